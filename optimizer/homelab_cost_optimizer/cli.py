@@ -1,37 +1,81 @@
 from __future__ import annotations
 
-import json
-from dataclasses import asdict
+import asyncio
 from pathlib import Path
 from typing import Any
 
 import typer
 
-from .collectors.base import build_snapshot
 from .collectors.docker_collector import DockerCollector
 from .collectors.k8s_collector import KubernetesCollector
 from .collectors.libvirt_collector import LibvirtCollector
+from .collectors.multi_source import MultiSourceCollector
 from .collectors.proxmox_collector import ProxmoxCollector
+from .collectors.snmp_collector import SNMPCounterCollector
 from .config import load_yaml
-from .consolidators.heuristic_consolidator import HeuristicConsolidator
+from .consolidators.sizing import ALLOCATED, SIZING_MODES
+from .estimators.batch_estimator import BatchEstimator
 from .estimators.cost_estimator import CostEstimator
 from .estimators.power_estimator import PowerEstimator
 from .reporters import ai_reporter, markdown_reporter
+from .snmp.agent import serve_devices, simulate_fleet
+from .snmp.usm import UsmUser
+from .storage import binary_format, json_stream
+from .sweep import SweepGrid, create_consolidator, run_sweep, write_rows
+from .zabbix.generator import generate, load_model
+from .zabbix.history import CHUNK_ROWS, replay_history
+from .zabbix.history import render_markdown as render_replay
+from .zabbix.lld import TOP_HOSTS, simulate_discovery, write_hosts_csv
+from .zabbix.lld import render_markdown as render_discovery
+from .zabbix.poll_budget import MAX_INTERVAL, load_fleet, parse_size, plan_budget, write_overrides
+from .zabbix.poll_budget import render_markdown as render_budget
+from .zabbix.poll_load import CountDistribution, estimate_poll_load, render_markdown
+from .zabbix.proxy_shard import (
+    EPSILON,
+    Overrides,
+    apply_delays,
+    host_loads,
+    proxy_names,
+    read_assignment,
+    read_overrides,
+    shard_hosts,
+    write_assignment,
+)
+from .zabbix.proxy_shard import render_markdown as render_shards
+from .zabbix.template import load_templates
 
 app = typer.Typer(help="Homelab cost optimizer CLI")
 
+# Counter sample exports that ``collect --source snmp --mock-data`` reads directly.
+SAMPLE_FILES = {".csv", ".ndjson", ".jsonl"}
+
 
 @app.command()
 def collect(
     source: str = typer.Option(..., help="Data source", case_sensitive=False),
     out: Path = typer.Option(..., help="Path to write inventory JSON"),
     mock_data: Path = typer.Option(None, help="Optional JSON fixture to use instead of API calls"),
+    format: str = typer.Option("json", help="Inventory format: json or binary"),
+    config: Path = typer.Option(None, help="Optimizer config YAML with collector endpoints"),
+    timeout: float = typer.Option(30.0, help="Per-source timeout in seconds for --source all"),
 ) -> None:
     out = Path(out)
-    dataset = _load_mock(mock_data) if mock_data else None
-    collector = _collector_factory(source.lower(), dataset)
-    snapshot = collector.collect()
-    out.write_text(json.dumps(asdict(snapshot), indent=2), encoding="utf-8")
+    if source.lower() == "all":
+        if mock_data:
+            raise typer.BadParameter("--mock-data cannot be combined with --source all")
+        endpoints = load_yaml(config).get("collectors", {}) if config else {}
+        report = MultiSourceCollector(endpoints, timeout=float(timeout)).collect_report()
+        for failed, reason in report.failures.items():
+            typer.echo(f"Source {failed} failed: {reason}")
+        if not report.succeeded:
+            raise SystemExit(1)
+        snapshot = report.snapshot
+    elif source.lower() == "snmp" and mock_data and Path(mock_data).suffix.lower() in SAMPLE_FILES:
+        snapshot = SNMPCounterCollector(samples_path=mock_data).collect()
+    else:
+        dataset = _load_mock(mock_data) if mock_data else None
+        snapshot = _collector_factory(source.lower(), dataset).collect()
+    _write_snapshot(snapshot, out, format.lower())
     typer.echo(f"Wrote inventory to {out}")
 
 
@@ -40,14 +84,14 @@ def analyze(
     inventory: Path = typer.Option(..., help="Path to inventory JSON"),
     electricity: Path = typer.Option(..., help="Electricity config YAML"),
     out: Path = typer.Option(..., help="Markdown report path"),
+    columnar: bool = typer.Option(False, help="Load the inventory into array-backed columns"),
+    engine: str = typer.Option("scalar", help="Estimation engine: scalar or batch"),
 ) -> None:
     out = Path(out)
-    snapshot = _load_snapshot(inventory)
-    power = PowerEstimator().estimate(snapshot)
-    cfg = load_yaml(electricity)
-    cost = CostEstimator(
-        price_per_kwh=cfg.get("price_per_kwh", 0.2), currency=cfg.get("currency", "USD")
-    ).estimate(power)
+    engine = engine.lower()
+    # The batch engine runs on columns, so load them directly instead of converting later.
+    snapshot = _load_snapshot(inventory, columnar=columnar or engine == "batch")
+    power, cost = _estimate(snapshot, load_yaml(electricity), engine)
     report = markdown_reporter.render_markdown(power, cost)
     out.write_text(report, encoding="utf-8")
     typer.echo(f"Report saved to {out}")
@@ -60,16 +104,25 @@ def suggest(
     scenario: str = typer.Option("consolidate-low-util", help="Scenario name"),
     out: Path = typer.Option(..., help="Output Markdown"),
     ai_report: bool = typer.Option(False, help="Include AI narrative"),
+    columnar: bool = typer.Option(False, help="Load the inventory into array-backed columns"),
+    engine: str = typer.Option("scalar", help="Estimation engine: scalar or batch"),
+    strategy: str = typer.Option(
+        "heuristic",
+        help="Consolidation strategy: heuristic, first-fit-decreasing, best-fit-decreasing, "
+        "worst-fit or optimal",
+    ),
+    time_budget: float = typer.Option(10.0, help="Seconds the optimal strategy may search"),
+    sizing: str = typer.Option(
+        "allocated", help="CPU sizing from utilization series: allocated, p95 or mean"
+    ),
 ) -> None:
     out = Path(out)
-    snapshot = _load_snapshot(inventory)
-    consolidator = HeuristicConsolidator()
+    snapshot = _load_snapshot(inventory, columnar=columnar)
+    consolidator = _consolidator_factory(
+        strategy.lower(), time_budget=float(time_budget), sizing=sizing.lower()
+    )
     plan = consolidator.consolidate(snapshot)
-    power = PowerEstimator().estimate(snapshot)
-    cfg = load_yaml(electricity)
-    cost = CostEstimator(
-        price_per_kwh=cfg.get("price_per_kwh", 0.2), currency=cfg.get("currency", "USD")
-    ).estimate(power)
+    power, cost = _estimate(snapshot, load_yaml(electricity), engine.lower())
     report = markdown_reporter.render_markdown(power, cost, plan.assignments)
     if ai_report:
         ai_summary = ai_reporter.render_ai_report(
@@ -77,9 +130,396 @@ def suggest(
         )
         report = f"{report}\n\n---\n\n### AI summary\n\n{ai_summary}\n"
     out.write_text(report, encoding="utf-8")
+    if plan.optimality_gap is not None:
+        typer.echo(f"Optimality gap: {plan.optimality_gap:.2%}")
     typer.echo(f"Suggestion report saved to {out}")
 
 
+@app.command()
+def sweep(
+    inventory: Path = typer.Option(..., help="Inventory JSON or binary inventory"),
+    electricity: Path = typer.Option(..., help="Electricity config"),
+    out: Path = typer.Option(..., help="Results table path"),
+    headroom: str = typer.Option("0.6,0.7,0.8,0.9", help="Comma-separated headroom values"),
+    strategy: str = typer.Option(
+        "heuristic,first-fit-decreasing,best-fit-decreasing",
+        help="Comma-separated consolidation strategies",
+    ),
+    price_per_kwh: str = typer.Option(None, help="Comma-separated prices (default: config)"),
+    hours_per_month: str = typer.Option("730", help="Comma-separated billing hours"),
+    workers: int = typer.Option(None, help="Worker processes (default: CPU count)"),
+    time_budget: float = typer.Option(10.0, help="Seconds the optimal strategy may search"),
+    format: str = typer.Option("csv", help="Output format: csv or markdown"),
+) -> None:
+    out = Path(out)
+    format = format.lower()
+    if format not in {"csv", "markdown"}:
+        raise typer.BadParameter(f"Unknown format: {format}")
+    if price_per_kwh is None:
+        price_per_kwh = str(load_yaml(electricity).get("price_per_kwh", 0.2))
+    try:
+        grid = SweepGrid(
+            headrooms=_parse_list(headroom, float, "headroom"),
+            strategies=_parse_list(strategy.lower(), str, "strategy"),
+            prices_per_kwh=_parse_list(price_per_kwh, float, "price-per-kwh"),
+            hours_per_month=_parse_list(hours_per_month, int, "hours-per-month"),
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    rows = run_sweep(
+        inventory,
+        grid,
+        max_workers=None if workers is None else int(workers),
+        time_budget=float(time_budget),
+    )
+    with out.open("w", encoding="utf-8", newline="") as handle:
+        count = write_rows(rows, handle, format)
+    typer.echo(f"Wrote {count} scenarios to {out}")
+
+
+@app.command("poll-load")
+def poll_load(
+    template: str = typer.Option(..., help="Comma-separated Zabbix template XML files"),
+    hosts: int = typer.Option(..., help="Number of hosts linked to each template"),
+    interfaces: str = typer.Option(
+        "24", help="Interfaces per host: a count or count:weight pairs (8:0.6,24:0.4)"
+    ),
+    discovered: str = typer.Option(
+        None, help="Other discovery rules as rule=distribution pairs separated by ';'"
+    ),
+    macro: str = typer.Option(
+        None, help="Comma-separated macro overrides ({$IF.POLL.INTERVAL}=5m)"
+    ),
+    out: Path = typer.Option(None, help="Markdown report path (default: print)"),
+) -> None:
+    try:
+        distributions = {
+            rule: CountDistribution.parse(dist)
+            for rule, dist in _parse_pairs(discovered or "", ";", "discovered").items()
+        }
+        interface_counts = CountDistribution.parse(interfaces)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    overrides = _parse_pairs(macro or "", ",", "macro")
+    loads = []
+    for path in _parse_list(template, str, "template"):
+        for spec in load_templates(path):
+            rules = {rule.key for rule in spec.discovery_rules}
+            counts = {key: dist for key, dist in distributions.items() if key in rules}
+            for rule in spec.discovery_rules:
+                if rule.key not in counts and any(
+                    column == "{#IFINDEX}" for column, _ in rule.discovery_columns()
+                ):
+                    counts[rule.key] = interface_counts
+            try:
+                loads.append(estimate_poll_load(spec, int(hosts), counts, overrides))
+            except ValueError as exc:
+                raise typer.BadParameter(f"{path}: {exc}") from exc
+    report = render_markdown(loads)
+    if out is None:
+        typer.echo(report)
+    else:
+        Path(out).write_text(report + "\n", encoding="utf-8")
+        typer.echo(f"Poll load report saved to {out}")
+
+
+@app.command("poll-budget")
+def poll_budget(
+    template: Path = typer.Option(..., help="Zabbix template XML export with one template"),
+    fleet: Path = typer.Option(..., help="Fleet description YAML (hosts, priorities, budget)"),
+    nvps_budget: float = typer.Option(None, help="NVPS budget per proxy (overrides the fleet)"),
+    storage_budget: str = typer.Option(
+        None, help="Retained history and trends budget, e.g. 2TB (overrides the fleet)"
+    ),
+    proxies: int = typer.Option(None, help="Proxy count (overrides the fleet)"),
+    max_interval: str = typer.Option(MAX_INTERVAL, help="Slowest interval the search may pick"),
+    overrides_dir: Path = typer.Option(
+        None, help="Write <host>.yaml macro overrides and _template.yaml delays here"
+    ),
+    out: Path = typer.Option(None, help="Markdown report path (default: print)"),
+) -> None:
+    specs = load_templates(template)
+    if len(specs) != 1:
+        raise typer.BadParameter(f"{template} must contain exactly one template")
+    try:
+        description = load_fleet(fleet)
+        if nvps_budget is not None:
+            description.nvps_budget = float(nvps_budget)
+        if storage_budget is not None:
+            description.storage_budget = parse_size(storage_budget)
+        if proxies is not None:
+            description.proxies = int(proxies)
+        plan = plan_budget(specs[0], description, str(max_interval))
+        written = write_overrides(plan, overrides_dir) if overrides_dir is not None else None
+    except (OSError, ValueError) as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    if written is not None:
+        typer.echo(
+            f"Wrote {written} host override files and the template delays to {overrides_dir}"
+        )
+    report = render_budget(plan)
+    if out is None:
+        typer.echo(report)
+    else:
+        Path(out).write_text(report + "\n", encoding="utf-8")
+        typer.echo(f"Poll budget report saved to {out}")
+    if not plan.feasible:
+        typer.echo("The fleet does not fit the budget even at the slowest intervals")
+        raise SystemExit(1)
+
+
+@app.command("proxy-shard")
+def proxy_shard(
+    template: Path = typer.Option(..., help="Zabbix template XML export with one template"),
+    fleet: Path = typer.Option(..., help="Fleet description YAML (see poll-budget)"),
+    proxies: str = typer.Option(
+        None, help="Proxy count or comma-separated proxy names (default: the fleet's count)"
+    ),
+    epsilon: float = typer.Option(EPSILON, help="Allowed load above the mean per proxy (0.05)"),
+    previous: Path = typer.Option(
+        None,
+        help="Previous host,proxy CSV map (default: the overrides' proxies); hosts stay if room",
+    ),
+    overrides_dir: Path = typer.Option(
+        None, help="Host overrides and template delays from poll-budget"
+    ),
+    map_out: Path = typer.Option(None, help="Write the host,proxy,nvps map to this CSV"),
+    out: Path = typer.Option(None, help="Markdown report path (default: print)"),
+) -> None:
+    specs = load_templates(template)
+    if len(specs) != 1:
+        raise typer.BadParameter(f"{template} must contain exactly one template")
+    try:
+        description = load_fleet(fleet)
+        names = proxy_names(description.proxies if proxies is None else proxies)
+        planned = read_overrides(overrides_dir) if overrides_dir is not None else Overrides()
+        spec = specs[0]
+        if planned.template not in (None, spec.template or spec.name):
+            raise ValueError(f"{overrides_dir} holds a plan for {planned.template}")
+        loads = host_loads(apply_delays(spec, planned.delays), description.hosts, planned.macros)
+        # Without a previous map, hosts start on the proxy poll-budget planned them on.
+        earlier = read_assignment(previous) if previous is not None else planned.proxies
+        plan = shard_hosts(loads, names, float(epsilon), earlier or None)
+    except (OSError, ValueError) as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    if map_out is not None:
+        with open(map_out, "w", encoding="utf-8", newline="") as handle:
+            write_assignment(plan, handle)
+        typer.echo(f"Host to proxy map saved to {map_out}")
+    report = render_shards(plan)
+    if out is None:
+        typer.echo(report)
+    else:
+        Path(out).write_text(report + "\n", encoding="utf-8")
+        typer.echo(f"Proxy sharding report saved to {out}")
+
+
+@app.command("generate-templates")
+def generate_templates(
+    model: Path = typer.Option(Path("templates/mikrotik.yaml"), help="Template family model YAML"),
+    out_dir: Path = typer.Option(Path("."), help="Directory the XML exports are written to"),
+    variant: str = typer.Option(
+        None, help="Comma-separated variants by template name or file (default: all)"
+    ),
+    check: bool = typer.Option(False, help="Only report exports that differ from the model"),
+) -> None:
+    try:
+        family = load_model(model)
+        variants = _parse_list(variant, str, "variant") if variant else None
+        results = generate(family, Path(out_dir), variants, write=not check)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    for path, changed in results:
+        state = ("out of date" if check else "written") if changed else "unchanged"
+        typer.echo(f"{path}: {state}")
+    if check and any(changed for _, changed in results):
+        raise SystemExit(1)
+
+
+@app.command("history-replay")
+def history_replay(
+    template: Path = typer.Option(..., help="Zabbix template XML export"),
+    history: str = typer.Option(
+        ..., help="Comma-separated history exports (.csv or .ndjson, optionally .gz)"
+    ),
+    macro: str = typer.Option(
+        None, help="Comma-separated macro overrides ({$IF.ERRORS.MAX_DELTA}=5)"
+    ),
+    stored: bool = typer.Option(False, help="Values are as Zabbix stored them; skip preprocessing"),
+    chunk_rows: int = typer.Option(CHUNK_ROWS, help="Rows read and replayed at a time"),
+    out: Path = typer.Option(None, help="Markdown report path (default: print)"),
+) -> None:
+    overrides = _parse_pairs(macro or "", ",", "macro")
+    paths = _parse_list(history, Path, "history")
+    reports = []
+    for spec in load_templates(template):
+        try:
+            result = replay_history(spec, paths, overrides, bool(stored), int(chunk_rows))
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        reports.append(render_replay(result))
+    report = "\n\n".join(reports)
+    if out is None:
+        typer.echo(report)
+    else:
+        Path(out).write_text(report + "\n", encoding="utf-8")
+        typer.echo(f"History replay report saved to {out}")
+
+
+@app.command("lld-sim")
+def lld_sim(
+    template: Path = typer.Option(..., help="Zabbix template XML export"),
+    walks: str = typer.Option(
+        ..., help="Comma-separated snmpwalk dumps or directories of them, one file per host"
+    ),
+    macro: str = typer.Option(
+        None, help="Comma-separated macro overrides ({$IF.LLD.FILTER.ADMIN_STATUS}=^1$)"
+    ),
+    workers: int = typer.Option(None, help="Worker processes (default: CPU count)"),
+    top: int = typer.Option(TOP_HOSTS, help="Hosts listed in the report, most items first"),
+    hosts_csv: Path = typer.Option(None, help="Also write every host's counts to this CSV"),
+    out: Path = typer.Option(None, help="Markdown report path (default: print)"),
+) -> None:
+    overrides = _parse_pairs(macro or "", ",", "macro")
+    paths = _parse_list(walks, Path, "walks")
+    missing = [str(path) for path in paths if not path.exists()]
+    if missing:
+        raise typer.BadParameter(f"Walk dumps not found: {', '.join(missing)}")
+    results = []
+    for spec in load_templates(template):
+        try:
+            results.append(
+                simulate_discovery(
+                    spec, paths, overrides, None if workers is None else int(workers)
+                )
+            )
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+    report = "\n\n".join(render_discovery(result, int(top)) for result in results)
+    if hosts_csv is not None:
+        with open(hosts_csv, "w", encoding="utf-8", newline="") as handle:
+            for result in results:
+                write_hosts_csv(result, handle)
+    if out is None:
+        typer.echo(report)
+    else:
+        Path(out).write_text(report + "\n", encoding="utf-8")
+        typer.echo(f"LLD simulation report saved to {out}")
+
+
+@app.command("snmp-sim")
+def snmp_sim(
+    devices: int = typer.Option(10, help="Number of simulated devices"),
+    base_port: int = typer.Option(16100, help="UDP port of the first device; one port per device"),
+    host: str = typer.Option("127.0.0.1", help="Address to listen on"),
+    interfaces: str = typer.Option(
+        "24", help="Interfaces per device: a count or count:weight pairs (8:0.6,24:0.4)"
+    ),
+    bgp_peers: int = typer.Option(2, help="BGP peers per device"),
+    ospf_neighbors: int = typer.Option(2, help="OSPF neighbors per device"),
+    community: str = typer.Option("public", help="SNMPv2c community ('*' accepts any)"),
+    v3_user: str = typer.Option(None, help="SNMPv3 user to accept"),
+    v3_auth_protocol: str = typer.Option("SHA", help="SNMPv3 auth protocol (MD5, SHA, SHA256...)"),
+    v3_auth_passphrase: str = typer.Option(None, help="SNMPv3 auth passphrase"),
+    v3_priv_protocol: str = typer.Option(None, help="SNMPv3 privacy protocol (AES)"),
+    v3_priv_passphrase: str = typer.Option(None, help="SNMPv3 privacy passphrase"),
+    wrap_after: float = typer.Option(600.0, help="Seconds until wrapping counters pass 2**64"),
+    reset_every: float = typer.Option(None, help="Reboot devices every N seconds"),
+    duration: float = typer.Option(None, help="Stop after N seconds (default: run until Ctrl-C)"),
+    seed: int = typer.Option(0, help="Random seed for device shapes and traffic"),
+) -> None:
+    if int(devices) < 1:
+        raise typer.BadParameter("--devices must be at least 1")
+    try:
+        fleet = simulate_fleet(
+            int(devices),
+            CountDistribution.parse(interfaces),
+            bgp_peers=int(bgp_peers),
+            ospf_neighbors=int(ospf_neighbors),
+            seed=int(seed),
+            wrap_after=float(wrap_after),
+            reset_every=None if reset_every is None else float(reset_every),
+        )
+        users = []
+        if v3_user:
+            users.append(
+                UsmUser(
+                    v3_user,
+                    v3_auth_protocol if v3_auth_passphrase else None,
+                    v3_auth_passphrase or "",
+                    v3_priv_protocol if v3_priv_passphrase else None,
+                    v3_priv_passphrase or "",
+                )
+            )
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+    async def serve() -> None:
+        agents = await serve_devices(
+            fleet,
+            host=host,
+            base_port=int(base_port),
+            community=None if community == "*" else community.encode(),
+            users=users,
+        )
+        ports = f"{agents[0].address[1]}-{agents[-1].address[1]}" if base_port else "random"
+        typer.echo(f"Serving {len(agents)} devices on {host} UDP ports {ports}")
+        try:
+            await asyncio.sleep(float(duration) if duration is not None else float("inf"))
+        finally:
+            for agent in agents:
+                agent.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        typer.echo("Stopped")
+
+
+def _estimate(snapshot, cfg: dict[str, Any], engine: str):
+    price_per_kwh = cfg.get("price_per_kwh", 0.2)
+    currency = cfg.get("currency", "USD")
+    if engine == "batch":
+        return BatchEstimator(price_per_kwh=price_per_kwh, currency=currency).estimate(snapshot)
+    if engine != "scalar":
+        raise typer.BadParameter(f"Unknown engine: {engine}")
+    power = PowerEstimator().estimate(snapshot)
+    cost = CostEstimator(price_per_kwh=price_per_kwh, currency=currency).estimate(power)
+    return power, cost
+
+
+def _consolidator_factory(
+    strategy: str, headroom: float = 0.8, time_budget: float = 10.0, sizing: str = ALLOCATED
+):
+    if sizing not in SIZING_MODES:
+        raise typer.BadParameter(f"Unknown sizing mode: {sizing}")
+    try:
+        return create_consolidator(
+            strategy, headroom=headroom, time_budget=time_budget, sizing=sizing
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(f"Unknown strategy: {strategy}") from exc
+
+
+def _parse_list(value: str, convert, option: str) -> list:
+    try:
+        return [convert(item.strip()) for item in str(value).split(",") if item.strip()]
+    except ValueError as exc:
+        raise typer.BadParameter(f"Invalid value for --{option}: {value}") from exc
+
+
+def _parse_pairs(value: str, separator: str, option: str) -> dict[str, str]:
+    pairs = {}
+    for item in value.split(separator):
+        if not item.strip():
+            continue
+        key, sep, setting = item.partition("=")
+        if not sep:
+            raise typer.BadParameter(f"Invalid value for --{option}: {item}")
+        pairs[key.strip()] = setting.strip()
+    return pairs
+
+
 def _collector_factory(source: str, dataset: dict[str, Any] | None):
     if source == "proxmox":
         return ProxmoxCollector(dataset)
@@ -89,18 +529,29 @@ def _collector_factory(source: str, dataset: dict[str, Any] | None):
         return DockerCollector(dataset)
     if source in {"k8s", "kubernetes"}:
         return KubernetesCollector(dataset)
+    if source == "snmp":
+        return SNMPCounterCollector(dataset)
     raise typer.BadParameter(f"Unknown source: {source}")
 
 
 def _load_mock(path: Path | str) -> dict[str, Any]:
-    file_path = Path(path)
-    return json.loads(file_path.read_text(encoding="utf-8"))
+    return json_stream.stream_dataset(path)
+
+
+def _write_snapshot(snapshot, path: Path, format: str) -> None:
+    if format == "json":
+        json_stream.write_snapshot(snapshot, path)
+    elif format == "binary":
+        binary_format.write_snapshot(snapshot, path)
+    else:
+        raise typer.BadParameter(f"Unknown format: {format}")
 
 
-def _load_snapshot(path: Path | str):
-    file_path = Path(path)
-    data = json.loads(file_path.read_text(encoding="utf-8"))
-    return build_snapshot(data)
+def _load_snapshot(path: Path | str, columnar: bool = False):
+    if binary_format.is_binary_inventory(path):
+        snapshot = binary_format.open_snapshot(path)
+        return snapshot if columnar else snapshot.to_snapshot()
+    return json_stream.load_snapshot(path, columnar=columnar)
 
 
 def main() -> None:
@@ -2,14 +2,44 @@ from __future__ import annotations
 
 from typing import Any
 
+from ..columnar import ColumnarSnapshot, ColumnarSnapshotBuilder
 from ..models import InventorySnapshot, Node, PowerProfile, Workload
+from ..timeseries import series_from_record
+
+
+class SnapshotBuilder:
+    """Accumulates raw node/workload records into an :class:`InventorySnapshot`."""
+
+    def __init__(self, metadata: dict[str, Any] | None = None) -> None:
+        self.metadata: dict[str, Any] = dict(metadata or {})
+        self.nodes: list[Node] = []
+        self.workloads: list[Workload] = []
+
+    def add_node(self, data: dict[str, Any]) -> None:
+        self.nodes.append(_node_from_dict(data))
+
+    def add_workload(self, data: dict[str, Any]) -> None:
+        self.workloads.append(_workload_from_dict(data))
+
+    def build(self) -> InventorySnapshot:
+        return InventorySnapshot(nodes=self.nodes, workloads=self.workloads, metadata=self.metadata)
 
 
 def build_snapshot(dataset: dict[str, Any]) -> InventorySnapshot:
-    nodes = [_node_from_dict(raw) for raw in dataset.get("nodes", [])]
-    workloads = [_workload_from_dict(raw) for raw in dataset.get("workloads", [])]
-    metadata = dataset.get("metadata", {})
-    return InventorySnapshot(nodes=nodes, workloads=workloads, metadata=metadata)
+    return _build(SnapshotBuilder(), dataset)
+
+
+def build_columnar_snapshot(dataset: dict[str, Any]) -> ColumnarSnapshot:
+    return _build(ColumnarSnapshotBuilder(), dataset)
+
+
+def _build(builder, dataset: dict[str, Any]):
+    builder.metadata = dataset.get("metadata", {})
+    for raw in dataset.get("nodes", []):
+        builder.add_node(raw)
+    for raw in dataset.get("workloads", []):
+        builder.add_workload(raw)
+    return builder.build()
 
 
 def _node_from_dict(data: dict[str, Any]) -> Node:
@@ -34,4 +64,5 @@ def _workload_from_dict(data: dict[str, Any]) -> Workload:
         utilization=float(data.get("utilization", 0)),
         node_name=data.get("node_name", "unknown"),
         labels=data.get("labels", {}),
+        utilization_series=series_from_record(data),
     )
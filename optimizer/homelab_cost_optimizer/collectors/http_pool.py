@@ -0,0 +1,158 @@
+"""Keep-alive HTTP connection pool shared by the API collectors.
+
+Built on :mod:`http.client` so collectors need no extra dependency. Idle
+connections are kept per scheme and host and reused by later requests; the
+async helpers run the blocking request on a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+import ssl
+import threading
+from collections.abc import Iterator, Mapping
+from typing import Any
+from urllib.parse import urlsplit
+
+# Errors raised when a reused keep-alive connection was closed by the server.
+_STALE_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class HTTPStatusError(Exception):
+    """Raised for non-2xx responses."""
+
+    def __init__(self, url: str, status: int, reason: str) -> None:
+        super().__init__(f"GET {url} returned HTTP {status} {reason}")
+        self.url = url
+        self.status = status
+
+
+class HTTPConnectionPool:
+    def __init__(
+        self, max_idle_per_host: int = 8, timeout: float = 10.0, verify_tls: bool = True
+    ) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self.verify_tls = verify_tls
+        self.connections_opened = 0
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> HTTPConnectionPool:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get_json(
+        self, url: str, headers: Mapping[str, str] | None = None, timeout: float | None = None
+    ) -> Any:
+        key, target = _split(url)
+        request_headers = {"Accept": "application/json", **(headers or {})}
+        connection, reused = self._acquire(key, timeout)
+        try:
+            try:
+                response = self._send(connection, target, request_headers)
+            except _STALE_ERRORS:
+                if not reused:
+                    raise
+                connection.close()
+                connection, reused = self._open(key, timeout), False
+                response = self._send(connection, target, request_headers)
+            body = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+        if not 200 <= response.status < 300:
+            raise HTTPStatusError(url, response.status, response.reason)
+        return json.loads(body)
+
+    def stream_lines(
+        self, url: str, headers: Mapping[str, str] | None = None, timeout: float | None = None
+    ) -> Iterator[bytes]:
+        """Yield the non-empty lines of a long-lived response, e.g. a watch stream.
+
+        The stream gets a dedicated connection, which is closed rather than
+        returned to the pool when the generator finishes.
+        """
+
+        key, target = _split(url)
+        request_headers = {"Accept": "application/json", **(headers or {})}
+        connection = self._open(key, timeout)
+        try:
+            response = self._send(connection, target, request_headers)
+            if not 200 <= response.status < 300:
+                raise HTTPStatusError(url, response.status, response.reason)
+            for line in response:
+                if line.strip():
+                    yield line
+        finally:
+            connection.close()
+
+    async def aget_json(
+        self, url: str, headers: Mapping[str, str] | None = None, timeout: float | None = None
+    ) -> Any:
+        return await asyncio.to_thread(self.get_json, url, headers, timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _send(
+        self, connection: http.client.HTTPConnection, target: str, headers: dict[str, str]
+    ) -> http.client.HTTPResponse:
+        connection.request("GET", target, headers=headers)
+        return connection.getresponse()
+
+    def _acquire(
+        self, key: tuple[str, str], timeout: float | None
+    ) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            connection = idle.pop() if idle else None
+        if connection is None:
+            return self._open(key, timeout), False
+        connection.timeout = self.timeout if timeout is None else timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(connection.timeout)
+        return connection, True
+
+    def _open(self, key: tuple[str, str], timeout: float | None) -> http.client.HTTPConnection:
+        scheme, netloc = key
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self.connections_opened += 1
+        if scheme == "https":
+            context = ssl.create_default_context()
+            if not self.verify_tls:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            return http.client.HTTPSConnection(netloc, timeout=timeout, context=context)
+        return http.client.HTTPConnection(netloc, timeout=timeout)
+
+    def _release(self, key: tuple[str, str], connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+
+def _split(url: str) -> tuple[tuple[str, str], str]:
+    parts = urlsplit(url)
+    if parts.scheme not in {"http", "https"}:
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return (parts.scheme, parts.netloc), target
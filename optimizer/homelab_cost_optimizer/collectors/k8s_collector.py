@@ -1,9 +1,30 @@
 from __future__ import annotations
 
+import http.client
+import json
+import queue
+import threading
+from collections.abc import Callable
 from typing import Any
+from urllib.parse import urlencode
 
-from ..models import InventorySnapshot
+from ..models import InventorySnapshot, Node, Workload
 from .base import build_snapshot
+from .http_pool import HTTPConnectionPool, HTTPStatusError
+
+_GIB = 1024**3
+_BINARY_SUFFIXES = {"Ki": 1024, "Mi": 1024**2, "Gi": 1024**3, "Ti": 1024**4, "Pi": 1024**5}
+_DECIMAL_SUFFIXES = {
+    "n": 1e-9,
+    "u": 1e-6,
+    "m": 1e-3,
+    "k": 1e3,
+    "M": 1e6,
+    "G": 1e9,
+    "T": 1e12,
+    "P": 1e15,
+}
+_FINISHED_PHASES = {"Succeeded", "Failed"}
 
 
 class KubernetesCollector:
@@ -15,6 +36,244 @@ class KubernetesCollector:
         return build_snapshot(data)
 
 
+class KubernetesWatchCollector:
+    """Kubernetes collector that lists once and then follows watch streams.
+
+    The first :meth:`collect` LISTs nodes and pods and starts a WATCH for each
+    from the returned ``resourceVersion`` on a background thread. Later calls
+    apply only the events received since the previous call to the snapshot,
+    which is kept and updated in place, so their cost does not depend on the
+    cluster size. A watch whose ``resourceVersion`` has expired (410 Gone) is
+    replaced by a new LIST of that resource.
+
+    Pods map to workloads named ``namespace/name`` sized by their container
+    requests; pods that are not scheduled or have finished are left out. Pod
+    objects carry no usage, so utilization stays 0.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        token: str | None = None,
+        timeout: float = 10.0,
+        watch_timeout: int = 300,
+        verify_tls: bool = True,
+        pool: HTTPConnectionPool | None = None,
+    ) -> None:
+        self.api_url = api_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.timeout = timeout
+        self.watch_timeout = watch_timeout
+        self.pool = pool or HTTPConnectionPool(timeout=timeout, verify_tls=verify_tls)
+        self.snapshot = InventorySnapshot(nodes=[], workloads=[], metadata={"source": "kubernetes"})
+        self.last_event_count = 0
+        self._events: queue.Queue = queue.Queue()
+        self._resources = {
+            "nodes": _Resource("nodes", _node_from_object, self.snapshot.nodes),
+            "pods": _Resource("pods", _workload_from_pod, self.snapshot.workloads),
+        }
+
+    def __enter__(self) -> KubernetesWatchCollector:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def collect(self) -> InventorySnapshot:
+        applied = 0
+        for resource in self._resources.values():
+            if resource.watcher is None:
+                self._relist(resource)
+        while True:
+            try:
+                name, generation, event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            resource = self._resources[name]
+            if generation != resource.generation:
+                continue
+            if event.get("type") == "ERROR":
+                self._relist(resource)
+            else:
+                resource.apply(event)
+            applied += 1
+        self.last_event_count = applied
+        if applied:
+            self.snapshot.invalidate_indexes()
+        return self.snapshot
+
+    def close(self) -> None:
+        for resource in self._resources.values():
+            resource.stop()
+        self.pool.close()
+
+    def _relist(self, resource: _Resource) -> None:
+        resource.stop()
+        payload = self.pool.get_json(f"{self.api_url}/api/v1/{resource.name}", headers=self.headers)
+        resource.reset(payload.get("items") or [])
+        resource_version = payload.get("metadata", {}).get("resourceVersion", "")
+        resource.generation += 1
+        resource.watcher = _Watcher(self, resource.name, resource.generation, resource_version)
+        resource.watcher.start()
+        self.snapshot.invalidate_indexes()
+
+    def _watch_url(self, name: str, resource_version: str) -> str:
+        query = {
+            "watch": "1",
+            "resourceVersion": resource_version,
+            "allowWatchBookmarks": "true",
+            "timeoutSeconds": str(self.watch_timeout),
+        }
+        return f"{self.api_url}/api/v1/{name}?{urlencode(query)}"
+
+
+class _Resource:
+    """Records of one resource kind, stored in a snapshot list with O(1) updates."""
+
+    def __init__(self, name: str, convert: Callable[[dict[str, Any]], Any], records: list) -> None:
+        self.name = name
+        self.convert = convert
+        self.records = records
+        self.positions: dict[str, int] = {}
+        self.generation = 0
+        self.watcher: _Watcher | None = None
+
+    def reset(self, items: list[dict[str, Any]]) -> None:
+        self.records.clear()
+        self.positions.clear()
+        for item in items:
+            self.upsert(item)
+
+    def apply(self, event: dict[str, Any]) -> None:
+        kind = event.get("type")
+        if kind in {"ADDED", "MODIFIED"}:
+            self.upsert(event["object"])
+        elif kind == "DELETED":
+            self.remove(_object_key(event["object"]))
+
+    def upsert(self, item: dict[str, Any]) -> None:
+        key = _object_key(item)
+        record = self.convert(item)
+        if record is None:
+            self.remove(key)
+            return
+        position = self.positions.get(key)
+        if position is None:
+            self.positions[key] = len(self.records)
+            self.records.append(record)
+        else:
+            self.records[position] = record
+
+    def remove(self, key: str) -> None:
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+        last = self.records.pop()
+        if position < len(self.records):
+            # Move the last record into the gap instead of shifting the list.
+            self.records[position] = last
+            self.positions[last.name] = position
+
+    def stop(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stopped.set()
+            self.watcher = None
+
+
+class _Watcher(threading.Thread):
+    """Reads one watch stream and queues its events, resuming after server timeouts."""
+
+    def __init__(
+        self, collector: KubernetesWatchCollector, name: str, generation: int, version: str
+    ) -> None:
+        super().__init__(name=f"k8s-watch-{name}", daemon=True)
+        self.collector = collector
+        self.resource = name
+        self.generation = generation
+        self.resource_version = version
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        collector = self.collector
+        while not self.stopped.is_set():
+            url = collector._watch_url(self.resource, self.resource_version)
+            try:
+                for line in collector.pool.stream_lines(
+                    url, headers=collector.headers, timeout=collector.watch_timeout + 30
+                ):
+                    if self.stopped.is_set():
+                        return
+                    event = json.loads(line)
+                    if event.get("type") == "ERROR":
+                        collector._events.put((self.resource, self.generation, event))
+                        return
+                    metadata = event.get("object", {}).get("metadata", {})
+                    self.resource_version = metadata.get("resourceVersion", self.resource_version)
+                    if event.get("type") != "BOOKMARK":
+                        collector._events.put((self.resource, self.generation, event))
+            except HTTPStatusError as exc:
+                if exc.status == 410:
+                    gone = {"type": "ERROR", "object": {"code": 410}}
+                    collector._events.put((self.resource, self.generation, gone))
+                    return
+                self.stopped.wait(1.0)
+            except (OSError, ValueError, http.client.HTTPException):
+                # Connection dropped: retry from the last seen resourceVersion.
+                self.stopped.wait(1.0)
+
+
+def _object_key(item: dict[str, Any]) -> str:
+    metadata = item.get("metadata", {})
+    namespace = metadata.get("namespace")
+    return f"{namespace}/{metadata['name']}" if namespace else metadata["name"]
+
+
+def _node_from_object(item: dict[str, Any]) -> Node:
+    capacity = item.get("status", {}).get("capacity", {})
+    return Node(
+        name=item["metadata"]["name"],
+        kind="k8s",
+        cpu_cores=round(parse_quantity(capacity.get("cpu", "0"))),
+        memory_gb=round(parse_quantity(capacity.get("memory", "0")) / _GIB),
+    )
+
+
+def _workload_from_pod(item: dict[str, Any]) -> Workload | None:
+    spec = item.get("spec", {})
+    node_name = spec.get("nodeName")
+    if not node_name or item.get("status", {}).get("phase") in _FINISHED_PHASES:
+        return None
+    cpu = memory = 0.0
+    for container in spec.get("containers", []):
+        resources = container.get("resources", {})
+        requests = resources.get("requests") or resources.get("limits") or {}
+        cpu += parse_quantity(requests.get("cpu", "0"))
+        memory += parse_quantity(requests.get("memory", "0"))
+    metadata = item["metadata"]
+    labels = {"namespace": metadata.get("namespace", "default")}
+    labels.update(metadata.get("labels") or {})
+    return Workload(
+        name=_object_key(item),
+        workload_type="pod",
+        cpu_cores=cpu,
+        memory_gb=memory / _GIB,
+        utilization=0.0,
+        node_name=node_name,
+        labels=labels,
+    )
+
+
+def parse_quantity(value: str | int | float) -> float:
+    """Parse a Kubernetes resource quantity such as ``500m``, ``2`` or ``512Mi``."""
+
+    text = str(value).strip()
+    for suffixes in (_BINARY_SUFFIXES, _DECIMAL_SUFFIXES):
+        for suffix, factor in suffixes.items():
+            if text.endswith(suffix):
+                return float(text[: -len(suffix)]) * factor
+    return float(text)
+
+
 def _simulate_dataset() -> dict[str, Any]:
     return {
         "metadata": {"source": "kubernetes", "note": "simulated"},
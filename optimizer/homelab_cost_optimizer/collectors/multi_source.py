@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..models import InventorySnapshot
+from .docker_collector import DockerCollector
+from .http_pool import HTTPConnectionPool
+from .k8s_collector import KubernetesCollector
+from .libvirt_collector import LibvirtCollector
+from .proxmox_collector import ProxmoxCollector
+
+COLLECTORS = {
+    "proxmox": ProxmoxCollector,
+    "libvirt": LibvirtCollector,
+    "docker": DockerCollector,
+    "k8s": KubernetesCollector,
+}
+_ALIASES = {"kubernetes": "k8s"}
+
+
+@dataclass
+class CollectionReport:
+    snapshot: InventorySnapshot
+    succeeded: list[str] = field(default_factory=list)
+    failures: dict[str, str] = field(default_factory=dict)
+
+
+class MultiSourceCollector:
+    """Collect several sources concurrently and merge them into one snapshot.
+
+    ``endpoints`` is the ``collectors`` section of the optimizer config: a
+    source with a ``url`` is fetched over a shared keep-alive connection pool
+    and must return an inventory dataset, ``proxmox`` with an ``api_url``
+    walks the Proxmox API over the same pool, and a source without either
+    uses its collector's built-in data. Every source gets its own timeout
+    (``timeout`` in its endpoint, else the collector default). Failed sources
+    are reported instead of aborting the whole collection.
+
+    Blocking collectors run on a private thread pool that is shut down without
+    waiting, so a source that times out does not hold up the report; its
+    thread finishes in the background and its late result is discarded.
+    """
+
+    def __init__(
+        self,
+        endpoints: Mapping[str, Mapping[str, Any]] | None = None,
+        sources: Sequence[str] = tuple(COLLECTORS),
+        timeout: float = 30.0,
+        pool: HTTPConnectionPool | None = None,
+    ) -> None:
+        self.endpoints = {_ALIASES.get(k, k): dict(v or {}) for k, v in (endpoints or {}).items()}
+        self.sources = [_ALIASES.get(source, source) for source in sources]
+        unknown = [source for source in self.sources if source not in COLLECTORS]
+        if unknown:
+            raise ValueError(f"Unknown source: {', '.join(unknown)}")
+        self.timeout = timeout
+        self.pool = pool
+
+    def collect(self) -> InventorySnapshot:
+        return self.collect_report().snapshot
+
+    def collect_report(self) -> CollectionReport:
+        return asyncio.run(self.collect_async())
+
+    async def collect_async(self) -> CollectionReport:
+        pool = self.pool or HTTPConnectionPool(timeout=self.timeout)
+        executor = ThreadPoolExecutor(
+            max_workers=max(len(self.sources), 1), thread_name_prefix="collector"
+        )
+        try:
+            results = await asyncio.gather(
+                *(self._collect_source(source, pool, executor) for source in self.sources),
+                return_exceptions=True,
+            )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.pool is None:
+                pool.close()
+
+        report = CollectionReport(snapshot=InventorySnapshot(nodes=[], workloads=[]))
+        for source, result in zip(self.sources, results, strict=True):
+            if isinstance(result, BaseException):
+                report.failures[source] = _describe(result)
+                continue
+            report.succeeded.append(source)
+            report.snapshot.nodes.extend(result.nodes)
+            report.snapshot.workloads.extend(result.workloads)
+        report.snapshot.invalidate_indexes()
+        report.snapshot.metadata = {"source": "all", "sources": ",".join(report.succeeded)}
+        if report.failures:
+            report.snapshot.metadata["failed_sources"] = ",".join(report.failures)
+        return report
+
+    async def _collect_source(
+        self, source: str, pool: HTTPConnectionPool, executor: Executor
+    ) -> InventorySnapshot:
+        endpoint = self.endpoints.get(source, {})
+        timeout = float(endpoint.get("timeout", self.timeout))
+        collector_class = COLLECTORS[source]
+        loop = asyncio.get_running_loop()
+
+        async def run() -> InventorySnapshot:
+            if source == "proxmox" and endpoint.get("api_url"):
+                collector = ProxmoxCollector(
+                    api_url=endpoint["api_url"],
+                    token_id=endpoint.get("token_id"),
+                    token_secret=endpoint.get("token_secret"),
+                    max_concurrency=int(endpoint.get("max_concurrency", 8)),
+                    timeout=timeout,
+                    pool=pool,
+                )
+                return await loop.run_in_executor(executor, collector.collect)
+            if not endpoint.get("url"):
+                return await loop.run_in_executor(executor, collector_class().collect)
+            dataset = await pool.aget_json(
+                endpoint["url"], headers=_auth_headers(source, endpoint), timeout=timeout
+            )
+            if not isinstance(dataset, dict) or "nodes" not in dataset:
+                raise ValueError(f"{endpoint['url']} did not return an inventory dataset")
+            return collector_class(dataset).collect()
+
+        try:
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError as exc:
+            raise TimeoutError(f"timed out after {timeout:g}s") from exc
+
+
+def _auth_headers(source: str, endpoint: Mapping[str, Any]) -> dict[str, str]:
+    if source == "proxmox" and endpoint.get("token_id"):
+        token = f"{endpoint['token_id']}={endpoint.get('token_secret', '')}"
+        return {"Authorization": f"PVEAPIToken={token}"}
+    if endpoint.get("token"):
+        return {"Authorization": f"Bearer {endpoint['token']}"}
+    return {}
+
+
+def _describe(error: BaseException) -> str:
+    message = str(error)
+    return message if message else type(error).__name__
@@ -1,20 +1,141 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Any
+from urllib.parse import quote
 
-from ..models import InventorySnapshot
+from ..models import InventorySnapshot, Node, Workload
 from .base import build_snapshot
+from .http_pool import HTTPConnectionPool
+
+_GIB = 1024**3
+_GUEST_TYPES = {"qemu": "vm", "lxc": "container"}
 
 
 class ProxmoxCollector:
-    """Collector that normalizes Proxmox API responses into the common snapshot model."""
+    """Collector that normalizes Proxmox API responses into the common snapshot model.
+
+    With ``api_url`` (e.g. ``https://pve.local:8006/api2/json``) the collector
+    reads ``/cluster/resources`` for the online nodes and then the per-node
+    ``qemu`` and ``lxc`` guest lists, at most ``max_concurrency`` requests at a
+    time. :meth:`iter_records` yields each node and guest as soon as its
+    response arrives. Without ``api_url`` it normalizes ``dataset`` (or the
+    simulated dataset).
+    """
 
-    def __init__(self, dataset: dict[str, Any] | None = None) -> None:
+    def __init__(
+        self,
+        dataset: dict[str, Any] | None = None,
+        api_url: str | None = None,
+        token_id: str | None = None,
+        token_secret: str | None = None,
+        max_concurrency: int = 8,
+        timeout: float = 10.0,
+        verify_tls: bool = True,
+        pool: HTTPConnectionPool | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
         self.dataset = dataset
+        self.api_url = api_url.rstrip("/") if api_url else None
+        self.token_id = token_id
+        self.token_secret = token_secret
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.verify_tls = verify_tls
+        self.pool = pool
 
     def collect(self) -> InventorySnapshot:
-        data = self.dataset or _simulate_dataset()
-        return build_snapshot(data)
+        if not self.api_url:
+            data = self.dataset or _simulate_dataset()
+            return build_snapshot(data)
+        nodes: list[Node] = []
+        workloads: list[Workload] = []
+        for record in self.iter_records():
+            (nodes if isinstance(record, Node) else workloads).append(record)
+        return InventorySnapshot(
+            nodes=nodes, workloads=workloads, metadata={"source": "proxmox", "api": self.api_url}
+        )
+
+    def iter_records(self) -> Iterator[Node | Workload]:
+        if not self.api_url:
+            snapshot = self.collect()
+            yield from snapshot.nodes
+            yield from snapshot.workloads
+            return
+        pool = self.pool or HTTPConnectionPool(timeout=self.timeout, verify_tls=self.verify_tls)
+        try:
+            yield from self._walk_api(pool)
+        finally:
+            if self.pool is None:
+                pool.close()
+
+    def _walk_api(self, pool: HTTPConnectionPool) -> Iterator[Node | Workload]:
+        node_names = []
+        for entry in self._get(pool, "/cluster/resources?type=node"):
+            if entry.get("type", "node") != "node" or entry.get("status") != "online":
+                continue
+            node_names.append(entry["node"])
+            yield _node_from_resource(entry)
+
+        requests = ((node, guest) for node in node_names for guest in _GUEST_TYPES)
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        in_flight: dict[Future, tuple[str, str]] = {}
+        try:
+            # Keep at most max_concurrency responses pending so memory stays bounded.
+            for node, guest in requests:
+                if len(in_flight) >= self.max_concurrency:
+                    yield from self._drain(in_flight)
+                path = f"/nodes/{quote(node, safe='')}/{guest}"
+                in_flight[executor.submit(self._get, pool, path)] = (node, guest)
+            while in_flight:
+                yield from self._drain(in_flight)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _drain(self, in_flight: dict[Future, tuple[str, str]]) -> Iterator[Workload]:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            node, guest = in_flight.pop(future)
+            for entry in future.result():
+                if not entry.get("template"):
+                    yield _workload_from_guest(entry, node, guest)
+
+    def _get(self, pool: HTTPConnectionPool, path: str) -> list[dict[str, Any]]:
+        headers = {}
+        if self.token_id:
+            headers["Authorization"] = f"PVEAPIToken={self.token_id}={self.token_secret or ''}"
+        payload = pool.get_json(self.api_url + path, headers=headers, timeout=self.timeout)
+        return payload.get("data") or []
+
+
+def _node_from_resource(entry: dict[str, Any]) -> Node:
+    return Node(
+        name=entry["node"],
+        kind="proxmox",
+        cpu_cores=int(entry.get("maxcpu", 0)),
+        memory_gb=round(entry.get("maxmem", 0) / _GIB),
+        metadata={"id": str(entry.get("id", f"node/{entry['node']}"))},
+    )
+
+
+def _workload_from_guest(entry: dict[str, Any], node: str, guest: str) -> Workload:
+    vmid = str(entry.get("vmid", ""))
+    status = str(entry.get("status", "unknown"))
+    labels = {"vmid": vmid, "status": status}
+    if entry.get("tags"):
+        labels["tags"] = str(entry["tags"])
+    return Workload(
+        name=entry.get("name") or f"{guest}-{vmid}",
+        workload_type=_GUEST_TYPES[guest],
+        cpu_cores=float(entry.get("cpus", entry.get("maxcpu", 0))),
+        memory_gb=entry.get("maxmem", 0) / _GIB,
+        # Proxmox reports guest CPU usage as a fraction of the guest's vCPUs.
+        utilization=float(entry.get("cpu", 0)) if status == "running" else 0.0,
+        node_name=node,
+        labels=labels,
+    )
 
 
 def _simulate_dataset() -> dict[str, Any]:
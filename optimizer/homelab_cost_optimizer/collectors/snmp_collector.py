@@ -0,0 +1,449 @@
+"""Network devices and interface traffic from SNMP ifHC* counter samples.
+
+Samples are ``(host, key, clock, value)`` rows as exported from Zabbix
+history. A raw IF-MIB counter key (``ifHCInOctets.3``,
+``IF-MIB::ifHCOutOctets.3``) carries the 64-bit octet counter. An item key of
+the MikroTik template (``net.if.in[3]``, ``net.if.out[3]``) carries what the
+template stores after its change-per-second and ×8 steps: bits per second
+over the interval ending at the sample's clock.
+
+Counter rates are computed for all interfaces at once over sorted sample
+columns (NumPy when installed). A counter that goes down either wrapped at
+2**64 or was reset by a reboot or ``clear counters``: the decrease is taken
+as a wrap when the wrapped delta is possible at the interface speed,
+otherwise the new value is counted from zero. Stored rates are used as they
+are; the first sample of an item has no known interval and is skipped.
+
+Each device becomes a ``network`` node whose idle power is the chassis draw
+plus a per-port draw for every interface that carried traffic. Each interface
+becomes an ``interface`` workload with no CPU or RAM, its mean in/out rates
+as labels and the link utilization (the busier direction) as a series.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ..columnar import np
+from ..models import NETWORK_NODE_KIND, InventorySnapshot, Node, PowerProfile, Workload
+from ..timeseries import UtilizationSeries
+
+COUNTER_MODULUS = 2**64
+DEFAULT_CHASSIS_WATTS = 15.0
+DEFAULT_WATTS_PER_PORT = 0.7
+# Ceiling for interfaces without a known speed when telling wraps from resets.
+DEFAULT_MAX_RATE_BPS = 400e9
+
+IN = 0
+OUT = 1
+_COUNTER_KEY = re.compile(r"^(?:IF-MIB::)?ifHC(?P<direction>In|Out)Octets\.(?P<index>\d+)$")
+_RATE_KEY = re.compile(r"^net\.if\.(?P<direction>in|out)\[(?P<index>\d+)\]$")
+
+
+def parse_counter_key(key: str) -> tuple[int, int] | None:
+    """Return ``(ifindex, direction)`` for an octet counter key, else ``None``."""
+
+    return _parse_key(_COUNTER_KEY, key)
+
+
+def parse_rate_key(key: str) -> tuple[int, int] | None:
+    """Return ``(ifindex, direction)`` for a stored bits/s item key, else ``None``."""
+
+    return _parse_key(_RATE_KEY, key)
+
+
+def _parse_key(pattern: re.Pattern[str], key: str) -> tuple[int, int] | None:
+    match = pattern.match(key)
+    if match is None:
+        return None
+    return int(match["index"]), IN if match["direction"].lower() == "in" else OUT
+
+
+@dataclass
+class CounterSamples:
+    """Counter and stored-rate samples as columns; ``series`` indexes ``keys``.
+
+    Octet counters go to ``series``/``clocks``/``values``, stored bits/s
+    values to the ``rate_*`` columns.
+    """
+
+    keys: list[tuple[str, int, int]] = field(default_factory=list)
+    series: array = field(default_factory=lambda: array("i"))
+    clocks: array = field(default_factory=lambda: array("d"))
+    values: list[int] = field(default_factory=list)
+    rate_series: array = field(default_factory=lambda: array("i"))
+    rate_clocks: array = field(default_factory=lambda: array("d"))
+    rate_values: array = field(default_factory=lambda: array("d"))
+    # Series codes whose samples are stored rates.
+    stored_rates: set[int] = field(default_factory=set)
+    # (series code, stored rate) per (host, item key); code -1 for other keys.
+    _codes: dict[tuple[str, str], tuple[int, bool]] = field(default_factory=dict, repr=False)
+    _series_codes: dict[tuple[str, int, int], int] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.clocks) + len(self.rate_clocks)
+
+    def append(self, host: str, key: str, clock: float, value: int | float | str) -> None:
+        """Add one sample; keys other than interface octets or bits/s are ignored."""
+
+        code, rate = self._codes.get((host, key)) or self._code(host, key)
+        if code < 0:
+            return
+        if rate:
+            self.rate_series.append(code)
+            self.rate_clocks.append(float(clock))
+            self.rate_values.append(float(value))
+        else:
+            self.series.append(code)
+            self.clocks.append(float(clock))
+            self.values.append(int(value))
+
+    def _code(self, host: str, key: str) -> tuple[int, bool]:
+        parsed = parse_counter_key(key)
+        rate = parsed is None
+        if rate:
+            parsed = parse_rate_key(key)
+        if parsed is None:
+            self._codes[(host, key)] = (-1, False)
+            return -1, False
+        # ifHCInOctets.3 and IF-MIB::ifHCInOctets.3 are the same counter.
+        series_key = (host, *parsed)
+        code = self._series_codes.get(series_key)
+        if code is None:
+            code = self._series_codes[series_key] = len(self.keys)
+            self.keys.append(series_key)
+            if rate:
+                self.stored_rates.add(code)
+        elif rate != (code in self.stored_rates):
+            raise ValueError(
+                f"{host} reports interface {parsed[0]} both as octet counter and stored rate"
+            )
+        self._codes[(host, key)] = (code, rate)
+        return code, rate
+
+    def extend(self, rows: Iterable[dict[str, Any]]) -> None:
+        for row in rows:
+            host = row["host"]
+            if isinstance(host, dict):
+                host = host["host"]
+            self.append(host, row["key"], row["clock"], row["value"])
+
+
+def load_counter_samples(path: Path | str) -> CounterSamples:
+    """Read samples from a CSV file with a ``host,key,clock,value`` header or NDJSON."""
+
+    path = Path(path)
+    samples = CounterSamples()
+    with path.open(encoding="utf-8", newline="") as handle:
+        if path.suffix.lower() == ".csv":
+            reader = csv.reader(handle)
+            header = next(reader, None)
+            if header is None:
+                return samples
+            columns = [header.index(name) for name in ("host", "key", "clock", "value")]
+            append = samples.append
+            for row in reader:
+                if row:
+                    append(*(row[column] for column in columns))
+        else:
+            samples.extend(json.loads(line) for line in handle if line.strip())
+    return samples
+
+
+@dataclass
+class InterfaceRates:
+    """Per-interval rates of one interface, in bits per second."""
+
+    host: str
+    ifindex: int
+    clocks: list[float] = field(default_factory=list)
+    in_bps: list[float] = field(default_factory=list)
+    out_bps: list[float] = field(default_factory=list)
+    in_octets: float = 0.0
+    out_octets: float = 0.0
+    seconds: float = 0.0
+    resets: int = 0
+
+    @property
+    def mean_in_bps(self) -> float:
+        return self.in_octets * 8 / self.seconds if self.seconds else 0.0
+
+    @property
+    def mean_out_bps(self) -> float:
+        return self.out_octets * 8 / self.seconds if self.seconds else 0.0
+
+
+def compute_rates(
+    samples: CounterSamples, speeds_bps: dict[tuple[str, int], float] | None = None
+) -> dict[tuple[str, int], InterfaceRates]:
+    """Per-interface rates with 64-bit wrap and reset handling."""
+
+    speeds_bps = speeds_bps or {}
+    limits = [
+        speeds_bps.get((host, ifindex)) or DEFAULT_MAX_RATE_BPS for host, ifindex, _ in samples.keys
+    ]
+    if np is not None:
+        counters = _counters_numpy(samples, limits)
+    else:
+        counters = _counters_python(samples, limits)
+    if samples.stored_rates:
+        for code, counter in _stored_rates(samples).items():
+            counters[code] = counter
+
+    directions: dict[tuple[str, int], list[_Counter | None]] = {}
+    for code, counter in enumerate(counters):
+        host, ifindex, direction = samples.keys[code]
+        directions.setdefault((host, ifindex), [None, None])[direction] = counter
+
+    result: dict[tuple[str, int], InterfaceRates] = {}
+    for key, (counter_in, counter_out) in directions.items():
+        rates = result[key] = InterfaceRates(*key)
+        # Both directions are polled together, so their intervals normally
+        # line up; an interval seen for one direction only counts 0 for the other.
+        by_clock = [
+            dict(zip(c.clocks, c.bps, strict=True)) if c else {} for c in (counter_in, counter_out)
+        ]
+        rates.clocks = sorted(by_clock[IN].keys() | by_clock[OUT].keys())
+        rates.in_bps = [by_clock[IN].get(clock, 0.0) for clock in rates.clocks]
+        rates.out_bps = [by_clock[OUT].get(clock, 0.0) for clock in rates.clocks]
+        if counter_in is not None:
+            rates.in_octets = counter_in.octets
+        if counter_out is not None:
+            rates.out_octets = counter_out.octets
+        counted = [counter for counter in (counter_in, counter_out) if counter is not None]
+        rates.seconds = max(counter.seconds for counter in counted)
+        rates.resets = sum(counter.resets for counter in counted)
+    return result
+
+
+class SNMPCounterCollector:
+    """Build network nodes and interface workloads from counter samples.
+
+    ``dataset`` may list ``devices`` (name, ``power_profile`` with the chassis
+    ``base_idle_watts``, ``watts_per_port`` and ``interfaces`` with ``ifindex``,
+    ``name`` and ``speed_mbps``) and inline ``samples`` rows; ``samples_path``
+    points to a CSV or NDJSON export instead. Devices that only appear in the
+    samples get the default chassis and port power.
+    """
+
+    def __init__(
+        self, dataset: dict[str, Any] | None = None, samples_path: Path | str | None = None
+    ) -> None:
+        self.dataset = dataset
+        self.samples_path = samples_path
+
+    def collect(self) -> InventorySnapshot:
+        data = self.dataset
+        if data is None:
+            data = {} if self.samples_path else _simulate_dataset()
+        samples_path = self.samples_path or data.get("samples_path")
+        if samples_path:
+            samples = load_counter_samples(samples_path)
+        else:
+            samples = CounterSamples()
+            samples.extend(data.get("samples", []))
+        devices = {device["name"]: device for device in data.get("devices", [])}
+        interfaces = {
+            (name, int(interface["ifindex"])): interface
+            for name, device in devices.items()
+            for interface in device.get("interfaces", [])
+        }
+        speeds = {
+            key: float(interface["speed_mbps"]) * 1e6
+            for key, interface in interfaces.items()
+            if interface.get("speed_mbps")
+        }
+        rates = compute_rates(samples, speeds)
+
+        hosts = list(devices)
+        hosts.extend(host for host, _, _ in samples.keys if host not in devices)
+        workloads = []
+        active_ports: dict[str, int] = {}
+        for (host, ifindex), interface_rates in sorted(rates.items()):
+            interface = interfaces.get((host, ifindex), {})
+            workloads.append(_workload(interface_rates, interface, speeds.get((host, ifindex))))
+            if interface_rates.in_octets or interface_rates.out_octets:
+                active_ports[host] = active_ports.get(host, 0) + 1
+        nodes = [
+            _node(host, devices.get(host, {}), active_ports.get(host, 0))
+            for host in dict.fromkeys(hosts)
+        ]
+        metadata = {"source": "snmp", **data.get("metadata", {})}
+        return InventorySnapshot(nodes=nodes, workloads=workloads, metadata=metadata)
+
+
+@dataclass
+class _Counter:
+    clocks: list[float]
+    bps: list[float]
+    octets: float
+    seconds: float
+    resets: int
+
+
+def _intervals(clocks: list[float]) -> list[float]:
+    return [later - earlier for earlier, later in zip(clocks, clocks[1:], strict=False)]
+
+
+def _counters_numpy(samples: CounterSamples, limits: list[float]) -> list[_Counter]:
+    count = len(samples.keys)
+    series = np.frombuffer(samples.series, dtype=np.int32)
+    clocks = np.frombuffer(samples.clocks, dtype=np.float64)
+    values = np.array(samples.values, dtype=np.uint64)
+    order = np.lexsort((clocks, series))
+    series, clocks, values = series[order], clocks[order], values[order]
+
+    previous, current = values[:-1], values[1:]
+    seconds = clocks[1:] - clocks[:-1]
+    # uint64 subtraction is modulo 2**64, which is the wrapped delta.
+    deltas = (current - previous).astype(np.float64)
+    limit_octets = np.asarray(limits, dtype=np.float64)[series[1:]] / 8 * seconds
+    resets = (current < previous) & (deltas > limit_octets)
+    deltas = np.where(resets, current.astype(np.float64), deltas)
+    keep = (series[1:] == series[:-1]) & (seconds > 0)
+    codes, clocks, deltas = series[1:][keep], clocks[1:][keep], deltas[keep]
+    seconds, resets = seconds[keep], resets[keep]
+
+    octets = np.bincount(codes, weights=deltas, minlength=count).tolist()
+    durations = np.bincount(codes, weights=seconds, minlength=count).tolist()
+    reset_counts = np.bincount(codes, weights=resets, minlength=count).astype(int).tolist()
+    bounds = np.searchsorted(codes, np.arange(1, count))
+    bps = np.split(deltas * 8 / seconds, bounds)
+    interval_clocks = np.split(clocks, bounds)
+    return [
+        _Counter(interval_clocks[code].tolist(), bps[code].tolist(), *totals)
+        for code, totals in enumerate(zip(octets, durations, reset_counts, strict=True))
+    ]
+
+
+def _counters_python(samples: CounterSamples, limits: list[float]) -> list[_Counter]:
+    counters = [_Counter([], [], 0.0, 0.0, 0) for _ in samples.keys]
+    order = sorted(range(len(samples.clocks)), key=lambda i: (samples.series[i], samples.clocks[i]))
+    previous = None
+    for index in order:
+        code, clock, value = samples.series[index], samples.clocks[index], samples.values[index]
+        if previous is not None and previous[0] == code and clock > previous[1]:
+            seconds = clock - previous[1]
+            delta = (value - previous[2]) % COUNTER_MODULUS
+            counter = counters[code]
+            if value < previous[2] and delta > limits[code] / 8 * seconds:
+                delta = value
+                counter.resets += 1
+            counter.clocks.append(clock)
+            counter.bps.append(delta * 8 / seconds)
+            counter.octets += delta
+            counter.seconds += seconds
+        previous = (code, clock, value)
+    return counters
+
+
+def _stored_rates(samples: CounterSamples) -> dict[int, _Counter]:
+    counters = {code: _Counter([], [], 0.0, 0.0, 0) for code in samples.stored_rates}
+    series, clocks, values = samples.rate_series, samples.rate_clocks, samples.rate_values
+    previous = None
+    for index in sorted(range(len(clocks)), key=lambda i: (series[i], clocks[i])):
+        code, clock = series[index], clocks[index]
+        if previous is not None and previous[0] == code and clock > previous[1]:
+            seconds = clock - previous[1]
+            counter = counters[code]
+            counter.clocks.append(clock)
+            counter.bps.append(values[index])
+            counter.octets += values[index] / 8 * seconds
+            counter.seconds += seconds
+        previous = (code, clock)
+    return counters
+
+
+def _workload(
+    rates: InterfaceRates, interface: dict[str, Any], speed_bps: float | None
+) -> Workload:
+    name = interface.get("name") or f"if{rates.ifindex}"
+    labels = {
+        "ifindex": str(rates.ifindex),
+        "in_bps": f"{rates.mean_in_bps:.0f}",
+        "out_bps": f"{rates.mean_out_bps:.0f}",
+    }
+    if rates.resets:
+        labels["counter_resets"] = str(rates.resets)
+    series = None
+    utilization = 0.0
+    if speed_bps:
+        labels["speed_mbps"] = f"{speed_bps / 1e6:g}"
+        utilization = max(rates.mean_in_bps, rates.mean_out_bps) / speed_bps
+        intervals = _intervals(rates.clocks)
+        interval = round(sorted(intervals)[len(intervals) // 2]) if intervals else 60
+        series = UtilizationSeries(
+            capacity=max(len(rates.clocks), 1),
+            interval_seconds=max(interval, 1),
+            samples=(
+                max(i, o) / speed_bps for i, o in zip(rates.in_bps, rates.out_bps, strict=True)
+            ),
+        )
+    return Workload(
+        name=f"{rates.host}:{name}",
+        workload_type="interface",
+        cpu_cores=0.0,
+        memory_gb=0.0,
+        utilization=min(utilization, 1.0),
+        node_name=rates.host,
+        labels=labels,
+        utilization_series=series,
+    )
+
+
+def _node(host: str, device: dict[str, Any], active_ports: int) -> Node:
+    profile = device.get("power_profile", {})
+    chassis = float(profile.get("base_idle_watts", DEFAULT_CHASSIS_WATTS))
+    per_port = float(device.get("watts_per_port", DEFAULT_WATTS_PER_PORT))
+    return Node(
+        name=host,
+        kind=NETWORK_NODE_KIND,
+        cpu_cores=0,
+        memory_gb=0,
+        power_profile=PowerProfile(
+            base_idle_watts=round(chassis + per_port * active_ports, 2),
+            watts_per_cpu_core=0.0,
+            watts_per_gb_ram=0.0,
+        ),
+        metadata={**device.get("metadata", {}), "active_ports": str(active_ports)},
+    )
+
+
+def _simulate_dataset() -> dict[str, Any]:
+    start = 1_700_000_000
+    samples = []
+    for minute in range(10):
+        clock = start + 60 * minute
+        # sfp-sfpplus1 starts near the top of the 64-bit range and wraps.
+        uplink = (COUNTER_MODULUS - 3_000_000_000 + minute * 750_000_000) % COUNTER_MODULUS
+        samples.append(
+            {"host": "core-sw", "key": "ifHCInOctets.1", "clock": clock, "value": uplink}
+        )
+        samples.append(
+            {"host": "core-sw", "key": "ifHCOutOctets.1", "clock": clock, "value": minute * 15e7}
+        )
+        # ether1 comes from the template item, already in bits/s.
+        samples.append({"host": "core-sw", "key": "net.if.in[2]", "clock": clock, "value": 8e5})
+    return {
+        "metadata": {"note": "simulated"},
+        "devices": [
+            {
+                "name": "core-sw",
+                "power_profile": {"base_idle_watts": 12},
+                "watts_per_port": 0.8,
+                "interfaces": [
+                    {"ifindex": 1, "name": "sfp-sfpplus1", "speed_mbps": 10000},
+                    {"ifindex": 2, "name": "ether1", "speed_mbps": 1000},
+                    {"ifindex": 3, "name": "ether2", "speed_mbps": 1000},
+                ],
+            }
+        ],
+        "samples": samples,
+    }
@@ -0,0 +1,416 @@
+"""Column-oriented inventory snapshot for large fleets.
+
+``ColumnarSnapshot`` keeps numeric node and workload attributes in typed
+arrays (NumPy when installed, :mod:`array` otherwise), repeated strings such as
+node references, kinds and workload types as codes into interned tables, and
+labels/metadata only for the rows that have them. It exposes the read API of
+:class:`~homelab_cost_optimizer.models.InventorySnapshot`, materializing
+``Node``/``Workload`` objects on access, so estimators and consolidators accept
+either representation. Columnar snapshots are read-only.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import Any, TypeVar
+
+from .models import InventorySnapshot, Node, PowerProfile, Workload
+from .timeseries import UtilizationSeries, series_from_record
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+FLOAT = "d"
+INT = "q"
+CODE = "i"
+
+_NUMPY_DTYPES = {FLOAT: "float64", INT: "int64", CODE: "int32"}
+
+
+def freeze_column(values: array, typecode: str):
+    """Return ``values`` as a NumPy array when available, sharing its buffer."""
+
+    if np is None:
+        return values
+    return np.frombuffer(values, dtype=_NUMPY_DTYPES[typecode])
+
+
+class StringTable:
+    """Interning table that maps strings to dense integer codes."""
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(sys.intern(value))
+            self._codes[value] = code
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+
+class _Rows(Sequence[T]):
+    """Sequence that builds row objects on access instead of storing them."""
+
+    def __init__(self, length: int, factory: Callable[[int], T]) -> None:
+        self._length = length
+        self._factory = factory
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self._factory(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return self._factory(index)
+
+    def __iter__(self) -> Iterator[T]:
+        factory = self._factory
+        for index in range(self._length):
+            yield factory(index)
+
+
+class _Grouping:
+    """Rows grouped by an integer code, keeping row order within each group."""
+
+    def __init__(self, codes: Sequence[int], group_count: int) -> None:
+        if np is not None:
+            codes = np.asarray(codes)
+            self.order = np.argsort(codes, kind="stable")
+            self.starts = np.zeros(group_count + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes, minlength=group_count), out=self.starts[1:])
+            return
+        starts = array(INT, bytes(8 * (group_count + 1)))
+        for code in codes:
+            starts[code + 1] += 1
+        for group in range(group_count):
+            starts[group + 1] += starts[group]
+        cursor = array(INT, starts)
+        order = array(INT, bytes(8 * len(codes)))
+        for row, code in enumerate(codes):
+            order[cursor[code]] = row
+            cursor[code] += 1
+        self.starts = starts
+        self.order = order
+
+    def rows(self, code: int) -> Sequence[int]:
+        return self.order[self.starts[code] : self.starts[code + 1]]
+
+
+class ColumnarSnapshot:
+    def __init__(
+        self,
+        *,
+        node_names: Sequence[str],
+        node_kind_codes: Sequence[int],
+        kinds: Sequence[str],
+        node_cpu_cores: Sequence[int],
+        node_memory_gb: Sequence[int],
+        node_idle_watts: Sequence[float],
+        node_watts_per_cpu_core: Sequence[float],
+        node_watts_per_gb_ram: Sequence[float],
+        workload_names: Sequence[str],
+        workload_type_codes: Sequence[int],
+        workload_types: Sequence[str],
+        workload_cpu_cores: Sequence[float],
+        workload_memory_gb: Sequence[float],
+        workload_utilization: Sequence[float],
+        workload_node_codes: Sequence[int],
+        node_refs: Sequence[str],
+        workload_node_index: Sequence[int],
+        node_metadata: Mapping[int, dict[str, str]] | None = None,
+        workload_labels: Mapping[int, dict[str, str]] | None = None,
+        workload_series: Mapping[int, UtilizationSeries] | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        self.node_names = node_names
+        self.node_kind_codes = node_kind_codes
+        self.kinds = kinds
+        self.node_cpu_cores = node_cpu_cores
+        self.node_memory_gb = node_memory_gb
+        self.node_idle_watts = node_idle_watts
+        self.node_watts_per_cpu_core = node_watts_per_cpu_core
+        self.node_watts_per_gb_ram = node_watts_per_gb_ram
+        self.workload_names = workload_names
+        self.workload_type_codes = workload_type_codes
+        self.workload_types = workload_types
+        self.workload_cpu_cores = workload_cpu_cores
+        self.workload_memory_gb = workload_memory_gb
+        self.workload_utilization = workload_utilization
+        self.workload_node_codes = workload_node_codes
+        self.node_refs = node_refs
+        self.workload_node_index = workload_node_index
+        # Sparse maps may be lazily decoded views; avoid truth tests that load them.
+        self.node_metadata = {} if node_metadata is None else node_metadata
+        self.workload_labels = {} if workload_labels is None else workload_labels
+        self.workload_series = {} if workload_series is None else workload_series
+        self.metadata = metadata or {}
+        self._node_lookup: dict[str, int] | None = None
+        self._ref_lookup: dict[str, int] | None = None
+        self._type_lookup: dict[str, int] | None = None
+        self._by_node: _Grouping | None = None
+        self._by_type: _Grouping | None = None
+
+    @classmethod
+    def from_snapshot(cls, snapshot: InventorySnapshot) -> ColumnarSnapshot:
+        builder = ColumnarSnapshotBuilder(metadata=snapshot.metadata)
+        for node in snapshot.nodes:
+            builder.add_node_object(node)
+        for workload in snapshot.workloads:
+            builder.add_workload_object(workload)
+        return builder.build()
+
+    def to_snapshot(self) -> InventorySnapshot:
+        return InventorySnapshot(
+            nodes=list(self.nodes), workloads=list(self.workloads), metadata=dict(self.metadata)
+        )
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_names)
+
+    @property
+    def workload_count(self) -> int:
+        return len(self.workload_names)
+
+    @property
+    def nodes(self) -> Sequence[Node]:
+        return _Rows(self.node_count, self._node)
+
+    @property
+    def workloads(self) -> Sequence[Workload]:
+        return _Rows(self.workload_count, self._workload)
+
+    def invalidate_indexes(self) -> None:
+        """Columnar snapshots are immutable; kept for ``InventorySnapshot`` parity."""
+
+    def average_utilization(self) -> Sequence[float]:
+        """Utilization column with series means for the rows that have a series."""
+
+        if not self.workload_series:
+            return self.workload_utilization
+        column = array(FLOAT, self.workload_utilization)
+        for row, series in self.workload_series.items():
+            if len(series):
+                column[row] = series.mean()
+        return freeze_column(column, FLOAT)
+
+    def node_by_name(self, name: str) -> Node | None:
+        if self._node_lookup is None:
+            lookup: dict[str, int] = {}
+            for index, node_name in enumerate(self.node_names):
+                lookup.setdefault(node_name, index)
+            self._node_lookup = lookup
+        index = self._node_lookup.get(name)
+        return None if index is None else self._node(index)
+
+    def workloads_on(self, node_name: str) -> list[Workload]:
+        if self._ref_lookup is None:
+            self._ref_lookup = {ref: code for code, ref in enumerate(self.node_refs)}
+        code = self._ref_lookup.get(node_name)
+        if code is None:
+            return []
+        if self._by_node is None:
+            self._by_node = _Grouping(self.workload_node_codes, len(self.node_refs))
+        return [self._workload(int(row)) for row in self._by_node.rows(code)]
+
+    def workloads_of_type(self, workload_type: str) -> list[Workload]:
+        if self._type_lookup is None:
+            self._type_lookup = {name: code for code, name in enumerate(self.workload_types)}
+        code = self._type_lookup.get(workload_type)
+        if code is None:
+            return []
+        if self._by_type is None:
+            self._by_type = _Grouping(self.workload_type_codes, len(self.workload_types))
+        return [self._workload(int(row)) for row in self._by_type.rows(code)]
+
+    def _node(self, index: int) -> Node:
+        return Node(
+            name=self.node_names[index],
+            kind=self.kinds[int(self.node_kind_codes[index])],
+            cpu_cores=int(self.node_cpu_cores[index]),
+            memory_gb=int(self.node_memory_gb[index]),
+            power_profile=PowerProfile(
+                base_idle_watts=float(self.node_idle_watts[index]),
+                watts_per_cpu_core=float(self.node_watts_per_cpu_core[index]),
+                watts_per_gb_ram=float(self.node_watts_per_gb_ram[index]),
+            ),
+            metadata=dict(self.node_metadata.get(index, {})),
+        )
+
+    def _workload(self, index: int) -> Workload:
+        return Workload(
+            name=self.workload_names[index],
+            workload_type=self.workload_types[int(self.workload_type_codes[index])],
+            cpu_cores=float(self.workload_cpu_cores[index]),
+            memory_gb=float(self.workload_memory_gb[index]),
+            utilization=float(self.workload_utilization[index]),
+            node_name=self.node_refs[int(self.workload_node_codes[index])],
+            labels=dict(self.workload_labels.get(index, {})),
+            utilization_series=self.workload_series.get(index),
+        )
+
+
+class ColumnarSnapshotBuilder:
+    """Accumulates raw node/workload records into a :class:`ColumnarSnapshot`."""
+
+    def __init__(self, metadata: dict[str, Any] | None = None) -> None:
+        self.metadata: dict[str, Any] = dict(metadata or {})
+        self._node_names: list[str] = []
+        self._kinds = StringTable()
+        self._node_kind_codes = array(CODE)
+        self._node_cpu = array(INT)
+        self._node_mem = array(INT)
+        self._node_idle = array(FLOAT)
+        self._node_wpc = array(FLOAT)
+        self._node_wpg = array(FLOAT)
+        self._node_metadata: dict[int, dict[str, str]] = {}
+        self._workload_names: list[str] = []
+        self._types = StringTable()
+        self._workload_type_codes = array(CODE)
+        self._workload_cpu = array(FLOAT)
+        self._workload_mem = array(FLOAT)
+        self._workload_util = array(FLOAT)
+        self._refs = StringTable()
+        self._workload_node_codes = array(CODE)
+        self._workload_labels: dict[int, dict[str, str]] = {}
+        self._workload_series: dict[int, UtilizationSeries] = {}
+
+    def add_node(self, data: dict[str, Any]) -> None:
+        profile_data = data.get("power_profile", {})
+        profile = PowerProfile(**profile_data) if profile_data else PowerProfile()
+        self._append_node(
+            name=data["name"],
+            kind=data.get("kind", "unknown"),
+            cpu_cores=int(data.get("cpu_cores", 0)),
+            memory_gb=int(data.get("memory_gb", 0)),
+            profile=profile,
+            metadata=data.get("metadata", {}),
+        )
+
+    def add_node_object(self, node: Node) -> None:
+        self._append_node(
+            name=node.name,
+            kind=node.kind,
+            cpu_cores=node.cpu_cores,
+            memory_gb=node.memory_gb,
+            profile=node.power_profile,
+            metadata=node.metadata,
+        )
+
+    def add_workload(self, data: dict[str, Any]) -> None:
+        self._append_workload(
+            name=data["name"],
+            workload_type=data.get("workload_type", "vm"),
+            cpu_cores=float(data.get("cpu_cores", 0)),
+            memory_gb=float(data.get("memory_gb", 0)),
+            utilization=float(data.get("utilization", 0)),
+            node_name=data.get("node_name", "unknown"),
+            labels=data.get("labels", {}),
+            series=series_from_record(data),
+        )
+
+    def add_workload_object(self, workload: Workload) -> None:
+        self._append_workload(
+            name=workload.name,
+            workload_type=workload.workload_type,
+            cpu_cores=workload.cpu_cores,
+            memory_gb=workload.memory_gb,
+            utilization=workload.utilization,
+            node_name=workload.node_name,
+            labels=workload.labels,
+            series=workload.utilization_series,
+        )
+
+    def build(self) -> ColumnarSnapshot:
+        node_lookup: dict[str, int] = {}
+        for index, name in enumerate(self._node_names):
+            node_lookup.setdefault(name, index)
+        ref_to_node = [node_lookup.get(ref, -1) for ref in self._refs.values]
+        workload_node_index = array(INT, (ref_to_node[code] for code in self._workload_node_codes))
+        return ColumnarSnapshot(
+            node_names=self._node_names,
+            node_kind_codes=freeze_column(self._node_kind_codes, CODE),
+            kinds=self._kinds.values,
+            node_cpu_cores=freeze_column(self._node_cpu, INT),
+            node_memory_gb=freeze_column(self._node_mem, INT),
+            node_idle_watts=freeze_column(self._node_idle, FLOAT),
+            node_watts_per_cpu_core=freeze_column(self._node_wpc, FLOAT),
+            node_watts_per_gb_ram=freeze_column(self._node_wpg, FLOAT),
+            workload_names=self._workload_names,
+            workload_type_codes=freeze_column(self._workload_type_codes, CODE),
+            workload_types=self._types.values,
+            workload_cpu_cores=freeze_column(self._workload_cpu, FLOAT),
+            workload_memory_gb=freeze_column(self._workload_mem, FLOAT),
+            workload_utilization=freeze_column(self._workload_util, FLOAT),
+            workload_node_codes=freeze_column(self._workload_node_codes, CODE),
+            node_refs=self._refs.values,
+            workload_node_index=freeze_column(workload_node_index, INT),
+            node_metadata=self._node_metadata,
+            workload_labels=self._workload_labels,
+            workload_series=self._workload_series,
+            metadata=self.metadata,
+        )
+
+    def _append_node(
+        self,
+        *,
+        name: str,
+        kind: str,
+        cpu_cores: int,
+        memory_gb: int,
+        profile: PowerProfile,
+        metadata: dict[str, str],
+    ) -> None:
+        if metadata:
+            self._node_metadata[len(self._node_names)] = dict(metadata)
+        self._node_names.append(sys.intern(name))
+        self._node_kind_codes.append(self._kinds.code(kind))
+        self._node_cpu.append(cpu_cores)
+        self._node_mem.append(memory_gb)
+        self._node_idle.append(profile.base_idle_watts)
+        self._node_wpc.append(profile.watts_per_cpu_core)
+        self._node_wpg.append(profile.watts_per_gb_ram)
+
+    def _append_workload(
+        self,
+        *,
+        name: str,
+        workload_type: str,
+        cpu_cores: float,
+        memory_gb: float,
+        utilization: float,
+        node_name: str,
+        labels: dict[str, str],
+        series: UtilizationSeries | None,
+    ) -> None:
+        if labels:
+            self._workload_labels[len(self._workload_names)] = dict(labels)
+        if series is not None:
+            self._workload_series[len(self._workload_names)] = series
+        self._workload_names.append(name)
+        self._workload_type_codes.append(self._types.code(workload_type))
+        self._workload_cpu.append(cpu_cores)
+        self._workload_mem.append(memory_gb)
+        self._workload_util.append(utilization)
+        self._workload_node_codes.append(self._refs.code(node_name))
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+
+from ..models import InventorySnapshot, Node, Workload
+from .heuristic_consolidator import ConsolidationPlan
+from .scope import consolidation_scope
+from .sizing import ALLOCATED, check_sizing, cpu_demand
+
+FIRST_FIT_DECREASING = "first-fit-decreasing"
+BEST_FIT_DECREASING = "best-fit-decreasing"
+WORST_FIT = "worst-fit"
+STRATEGIES = (FIRST_FIT_DECREASING, BEST_FIT_DECREASING, WORST_FIT)
+
+# Slack for pruning on residual capacity; the final fit test is exact.
+_EPSILON = 1e-9
+
+
+class BinPackingConsolidator:
+    """Bin-packing consolidation over a residual-capacity index.
+
+    Workloads are placed largest first (by CPU, then RAM). Nodes keep the
+    heuristic consolidator's order (most CPU cores first) and each placement
+    is an ``O(log N)`` index lookup instead of a scan over every node:
+
+    * ``first-fit-decreasing`` descends a max segment tree over node positions;
+    * ``best-fit-decreasing`` bisects nodes sorted by residual CPU and takes
+      the tightest one that also has room for the RAM;
+    * ``worst-fit`` takes the node with the most residual CPU.
+    """
+
+    def __init__(
+        self, strategy: str = FIRST_FIT_DECREASING, headroom: float = 0.8, sizing: str = ALLOCATED
+    ) -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown consolidation strategy: {strategy}")
+        self.strategy = strategy
+        self.headroom = headroom
+        self.sizing = check_sizing(sizing)
+
+    def consolidate(self, snapshot: InventorySnapshot) -> ConsolidationPlan:
+        nodes, workloads = consolidation_scope(snapshot)
+        nodes.sort(key=lambda n: n.cpu_cores, reverse=True)
+        state = PlacementState(nodes, self.headroom, self.strategy, self.sizing)
+        workloads.sort(key=state.demand, reverse=True)
+
+        assignments: dict[str, str] = {}
+        unplaced: list[str] = []
+        for workload in workloads:
+            position = state.place(workload)
+            if position is None:
+                unplaced.append(workload.name)
+                continue
+            assignments[workload.name] = nodes[position].name
+        return state.plan(assignments, unplaced)
+
+
+class PlacementState:
+    """Per-node usage plus the residual-capacity index for one strategy."""
+
+    def __init__(
+        self, nodes: list[Node], headroom: float, strategy: str, sizing: str = ALLOCATED
+    ) -> None:
+        self.nodes = nodes
+        self.strategy = strategy
+        self.sizing = sizing
+        self.max_cpu = [node.cpu_cores * headroom for node in nodes]
+        self.max_ram = [node.memory_gb * headroom for node in nodes]
+        self.used_cpu = [0.0] * len(nodes)
+        self.used_ram = [0.0] * len(nodes)
+        self.counts = [0] * len(nodes)
+        if strategy == FIRST_FIT_DECREASING:
+            self.tree = _ResidualTree(self.max_cpu, self.max_ram)
+        else:
+            self.by_cpu = sorted((cpu, position) for position, cpu in enumerate(self.max_cpu))
+
+    def fits(self, position: int, cpu: float, ram: float) -> bool:
+        return (
+            self.used_cpu[position] + cpu <= self.max_cpu[position]
+            and self.used_ram[position] + ram <= self.max_ram[position]
+        )
+
+    def find(self, cpu: float, ram: float) -> int | None:
+        if self.strategy == FIRST_FIT_DECREASING:
+            return self.tree.first_fit(cpu, ram, self.fits)
+        if self.strategy == BEST_FIT_DECREASING:
+            start = bisect_left(self.by_cpu, (cpu - _EPSILON, -1))
+            candidates = (self.by_cpu[i][1] for i in range(start, len(self.by_cpu)))
+        else:
+            candidates = (self.by_cpu[i][1] for i in range(len(self.by_cpu) - 1, -1, -1))
+        for position in candidates:
+            if self.fits(position, cpu, ram):
+                return position
+            if self.strategy == WORST_FIT and self._residual_cpu(position) + _EPSILON < cpu:
+                return None
+        return None
+
+    def demand(self, workload: Workload) -> tuple[float, float]:
+        return cpu_demand(workload, self.sizing), workload.memory_gb
+
+    def place(self, workload: Workload) -> int | None:
+        cpu, ram = self.demand(workload)
+        position = self.find(cpu, ram)
+        if position is not None:
+            self.add(position, cpu, ram)
+        return position
+
+    def add(self, position: int, cpu: float, ram: float) -> None:
+        self._update(position, cpu, ram, 1)
+
+    def remove(self, position: int, cpu: float, ram: float) -> None:
+        self._update(position, -cpu, -ram, -1)
+
+    def plan(self, assignments: dict[str, str], unplaced: list[str]) -> ConsolidationPlan:
+        idle_nodes = [
+            node for node, count in zip(self.nodes, self.counts, strict=True) if not count
+        ]
+        estimated_savings = sum(node.power_profile.base_idle_watts for node in idle_nodes)
+        return ConsolidationPlan(
+            assignments=assignments,
+            nodes_to_power_down=[node.name for node in idle_nodes],
+            estimated_idle_watt_reduction=round(estimated_savings, 2),
+            unplaced=unplaced,
+        )
+
+    def _residual_cpu(self, position: int) -> float:
+        return self.max_cpu[position] - self.used_cpu[position]
+
+    def _update(self, position: int, cpu: float, ram: float, count: int) -> None:
+        if self.strategy != FIRST_FIT_DECREASING:
+            key = (self._residual_cpu(position), position)
+            del self.by_cpu[bisect_left(self.by_cpu, key)]
+        self.used_cpu[position] += cpu
+        self.used_ram[position] += ram
+        self.counts[position] += count
+        residual_cpu = self._residual_cpu(position)
+        if self.strategy == FIRST_FIT_DECREASING:
+            residual_ram = self.max_ram[position] - self.used_ram[position]
+            self.tree.update(position, residual_cpu, residual_ram)
+        else:
+            insort(self.by_cpu, (residual_cpu, position))
+
+
+class _ResidualTree:
+    """Max segment tree over node positions for residual CPU and RAM."""
+
+    def __init__(self, cpu: list[float], ram: list[float]) -> None:
+        size = 1
+        while size < len(cpu):
+            size *= 2
+        self.size = size
+        self.cpu = [float("-inf")] * (2 * size)
+        self.ram = [float("-inf")] * (2 * size)
+        self.cpu[size : size + len(cpu)] = cpu
+        self.ram[size : size + len(ram)] = ram
+        for index in range(size - 1, 0, -1):
+            self._pull(index)
+
+    def update(self, position: int, cpu: float, ram: float) -> None:
+        index = position + self.size
+        self.cpu[index] = cpu
+        self.ram[index] = ram
+        index //= 2
+        while index:
+            self._pull(index)
+            index //= 2
+
+    def first_fit(self, cpu: float, ram: float, fits) -> int | None:
+        # Subtree maxima are taken per dimension, so a subtree can pass the
+        # pruning test without any single node fitting; the search then
+        # backtracks to the next subtree on the right.
+        stack = [1]
+        while stack:
+            index = stack.pop()
+            if self.cpu[index] + _EPSILON < cpu or self.ram[index] + _EPSILON < ram:
+                continue
+            if index >= self.size:
+                position = index - self.size
+                if fits(position, cpu, ram):
+                    return position
+                continue
+            stack.append(2 * index + 1)
+            stack.append(2 * index)
+        return None
+
+    def _pull(self, index: int) -> None:
+        self.cpu[index] = max(self.cpu[2 * index], self.cpu[2 * index + 1])
+        self.ram[index] = max(self.ram[2 * index], self.ram[2 * index + 1])
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+
+from ..models import InventorySnapshot, Node, Workload
+from .binpacking_consolidator import (
+    BEST_FIT_DECREASING,
+    FIRST_FIT_DECREASING,
+    BinPackingConsolidator,
+)
+from .heuristic_consolidator import ConsolidationPlan, HeuristicConsolidator
+from .scope import consolidation_scope
+from .sizing import ALLOCATED, check_sizing, cpu_demand
+
+_EPSILON = 1e-9
+_CLOCK_CHECK_INTERVAL = 256
+
+
+class ExactConsolidator:
+    """Branch-and-bound consolidation that minimizes idle watts of powered-on nodes.
+
+    Workloads are assigned largest first. Each branch either adds the workload
+    to an already powered-on node or powers on another one; nodes in the same
+    state are tried once per level. A branch is cut when its powered-on idle
+    watts plus a lower bound for the remaining CPU and RAM demand cannot beat
+    the best plan found so far. The bound is the cheapest fractional cover of
+    the demand that does not fit into the powered-on nodes.
+
+    The search starts from the best heuristic or bin-packing plan and stops
+    after ``time_budget`` seconds with the best plan found.
+    ``ConsolidationPlan.optimality_gap`` is 0 when the search finished,
+    otherwise the relative distance between that plan and the root bound.
+    When no complete placement is found, the partial plan that places the most
+    workloads is returned as is, with no gap.
+    """
+
+    def __init__(
+        self, headroom: float = 0.8, time_budget: float = 10.0, sizing: str = ALLOCATED
+    ) -> None:
+        self.headroom = headroom
+        self.time_budget = time_budget
+        self.sizing = check_sizing(sizing)
+
+    def consolidate(self, snapshot: InventorySnapshot) -> ConsolidationPlan:
+        nodes, workloads = consolidation_scope(snapshot)
+        nodes.sort(key=lambda n: n.cpu_cores, reverse=True)
+        search = _Search(nodes, workloads, self.headroom, self.sizing)
+        search.offer(HeuristicConsolidator(self.headroom, self.sizing).consolidate(snapshot))
+        for strategy in (FIRST_FIT_DECREASING, BEST_FIT_DECREASING):
+            consolidator = BinPackingConsolidator(strategy, self.headroom, self.sizing)
+            search.offer(consolidator.consolidate(snapshot))
+        completed = search.run(time.perf_counter() + self.time_budget)
+        return search.plan(completed)
+
+
+class _Search:
+    def __init__(
+        self, nodes: list[Node], workloads: list[Workload], headroom: float, sizing: str
+    ) -> None:
+        self.nodes = nodes
+        self.max_cpu = [node.cpu_cores * headroom for node in nodes]
+        self.max_ram = [node.memory_gb * headroom for node in nodes]
+        self.idle = [node.power_profile.base_idle_watts for node in nodes]
+        self.position = {}
+        for position, node in enumerate(nodes):
+            self.position.setdefault(node.name, position)
+
+        placeable = []
+        self.unplaceable: list[str] = []
+        for workload in workloads:
+            demand = (cpu_demand(workload, sizing), workload.memory_gb)
+            if any(
+                demand[0] <= cpu and demand[1] <= ram
+                for cpu, ram in zip(self.max_cpu, self.max_ram, strict=True)
+            ):
+                placeable.append((demand, workload))
+            else:
+                self.unplaceable.append(workload.name)
+        placeable.sort(key=lambda item: item[0], reverse=True)
+        self.workloads = [workload for _, workload in placeable]
+        self.cpu = [cpu for (cpu, _), _ in placeable]
+        self.ram = [ram for (_, ram), _ in placeable]
+        self.rest_cpu = _suffix_sums(self.cpu)
+        self.rest_ram = _suffix_sums(self.ram)
+
+        node_positions = range(len(nodes))
+        self.by_cpu_cost = sorted(
+            (p for p in node_positions if self.max_cpu[p] > 0),
+            key=lambda p: self.idle[p] / self.max_cpu[p],
+        )
+        self.by_ram_cost = sorted(
+            (p for p in node_positions if self.max_ram[p] > 0),
+            key=lambda p: self.idle[p] / self.max_ram[p],
+        )
+
+        self.used_cpu = [0.0] * len(nodes)
+        self.used_ram = [0.0] * len(nodes)
+        self.counts = [0] * len(nodes)
+        self.open_cost = 0.0
+        self.open_cpu = 0.0
+        self.open_ram = 0.0
+        self.root_bound = self.bound(0)
+
+        self.best_cost = float("inf")
+        self.best: list[int] | None = None
+        self.partial: ConsolidationPlan | None = None
+        self.assigned = [-1] * len(self.workloads)
+
+    def offer(self, plan: ConsolidationPlan) -> None:
+        """Use a complete plan from another consolidator as the incumbent.
+
+        Partial plans are kept as the fallback, preferring the one that places
+        the most workloads, then the one that saves the most idle watts.
+        """
+
+        if len(plan.assignments) != len(self.workloads):
+            rank = (len(plan.assignments), plan.estimated_idle_watt_reduction)
+            if self.partial is None or rank > (
+                len(self.partial.assignments),
+                self.partial.estimated_idle_watt_reduction,
+            ):
+                self.partial = plan
+            return
+        assignment = [self.position[plan.assignments[w.name]] for w in self.workloads]
+        cost = sum(self.idle[p] for p in set(assignment))
+        if cost < self.best_cost - _EPSILON:
+            self.best_cost = cost
+            self.best = assignment
+
+    def run(self, deadline: float) -> bool:
+        if not self.workloads:
+            self.best_cost, self.best = 0.0, []
+            return True
+        stack = [[0, self.candidates(0), 0]]
+        iterations = 0
+        while stack:
+            frame = stack[-1]
+            depth, candidates, cursor = frame
+            if self.assigned[depth] >= 0:
+                self.unassign(depth)
+            iterations += 1
+            if iterations % _CLOCK_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                while stack:
+                    depth = stack.pop()[0]
+                    if self.assigned[depth] >= 0:
+                        self.unassign(depth)
+                return False
+            if cursor == len(candidates):
+                stack.pop()
+                continue
+            frame[2] += 1
+            self.assign(depth, candidates[cursor])
+            if self.open_cost >= self.best_cost - _EPSILON:
+                continue
+            if depth + 1 == len(self.workloads):
+                self.best_cost = self.open_cost
+                self.best = list(self.assigned)
+                continue
+            if self.bound(depth + 1) >= self.best_cost - _EPSILON:
+                continue
+            stack.append([depth + 1, self.candidates(depth + 1), 0])
+        return True
+
+    def candidates(self, depth: int) -> list[int]:
+        cpu, ram = self.cpu[depth], self.ram[depth]
+        used, fresh = [], []
+        seen: set[tuple[float, ...]] = set()
+        for position in range(len(self.nodes)):
+            if self.used_cpu[position] + cpu > self.max_cpu[position]:
+                continue
+            if self.used_ram[position] + ram > self.max_ram[position]:
+                continue
+            is_open = self.counts[position] > 0
+            # Nodes that are interchangeable at this point lead to symmetric subtrees.
+            signature = (
+                is_open,
+                self.max_cpu[position],
+                self.max_ram[position],
+                self.idle[position],
+                self.used_cpu[position],
+                self.used_ram[position],
+            )
+            if signature in seen:
+                continue
+            seen.add(signature)
+            (used if is_open else fresh).append(position)
+        used.sort(key=lambda p: self.max_cpu[p] - self.used_cpu[p])
+        fresh.sort(key=lambda p: self.idle[p])
+        return used + fresh
+
+    def assign(self, depth: int, position: int) -> None:
+        if not self.counts[position]:
+            self.open_cost += self.idle[position]
+            self.open_cpu += self.max_cpu[position]
+            self.open_ram += self.max_ram[position]
+        self.counts[position] += 1
+        self.used_cpu[position] += self.cpu[depth]
+        self.used_ram[position] += self.ram[depth]
+        self.assigned[depth] = position
+
+    def unassign(self, depth: int) -> None:
+        position = self.assigned[depth]
+        self.assigned[depth] = -1
+        self.used_cpu[position] -= self.cpu[depth]
+        self.used_ram[position] -= self.ram[depth]
+        self.counts[position] -= 1
+        if not self.counts[position]:
+            self.open_cost -= self.idle[position]
+            self.open_cpu -= self.max_cpu[position]
+            self.open_ram -= self.max_ram[position]
+
+    def bound(self, depth: int) -> float:
+        placed_cpu = self.rest_cpu[0] - self.rest_cpu[depth]
+        placed_ram = self.rest_ram[0] - self.rest_ram[depth]
+        cpu_deficit = self.rest_cpu[depth] - (self.open_cpu - placed_cpu)
+        ram_deficit = self.rest_ram[depth] - (self.open_ram - placed_ram)
+        extra = max(
+            self._fractional_cover(cpu_deficit, self.by_cpu_cost, self.max_cpu),
+            self._fractional_cover(ram_deficit, self.by_ram_cost, self.max_ram),
+        )
+        return self.open_cost + extra
+
+    def _fractional_cover(self, deficit: float, order: list[int], capacity: list[float]) -> float:
+        cost = 0.0
+        for position in order:
+            if deficit <= _EPSILON:
+                break
+            if self.counts[position]:
+                continue
+            share = min(1.0, deficit / capacity[position])
+            cost += share * self.idle[position]
+            deficit -= capacity[position]
+        return cost
+
+    def plan(self, completed: bool) -> ConsolidationPlan:
+        if self.best is None:
+            if self.partial is not None:
+                return replace(self.partial, optimality_gap=None)
+            # Nothing was placed: every node keeps its workloads.
+            return ConsolidationPlan(
+                assignments={},
+                nodes_to_power_down=[],
+                estimated_idle_watt_reduction=0.0,
+                unplaced=[w.name for w in self.workloads] + self.unplaceable,
+                optimality_gap=None,
+            )
+        powered_on = set(self.best)
+        idle_positions = [p for p in range(len(self.nodes)) if p not in powered_on]
+        if completed or self.best_cost <= _EPSILON:
+            gap = 0.0
+        else:
+            gap = max(0.0, (self.best_cost - self.root_bound) / self.best_cost)
+        return ConsolidationPlan(
+            assignments={
+                workload.name: self.nodes[position].name
+                for workload, position in zip(self.workloads, self.best, strict=True)
+            },
+            nodes_to_power_down=[self.nodes[p].name for p in idle_positions],
+            estimated_idle_watt_reduction=round(sum(self.idle[p] for p in idle_positions), 2),
+            unplaced=list(self.unplaceable),
+            optimality_gap=round(gap, 4),
+        )
+
+
+def _suffix_sums(values: list[float]) -> list[float]:
+    sums = [0.0] * (len(values) + 1)
+    for index in range(len(values) - 1, -1, -1):
+        sums[index] = sums[index + 1] + values[index]
+    return sums
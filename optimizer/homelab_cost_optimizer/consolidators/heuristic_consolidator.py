@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from ..models import InventorySnapshot, Node, Workload
+from ..models import InventorySnapshot, Node
+from .scope import consolidation_scope
+from .sizing import ALLOCATED, check_sizing, cpu_demand
 
 
 @dataclass
@@ -10,51 +12,55 @@ class ConsolidationPlan:
     assignments: dict[str, str]
     nodes_to_power_down: list[str]
     estimated_idle_watt_reduction: float
+    unplaced: list[str] = field(default_factory=list)
+    optimality_gap: float | None = None
 
 
 class HeuristicConsolidator:
-    def __init__(self, headroom: float = 0.8) -> None:
+    def __init__(self, headroom: float = 0.8, sizing: str = ALLOCATED) -> None:
         self.headroom = headroom
+        self.sizing = check_sizing(sizing)
 
     def consolidate(self, snapshot: InventorySnapshot) -> ConsolidationPlan:
-        nodes = sorted(snapshot.nodes, key=lambda n: n.cpu_cores, reverse=True)
+        nodes, workloads = consolidation_scope(snapshot)
+        nodes.sort(key=lambda n: n.cpu_cores, reverse=True)
         usage = {node.name: {"cpu": 0.0, "ram": 0.0, "workloads": []} for node in nodes}
         assignments: dict[str, str] = {}
+        unplaced: list[str] = []
 
-        workloads = sorted(snapshot.workloads, key=lambda w: w.utilization)
+        workloads.sort(key=lambda w: w.utilization)
         for workload in workloads:
-            target = self._find_target_node(workload, nodes, usage)
+            cpu = cpu_demand(workload, self.sizing)
+            target = self._find_target_node(cpu, workload.memory_gb, nodes, usage)
             if not target:
+                unplaced.append(workload.name)
                 continue
             assignments[workload.name] = target.name
-            usage[target.name]["cpu"] += workload.cpu_cores
+            usage[target.name]["cpu"] += cpu
             usage[target.name]["ram"] += workload.memory_gb
             usage[target.name]["workloads"].append(workload.name)
 
-        nodes_to_power_down = [node.name for node in nodes if not usage[node.name]["workloads"]]
-        estimated_savings = sum(
-            node.power_profile.base_idle_watts for node in nodes if node.name in nodes_to_power_down
-        )
+        idle_nodes = [node for node in nodes if not usage[node.name]["workloads"]]
+        nodes_to_power_down = [node.name for node in idle_nodes]
+        estimated_savings = sum(node.power_profile.base_idle_watts for node in idle_nodes)
 
         return ConsolidationPlan(
             assignments=assignments,
             nodes_to_power_down=nodes_to_power_down,
             estimated_idle_watt_reduction=round(estimated_savings, 2),
+            unplaced=unplaced,
         )
 
     def _find_target_node(
-        self, workload: Workload, nodes: list[Node], usage: dict[str, dict[str, float]]
+        self, cpu: float, ram: float, nodes: list[Node], usage: dict[str, dict[str, float]]
     ) -> Node | None:
         for node in nodes:
             node_usage = usage[node.name]
-            if self._fits(workload, node, node_usage):
+            if self._fits(cpu, ram, node, node_usage):
                 return node
         return None
 
-    def _fits(self, workload: Workload, node: Node, node_usage: dict[str, float]) -> bool:
+    def _fits(self, cpu: float, ram: float, node: Node, node_usage: dict[str, float]) -> bool:
         max_cpu = node.cpu_cores * self.headroom
         max_ram = node.memory_gb * self.headroom
-        return (
-            node_usage["cpu"] + workload.cpu_cores <= max_cpu
-            and node_usage["ram"] + workload.memory_gb <= max_ram
-        )
+        return node_usage["cpu"] + cpu <= max_cpu and node_usage["ram"] + ram <= max_ram
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from ..delta import SnapshotDelta
+from ..models import InventorySnapshot, Workload
+from .binpacking_consolidator import FIRST_FIT_DECREASING, STRATEGIES, PlacementState
+from .heuristic_consolidator import ConsolidationPlan
+from .scope import consolidation_scope
+from .sizing import ALLOCATED, check_sizing
+
+
+class IncrementalConsolidator:
+    """Update a previous plan from a snapshot delta instead of planning from scratch.
+
+    Workloads that the delta does not touch keep their previous target. Changed
+    workloads and workloads on changed nodes keep theirs while they still fit.
+    Everything else (added, previously unplaced, on removed nodes or no longer
+    fitting) is placed again with the node search and ordering of ``strategy``.
+    The result equals a full ``consolidate`` run whenever the kept placements are
+    the ones the full run would have chosen, e.g. when only workloads that sort
+    after the existing ones are added.
+    """
+
+    def __init__(
+        self, strategy: str = "heuristic", headroom: float = 0.8, sizing: str = ALLOCATED
+    ) -> None:
+        if strategy != "heuristic" and strategy not in STRATEGIES:
+            raise ValueError(f"Unknown consolidation strategy: {strategy}")
+        self.strategy = strategy
+        self.headroom = headroom
+        self.sizing = check_sizing(sizing)
+
+    def consolidate(
+        self, snapshot: InventorySnapshot, previous: ConsolidationPlan, delta: SnapshotDelta
+    ) -> ConsolidationPlan:
+        nodes, workloads = consolidation_scope(snapshot)
+        nodes.sort(key=lambda n: n.cpu_cores, reverse=True)
+        # The heuristic consolidator scans nodes in order, which is first fit.
+        placement = FIRST_FIT_DECREASING if self.strategy == "heuristic" else self.strategy
+        state = PlacementState(nodes, self.headroom, placement, self.sizing)
+        positions: dict[str, int] = {}
+        for position, node in enumerate(nodes):
+            positions.setdefault(node.name, position)
+
+        changed_workloads = {w.name for w in delta.changed_workloads}
+        changed_nodes = {n.name for n in delta.changed_nodes}
+        assignments: dict[str, str] = {}
+        recheck: list[tuple[Workload, int]] = []
+        pending: list[Workload] = []
+        for workload in workloads:
+            position = positions.get(previous.assignments.get(workload.name))
+            if position is None:
+                pending.append(workload)
+            elif workload.name in changed_workloads or nodes[position].name in changed_nodes:
+                recheck.append((workload, position))
+            else:
+                state.add(position, *state.demand(workload))
+                assignments[workload.name] = nodes[position].name
+
+        for workload, position in recheck:
+            demand = state.demand(workload)
+            if state.fits(position, *demand):
+                state.add(position, *demand)
+                assignments[workload.name] = nodes[position].name
+            else:
+                pending.append(workload)
+
+        unplaced: list[str] = []
+        if self.strategy == "heuristic":
+            pending.sort(key=lambda w: w.utilization)
+        else:
+            pending.sort(key=state.demand, reverse=True)
+        for workload in pending:
+            position = state.place(workload)
+            if position is None:
+                unplaced.append(workload.name)
+            else:
+                assignments[workload.name] = nodes[position].name
+        return state.plan(assignments, unplaced)
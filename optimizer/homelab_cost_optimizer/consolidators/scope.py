@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from ..models import NETWORK_NODE_KIND, InventorySnapshot, Node, Workload
+
+
+def consolidation_scope(snapshot: InventorySnapshot) -> tuple[list[Node], list[Workload]]:
+    """Nodes and workloads a consolidator may plan for.
+
+    Network devices and their interfaces are left out: a switch stays powered
+    regardless of how little it forwards, and its interfaces cannot move to a
+    server.
+    """
+
+    nodes = list(snapshot.nodes)
+    network = {node.name for node in nodes if node.kind == NETWORK_NODE_KIND}
+    if not network:
+        return nodes, list(snapshot.workloads)
+    return (
+        [node for node in nodes if node.kind != NETWORK_NODE_KIND],
+        [workload for workload in snapshot.workloads if workload.node_name not in network],
+    )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from ..models import Workload
+
+ALLOCATED = "allocated"
+P95 = "p95"
+MEAN = "mean"
+SIZING_MODES = (ALLOCATED, P95, MEAN)
+
+
+def check_sizing(sizing: str) -> str:
+    if sizing not in SIZING_MODES:
+        raise ValueError(f"Unknown sizing mode: {sizing}")
+    return sizing
+
+
+def cpu_demand(workload: Workload, sizing: str = ALLOCATED) -> float:
+    """CPU cores a workload needs on its target node.
+
+    ``allocated`` uses the configured cores; ``p95`` and ``mean`` scale them by
+    the 95th percentile or the mean of the utilization series. Workloads
+    without a series are sized by their allocation in every mode.
+    """
+
+    series = workload.utilization_series
+    if sizing == ALLOCATED or series is None or not len(series):
+        return workload.cpu_cores
+    if sizing == P95:
+        return workload.cpu_cores * series.percentile(95)
+    return workload.cpu_cores * series.mean()
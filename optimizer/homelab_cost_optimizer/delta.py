@@ -0,0 +1,61 @@
+"""Differences between two inventory snapshots, keyed by node and workload name."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .models import InventorySnapshot, Node, Workload
+
+
+@dataclass
+class SnapshotDelta:
+    added_nodes: list[Node] = field(default_factory=list)
+    removed_nodes: list[str] = field(default_factory=list)
+    changed_nodes: list[Node] = field(default_factory=list)
+    added_workloads: list[Workload] = field(default_factory=list)
+    removed_workloads: list[str] = field(default_factory=list)
+    changed_workloads: list[Workload] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (
+            self.added_nodes
+            or self.removed_nodes
+            or self.changed_nodes
+            or self.added_workloads
+            or self.removed_workloads
+            or self.changed_workloads
+        )
+
+
+def diff_snapshots(old: InventorySnapshot, new: InventorySnapshot) -> SnapshotDelta:
+    """Return what changed from ``old`` to ``new``.
+
+    Records are matched by name; the first record wins for duplicated names.
+    Added and changed entries hold the records from ``new``.
+    """
+
+    delta = SnapshotDelta()
+    delta.added_nodes, delta.removed_nodes, delta.changed_nodes = _diff(old.nodes, new.nodes)
+    delta.added_workloads, delta.removed_workloads, delta.changed_workloads = _diff(
+        old.workloads, new.workloads
+    )
+    return delta
+
+
+def _diff(old_records, new_records):
+    old_by_name = {}
+    for record in old_records:
+        old_by_name.setdefault(record.name, record)
+    added, changed = [], []
+    seen = set()
+    for record in new_records:
+        if record.name in seen:
+            continue
+        seen.add(record.name)
+        previous = old_by_name.get(record.name)
+        if previous is None:
+            added.append(record)
+        elif previous != record:
+            changed.append(record)
+    removed = [name for name in old_by_name if name not in seen]
+    return added, removed, changed
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from itertools import repeat
+
+from ..columnar import ColumnarSnapshot, np
+from ..models import InventorySnapshot
+
+
+class BatchEstimator:
+    """Fleet-wide power and cost estimation over a columnar snapshot.
+
+    Dynamic CPU and RAM load is summed per node in one pass over the workload
+    columns (``numpy.bincount`` when NumPy is installed), using the series mean
+    for workloads that have a utilization series. Per-node rounding and
+    the cost step reuse the scalar rules, so results are identical to
+    ``PowerEstimator`` followed by ``CostEstimator``.
+    """
+
+    def __init__(
+        self, price_per_kwh: float, currency: str = "USD", hours_per_month: int = 730
+    ) -> None:
+        self.price_per_kwh = price_per_kwh
+        self.currency = currency
+        self.hours_per_month = hours_per_month
+
+    def estimate(
+        self, snapshot: InventorySnapshot | ColumnarSnapshot
+    ) -> tuple[dict[str, float], dict[str, dict[str, float]]]:
+        power = self.estimate_power(snapshot)
+        return power, self.estimate_cost(power)
+
+    def estimate_cost(self, power_by_node: dict[str, float]) -> dict[str, dict[str, float]]:
+        names = [name for name in power_by_node if name != "total_watts"]
+        watts = [power_by_node[name] for name in names]
+        if np is not None:
+            kwh = np.asarray(watts, dtype=float) * self.hours_per_month / 1000
+            kwh_values = kwh.tolist()
+            cost_values = (kwh * self.price_per_kwh).tolist()
+        else:
+            kwh_values = [(value * self.hours_per_month) / 1000 for value in watts]
+            cost_values = [value * self.price_per_kwh for value in kwh_values]
+
+        currency = self.currency
+        costs = list(map(round, cost_values, repeat(2)))
+        result: dict[str, dict[str, float]] = {
+            name: {"kwh": kwh, "monthly_cost": cost, "currency": currency}
+            for name, kwh, cost in zip(names, map(round, kwh_values, repeat(2)), costs, strict=True)
+        }
+        result["total"] = {"monthly_cost": round(sum(costs), 2), "currency": currency}
+        return result
+
+    def estimate_power(self, snapshot: InventorySnapshot | ColumnarSnapshot) -> dict[str, float]:
+        if not isinstance(snapshot, ColumnarSnapshot):
+            snapshot = columnar_view(snapshot)
+        cpu_dynamic, ram_dynamic = _dynamic_load_by_node(snapshot)
+
+        names = list(snapshot.node_names)
+        groups = None
+        if len(set(names)) != len(names):
+            first_index: dict[str, int] = {}
+            for index, name in enumerate(names):
+                first_index.setdefault(name, index)
+            # Workloads reference nodes by name, so duplicated names share the load
+            # of the first node with that name, as in the scalar path.
+            groups = [first_index[name] for name in names]
+        watts = _node_watts(snapshot, cpu_dynamic, ram_dynamic, groups)
+
+        per_node: dict[str, float] = dict(zip(names, map(round, watts, repeat(2)), strict=True))
+        per_node["total_watts"] = sum(per_node.values())
+        return per_node
+
+
+def columnar_view(snapshot: InventorySnapshot) -> ColumnarSnapshot:
+    """Columnar copy of ``snapshot``, built once and kept until its indexes are rebuilt."""
+
+    return snapshot.derived("columnar", ColumnarSnapshot.from_snapshot)
+
+
+def _node_watts(snapshot: ColumnarSnapshot, cpu_dynamic, ram_dynamic, groups: list[int] | None):
+    if np is not None:
+        if groups is not None:
+            cpu_dynamic, ram_dynamic = cpu_dynamic[groups], ram_dynamic[groups]
+        watts = np.asarray(snapshot.node_idle_watts, dtype=float)
+        watts = watts + cpu_dynamic * np.asarray(snapshot.node_watts_per_cpu_core)
+        watts = watts + ram_dynamic * np.asarray(snapshot.node_watts_per_gb_ram)
+        return watts.tolist()
+    if groups is None:
+        groups = range(snapshot.node_count)
+    return [
+        float(idle) + cpu_dynamic[group] * per_cpu + ram_dynamic[group] * per_gb
+        for idle, per_cpu, per_gb, group in zip(
+            snapshot.node_idle_watts,
+            snapshot.node_watts_per_cpu_core,
+            snapshot.node_watts_per_gb_ram,
+            groups,
+            strict=True,
+        )
+    ]
+
+
+def _dynamic_load_by_node(snapshot: ColumnarSnapshot):
+    node_count = snapshot.node_count
+    if np is not None:
+        node_index = np.asarray(snapshot.workload_node_index)
+        utilization = np.maximum(np.asarray(snapshot.average_utilization()), 0)
+        cpu = np.asarray(snapshot.workload_cpu_cores) * utilization
+        ram = np.asarray(snapshot.workload_memory_gb) * utilization
+        placed = node_index >= 0
+        if not placed.all():
+            node_index, cpu, ram = node_index[placed], cpu[placed], ram[placed]
+        return (
+            np.bincount(node_index, weights=cpu, minlength=node_count),
+            np.bincount(node_index, weights=ram, minlength=node_count),
+        )
+
+    cpu_dynamic = [0.0] * node_count
+    ram_dynamic = [0.0] * node_count
+    for group, cpu, ram, utilization in zip(
+        snapshot.workload_node_index,
+        snapshot.workload_cpu_cores,
+        snapshot.workload_memory_gb,
+        snapshot.average_utilization(),
+        strict=True,
+    ):
+        if group < 0:
+            continue
+        utilization = max(utilization, 0)
+        cpu_dynamic[group] += cpu * utilization
+        ram_dynamic[group] += ram * utilization
+    return cpu_dynamic, ram_dynamic
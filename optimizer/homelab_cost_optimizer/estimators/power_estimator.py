@@ -7,16 +7,17 @@ class PowerEstimator:
     def estimate(self, snapshot: InventorySnapshot) -> dict[str, float]:
         per_node: dict[str, float] = {}
         for node in snapshot.nodes:
-            workloads = [w for w in snapshot.workloads if w.node_name == node.name]
-            per_node[node.name] = self._estimate_node(node, workloads)
+            per_node[node.name] = self._estimate_node(node, snapshot.workloads_on(node.name))
         total = sum(per_node.values())
         per_node["total_watts"] = total
         return per_node
 
     def _estimate_node(self, node: Node, workloads: list[Workload]) -> float:
         profile = node.power_profile
-        cpu_dynamic = sum(w.cpu_cores * max(w.utilization, 0) for w in workloads)
-        ram_dynamic = sum(w.memory_gb * max(w.utilization, 0) for w in workloads)
+        # Power is linear in utilization, so the mean of a series gives the
+        # average watts over its window (energy integral / duration).
+        cpu_dynamic = sum(w.cpu_cores * max(w.average_utilization(), 0) for w in workloads)
+        ram_dynamic = sum(w.memory_gb * max(w.average_utilization(), 0) for w in workloads)
         watts = profile.base_idle_watts
         watts += cpu_dynamic * profile.watts_per_cpu_core
         watts += ram_dynamic * profile.watts_per_gb_ram
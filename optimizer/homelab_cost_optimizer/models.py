@@ -1,6 +1,16 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from .timeseries import UtilizationSeries
+
+# Node kind of switches and routers. Their interfaces are workloads of type
+# ``interface`` and consolidators leave both alone.
+NETWORK_NODE_KIND = "network"
+
+T = TypeVar("T")
 
 
 @dataclass
@@ -32,16 +42,120 @@ class Workload:
     utilization: float
     node_name: str
     labels: dict[str, str] = field(default_factory=dict)
+    utilization_series: UtilizationSeries | None = None
+
+    def average_utilization(self) -> float:
+        """Mean of the utilization series when present, else ``utilization``."""
+
+        if self.utilization_series is not None and len(self.utilization_series):
+            return self.utilization_series.mean()
+        return self.utilization
+
+
+class _TrackedList(list):
+    """A list that counts its mutations, so indexes built from it can tell they are stale."""
+
+    version = 0
+
+
+def _counting(name: str):
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    mutate.__name__ = name
+    return mutate
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(_TrackedList, _name, _counting(_name))
+
+
+def _key(nodes: list[Node], workloads: list[Workload]) -> tuple[int, int]:
+    return getattr(nodes, "version", 0), getattr(workloads, "version", 0)
+
+
+class _SnapshotIndex:
+    """Lookup tables derived from a snapshot's node and workload lists."""
+
+    def __init__(self, nodes: list[Node], workloads: list[Workload]) -> None:
+        self.key = _key(nodes, workloads)
+        self.nodes_by_name: dict[str, Node] = {}
+        for node in nodes:
+            # Keep the first node for duplicated names, as the old linear scan did.
+            self.nodes_by_name.setdefault(node.name, node)
+        self.workloads_by_node: dict[str, list[Workload]] = {}
+        self.workloads_by_type: dict[str, list[Workload]] = {}
+        # Other views of the snapshot, built on request by ``InventorySnapshot.derived``.
+        self.derived: dict[str, Any] = {}
+        for workload in workloads:
+            self.workloads_by_node.setdefault(workload.node_name, []).append(workload)
+            self.workloads_by_type.setdefault(workload.workload_type, []).append(workload)
 
 
 @dataclass
 class InventorySnapshot:
+    """Inventory of nodes and workloads with lazily built lookup indexes.
+
+    ``nodes`` and ``workloads`` are copied into lists that count their mutations.
+    Indexes, and views cached with :meth:`derived`, are rebuilt on
+    first use after either list is reassigned or changed (append, remove,
+    item assignment and so on). Call :meth:`invalidate_indexes` after changing
+    a node or workload itself (for example renaming a node or moving a
+    workload to another node).
+    """
+
     nodes: list[Node]
     workloads: list[Workload]
     metadata: dict[str, str] = field(default_factory=dict)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in {"nodes", "workloads"}:
+            if not isinstance(value, _TrackedList):
+                value = _TrackedList(value)
+            super().__setattr__(name, value)
+            self.invalidate_indexes()
+        else:
+            super().__setattr__(name, value)
+
+    def invalidate_indexes(self) -> None:
+        self.__dict__["_index"] = None
+
+    def _indexes(self) -> _SnapshotIndex:
+        index = self.__dict__.get("_index")
+        if index is None or index.key != _key(self.nodes, self.workloads):
+            index = _SnapshotIndex(self.nodes, self.workloads)
+            self.__dict__["_index"] = index
+        return index
+
+    def derived(self, name: str, build: Callable[[InventorySnapshot], T]) -> T:
+        """``build(self)``, cached under ``name`` until the indexes are rebuilt."""
+
+        views = self._indexes().derived
+        if name not in views:
+            views[name] = build(self)
+        return views[name]
+
     def node_by_name(self, name: str) -> Node | None:
-        for node in self.nodes:
-            if node.name == name:
-                return node
-        return None
+        return self._indexes().nodes_by_name.get(name)
+
+    def workloads_on(self, node_name: str) -> list[Workload]:
+        return list(self._indexes().workloads_by_node.get(node_name, ()))
+
+    def workloads_of_type(self, workload_type: str) -> list[Workload]:
+        return list(self._indexes().workloads_by_type.get(workload_type, ()))
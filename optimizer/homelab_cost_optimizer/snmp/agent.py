@@ -0,0 +1,465 @@
+"""Simulated RouterOS SNMP agents for load-testing the Zabbix templates.
+
+Each :class:`SimulatedDevice` serves the objects the templates poll: system
+scalars, the MIKROTIK-MIB health/version scalars, host resources, IF-MIB
+``ifTable``/``ifXTable`` rows per interface, BGP peers and OSPF neighbors.
+Values are computed from the clock when requested, so thousands of devices
+cost little memory; devices with the same shape share one sorted OID view.
+
+64-bit octet counters run at a fixed per-interface rate from a random
+offset. A share of interfaces start close to 2**64 and wrap after
+``wrap_after`` seconds, and with ``reset_every`` the whole device "reboots"
+periodically: uptime and all counters restart from zero.
+
+:class:`SnmpAgent` answers SNMPv2c (community) and SNMPv3 (USM) requests for
+one device on its own UDP port; :func:`serve_devices` starts many of them in
+one event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import time
+import zlib
+from bisect import bisect_right
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+
+from ..zabbix.poll_load import CountDistribution
+from . import ber, usm
+from .ber import Oid, VarBind
+from .mib import OBJECTS
+
+COUNTER64 = 2**64
+COUNTER32 = 2**32
+SPEEDS_MBPS = (100, 1000, 1000, 1000, 2500, 10000)
+# Engine IDs in the RFC 3411 text format under the MikroTik enterprise number.
+ENGINE_PREFIX = b"\x80\x00\x3a\x8c\x04"
+
+_USM_STATS = (1, 3, 6, 1, 6, 3, 15, 1, 1)
+UNSUPPORTED_SEC_LEVELS = (*_USM_STATS, 1, 0)
+NOT_IN_TIME_WINDOWS = (*_USM_STATS, 2, 0)
+UNKNOWN_USER_NAMES = (*_USM_STATS, 3, 0)
+UNKNOWN_ENGINE_IDS = (*_USM_STATS, 4, 0)
+WRONG_DIGESTS = (*_USM_STATS, 5, 0)
+DECRYPTION_ERRORS = (*_USM_STATS, 6, 0)
+TIME_WINDOW = 150
+MAX_DATAGRAM = 65507
+
+_SCALARS = (
+    "sysDescr",
+    "sysUpTime",
+    "sysContact",
+    "sysName",
+    "sysLocation",
+    "hrMemorySize",
+    "mtxrHlVoltage",
+    "mtxrHlTemperature",
+    "mtxrFirmwareVersion",
+    "mtxrSerialNumber",
+)
+_IF_COLUMNS = (
+    "ifIndex",
+    "ifDescr",
+    "ifType",
+    "ifAdminStatus",
+    "ifOperStatus",
+    "ifInDiscards",
+    "ifInErrors",
+    "ifOutDiscards",
+    "ifOutErrors",
+    "ifName",
+    "ifHCInOctets",
+    "ifHCInMulticastPkts",
+    "ifHCInBroadcastPkts",
+    "ifHCOutOctets",
+    "ifHighSpeed",
+    "ifAlias",
+)
+_BGP_COLUMNS = ("bgpPeerState", "bgpPeerRemoteAddr", "bgpPeerRemoteAs", "bgpPeerInTotalMessages")
+_OSPF_COLUMNS = ("ospfNbrIpAddr", "ospfNbrRtrId", "ospfNbrState")
+
+
+def _oid(name: str) -> Oid:
+    return next(oid for key, oid in OBJECTS.items() if key.endswith(f"::{name}"))
+
+
+def _bgp_index(row: int) -> Oid:
+    return (10, 255, row // 256, row % 256)
+
+
+def _ospf_index(row: int) -> Oid:
+    # Indexed by neighbor address only, as the template's item prototypes expect.
+    return (10, 254, row // 256, row % 256)
+
+
+@lru_cache(maxsize=256)
+def _view(interfaces: int, bgp_peers: int, ospf_neighbors: int):
+    """Sorted OIDs, their ``(column, row)`` and an exact-match index for one shape."""
+
+    entries: list[tuple[Oid, tuple[str, int]]] = [
+        (_oid(name) + (0,), (name, 0)) for name in _SCALARS
+    ]
+    entries.append((_oid("hrStorageUsed") + (1,), ("hrStorageUsed", 1)))
+    entries.append((_oid("hrProcessorLoad") + (1,), ("hrProcessorLoad", 1)))
+    for name in _IF_COLUMNS:
+        base = _oid(name)
+        entries.extend((base + (row,), (name, row)) for row in range(1, interfaces + 1))
+    for name in _BGP_COLUMNS:
+        base = _oid(name)
+        entries.extend((base + _bgp_index(row), (name, row)) for row in range(1, bgp_peers + 1))
+    for name in _OSPF_COLUMNS:
+        base = _oid(name)
+        entries.extend(
+            (base + _ospf_index(row), (name, row)) for row in range(1, ospf_neighbors + 1)
+        )
+    entries.sort()
+    oids = [oid for oid, _ in entries]
+    return oids, [spec for _, spec in entries], {oid: i for i, oid in enumerate(oids)}
+
+
+class SimulatedDevice:
+    """A RouterOS device whose MIB values are a function of time."""
+
+    def __init__(
+        self,
+        name: str,
+        interfaces: int = 24,
+        bgp_peers: int = 2,
+        ospf_neighbors: int = 2,
+        seed: int = 0,
+        wrap_after: float = 600.0,
+        wrap_fraction: float = 0.25,
+        reset_every: float | None = None,
+        started: float | None = None,
+    ) -> None:
+        if interfaces < 0 or bgp_peers < 0 or ospf_neighbors < 0:
+            raise ValueError("Entity counts must not be negative")
+        if reset_every is not None and reset_every <= 0:
+            raise ValueError("reset_every must be positive")
+        self.name = name
+        self.interfaces = interfaces
+        self.bgp_peers = bgp_peers
+        self.ospf_neighbors = ospf_neighbors
+        self.reset_every = reset_every
+        self.started = time.time() if started is None else started
+        rng = random.Random(f"{seed}:{name}")
+        self.speeds = [rng.choice(SPEEDS_MBPS) for _ in range(interfaces)]
+        self.up = [rng.random() > 0.15 for _ in range(interfaces)]
+        self.rates: list[tuple[float, float]] = []
+        self.offsets: list[tuple[int, int]] = []
+        for speed, up in zip(self.speeds, self.up, strict=True):
+            line_rate = speed * 1e6 / 8
+            rates = tuple(line_rate * rng.uniform(0.005, 0.4) if up else 0.0 for _ in range(2))
+            wraps = up and rng.random() < wrap_fraction
+            offsets = tuple(
+                (
+                    COUNTER64 - int(rate * wrap_after * rng.uniform(0.5, 1.5))
+                    if wraps
+                    else rng.randrange(2**48)
+                )
+                for rate in rates
+            )
+            self.rates.append(rates)
+            self.offsets.append(offsets)
+        self.cpu_phase = rng.uniform(0, 2 * math.pi)
+        self._oids, self._specs, self._index = _view(interfaces, bgp_peers, ospf_neighbors)
+        self._columns: dict[str, Callable[[int, float, bool], tuple[int, object]]] = {
+            "sysDescr": lambda row, up, fresh: (ber.OCTET_STRING, b"RouterOS CCR2004-16G-2S+"),
+            "sysUpTime": lambda row, up, fresh: (ber.TIMETICKS, int(up * 100) % COUNTER32),
+            "sysContact": lambda row, up, fresh: (ber.OCTET_STRING, b"noc@example.net"),
+            "sysName": lambda row, up, fresh: (ber.OCTET_STRING, self.name.encode()),
+            "sysLocation": lambda row, up, fresh: (ber.OCTET_STRING, b"lab"),
+            "hrMemorySize": lambda row, up, fresh: (ber.INTEGER, 1048576),
+            "hrStorageUsed": lambda row, up, fresh: (ber.INTEGER, 40000 + int(up) % 1000),
+            "hrProcessorLoad": self._cpu,
+            "mtxrHlVoltage": lambda row, up, fresh: (ber.INTEGER, 240),
+            "mtxrHlTemperature": lambda row, up, fresh: (ber.INTEGER, 410 + int(up) % 30),
+            "mtxrFirmwareVersion": lambda row, up, fresh: (ber.OCTET_STRING, b"7.14.3"),
+            "mtxrSerialNumber": lambda row, up, fresh: (
+                ber.OCTET_STRING,
+                f"HE{zlib.crc32(self.name.encode()) % 10**8:08d}".encode(),
+            ),
+            "ifIndex": lambda row, up, fresh: (ber.INTEGER, row),
+            "ifDescr": lambda row, up, fresh: (ber.OCTET_STRING, self.interface_name(row)),
+            "ifName": lambda row, up, fresh: (ber.OCTET_STRING, self.interface_name(row)),
+            "ifAlias": lambda row, up, fresh: (ber.OCTET_STRING, b"uplink" if row == 1 else b""),
+            "ifType": lambda row, up, fresh: (ber.INTEGER, 6),
+            "ifAdminStatus": lambda row, up, fresh: (ber.INTEGER, 1),
+            "ifOperStatus": lambda row, up, fresh: (ber.INTEGER, 1 if self.up[row - 1] else 2),
+            "ifHighSpeed": lambda row, up, fresh: (ber.GAUGE32, self.speeds[row - 1]),
+            "ifHCInOctets": lambda row, up, fresh: self._octets(row, 0, up, fresh),
+            "ifHCOutOctets": lambda row, up, fresh: self._octets(row, 1, up, fresh),
+            "ifHCInMulticastPkts": lambda row, up, fresh: self._packets(row, up, 1e-5),
+            "ifHCInBroadcastPkts": lambda row, up, fresh: self._packets(row, up, 2e-5),
+            "ifInDiscards": lambda row, up, fresh: self._errors(row, up, 1e-3),
+            "ifInErrors": lambda row, up, fresh: self._errors(row, up, 1e-4),
+            "ifOutDiscards": lambda row, up, fresh: self._errors(row, up, 1e-3),
+            "ifOutErrors": lambda row, up, fresh: self._errors(row, up, 1e-4),
+            "bgpPeerState": lambda row, up, fresh: (ber.INTEGER, 6),
+            "bgpPeerRemoteAddr": lambda row, up, fresh: (ber.IP_ADDRESS, bytes(_bgp_index(row))),
+            "bgpPeerRemoteAs": lambda row, up, fresh: (ber.INTEGER, 65000 + row),
+            "bgpPeerInTotalMessages": lambda row, up, fresh: (
+                ber.COUNTER32,
+                int(up / 30) % COUNTER32,
+            ),
+            "ospfNbrIpAddr": lambda row, up, fresh: (ber.IP_ADDRESS, bytes(_ospf_index(row))),
+            "ospfNbrRtrId": lambda row, up, fresh: (
+                ber.IP_ADDRESS,
+                bytes((10, 0, row // 256, row % 256)),
+            ),
+            "ospfNbrState": lambda row, up, fresh: (ber.INTEGER, 8),
+        }
+
+    def interface_name(self, row: int) -> bytes:
+        if row > self.interfaces - 2 and self.interfaces > 2:
+            return f"sfp-sfpplus{row - self.interfaces + 2}".encode()
+        return f"ether{row}".encode()
+
+    def resets(self, now: float) -> int:
+        if self.reset_every is None:
+            return 0
+        return int(max(now - self.started, 0) // self.reset_every)
+
+    def uptime(self, now: float) -> float:
+        elapsed = max(now - self.started, 0.0)
+        return elapsed % self.reset_every if self.reset_every else elapsed
+
+    def get(self, oid: Oid, now: float) -> VarBind:
+        position = self._index.get(oid)
+        if position is None:
+            return VarBind(oid, ber.NO_SUCH_OBJECT)
+        return self._varbind(position, now)
+
+    def get_next(self, oid: Oid, now: float) -> VarBind:
+        position = bisect_right(self._oids, oid)
+        if position == len(self._oids):
+            return VarBind(oid, ber.END_OF_MIB_VIEW)
+        return self._varbind(position, now)
+
+    def get_bulk(
+        self, oids: list[Oid], non_repeaters: int, max_repetitions: int, now: float
+    ) -> list[VarBind]:
+        non_repeaters = min(max(non_repeaters, 0), len(oids))
+        varbinds = [self.get_next(oid, now) for oid in oids[:non_repeaters]]
+        current = list(oids[non_repeaters:])
+        for _ in range(max(max_repetitions, 0)):
+            row = [self.get_next(oid, now) for oid in current]
+            varbinds.extend(row)
+            if not current or all(vb.tag == ber.END_OF_MIB_VIEW for vb in row):
+                break
+            current = [vb.oid for vb in row]
+        return varbinds
+
+    def _varbind(self, position: int, now: float) -> VarBind:
+        name, row = self._specs[position]
+        tag, value = self._columns[name](row, self.uptime(now), self.resets(now) == 0)
+        return VarBind(self._oids[position], tag, value)
+
+    def _octets(self, row: int, direction: int, up: float, fresh: bool) -> tuple[int, int]:
+        offset = self.offsets[row - 1][direction] if fresh else 0
+        return ber.COUNTER64, (offset + int(self.rates[row - 1][direction] * up)) % COUNTER64
+
+    def _packets(self, row: int, up: float, share: float) -> tuple[int, int]:
+        return ber.COUNTER64, int(self.rates[row - 1][0] * share * up) % COUNTER64
+
+    def _errors(self, row: int, up: float, per_second: float) -> tuple[int, int]:
+        rate = per_second if self.up[row - 1] else 0.0
+        return ber.COUNTER32, int(rate * up) % COUNTER32
+
+    def _cpu(self, row: int, up: float, fresh: bool) -> tuple[int, int]:
+        return ber.INTEGER, int(20 + 15 * math.sin(up / 300 + self.cpu_phase))
+
+
+@dataclass
+class AgentStats:
+    requests: int = 0
+    varbinds: int = 0
+    reports: int = 0
+    dropped: int = 0
+
+
+class SnmpAgent(asyncio.DatagramProtocol):
+    """SNMPv2c/v3 responder for one simulated device.
+
+    ``community=None`` accepts any community. SNMPv3 users must use exactly
+    the security level they were configured with.
+    """
+
+    def __init__(
+        self,
+        device: SimulatedDevice,
+        community: bytes | None = b"public",
+        users: Iterable[usm.UsmUser] = (),
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.device = device
+        self.community = community
+        self.clock = clock
+        self.engine_id = ENGINE_PREFIX + device.name.encode()
+        self.keys = {
+            user.name.encode(): usm.LocalizedKeys.for_engine(user, self.engine_id) for user in users
+        }
+        self.stats = AgentStats()
+        self.transport: asyncio.DatagramTransport | None = None
+        self._salt = random.Random(device.name).randrange(2**63)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.transport.get_extra_info("sockname")[:2]
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        response = self.handle(data)
+        if response is not None:
+            self.transport.sendto(response, addr)
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+    def handle(self, data: bytes) -> bytes | None:
+        """Response datagram for ``data``, or ``None`` to drop it."""
+
+        try:
+            message = ber.decode_message(data)
+        except ValueError:
+            self.stats.dropped += 1
+            return None
+        now = self.clock()
+        if message.version == ber.V2C:
+            if self.community is not None and message.community != self.community:
+                self.stats.dropped += 1
+                return None
+            return self._respond(message.pdu, now, MAX_DATAGRAM, ber.encode_v2c, message.community)
+        return self._handle_v3(message, now)
+
+    def engine_boots(self, now: float) -> int:
+        return self.device.resets(now) + 1
+
+    def engine_time(self, now: float) -> int:
+        return int(self.device.uptime(now))
+
+    def _handle_v3(self, message: ber.Message, now: float) -> bytes | None:
+        params = message.usm
+        if params.engine_id != self.engine_id:
+            return self._report(message, UNKNOWN_ENGINE_IDS, now)
+        keys = self.keys.get(params.user)
+        if keys is None:
+            return self._report(message, UNKNOWN_USER_NAMES, now)
+        flags = message.flags & (ber.FLAG_AUTH | ber.FLAG_PRIV)
+        if flags != keys.user.flags:
+            return self._report(message, UNSUPPORTED_SEC_LEVELS, now)
+        if flags & ber.FLAG_AUTH:
+            if not keys.verify(message):
+                return self._report(message, WRONG_DIGESTS, now)
+            boots, engine_time = self.engine_boots(now), self.engine_time(now)
+            if params.engine_boots != boots or abs(params.engine_time - engine_time) > TIME_WINDOW:
+                return self._report(message, NOT_IN_TIME_WINDOWS, now)
+        try:
+            usm.open_message(message, keys)
+        except ValueError:
+            return self._report(message, DECRYPTION_ERRORS, now)
+
+        def encode(user: bytes, pdu: ber.Pdu) -> bytes:
+            self._salt = (self._salt + 1) % 2**64
+            return usm.encode_message(
+                pdu,
+                keys,
+                self._usm(params.user, now),
+                message.msg_id,
+                flags,
+                self.engine_id,
+                salt=self._salt,
+                max_size=message.max_size,
+            )
+
+        return self._respond(message.pdu, now, min(message.max_size, MAX_DATAGRAM), encode, b"")
+
+    def _respond(self, pdu: ber.Pdu, now: float, limit: int, encode, context) -> bytes | None:
+        self.stats.requests += 1
+        if pdu.type == ber.GET:
+            varbinds = [self.device.get(vb.oid, now) for vb in pdu.varbinds]
+        elif pdu.type == ber.GET_NEXT:
+            varbinds = [self.device.get_next(vb.oid, now) for vb in pdu.varbinds]
+        elif pdu.type == ber.GET_BULK:
+            oids = [vb.oid for vb in pdu.varbinds]
+            varbinds = self.device.get_bulk(oids, pdu.error_status, pdu.error_index, now)
+        else:
+            self.stats.dropped += 1
+            return None
+        response = ber.Pdu(ber.RESPONSE, pdu.request_id, varbinds)
+        data = encode(context, response)
+        # GETBULK answers drop trailing varbinds until the datagram fits.
+        while len(data) > limit and pdu.type == ber.GET_BULK and len(response.varbinds) > 1:
+            response.varbinds = response.varbinds[: len(response.varbinds) * 3 // 4]
+            data = encode(context, response)
+        if len(data) > limit:
+            response = ber.Pdu(ber.RESPONSE, pdu.request_id, pdu.varbinds, error_status=1)
+            data = encode(context, response)
+        self.stats.varbinds += len(response.varbinds)
+        return data
+
+    def _report(self, message: ber.Message, counter: Oid, now: float) -> bytes:
+        self.stats.reports += 1
+        request_id = message.pdu.request_id if message.pdu is not None else 0
+        report = ber.Pdu(ber.REPORT, request_id, [VarBind(counter, ber.COUNTER32, 1)])
+        return usm.encode_message(
+            report, None, self._usm(b"", now), message.msg_id, 0, self.engine_id
+        )
+
+    def _usm(self, user: bytes, now: float) -> ber.UsmParameters:
+        return ber.UsmParameters(
+            self.engine_id, self.engine_boots(now), self.engine_time(now), user
+        )
+
+
+def simulate_fleet(
+    count: int,
+    interfaces: CountDistribution | None = None,
+    bgp_peers: int = 2,
+    ospf_neighbors: int = 2,
+    seed: int = 0,
+    **kwargs,
+) -> list[SimulatedDevice]:
+    """``count`` devices named ``sim-0001``... with interface counts drawn from ``interfaces``."""
+
+    interfaces = interfaces or CountDistribution([(24, 1.0)])
+    rng = random.Random(seed)
+    counts, weights = zip(*interfaces.buckets, strict=True)
+    return [
+        SimulatedDevice(
+            f"sim-{index + 1:04d}",
+            interfaces=rng.choices(counts, weights)[0],
+            bgp_peers=bgp_peers,
+            ospf_neighbors=ospf_neighbors,
+            seed=seed,
+            **kwargs,
+        )
+        for index in range(count)
+    ]
+
+
+async def serve_devices(
+    devices: Iterable[SimulatedDevice],
+    host: str = "127.0.0.1",
+    base_port: int = 16100,
+    community: bytes | None = b"public",
+    users: Iterable[usm.UsmUser] = (),
+) -> list[SnmpAgent]:
+    """Start one agent per device on consecutive ports (``base_port=0`` picks free ones)."""
+
+    loop = asyncio.get_running_loop()
+    users = tuple(users)
+    agents = []
+    for offset, device in enumerate(devices):
+        agent = SnmpAgent(device, community, users)
+        port = base_port + offset if base_port else 0
+        await loop.create_datagram_endpoint(lambda agent=agent: agent, local_addr=(host, port))
+        agents.append(agent)
+    return agents
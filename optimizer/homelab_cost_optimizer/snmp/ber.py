@@ -0,0 +1,374 @@
+"""Minimal BER codec for SNMPv2c and SNMPv3 messages.
+
+Covers what the agent simulator and the poller exchange: GET, GETNEXT,
+GETBULK, RESPONSE and REPORT PDUs, the SNMPv2 application types and the
+SNMPv3 message header with USM security parameters. Authentication and
+privacy are applied by :mod:`.usm`; this module only places and finds the
+fields they need.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIMETICKS = 0x43
+COUNTER64 = 0x46
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+
+GET = 0xA0
+GET_NEXT = 0xA1
+RESPONSE = 0xA2
+GET_BULK = 0xA5
+REPORT = 0xA8
+
+V2C = 1
+V3 = 3
+USM_SECURITY_MODEL = 3
+
+FLAG_AUTH = 0x01
+FLAG_PRIV = 0x02
+FLAG_REPORTABLE = 0x04
+
+_INTEGER_TAGS = {INTEGER, COUNTER32, GAUGE32, TIMETICKS, COUNTER64}
+_EXCEPTIONS = {NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW}
+
+Oid = tuple[int, ...]
+
+
+@dataclass
+class VarBind:
+    oid: Oid
+    tag: int = NULL
+    value: int | bytes | Oid | None = None
+
+
+@dataclass
+class Pdu:
+    """An SNMP PDU; GETBULK keeps non-repeaters/max-repetitions in the error fields."""
+
+    type: int
+    request_id: int
+    varbinds: list[VarBind] = field(default_factory=list)
+    error_status: int = 0
+    error_index: int = 0
+
+
+@dataclass
+class UsmParameters:
+    engine_id: bytes = b""
+    engine_boots: int = 0
+    engine_time: int = 0
+    user: bytes = b""
+    auth: bytes = b""
+    priv: bytes = b""
+
+
+@dataclass
+class Message:
+    """A decoded SNMP message.
+
+    For SNMPv3 ``pdu`` is ``None`` while the scoped PDU is still encrypted;
+    ``auth_offset`` is where the authentication parameters sit in ``raw``.
+    """
+
+    version: int
+    pdu: Pdu | None
+    community: bytes = b""
+    msg_id: int = 0
+    max_size: int = 65507
+    flags: int = 0
+    usm: UsmParameters | None = None
+    context_engine_id: bytes = b""
+    context_name: bytes = b""
+    encrypted: bytes = b""
+    raw: bytes = b""
+    auth_offset: int = -1
+
+
+def encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes([length])
+    size = (length.bit_length() + 7) // 8
+    return bytes([0x80 | size]) + length.to_bytes(size, "big")
+
+
+def tlv(tag: int, payload: bytes) -> bytes:
+    return bytes([tag]) + encode_length(len(payload)) + payload
+
+
+def encode_integer(value: int, tag: int = INTEGER) -> bytes:
+    size = ((value if value >= 0 else ~value).bit_length() + 8) // 8
+    return tlv(tag, value.to_bytes(size, "big", signed=True))
+
+
+def encode_oid(oid: Oid) -> bytes:
+    if len(oid) < 2:
+        raise ValueError(f"OID needs at least two components: {oid}")
+    out = bytearray()
+    for number in (40 * oid[0] + oid[1], *oid[2:]):
+        chunk = [number & 0x7F]
+        number >>= 7
+        while number:
+            chunk.append(0x80 | (number & 0x7F))
+            number >>= 7
+        out.extend(reversed(chunk))
+    return tlv(OBJECT_IDENTIFIER, bytes(out))
+
+
+def encode_value(tag: int, value) -> bytes:
+    if tag in _INTEGER_TAGS:
+        return encode_integer(value, tag)
+    if tag == OBJECT_IDENTIFIER:
+        return encode_oid(value)
+    if tag in (OCTET_STRING, IP_ADDRESS):
+        return tlv(tag, value)
+    return tlv(tag, b"")
+
+
+def encode_pdu(pdu: Pdu) -> bytes:
+    varbinds = b"".join(
+        tlv(SEQUENCE, encode_oid(vb.oid) + encode_value(vb.tag, vb.value)) for vb in pdu.varbinds
+    )
+    return tlv(
+        pdu.type,
+        encode_integer(pdu.request_id)
+        + encode_integer(pdu.error_status)
+        + encode_integer(pdu.error_index)
+        + tlv(SEQUENCE, varbinds),
+    )
+
+
+def encode_scoped_pdu(pdu: Pdu, context_engine_id: bytes, context_name: bytes = b"") -> bytes:
+    return tlv(
+        SEQUENCE,
+        tlv(OCTET_STRING, context_engine_id) + tlv(OCTET_STRING, context_name) + encode_pdu(pdu),
+    )
+
+
+def encode_v2c(community: bytes, pdu: Pdu) -> bytes:
+    return tlv(SEQUENCE, encode_integer(V2C) + tlv(OCTET_STRING, community) + encode_pdu(pdu))
+
+
+def encode_v3(
+    msg_id: int,
+    flags: int,
+    usm: UsmParameters,
+    scoped: bytes,
+    max_size: int = 65507,
+    auth_length: int = 0,
+) -> tuple[bytes, int]:
+    """Encode an SNMPv3 message around an already encoded (or encrypted) scoped PDU.
+
+    ``auth_length`` zero bytes are reserved for the authentication parameters;
+    the return value is the message and the offset of that placeholder.
+    """
+
+    header = tlv(
+        SEQUENCE,
+        encode_integer(msg_id)
+        + encode_integer(max_size)
+        + tlv(OCTET_STRING, bytes([flags]))
+        + encode_integer(USM_SECURITY_MODEL),
+    )
+    before_auth = (
+        tlv(OCTET_STRING, usm.engine_id)
+        + encode_integer(usm.engine_boots)
+        + encode_integer(usm.engine_time)
+        + tlv(OCTET_STRING, usm.user)
+    )
+    auth = tlv(OCTET_STRING, bytes(auth_length))
+    security = tlv(SEQUENCE, before_auth + auth + tlv(OCTET_STRING, usm.priv))
+    wrapped = tlv(OCTET_STRING, security)
+    version = encode_integer(V3)
+    message = tlv(SEQUENCE, version + header + wrapped + scoped)
+    auth_at = (
+        _header_size(message)
+        + len(version)
+        + len(header)
+        + _header_size(wrapped)
+        + _header_size(security)
+        + len(before_auth)
+        + len(auth)
+        - auth_length
+    )
+    return message, auth_at
+
+
+def decode_message(data: bytes) -> Message:
+    """Decode an SNMPv2c or SNMPv3 message; malformed input raises ``ValueError``."""
+
+    try:
+        tag, start, end = read_tlv(data, 0)
+        _expect(tag, SEQUENCE)
+        tag, pos, after = read_tlv(data, start)
+        version = decode_integer(data[pos:after])
+        if version == V2C:
+            tag, pos, after2 = read_tlv(data, after)
+            _expect(tag, OCTET_STRING)
+            community = data[pos:after2]
+            pdu, _ = decode_pdu(data, after2)
+            return Message(V2C, pdu, community=community, raw=data)
+        if version != V3:
+            raise ValueError(f"Unsupported SNMP version {version}")
+        return _decode_v3(data, after)
+    except (IndexError, OverflowError) as exc:
+        raise ValueError("Malformed SNMP message") from exc
+
+
+def decode_pdu(data: bytes, offset: int) -> tuple[Pdu, int]:
+    tag, start, end = read_tlv(data, offset)
+    if tag not in (GET, GET_NEXT, RESPONSE, GET_BULK, REPORT):
+        raise ValueError(f"Unsupported PDU type 0x{tag:02x}")
+    numbers = []
+    pos = start
+    for _ in range(3):
+        _, value_start, pos = read_tlv(data, pos)
+        numbers.append(decode_integer(data[value_start:pos]))
+    list_tag, pos, list_end = read_tlv(data, pos)
+    _expect(list_tag, SEQUENCE)
+    varbinds = []
+    while pos < list_end:
+        _, vb_start, pos = read_tlv(data, pos)
+        oid_tag, oid_start, value_at = read_tlv(data, vb_start)
+        _expect(oid_tag, OBJECT_IDENTIFIER)
+        value_tag, value_start, value_end = read_tlv(data, value_at)
+        value = decode_value(value_tag, data[value_start:value_end])
+        varbinds.append(VarBind(decode_oid(data[oid_start:value_at]), value_tag, value))
+    request_id, error_status, error_index = numbers
+    return Pdu(tag, request_id, varbinds, error_status, error_index), end
+
+
+def decode_scoped_pdu(data: bytes, offset: int = 0) -> tuple[bytes, bytes, Pdu]:
+    tag, start, _ = read_tlv(data, offset)
+    _expect(tag, SEQUENCE)
+    _, pos, after = read_tlv(data, start)
+    engine_id = data[pos:after]
+    _, pos, after2 = read_tlv(data, after)
+    pdu, _ = decode_pdu(data, after2)
+    return engine_id, data[pos:after2], pdu
+
+
+def read_tlv(data: bytes, offset: int) -> tuple[int, int, int]:
+    """Return ``(tag, value start, value end)`` of the element at ``offset``."""
+
+    tag = data[offset]
+    length = data[offset + 1]
+    pos = offset + 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[pos : pos + size], "big")
+        pos += size
+    if pos + length > len(data):
+        raise ValueError("Truncated SNMP message")
+    return tag, pos, pos + length
+
+
+def decode_integer(payload: bytes, signed: bool = True) -> int:
+    return int.from_bytes(payload, "big", signed=signed)
+
+
+def decode_oid(payload: bytes) -> Oid:
+    numbers = []
+    number = 0
+    for byte in payload:
+        number = (number << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            numbers.append(number)
+            number = 0
+    if not numbers:
+        raise ValueError("Empty OID")
+    first = numbers[0]
+    head = (first // 40, first % 40) if first < 80 else (2, first - 80)
+    return (*head, *numbers[1:])
+
+
+def decode_value(tag: int, payload: bytes):
+    if tag == INTEGER:
+        return decode_integer(payload)
+    if tag in _INTEGER_TAGS:
+        return decode_integer(payload, signed=False)
+    if tag == OBJECT_IDENTIFIER:
+        return decode_oid(payload)
+    if tag in _EXCEPTIONS or tag == NULL:
+        return None
+    return payload
+
+
+def format_oid(oid: Oid) -> str:
+    return ".".join(map(str, oid))
+
+
+def parse_oid(text: str) -> Oid:
+    return tuple(int(part) for part in text.strip(".").split("."))
+
+
+def _decode_v3(data: bytes, offset: int) -> Message:
+    tag, pos, after = read_tlv(data, offset)
+    _expect(tag, SEQUENCE)
+    fields = []
+    for _ in range(4):
+        field_tag, value_start, pos = read_tlv(data, pos)
+        fields.append(data[value_start:pos])
+    msg_id, max_size = decode_integer(fields[0]), decode_integer(fields[1])
+    flags = fields[2][0] if fields[2] else 0
+    if decode_integer(fields[3]) != USM_SECURITY_MODEL:
+        raise ValueError("Only the user-based security model is supported")
+
+    tag, pos, scoped_at = read_tlv(data, after)
+    _expect(tag, OCTET_STRING)
+    tag, pos, _ = read_tlv(data, pos)
+    _expect(tag, SEQUENCE)
+    values = []
+    auth_offset = -1
+    for index in range(6):
+        _, value_start, pos = read_tlv(data, pos)
+        if index == 4:
+            auth_offset = value_start
+        values.append(data[value_start:pos])
+    usm = UsmParameters(
+        engine_id=values[0],
+        engine_boots=decode_integer(values[1]),
+        engine_time=decode_integer(values[2]),
+        user=values[3],
+        auth=values[4],
+        priv=values[5],
+    )
+    message = Message(
+        V3,
+        None,
+        msg_id=msg_id,
+        max_size=max_size,
+        flags=flags,
+        usm=usm,
+        raw=data,
+        auth_offset=auth_offset,
+    )
+    if flags & FLAG_PRIV:
+        tag, pos, end = read_tlv(data, scoped_at)
+        _expect(tag, OCTET_STRING)
+        message.encrypted = data[pos:end]
+    else:
+        message.context_engine_id, message.context_name, message.pdu = decode_scoped_pdu(
+            data, scoped_at
+        )
+    return message
+
+
+def _header_size(element: bytes) -> int:
+    _, start, _ = read_tlv(element, 0)
+    return start
+
+
+def _expect(tag: int, expected: int) -> None:
+    if tag != expected:
+        raise ValueError(f"Expected BER tag 0x{expected:02x}, got 0x{tag:02x}")
@@ -0,0 +1,68 @@
+"""Numeric OIDs of the MIB objects the MikroTik templates reference."""
+
+from __future__ import annotations
+
+from .ber import Oid, parse_oid
+
+_IF_ENTRY = (1, 3, 6, 1, 2, 1, 2, 2, 1)
+_IFX_ENTRY = (1, 3, 6, 1, 2, 1, 31, 1, 1, 1)
+_BGP_PEER_ENTRY = (1, 3, 6, 1, 2, 1, 15, 3, 1)
+_OSPF_NBR_ENTRY = (1, 3, 6, 1, 2, 1, 14, 10, 1)
+_MIKROTIK = (1, 3, 6, 1, 4, 1, 14988, 1, 1)
+
+OBJECTS: dict[str, Oid] = {
+    "SNMPv2-MIB::sysDescr": (1, 3, 6, 1, 2, 1, 1, 1),
+    "SNMPv2-MIB::sysUpTime": (1, 3, 6, 1, 2, 1, 1, 3),
+    "SNMPv2-MIB::sysContact": (1, 3, 6, 1, 2, 1, 1, 4),
+    "SNMPv2-MIB::sysName": (1, 3, 6, 1, 2, 1, 1, 5),
+    "SNMPv2-MIB::sysLocation": (1, 3, 6, 1, 2, 1, 1, 6),
+    "IF-MIB::ifIndex": (*_IF_ENTRY, 1),
+    "IF-MIB::ifDescr": (*_IF_ENTRY, 2),
+    "IF-MIB::ifType": (*_IF_ENTRY, 3),
+    "IF-MIB::ifAdminStatus": (*_IF_ENTRY, 7),
+    "IF-MIB::ifOperStatus": (*_IF_ENTRY, 8),
+    "IF-MIB::ifInDiscards": (*_IF_ENTRY, 13),
+    "IF-MIB::ifInErrors": (*_IF_ENTRY, 14),
+    "IF-MIB::ifOutDiscards": (*_IF_ENTRY, 19),
+    "IF-MIB::ifOutErrors": (*_IF_ENTRY, 20),
+    "IF-MIB::ifName": (*_IFX_ENTRY, 1),
+    "IF-MIB::ifHCInOctets": (*_IFX_ENTRY, 6),
+    "IF-MIB::ifHCInMulticastPkts": (*_IFX_ENTRY, 8),
+    "IF-MIB::ifHCInBroadcastPkts": (*_IFX_ENTRY, 9),
+    "IF-MIB::ifHCOutOctets": (*_IFX_ENTRY, 10),
+    "IF-MIB::ifHighSpeed": (*_IFX_ENTRY, 15),
+    "IF-MIB::ifAlias": (*_IFX_ENTRY, 18),
+    "HOST-RESOURCES-MIB::hrMemorySize": (1, 3, 6, 1, 2, 1, 25, 2, 2),
+    "HOST-RESOURCES-MIB::hrStorageUsed": (1, 3, 6, 1, 2, 1, 25, 2, 3, 1, 6),
+    "HOST-RESOURCES-MIB::hrProcessorLoad": (1, 3, 6, 1, 2, 1, 25, 3, 3, 1, 2),
+    "BGP4-MIB::bgpPeerState": (*_BGP_PEER_ENTRY, 2),
+    "BGP4-MIB::bgpPeerRemoteAddr": (*_BGP_PEER_ENTRY, 7),
+    "BGP4-MIB::bgpPeerRemoteAs": (*_BGP_PEER_ENTRY, 9),
+    "BGP4-MIB::bgpPeerInTotalMessages": (*_BGP_PEER_ENTRY, 12),
+    "OSPF-MIB::ospfNbrIpAddr": (*_OSPF_NBR_ENTRY, 1),
+    "OSPF-MIB::ospfNbrRtrId": (*_OSPF_NBR_ENTRY, 3),
+    "OSPF-MIB::ospfNbrState": (*_OSPF_NBR_ENTRY, 6),
+    # MIKROTIK-MIB scalars the advanced template polls by number.
+    "MIKROTIK-MIB::mtxrHlVoltage": (*_MIKROTIK, 3, 8),
+    "MIKROTIK-MIB::mtxrHlTemperature": (*_MIKROTIK, 3, 10),
+    "MIKROTIK-MIB::mtxrFirmwareVersion": (*_MIKROTIK, 4, 4),
+    "MIKROTIK-MIB::mtxrSerialNumber": (*_MIKROTIK, 7, 3),
+}
+
+
+def resolve_oid(text: str) -> Oid:
+    """Numeric OID for ``IF-MIB::ifHCInOctets.3``, ``sysName.0`` or ``1.3.6.1...``.
+
+    Raises ``ValueError`` for unknown objects.
+    """
+
+    text = text.strip()
+    if text[:1].isdigit() or text.startswith("."):
+        return parse_oid(text)
+    name, _, index = text.partition(".")
+    base = OBJECTS.get(name)
+    if base is None and "::" not in name:
+        base = next((oid for key, oid in OBJECTS.items() if key.endswith(f"::{name}")), None)
+    if base is None:
+        raise ValueError(f"Unknown MIB object: {name}")
+    return base + (parse_oid(index) if index else ())
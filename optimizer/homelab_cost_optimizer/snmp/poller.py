@@ -0,0 +1,408 @@
+"""Asyncio SNMP poller that benchmarks a template against live agents.
+
+:class:`SnmpClient` multiplexes requests to many agents over one UDP socket,
+matching responses by request ID (SNMPv2c) or message ID (SNMPv3, where the
+engine is discovered and keys are localized on first contact).
+
+:func:`benchmark_template` discovers the template's LLD rules on every
+target, expands the item prototypes into OIDs and then polls them all in
+one of three ways:
+
+``get``
+    one OID per GET request;
+``combined``
+    GET requests of up to ``oids_per_request`` OIDs, as the Zabbix poller
+    does by default;
+``bulk``
+    GETBULK walks of the table columns the items live in, with combined GETs
+    for scalars.
+
+Each mode reports OIDs/s, OIDs per request and request latency percentiles.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import random
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+
+from ..zabbix.template import TemplateSpec
+from . import ber, usm
+from .ber import Oid, VarBind
+from .mib import OBJECTS, resolve_oid
+
+MODES = ("get", "combined", "bulk")
+SNMP_TYPE = "SNMP_AGENT"
+OIDS_PER_REQUEST = 128
+MAX_REPETITIONS = 10
+
+
+@dataclass
+class Target:
+    address: tuple[str, int]
+    community: bytes = b"public"
+    user: usm.UsmUser | None = None
+
+
+@dataclass
+class RequestStats:
+    requests: int = 0
+    oids: int = 0
+    timeouts: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+@dataclass
+class _Engine:
+    keys: usm.LocalizedKeys
+    boots: int
+    time: int
+    discovered_at: float
+
+
+class SnmpClient(asyncio.DatagramProtocol):
+    """Many-target SNMP client over a single UDP socket."""
+
+    def __init__(self, timeout: float = 2.0, retries: int = 1, max_in_flight: int = 64) -> None:
+        self.timeout = timeout
+        self.retries = retries
+        self.stats = RequestStats()
+        self.transport: asyncio.DatagramTransport | None = None
+        self._ids = itertools.count(random.randrange(1, 2**30))
+        self._pending: dict[int, asyncio.Future] = {}
+        self._engines: dict[tuple[str, int], _Engine] = {}
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    @classmethod
+    async def open(cls, **kwargs) -> SnmpClient:
+        loop = asyncio.get_running_loop()
+        _, client = await loop.create_datagram_endpoint(
+            lambda: cls(**kwargs), local_addr=("0.0.0.0", 0)
+        )
+        return client
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            message = ber.decode_message(data)
+        except ValueError:
+            return
+        key = message.msg_id if message.version == ber.V3 else message.pdu.request_id
+        future = self._pending.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+    async def get(self, target: Target, oids: list[Oid]) -> list[VarBind]:
+        pdu = await self.request(target, ber.GET, oids)
+        return pdu.varbinds
+
+    async def walk(
+        self, target: Target, column: Oid, bulk: bool = True, max_repetitions: int = MAX_REPETITIONS
+    ) -> dict[Oid, VarBind]:
+        """Rows of ``column`` keyed by index, walked with GETBULK or GETNEXT."""
+
+        rows: dict[Oid, VarBind] = {}
+        current = column
+        while True:
+            if bulk:
+                pdu = await self.request(target, ber.GET_BULK, [current], 0, max_repetitions)
+            else:
+                pdu = await self.request(target, ber.GET_NEXT, [current])
+            for varbind in pdu.varbinds:
+                if varbind.tag == ber.END_OF_MIB_VIEW or varbind.oid[: len(column)] != column:
+                    return rows
+                rows[varbind.oid[len(column) :]] = varbind
+                current = varbind.oid
+            if not pdu.varbinds:
+                return rows
+
+    async def request(
+        self,
+        target: Target,
+        pdu_type: int,
+        oids: list[Oid],
+        non_repeaters: int = 0,
+        max_repetitions: int = 0,
+    ) -> ber.Pdu:
+        varbinds = [VarBind(oid) for oid in oids]
+        async with self._slots:
+            for _ in range(self.retries + 1):
+                request_id = next(self._ids) % 2**31
+                pdu = ber.Pdu(pdu_type, request_id, varbinds, non_repeaters, max_repetitions)
+                data = await self._encode(target, pdu)
+                started = time.perf_counter()
+                try:
+                    message = await self._send(data, target.address, request_id)
+                except TimeoutError:
+                    self.stats.timeouts += 1
+                    continue
+                self.stats.latencies.append(time.perf_counter() - started)
+                self.stats.requests += 1
+                response = self._open(target, message)
+                self.stats.oids += len(response.varbinds)
+                return response
+        raise TimeoutError(f"No response from {target.address[0]}:{target.address[1]}")
+
+    async def _send(self, data: bytes, address: tuple[str, int], key: int) -> ber.Message:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        self.transport.sendto(data, address)
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._pending.pop(key, None)
+
+    async def _encode(self, target: Target, pdu: ber.Pdu) -> bytes:
+        if target.user is None:
+            return ber.encode_v2c(target.community, pdu)
+        engine = self._engines.get(target.address) or await self._discover(target)
+        elapsed = int(time.monotonic() - engine.discovered_at)
+        params = ber.UsmParameters(
+            engine.keys.engine_id, engine.boots, engine.time + elapsed, target.user.name.encode()
+        )
+        return usm.encode_message(
+            pdu,
+            engine.keys,
+            params,
+            pdu.request_id,
+            target.user.flags | ber.FLAG_REPORTABLE,
+            engine.keys.engine_id,
+            salt=pdu.request_id,
+        )
+
+    async def _discover(self, target: Target) -> _Engine:
+        """Learn the agent's engine ID, boots and time from its report (RFC 3414 4)."""
+
+        for _ in range(self.retries + 1):
+            msg_id = next(self._ids) % 2**31
+            probe = usm.encode_message(
+                ber.Pdu(ber.GET, msg_id),
+                None,
+                ber.UsmParameters(),
+                msg_id,
+                ber.FLAG_REPORTABLE,
+                b"",
+            )
+            try:
+                report = await self._send(probe, target.address, msg_id)
+            except TimeoutError:
+                self.stats.timeouts += 1
+                continue
+            params = report.usm
+            engine = _Engine(
+                usm.LocalizedKeys.for_engine(target.user, params.engine_id),
+                params.engine_boots,
+                params.engine_time,
+                time.monotonic(),
+            )
+            self._engines[target.address] = engine
+            return engine
+        raise TimeoutError(f"No SNMPv3 engine at {target.address[0]}:{target.address[1]}")
+
+    def _open(self, target: Target, message: ber.Message) -> ber.Pdu:
+        if message.version == ber.V3:
+            engine = self._engines[target.address]
+            if message.pdu is None or message.pdu.type != ber.REPORT:
+                usm.open_message(message, engine.keys)
+            if message.pdu.type == ber.REPORT:
+                # Out of the time window or rebooted: discover again on the next request.
+                self._engines.pop(target.address, None)
+                oid = ber.format_oid(message.pdu.varbinds[0].oid) if message.pdu.varbinds else "?"
+                raise ValueError(f"SNMPv3 report {oid} from {target.address[0]}")
+        return message.pdu
+
+
+@dataclass
+class PollResult:
+    template: str
+    mode: str
+    hosts: int
+    items: int
+    seconds: float
+    stats: RequestStats
+
+    @property
+    def oids_per_second(self) -> float:
+        return self.stats.oids / self.seconds if self.seconds else 0.0
+
+    @property
+    def oids_per_request(self) -> float:
+        return self.stats.oids / self.stats.requests if self.stats.requests else 0.0
+
+    def latency_ms(self, percentile: float) -> float:
+        return percentile_of(self.stats.latencies, percentile) * 1000
+
+
+def percentile_of(values: list[float], percentile: float) -> float:
+    """Nearest-rank percentile; ``0.0`` for no values."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percentile // 100))
+    return ordered[min(int(rank), len(ordered)) - 1]
+
+
+def targets_for(
+    template: TemplateSpec,
+    addresses: Iterable[tuple[str, int]],
+    macros: Mapping[str, str] | None = None,
+) -> list[Target]:
+    """Targets using the template's SNMPv3 user, or its SNMPv2c community."""
+
+    resolved = {**template.macros, **(macros or {})}
+    user = usm.UsmUser.from_macros(resolved) if "{$SNMPV3_USER}" in resolved else None
+    community = resolved.get("{$SNMP_COMMUNITY}", "public").encode()
+    return [Target(address, community, user) for address in addresses]
+
+
+async def discover_items(
+    client: SnmpClient, target: Target, template: TemplateSpec, max_repetitions: int
+) -> list[Oid]:
+    """OIDs of the template's SNMP items and of the prototypes LLD creates on ``target``."""
+
+    oids = [
+        resolve_oid(item.snmp_oid)
+        for item in template.items
+        if item.type == SNMP_TYPE and item.snmp_oid
+    ]
+    for rule in template.discovery_rules:
+        columns = rule.discovery_columns()
+        if rule.type != SNMP_TYPE or not columns:
+            continue
+        walked = [
+            await client.walk(target, resolve_oid(oid), max_repetitions=max_repetitions)
+            for _, oid in columns
+        ]
+        for index in walked[0]:
+            macros = {"{#SNMPINDEX}": ber.format_oid(index)}
+            for (macro, _), rows in zip(columns, walked, strict=True):
+                if index in rows:
+                    macros[macro] = _lld_value(rows[index])
+            for prototype in rule.item_prototypes:
+                if prototype.type != SNMP_TYPE or not prototype.snmp_oid:
+                    continue
+                text = prototype.snmp_oid
+                for macro, value in macros.items():
+                    text = text.replace(macro, value)
+                oids.append(resolve_oid(text))
+    return oids
+
+
+async def poll(
+    client: SnmpClient,
+    target: Target,
+    oids: list[Oid],
+    mode: str,
+    oids_per_request: int = OIDS_PER_REQUEST,
+    max_repetitions: int = MAX_REPETITIONS,
+) -> int:
+    """Poll ``oids`` once; returns the number of item values received."""
+
+    if mode == "get":
+        replies = await asyncio.gather(*(client.get(target, [oid]) for oid in oids))
+        return sum(len(varbinds) for varbinds in replies)
+    scalars, columns = (oids, {}) if mode == "combined" else _by_column(oids)
+    batches = [scalars[i : i + oids_per_request] for i in range(0, len(scalars), oids_per_request)]
+    requests = [client.get(target, batch) for batch in batches]
+    requests.extend(
+        client.walk(target, column, max_repetitions=max_repetitions) for column in columns
+    )
+    replies = await asyncio.gather(*requests)
+    received = sum(len(varbinds) for varbinds in replies[: len(batches)])
+    for column, rows in zip(columns, replies[len(batches) :], strict=True):
+        received += sum(1 for index in columns[column] if index in rows)
+    return received
+
+
+async def benchmark_template(
+    client: SnmpClient,
+    template: TemplateSpec,
+    targets: list[Target],
+    modes: Iterable[str] = MODES,
+    rounds: int = 3,
+    oids_per_request: int = OIDS_PER_REQUEST,
+    max_repetitions: int = MAX_REPETITIONS,
+) -> list[PollResult]:
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError(f"Unknown poll mode: {mode}")
+    items = await asyncio.gather(
+        *(discover_items(client, target, template, max_repetitions) for target in targets)
+    )
+    results = []
+    for mode in modes:
+        client.stats = RequestStats()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(
+                *(
+                    poll(client, target, oids, mode, oids_per_request, max_repetitions)
+                    for target, oids in zip(targets, items, strict=True)
+                )
+            )
+        results.append(
+            PollResult(
+                template=template.template or template.name,
+                mode=mode,
+                hosts=len(targets),
+                items=sum(map(len, items)),
+                seconds=time.perf_counter() - started,
+                stats=client.stats,
+            )
+        )
+    return results
+
+
+def render_markdown(results: list[PollResult]) -> str:
+    md = [
+        "# SNMP poller benchmark",
+        "",
+        "| Template | Mode | Hosts | Items | Requests | OIDs/s | OIDs/request "
+        "| p50 ms | p95 ms | p99 ms | Timeouts |",
+        "| --- | --- | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: |",
+    ]
+    for result in results:
+        md.append(
+            f"| {result.template} | {result.mode} | {result.hosts} | {result.items} "
+            f"| {result.stats.requests} | {result.oids_per_second:.0f} "
+            f"| {result.oids_per_request:.1f} | {result.latency_ms(50):.2f} "
+            f"| {result.latency_ms(95):.2f} | {result.latency_ms(99):.2f} "
+            f"| {result.stats.timeouts} |"
+        )
+    return "\n".join(md)
+
+
+def _by_column(oids: list[Oid]) -> tuple[list[Oid], dict[Oid, set[Oid]]]:
+    """Split item OIDs into scalars and the table rows wanted per column."""
+
+    scalars: list[Oid] = []
+    columns: dict[Oid, set[Oid]] = {}
+    for oid in oids:
+        base = next((b for b in _COLUMNS if oid[: len(b)] == b and len(oid) > len(b)), None)
+        if base is None or oid[len(base) :] == (0,):
+            scalars.append(oid)
+        else:
+            columns.setdefault(base, set()).add(oid[len(base) :])
+    return scalars, columns
+
+
+def _lld_value(varbind: VarBind) -> str:
+    if varbind.tag == ber.IP_ADDRESS:
+        return ".".join(map(str, varbind.value))
+    if isinstance(varbind.value, bytes):
+        return varbind.value.decode("utf-8", "replace")
+    return str(varbind.value)
+
+
+# Longest first so a column never matches a shorter object that prefixes it.
+_COLUMNS = sorted(OBJECTS.values(), key=len, reverse=True)
@@ -0,0 +1,198 @@
+"""SNMPv3 user-based security model.
+
+Key localization and HMAC authentication (RFC 3414, SHA-2 from RFC 7860) use
+only :mod:`hashlib`. AES-128 privacy (RFC 3826) needs the optional
+``cryptography`` package (``pip install -e ".[snmp]"``); without it users with
+a privacy protocol are rejected.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+from . import ber
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # pragma: no cover - privacy is optional
+    Cipher = None  # type: ignore[assignment,misc]
+
+# Protocol name -> (hashlib name, truncated MAC length).
+AUTH_PROTOCOLS = {
+    "MD5": ("md5", 12),
+    "SHA": ("sha1", 12),
+    "SHA1": ("sha1", 12),
+    "SHA224": ("sha224", 16),
+    "SHA256": ("sha256", 24),
+    "SHA384": ("sha384", 32),
+    "SHA512": ("sha512", 48),
+}
+PRIV_PROTOCOLS = {"AES": 16, "AES128": 16}
+
+NO_AUTH_NO_PRIV = "noAuthNoPriv"
+AUTH_NO_PRIV = "authNoPriv"
+AUTH_PRIV = "authPriv"
+
+_KEY_STRETCH = 1_048_576
+
+
+@dataclass(frozen=True)
+class UsmUser:
+    name: str
+    auth_protocol: str | None = None
+    auth_passphrase: str = ""
+    priv_protocol: str | None = None
+    priv_passphrase: str = ""
+
+    def __post_init__(self) -> None:
+        if self.auth_protocol is not None:
+            if self.auth_protocol.upper() not in AUTH_PROTOCOLS:
+                raise ValueError(f"Unsupported SNMPv3 auth protocol: {self.auth_protocol}")
+            if len(self.auth_passphrase) < 8:
+                raise ValueError("SNMPv3 passphrases need at least 8 characters")
+        if self.priv_protocol is not None:
+            if self.auth_protocol is None:
+                raise ValueError("SNMPv3 privacy requires authentication")
+            if self.priv_protocol.upper() not in PRIV_PROTOCOLS:
+                raise ValueError(f"Unsupported SNMPv3 privacy protocol: {self.priv_protocol}")
+            if len(self.priv_passphrase) < 8:
+                raise ValueError("SNMPv3 passphrases need at least 8 characters")
+            if Cipher is None:
+                raise ValueError("SNMPv3 AES privacy needs the cryptography package")
+
+    @property
+    def flags(self) -> int:
+        flags = ber.FLAG_AUTH if self.auth_protocol else 0
+        return flags | (ber.FLAG_PRIV if self.priv_protocol else 0)
+
+    @classmethod
+    def from_macros(cls, macros: dict[str, str]) -> UsmUser:
+        """User from the ``{$SNMPV3_*}`` macros of the SNMPv3 template."""
+
+        level = macros.get("{$SNMPV3_SECURITY_LEVEL}", AUTH_PRIV)
+        if level not in (NO_AUTH_NO_PRIV, AUTH_NO_PRIV, AUTH_PRIV):
+            raise ValueError(f"Unknown SNMPv3 security level: {level}")
+        auth = level != NO_AUTH_NO_PRIV
+        priv = level == AUTH_PRIV
+        return cls(
+            name=macros.get("{$SNMPV3_USER}", ""),
+            auth_protocol=macros.get("{$SNMPV3_AUTH_PROTOCOL}", "SHA") if auth else None,
+            auth_passphrase=macros.get("{$SNMPV3_AUTH_PASSPHRASE}", "") if auth else "",
+            priv_protocol=macros.get("{$SNMPV3_PRIV_PROTOCOL}", "AES") if priv else None,
+            priv_passphrase=macros.get("{$SNMPV3_PRIV_PASSPHRASE}", "") if priv else "",
+        )
+
+
+@dataclass(frozen=True)
+class LocalizedKeys:
+    """A user's keys localized to one authoritative engine."""
+
+    user: UsmUser
+    engine_id: bytes
+    auth_key: bytes = b""
+    priv_key: bytes = b""
+
+    @classmethod
+    def for_engine(cls, user: UsmUser, engine_id: bytes) -> LocalizedKeys:
+        if user.auth_protocol is None:
+            return cls(user, engine_id)
+        protocol = user.auth_protocol.upper()
+        master = password_to_key(user.auth_passphrase, protocol)
+        auth_key = localize_key(master, engine_id, protocol)
+        priv_key = b""
+        if user.priv_protocol is not None:
+            master = password_to_key(user.priv_passphrase, protocol)
+            priv_key = localize_key(master, engine_id, protocol)[: PRIV_PROTOCOLS["AES"]]
+        return cls(user, engine_id, auth_key, priv_key)
+
+    @property
+    def mac_length(self) -> int:
+        if self.user.auth_protocol is None:
+            return 0
+        return AUTH_PROTOCOLS[self.user.auth_protocol.upper()][1]
+
+    def sign(self, message: bytes, offset: int) -> bytes:
+        """Fill the zeroed authentication parameters at ``offset``."""
+
+        digest = self._mac(message)
+        return message[:offset] + digest + message[offset + len(digest) :]
+
+    def verify(self, message: ber.Message) -> bool:
+        usm = message.usm
+        if usm is None or len(usm.auth) != self.mac_length:
+            return False
+        offset = message.auth_offset
+        blank = message.raw[:offset] + bytes(len(usm.auth)) + message.raw[offset + len(usm.auth) :]
+        return hmac.compare_digest(self._mac(blank), usm.auth)
+
+    def encrypt(self, scoped: bytes, boots: int, time: int, salt: int) -> tuple[bytes, bytes]:
+        priv = salt.to_bytes(8, "big")
+        encryptor = Cipher(algorithms.AES(self.priv_key), modes.CFB(_iv(boots, time, priv)))
+        return encryptor.encryptor().update(scoped), priv
+
+    def decrypt(self, encrypted: bytes, boots: int, time: int, priv: bytes) -> bytes:
+        if len(priv) != 8:
+            raise ValueError("Bad AES privacy parameters")
+        decryptor = Cipher(algorithms.AES(self.priv_key), modes.CFB(_iv(boots, time, priv)))
+        return decryptor.decryptor().update(encrypted)
+
+    def _mac(self, message: bytes) -> bytes:
+        name, length = AUTH_PROTOCOLS[self.user.auth_protocol.upper()]
+        return hmac.new(self.auth_key, message, name).digest()[:length]
+
+
+@lru_cache(maxsize=64)
+def password_to_key(passphrase: str, protocol: str) -> bytes:
+    """Hash ``passphrase`` stretched to 1 MiB (RFC 3414 A.2)."""
+
+    name = AUTH_PROTOCOLS[protocol.upper()][0]
+    data = passphrase.encode()
+    repeated = data * (_KEY_STRETCH // len(data) + 1)
+    return hashlib.new(name, repeated[:_KEY_STRETCH]).digest()
+
+
+def localize_key(key: bytes, engine_id: bytes, protocol: str) -> bytes:
+    name = AUTH_PROTOCOLS[protocol.upper()][0]
+    return hashlib.new(name, key + engine_id + key).digest()
+
+
+def encode_message(
+    pdu: ber.Pdu,
+    keys: LocalizedKeys | None,
+    usm: ber.UsmParameters,
+    msg_id: int,
+    flags: int,
+    context_engine_id: bytes,
+    salt: int = 0,
+    max_size: int = 65507,
+) -> bytes:
+    """Encode, encrypt and sign an SNMPv3 message as ``flags`` request."""
+
+    scoped = ber.encode_scoped_pdu(pdu, context_engine_id)
+    if flags & ber.FLAG_PRIV:
+        encrypted, priv = keys.encrypt(scoped, usm.engine_boots, usm.engine_time, salt)
+        usm = replace(usm, priv=priv)
+        scoped = ber.tlv(ber.OCTET_STRING, encrypted)
+    mac_length = keys.mac_length if keys is not None and flags & ber.FLAG_AUTH else 0
+    message, offset = ber.encode_v3(msg_id, flags, usm, scoped, max_size, mac_length)
+    return keys.sign(message, offset) if mac_length else message
+
+
+def open_message(message: ber.Message, keys: LocalizedKeys) -> ber.Message:
+    """Verify and decrypt ``message`` in place; raises ``ValueError`` on failure."""
+
+    if message.flags & ber.FLAG_AUTH and not keys.verify(message):
+        raise ValueError("SNMPv3 authentication failed")
+    if message.flags & ber.FLAG_PRIV:
+        usm = message.usm
+        scoped = keys.decrypt(message.encrypted, usm.engine_boots, usm.engine_time, usm.priv)
+        engine_id, context, pdu = ber.decode_scoped_pdu(scoped)
+        message.context_engine_id, message.context_name, message.pdu = engine_id, context, pdu
+    return message
+
+
+def _iv(boots: int, time: int, priv: bytes) -> bytes:
+    return boots.to_bytes(4, "big") + time.to_bytes(4, "big") + priv
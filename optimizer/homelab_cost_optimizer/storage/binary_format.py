@@ -0,0 +1,291 @@
+"""Compact binary inventory format.
+
+A binary inventory is a little-endian, length-prefixed columnar layout::
+
+    header     magic (8s) | schema version (u16) | flags (u16) | section count (u32)
+    directory  section count x (name (16s) | offset (u64) | length (u64))
+    sections   8-byte aligned payloads
+
+Numeric sections hold one fixed-width column each. String sections are a
+string table: entry count (u64), ``count + 1`` end offsets (u64) and the
+UTF-8 bytes. Sparse labels and metadata are stored as JSON objects keyed by
+row, as are utilization series (optional section, written only when some
+workload has one). Readers reject files whose schema version they do not know
+and sections they do not know. Version 1 files predate utilization series.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from ..columnar import CODE, FLOAT, INT, ColumnarSnapshot, np
+from ..models import InventorySnapshot
+from ..timeseries import UtilizationSeries
+
+MAGIC = b"HCOSNAP\x00"
+SCHEMA_VERSION = 2
+_READABLE_VERSIONS = (1, SCHEMA_VERSION)
+
+_HEADER = struct.Struct("<8sHHI")
+_ENTRY = struct.Struct("<16sQQ")
+_COUNT = struct.Struct("<Q")
+_ALIGN = 8
+_DTYPES = {FLOAT: "<f8", INT: "<i8", CODE: "<i4"}
+
+_NUMERIC_SECTIONS = {
+    "node.kind": ("node_kind_codes", CODE),
+    "node.cpu": ("node_cpu_cores", INT),
+    "node.memory": ("node_memory_gb", INT),
+    "node.idle_w": ("node_idle_watts", FLOAT),
+    "node.cpu_w": ("node_watts_per_cpu_core", FLOAT),
+    "node.ram_w": ("node_watts_per_gb_ram", FLOAT),
+    "wl.type": ("workload_type_codes", CODE),
+    "wl.cpu": ("workload_cpu_cores", FLOAT),
+    "wl.memory": ("workload_memory_gb", FLOAT),
+    "wl.util": ("workload_utilization", FLOAT),
+    "wl.node": ("workload_node_codes", CODE),
+    "wl.node_index": ("workload_node_index", INT),
+}
+_STRING_SECTIONS = {
+    "node.name": "node_names",
+    "kinds": "kinds",
+    "wl.name": "workload_names",
+    "types": "workload_types",
+    "refs": "node_refs",
+}
+_JSON_SECTIONS = {
+    "metadata": "metadata",
+    "node.metadata": "node_metadata",
+    "wl.labels": "workload_labels",
+}
+# Sections that older files may lack; readers treat them as empty.
+_OPTIONAL_SECTIONS = {"wl.series": "workload_series"}
+
+
+def is_binary_inventory(path: Path | str) -> bool:
+    with Path(path).open("rb") as handle:
+        return handle.read(len(MAGIC)) == MAGIC
+
+
+def write_snapshot(snapshot: InventorySnapshot | ColumnarSnapshot, path: Path | str) -> None:
+    if not isinstance(snapshot, ColumnarSnapshot):
+        snapshot = ColumnarSnapshot.from_snapshot(snapshot)
+
+    payloads: list[tuple[str, bytes]] = []
+    for name, (attribute, typecode) in _NUMERIC_SECTIONS.items():
+        payloads.append((name, _column_bytes(getattr(snapshot, attribute), typecode)))
+    for name, attribute in _STRING_SECTIONS.items():
+        payloads.append((name, _string_table_bytes(getattr(snapshot, attribute))))
+    for name, attribute in _JSON_SECTIONS.items():
+        value = dict(getattr(snapshot, attribute))
+        payloads.append((name, json.dumps(value, separators=(",", ":")).encode("utf-8")))
+    if snapshot.workload_series:
+        series = {row: entry.to_dict() for row, entry in snapshot.workload_series.items()}
+        payloads.append(("wl.series", json.dumps(series, separators=(",", ":")).encode("utf-8")))
+
+    offset = _aligned(_HEADER.size + _ENTRY.size * len(payloads))
+    directory = []
+    for name, payload in payloads:
+        directory.append(_ENTRY.pack(name.encode("ascii"), offset, len(payload)))
+        offset = _aligned(offset + len(payload))
+
+    with Path(path).open("wb") as handle:
+        handle.write(_HEADER.pack(MAGIC, SCHEMA_VERSION, 0, len(payloads)))
+        handle.writelines(directory)
+        for _, payload in payloads:
+            _pad(handle)
+            handle.write(payload)
+
+
+def read_snapshot(path: Path | str) -> ColumnarSnapshot:
+    return decode_snapshot(Path(path).read_bytes())
+
+
+def open_snapshot(path: Path | str) -> ColumnarSnapshot:
+    """Memory-map a binary inventory and return a snapshot backed by the mapping.
+
+    Numeric columns are zero-copy views into the file, strings are decoded
+    when a row is accessed and sparse labels/metadata on first lookup, so
+    opening cost does not grow with the number of workloads. Pages are
+    shared between processes that map the same file.
+    """
+
+    with Path(path).open("rb") as handle:
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode_snapshot(mapping, lazy=True)
+
+
+def decode_snapshot(buffer, lazy: bool = False) -> ColumnarSnapshot:
+    """Decode a binary inventory held in ``buffer`` (bytes, mmap or memoryview).
+
+    With ``lazy=True`` string tables and sparse maps stay views over
+    ``buffer`` instead of being copied into Python objects.
+    """
+
+    sections = read_directory(buffer)
+    view = memoryview(buffer)
+    columns: dict[str, Any] = {}
+    for name, (attribute, typecode) in _NUMERIC_SECTIONS.items():
+        offset, length = sections[name]
+        columns[attribute] = _decode_column(view[offset : offset + length], typecode)
+    for name, attribute in _STRING_SECTIONS.items():
+        offset, length = sections[name]
+        table = StringTableView(view[offset : offset + length])
+        columns[attribute] = table if lazy else list(table)
+    for name, attribute in _JSON_SECTIONS.items():
+        offset, length = sections[name]
+        payload = view[offset : offset + length]
+        if lazy and attribute != "metadata":
+            columns[attribute] = SparseRowMap(payload)
+        else:
+            columns[attribute] = _decode_json(payload, attribute)
+    for name, attribute in _OPTIONAL_SECTIONS.items():
+        if name not in sections:
+            continue
+        offset, length = sections[name]
+        payload = view[offset : offset + length]
+        rows = SparseRowMap(payload, UtilizationSeries.from_dict)
+        columns[attribute] = rows if lazy else dict(rows)
+    return ColumnarSnapshot(**columns)
+
+
+def read_directory(buffer) -> dict[str, tuple[int, int]]:
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Binary inventory is truncated")
+    magic, version, _flags, count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary inventory file")
+    if version not in _READABLE_VERSIONS:
+        raise ValueError(
+            f"Unsupported binary inventory schema version {version} "
+            f"(expected 1 to {SCHEMA_VERSION})"
+        )
+    sections: dict[str, tuple[int, int]] = {}
+    for index in range(count):
+        raw_name, offset, length = _ENTRY.unpack_from(buffer, _HEADER.size + index * _ENTRY.size)
+        if offset + length > len(buffer):
+            raise ValueError("Binary inventory is truncated")
+        sections[raw_name.rstrip(b"\x00").decode("ascii")] = (offset, length)
+    missing = [
+        name
+        for name in (*_NUMERIC_SECTIONS, *_STRING_SECTIONS, *_JSON_SECTIONS)
+        if name not in sections
+    ]
+    if missing:
+        raise ValueError(f"Binary inventory is missing sections: {', '.join(missing)}")
+    known = (*_NUMERIC_SECTIONS, *_STRING_SECTIONS, *_JSON_SECTIONS)
+    if version > 1:
+        known += tuple(_OPTIONAL_SECTIONS)
+    unknown = [name for name in sections if name not in known]
+    if unknown:
+        raise ValueError(f"Binary inventory has unknown sections: {', '.join(unknown)}")
+    return sections
+
+
+class StringTableView(Sequence[str]):
+    """Read-only view of a string table section; entries are decoded on access."""
+
+    def __init__(self, payload: memoryview) -> None:
+        (count,) = _COUNT.unpack_from(payload, 0)
+        offsets_end = _COUNT.size * (count + 2)
+        self._offsets = _decode_column(payload[_COUNT.size : offsets_end], INT)
+        self._data = payload[offsets_end:]
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("string table index out of range")
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return str(self._data[start:end], "utf-8")
+
+
+class SparseRowMap(Mapping[int, Any]):
+    """Row-keyed JSON section decoded on first access.
+
+    ``convert`` turns each decoded entry into its row value (for example a
+    :class:`UtilizationSeries`).
+    """
+
+    def __init__(self, payload: memoryview, convert=None) -> None:
+        self._payload: memoryview | None = payload
+        self._convert = convert
+        self._rows: dict[int, Any] = {}
+
+    def _decoded(self) -> dict[int, Any]:
+        if self._payload is not None:
+            self._rows = _decode_json(self._payload, "rows")
+            if self._convert is not None:
+                self._rows = {row: self._convert(entry) for row, entry in self._rows.items()}
+            self._payload = None
+        return self._rows
+
+    def __getitem__(self, row: int) -> Any:
+        return self._decoded()[row]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._decoded())
+
+    def __len__(self) -> int:
+        return len(self._decoded())
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _pad(handle: BinaryIO) -> None:
+    handle.write(b"\x00" * (_aligned(handle.tell()) - handle.tell()))
+
+
+def _column_bytes(values, typecode: str) -> bytes:
+    if np is not None:
+        return np.ascontiguousarray(values, dtype=_DTYPES[typecode]).tobytes()
+    column = values
+    if not isinstance(column, array) or column.typecode != typecode:
+        column = array(typecode, values)
+    if sys.byteorder != "little":
+        column = array(typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _decode_column(payload: memoryview, typecode: str):
+    if np is not None:
+        return np.frombuffer(payload, dtype=_DTYPES[typecode])
+    if sys.byteorder == "little":
+        return payload.cast(typecode)
+    column = array(typecode, payload.tobytes())
+    column.byteswap()
+    return column
+
+
+def _string_table_bytes(values: Sequence[str]) -> bytes:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = array(INT, [0])
+    total = 0
+    for item in encoded:
+        total += len(item)
+        offsets.append(total)
+    return _COUNT.pack(len(encoded)) + _column_bytes(offsets, INT) + b"".join(encoded)
+
+
+def _decode_json(payload: memoryview, attribute: str) -> dict[Any, Any]:
+    value = json.loads(str(payload, "utf-8"))
+    if attribute == "metadata":
+        return value
+    # Row-keyed sparse maps: JSON object keys are strings.
+    return {int(row): entry for row, entry in value.items()}
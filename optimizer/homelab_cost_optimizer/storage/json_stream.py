@@ -0,0 +1,193 @@
+"""Incremental reader and writer for inventory JSON documents.
+
+Inventory exports are a single JSON object whose ``nodes`` and ``workloads``
+members can hold millions of records. The reader walks the top-level object
+and decodes array members one element at a time, so only the current record
+and a small read buffer are held in memory instead of the whole text and the
+parsed tree.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from ..collectors.base import SnapshotBuilder
+from ..columnar import ColumnarSnapshot, ColumnarSnapshotBuilder
+from ..models import InventorySnapshot
+
+CHUNK_SIZE = 1 << 16
+
+# Value of the tuple that announces an array member before its elements.
+ARRAY_START = object()
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _Reader:
+    def __init__(self, handle, chunk_size: int) -> None:
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        # Grow reads with the pending text so re-decoding a large value after
+        # a refill stays linear overall.
+        chunk = self.handle.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in inventory JSON, found {found or 'EOF'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        while True:
+            self.peek()
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            if end == len(self.buffer) and self.fill():
+                # A number at the end of the buffer may continue in the next chunk.
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_members(
+    path: Path | str, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[str, Any, bool]]:
+    """Yield ``(key, value, is_item)`` for the members of a top-level JSON object.
+
+    Array members are announced by ``(key, ARRAY_START, False)``, even when
+    empty, and then streamed as one ``is_item=True`` tuple per element; all
+    other members are yielded whole with ``is_item=False``.
+    """
+
+    with Path(path).open(encoding="utf-8") as handle:
+        reader = _Reader(handle, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError("Inventory JSON object keys must be strings")
+            reader.expect(":")
+            if reader.peek() == "[":
+                reader.pos += 1
+                yield key, ARRAY_START, False
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield key, reader.value(), True
+                        if reader.peek() == ",":
+                            reader.pos += 1
+                            continue
+                        reader.expect("]")
+                        break
+            else:
+                yield key, reader.value(), False
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("}")
+            return
+
+
+def load_snapshot(
+    path: Path | str, columnar: bool = False, chunk_size: int = CHUNK_SIZE
+) -> InventorySnapshot | ColumnarSnapshot:
+    """Build a snapshot from an inventory JSON file in a single streaming pass."""
+
+    builder = ColumnarSnapshotBuilder() if columnar else SnapshotBuilder()
+    for key, value, is_item in iter_json_members(path, chunk_size):
+        if key == "nodes" and is_item:
+            builder.add_node(value)
+        elif key == "workloads" and is_item:
+            builder.add_workload(value)
+        elif key == "metadata" and not is_item and value is not ARRAY_START:
+            builder.metadata = value
+    return builder.build()
+
+
+class _ArrayMember:
+    """Re-iterable view of one top-level array, read from disk on each pass."""
+
+    def __init__(self, path: Path, key: str, chunk_size: int) -> None:
+        self.path = path
+        self.key = key
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[Any]:
+        for key, value, is_item in iter_json_members(self.path, self.chunk_size):
+            if key == self.key and is_item:
+                yield value
+
+
+def stream_dataset(path: Path | str, chunk_size: int = CHUNK_SIZE) -> dict[str, Any]:
+    """Return a dataset dict whose array members are streamed from ``path`` on demand.
+
+    Scalar and object members are loaded eagerly; arrays are replaced by lazy
+    iterables, so collectors can pass the result to ``build_snapshot`` without
+    the document ever being held in memory.
+    """
+
+    file_path = Path(path)
+    dataset: dict[str, Any] = {}
+    for key, value, is_item in iter_json_members(file_path, chunk_size):
+        if value is ARRAY_START:
+            dataset[key] = _ArrayMember(file_path, key, chunk_size)
+        elif not is_item:
+            dataset[key] = value
+    return dataset
+
+
+def write_snapshot(snapshot: InventorySnapshot | ColumnarSnapshot, path: Path | str) -> None:
+    """Write ``snapshot`` as inventory JSON, one node or workload record per line.
+
+    Records are serialized as they are visited instead of deep-copying the
+    whole snapshot with ``dataclasses.asdict`` first.
+    """
+
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(", ", ": ")).encode
+    with Path(path).open("w", encoding="utf-8") as handle:
+        handle.write('{"nodes": [')
+        for index, node in enumerate(snapshot.nodes):
+            record = dict(vars(node))
+            record["power_profile"] = dict(vars(node.power_profile))
+            handle.write(("," if index else "") + "\n  " + encode(record))
+        handle.write('\n], "workloads": [')
+        for index, workload in enumerate(snapshot.workloads):
+            record = dict(vars(workload))
+            series = record.pop("utilization_series")
+            if series is not None:
+                record["utilization_series"] = series.to_dict()
+            handle.write(("," if index else "") + "\n  " + encode(record))
+        handle.write('\n], "metadata": ' + encode(snapshot.metadata) + "}\n")
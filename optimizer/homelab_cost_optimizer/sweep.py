@@ -0,0 +1,191 @@
+"""Parallel what-if sweeps over consolidation and pricing parameters.
+
+A sweep evaluates every combination of headroom, strategy, electricity price
+and billing hours for one inventory. Consolidation only depends on headroom
+and strategy, so each (headroom, strategy) pair is one task for the process
+pool and prices are applied to its plan inside the worker.
+
+Workers do not receive the snapshot with each task. The inventory is written
+once as a binary inventory (or used as is when it already is one) and every
+worker memory-maps it in its initializer. Workers keep the mapped columnar
+snapshot rather than a copy of it, so the column pages are shared between
+processes. Consolidators still build the node and workload rows of a task,
+and those rows set a worker's peak memory while the task runs.
+"""
+
+from __future__ import annotations
+
+import csv
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from itertools import product
+from pathlib import Path
+from typing import Any, TextIO
+
+from .columnar import ColumnarSnapshot
+from .consolidators.binpacking_consolidator import STRATEGIES, BinPackingConsolidator
+from .consolidators.exact_consolidator import ExactConsolidator
+from .consolidators.heuristic_consolidator import HeuristicConsolidator
+from .consolidators.sizing import ALLOCATED
+from .estimators.batch_estimator import BatchEstimator
+from .storage import binary_format, json_stream
+
+STRATEGY_CHOICES = ("heuristic", *STRATEGIES, "optimal")
+
+COLUMNS = (
+    "headroom",
+    "strategy",
+    "price_per_kwh",
+    "hours_per_month",
+    "nodes_powered_down",
+    "unplaced",
+    "idle_watt_reduction",
+    "monthly_cost",
+    "monthly_savings",
+    "optimality_gap",
+)
+
+
+def create_consolidator(
+    strategy: str, headroom: float = 0.8, time_budget: float = 10.0, sizing: str = ALLOCATED
+):
+    if strategy == "heuristic":
+        return HeuristicConsolidator(headroom=headroom, sizing=sizing)
+    if strategy in STRATEGIES:
+        return BinPackingConsolidator(strategy=strategy, headroom=headroom, sizing=sizing)
+    if strategy == "optimal":
+        return ExactConsolidator(headroom=headroom, time_budget=time_budget, sizing=sizing)
+    raise ValueError(f"Unknown consolidation strategy: {strategy}")
+
+
+@dataclass
+class SweepGrid:
+    headrooms: Sequence[float]
+    strategies: Sequence[str]
+    prices_per_kwh: Sequence[float]
+    hours_per_month: Sequence[int] = (730,)
+
+    def __post_init__(self) -> None:
+        for name in ("headrooms", "strategies", "prices_per_kwh", "hours_per_month"):
+            if not getattr(self, name):
+                raise ValueError(f"Sweep grid needs at least one value for {name}")
+        unknown = [s for s in self.strategies if s not in STRATEGY_CHOICES]
+        if unknown:
+            raise ValueError(f"Unknown consolidation strategy: {', '.join(unknown)}")
+        if any(not 0 < headroom <= 1 for headroom in self.headrooms):
+            raise ValueError("Headroom values must be in (0, 1]")
+
+    def __len__(self) -> int:
+        return (
+            len(self.headrooms)
+            * len(self.strategies)
+            * len(self.prices_per_kwh)
+            * len(self.hours_per_month)
+        )
+
+    def plan_tasks(self) -> list[tuple[float, str]]:
+        return list(product(self.headrooms, self.strategies))
+
+
+def run_sweep(
+    inventory: Path | str,
+    grid: SweepGrid,
+    max_workers: int | None = None,
+    time_budget: float = 10.0,
+) -> Iterator[dict[str, Any]]:
+    """Yield one result row per grid point, in completion order."""
+
+    with tempfile.TemporaryDirectory(prefix="hco-sweep-") as scratch:
+        shared = _shared_inventory(Path(inventory), Path(scratch))
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(str(shared),)
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _evaluate,
+                    headroom,
+                    strategy,
+                    tuple(grid.prices_per_kwh),
+                    tuple(grid.hours_per_month),
+                    time_budget,
+                )
+                for headroom, strategy in grid.plan_tasks()
+            ]
+            for future in as_completed(futures):
+                yield from future.result()
+
+
+def write_rows(rows: Iterable[dict[str, Any]], handle: TextIO, format: str = "csv") -> int:
+    """Write rows to ``handle`` as CSV or a Markdown table, flushing after each row."""
+
+    if format == "csv":
+        writer = csv.DictWriter(handle, fieldnames=COLUMNS)
+        writer.writeheader()
+        emit = writer.writerow
+    elif format == "markdown":
+        handle.write("| " + " | ".join(COLUMNS) + " |\n")
+        handle.write("|" + " --- |" * len(COLUMNS) + "\n")
+
+        def emit(row: dict[str, Any]) -> None:
+            cells = ("" if row[column] is None else str(row[column]) for column in COLUMNS)
+            handle.write("| " + " | ".join(cells) + " |\n")
+
+    else:
+        raise ValueError(f"Unknown sweep output format: {format}")
+    handle.flush()
+    count = 0
+    for row in rows:
+        emit(row)
+        handle.flush()
+        count += 1
+    return count
+
+
+def _shared_inventory(inventory: Path, scratch: Path) -> Path:
+    if binary_format.is_binary_inventory(inventory):
+        return inventory
+    shared = scratch / "inventory.bin"
+    binary_format.write_snapshot(json_stream.load_snapshot(inventory, columnar=True), shared)
+    return shared
+
+
+# Per-process state set up by ``_init_worker``.
+_snapshot: ColumnarSnapshot | None = None
+_total_watts = 0.0
+
+
+def _init_worker(path: str) -> None:
+    global _snapshot, _total_watts
+    _snapshot = binary_format.open_snapshot(path)
+    # The price does not affect watts; rows apply each grid price themselves.
+    _total_watts = BatchEstimator(price_per_kwh=0.0).estimate_power(_snapshot)["total_watts"]
+
+
+def _evaluate(
+    headroom: float,
+    strategy: str,
+    prices_per_kwh: tuple[float, ...],
+    hours_per_month: tuple[int, ...],
+    time_budget: float,
+) -> list[dict[str, Any]]:
+    plan = create_consolidator(strategy, headroom, time_budget).consolidate(_snapshot)
+    saved = plan.estimated_idle_watt_reduction
+    rows = []
+    for price, hours in product(prices_per_kwh, hours_per_month):
+        rows.append(
+            {
+                "headroom": headroom,
+                "strategy": strategy,
+                "price_per_kwh": price,
+                "hours_per_month": hours,
+                "nodes_powered_down": len(plan.nodes_to_power_down),
+                "unplaced": len(plan.unplaced),
+                "idle_watt_reduction": saved,
+                "monthly_cost": round(_total_watts * hours / 1000 * price, 2),
+                "monthly_savings": round(saved * hours / 1000 * price, 2),
+                "optimality_gap": plan.optimality_gap,
+            }
+        )
+    return rows
@@ -0,0 +1,157 @@
+"""Fixed-size utilization series for workloads.
+
+A :class:`UtilizationSeries` keeps the most recent ``capacity`` samples (by
+default 30 days of 5-minute samples) in a ring buffer of one byte per sample,
+quantized to 1/255 of full utilization. A histogram of the quantized values
+is maintained alongside, so mean and percentiles cost O(256) regardless of
+the series length. A full 30-day series takes about 10.6 KB, so 10k
+workloads fit in roughly 106 MB.
+"""
+
+from __future__ import annotations
+
+import base64
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+SAMPLE_INTERVAL_SECONDS = 300
+DEFAULT_CAPACITY = 30 * 24 * 3600 // SAMPLE_INTERVAL_SECONDS
+LEVELS = 255
+ENCODING = "u8-base64"
+
+
+def series_from_record(data: dict[str, Any]) -> UtilizationSeries | None:
+    """Parse the optional ``utilization_series`` member of a workload record."""
+
+    raw = data.get("utilization_series")
+    return None if raw is None else UtilizationSeries.from_dict(raw)
+
+
+class UtilizationSeries:
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        interval_seconds: int = SAMPLE_INTERVAL_SECONDS,
+        samples: Iterable[float] = (),
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("Series capacity must be at least 1")
+        if interval_seconds <= 0:
+            raise ValueError("Series interval must be positive")
+        self.capacity = capacity
+        self.interval_seconds = interval_seconds
+        self._buffer = array("B", bytes(capacity))
+        self._histogram = array("I", bytes(4 * (LEVELS + 1)))
+        self._start = 0
+        self._length = 0
+        self._total = 0
+        self.extend(samples)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[float]:
+        for level in self._levels():
+            yield level / LEVELS
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, UtilizationSeries):
+            return NotImplemented
+        return (
+            self.capacity == other.capacity
+            and self.interval_seconds == other.interval_seconds
+            and self.to_bytes() == other.to_bytes()
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"UtilizationSeries(samples={self._length}, capacity={self.capacity}, "
+            f"interval_seconds={self.interval_seconds})"
+        )
+
+    @property
+    def duration_hours(self) -> float:
+        return self._length * self.interval_seconds / 3600
+
+    def append(self, utilization: float) -> None:
+        self._append_level(round(min(max(utilization, 0.0), 1.0) * LEVELS))
+
+    def extend(self, samples: Iterable[float]) -> None:
+        for utilization in samples:
+            self.append(utilization)
+
+    def mean(self) -> float:
+        """Mean utilization; the energy integral over the series divided by its duration."""
+
+        if not self._length:
+            return 0.0
+        return self._total / (self._length * LEVELS)
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile (``q`` in 0-100) of the samples."""
+
+        if not self._length:
+            return 0.0
+        rank = max(1, -(-self._length * q // 100))
+        seen = 0
+        for level, count in enumerate(self._histogram):
+            seen += count
+            if seen >= rank:
+                return level / LEVELS
+        return 1.0
+
+    def to_bytes(self) -> bytes:
+        """Quantized samples, oldest first."""
+
+        end = self._start + self._length
+        if end <= self.capacity:
+            return self._buffer[self._start : end].tobytes()
+        return (self._buffer[self._start :] + self._buffer[: end - self.capacity]).tobytes()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "capacity": self.capacity,
+            "encoding": ENCODING,
+            "samples": base64.b64encode(self.to_bytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | list[float]) -> UtilizationSeries:
+        """Build a series from :meth:`to_dict` output or a plain list of utilizations."""
+
+        if isinstance(data, list):
+            data = {"samples": data}
+        samples = data.get("samples", [])
+        series = cls(
+            capacity=int(data.get("capacity", DEFAULT_CAPACITY)),
+            interval_seconds=int(data.get("interval_seconds", SAMPLE_INTERVAL_SECONDS)),
+        )
+        if isinstance(samples, str):
+            if data.get("encoding", ENCODING) != ENCODING:
+                raise ValueError(f"Unknown utilization series encoding: {data['encoding']}")
+            for level in base64.b64decode(samples):
+                series._append_level(level)
+        else:
+            series.extend(float(value) for value in samples)
+        return series
+
+    def _append_level(self, level: int) -> None:
+        if self._length == self.capacity:
+            # Full: overwrite the oldest sample.
+            oldest = self._buffer[self._start]
+            self._histogram[oldest] -= 1
+            self._total -= oldest
+            self._buffer[self._start] = level
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._buffer[(self._start + self._length) % self.capacity] = level
+            self._length += 1
+        self._histogram[level] += 1
+        self._total += level
+
+    def _levels(self) -> Iterator[int]:
+        buffer, capacity = self._buffer, self.capacity
+        for offset in range(self._length):
+            yield buffer[(self._start + offset) % capacity]
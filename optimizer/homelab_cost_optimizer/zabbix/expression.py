@@ -0,0 +1,350 @@
+"""Zabbix trigger and calculated-item expressions.
+
+Both the pre-5.4 syntax ``{Template:key.func(params)}`` and the current
+``func(/host/key,params)`` are parsed into a small tree. Evaluation is
+vectorized: the caller supplies each function's value at every evaluation
+point, and results carry an "unknown" mask that follows Zabbix's rules, so
+``TRUE or UNKNOWN`` is true and ``FALSE and UNKNOWN`` is false.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+from ..columnar import np
+from .template import parse_interval, resolve_macros
+
+FUNCTIONS = ("last", "avg", "min", "max", "sum", "count", "change")
+COUNT_OPERATORS = ("eq", "ne", "gt", "ge", "lt", "le")
+
+# Zabbix tolerance for "=" and "<>" between floats.
+EQUALITY_EPSILON = 0.000001
+
+_SUFFIXES = {
+    "K": 1024,
+    "M": 1024**2,
+    "G": 1024**3,
+    "T": 1024**4,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+}
+_NUMBER = re.compile(r"\d+(?:\.\d+)?(?:[eE][+-]?\d+)?([KMGTsmhdw])?(?![\w.])")
+_NAME = re.compile(r"[a-z_]+")
+_OPERATORS = ("<>", "<=", ">=", "<", ">", "=", "+", "-", "*", "/", "(", ")")
+# Binding strength of binary operators, weakest first.
+_PRECEDENCE = {
+    "or": 1,
+    "and": 2,
+    "=": 3,
+    "<>": 3,
+    "<": 4,
+    "<=": 4,
+    ">": 4,
+    ">=": 4,
+    "+": 5,
+    "-": 5,
+    "*": 6,
+    "/": 6,
+}
+
+
+@dataclass(frozen=True)
+class FunctionCall:
+    """One history function applied to an item.
+
+    ``period`` is a time window in seconds and ``count`` a number of latest
+    values; ``last`` uses ``count`` as the position from the newest value.
+    """
+
+    name: str
+    key: str
+    period: float | None = None
+    count: int | None = None
+    pattern: float | None = None
+    operator: str = "eq"
+
+
+@dataclass(frozen=True)
+class Node:
+    op: str
+    args: tuple = ()
+
+
+@dataclass
+class Expression:
+    text: str
+    root: Node
+    calls: list[FunctionCall]
+
+    @property
+    def keys(self) -> list[str]:
+        return list(dict.fromkeys(call.key for call in self.calls))
+
+    def evaluate(self, values: Callable[[FunctionCall], tuple]) -> tuple:
+        """``(result, unknown)`` arrays; ``values(call)`` returns the same pair."""
+
+        return _evaluate(self.root, values)
+
+
+def parse_expression(text: str, macros: Mapping[str, str] | None = None) -> Expression:
+    """Parse ``text`` after resolving its user macros; raises ``ValueError``."""
+
+    resolved = resolve_macros(text, macros or {})
+    parser = _Parser(resolved)
+    root = parser.parse()
+    return Expression(text, root, parser.calls)
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.calls: list[FunctionCall] = []
+        self.text = text
+
+    def parse(self) -> Node:
+        node = self._binary(1)
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.pos][1]!r} in {self.text!r}")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _binary(self, level: int) -> Node:
+        node = self._unary()
+        while True:
+            kind, value = self._peek()
+            strength = _PRECEDENCE.get(value) if kind == "op" else None
+            if strength is None or strength < level:
+                return node
+            self.pos += 1
+            node = Node(value, (node, self._binary(strength + 1)))
+
+    def _unary(self) -> Node:
+        kind, value = self._peek()
+        if kind == "op" and value in ("-", "not"):
+            self.pos += 1
+            return Node("neg" if value == "-" else "not", (self._unary(),))
+        if kind == "op" and value == "(":
+            self.pos += 1
+            node = self._binary(1)
+            if self._peek() != ("op", ")"):
+                raise ValueError(f"Missing ')' in {self.text!r}")
+            self.pos += 1
+            return node
+        if kind == "num":
+            self.pos += 1
+            return Node("num", (value,))
+        if kind == "call":
+            self.pos += 1
+            self.calls.append(value)
+            return Node("call", (value,))
+        raise ValueError(f"Unexpected {value or 'end'!r} in {self.text!r}")
+
+
+def _tokenize(text: str) -> list[tuple[str, object]]:
+    tokens: list[tuple[str, object]] = []
+    pos = 0
+    while pos < len(text):
+        char = text[pos]
+        if char.isspace():
+            pos += 1
+        elif char == "{":
+            end = _closing(text, pos, "{", "}")
+            tokens.append(("call", _old_call(text[pos + 1 : end])))
+            pos = end + 1
+        elif char.isdigit():
+            match = _NUMBER.match(text, pos)
+            if match is None:
+                raise ValueError(f"Bad number at {text[pos:]!r}")
+            number = float(match[0].rstrip("KMGTsmhdw"))
+            tokens.append(("num", number * _SUFFIXES.get(match[1], 1)))
+            pos = match.end()
+        elif char.isalpha():
+            name = _NAME.match(text, pos)[0]
+            pos += len(name)
+            if name in ("and", "or", "not"):
+                tokens.append(("op", name))
+            elif text.startswith("(", pos):
+                end = _closing(text, pos, "(", ")")
+                tokens.append(("call", _new_call(name, text[pos + 1 : end])))
+                pos = end + 1
+            else:
+                raise ValueError(f"Unexpected {name!r} in {text!r}")
+        else:
+            operator = next((op for op in _OPERATORS if text.startswith(op, pos)), None)
+            if operator is None:
+                raise ValueError(f"Unexpected {char!r} in {text!r}")
+            tokens.append(("op", operator))
+            pos += len(operator)
+    return tokens
+
+
+def _closing(text: str, start: int, opening: str, closing: str) -> int:
+    """Index of the bracket closing the one at ``start``, skipping quoted text."""
+
+    depth = 0
+    quoted = False
+    pos = start
+    while pos < len(text):
+        char = text[pos]
+        if quoted:
+            if char == "\\":
+                pos += 1
+            elif char == '"':
+                quoted = False
+        elif char == '"':
+            quoted = True
+        elif char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+    raise ValueError(f"Unbalanced {opening!r} in {text!r}")
+
+
+def _split_args(text: str) -> list[str]:
+    """Split on commas outside quotes and brackets; quotes are removed."""
+
+    args, current, depth, quoted = [], [], 0, False
+    for char in text:
+        if quoted:
+            if char == '"':
+                quoted = False
+            else:
+                current.append(char)
+            continue
+        if char == '"':
+            quoted = True
+        elif char == "," and depth == 0:
+            args.append("".join(current).strip())
+            current = []
+        else:
+            depth += char in "[(" and 1 or (-1 if char in "])" else 0)
+            current.append(char)
+    args.append("".join(current).strip())
+    return args
+
+
+def _old_call(body: str) -> FunctionCall:
+    """``host:key.func(params)``."""
+
+    host, sep, rest = body.partition(":")
+    if not sep or not rest.endswith(")"):
+        raise ValueError(f"Bad function reference {{{body}}}")
+    opening = _opening_paren(rest)
+    name_start = rest.rfind(".", 0, opening)
+    if name_start < 0:
+        raise ValueError(f"Bad function reference {{{body}}}")
+    name = rest[name_start + 1 : opening]
+    params = _split_args(rest[opening + 1 : -1])
+    key = rest[:name_start]
+    if name == "count":
+        period, pattern, operator = (params + ["", "", ""])[:3]
+        return _call(name, key, period, pattern, operator or "eq")
+    return _call(name, key, params[0] if params else "")
+
+
+def _opening_paren(text: str) -> int:
+    depth = 0
+    for pos in range(len(text) - 1, -1, -1):
+        if text[pos] == ")":
+            depth += 1
+        elif text[pos] == "(":
+            depth -= 1
+            if depth == 0:
+                return pos
+    raise ValueError(f"Unbalanced parentheses in {text!r}")
+
+
+def _new_call(name: str, body: str) -> FunctionCall:
+    """``/host/key,params``."""
+
+    args = _split_args(body)
+    query = args[0]
+    if not query.startswith("/") or "/" not in query[1:]:
+        raise ValueError(f"Bad item query {query!r} in {name}()")
+    key = query[1:].split("/", 1)[1]
+    params = args[1:]
+    if name == "count":
+        period, operator, pattern = (params + ["", "", ""])[:3]
+        return _call(name, key, period, pattern, operator or "eq")
+    return _call(name, key, params[0] if params else "")
+
+
+def _call(name: str, key: str, period: str, pattern: str = "", operator: str = "eq"):
+    if name not in FUNCTIONS:
+        raise ValueError(f"Unsupported trigger function {name}()")
+    if ":" in period:
+        raise ValueError(f"Time shifts are not supported: {name}({period})")
+    count = None
+    seconds = None
+    if period.startswith("#"):
+        count = int(period[1:])
+    elif period not in ("", "0") or name in ("avg", "min", "max", "sum", "count"):
+        seconds = float(parse_interval(period)) if period else None
+        if seconds is None:
+            raise ValueError(f"{name}() needs a period")
+    if name == "last":
+        if seconds is not None:
+            raise ValueError("last() takes #N, not a time period")
+        count = count or 1
+    if operator not in COUNT_OPERATORS:
+        raise ValueError(f"Unsupported count() operator {operator!r}")
+    value = None
+    if pattern:
+        try:
+            value = float(pattern)
+        except ValueError as exc:
+            raise ValueError(f"count() patterns must be numbers: {pattern!r}") from exc
+    return FunctionCall(name, key, seconds, count, value, operator)
+
+
+def _evaluate(node: Node, values: Callable[[FunctionCall], tuple]) -> tuple:
+    op = node.op
+    if op == "num":
+        return node.args[0], False
+    if op == "call":
+        return values(node.args[0])
+    if op in ("neg", "not"):
+        value, unknown = _evaluate(node.args[0], values)
+        return (-value if op == "neg" else (np.asarray(value) == 0).astype(float)), unknown
+    left, left_unknown = _evaluate(node.args[0], values)
+    right, right_unknown = _evaluate(node.args[1], values)
+    if op in ("and", "or"):
+        left_true = ~np.asarray(left_unknown) & (np.asarray(left) != 0)
+        right_true = ~np.asarray(right_unknown) & (np.asarray(right) != 0)
+        left_false = ~np.asarray(left_unknown) & ~left_true
+        right_false = ~np.asarray(right_unknown) & ~right_true
+        if op == "and":
+            result = left_true & right_true
+            known = result | left_false | right_false
+        else:
+            result = left_true | right_true
+            known = result | (left_false & right_false)
+        return result.astype(float), ~known
+    unknown = np.asarray(left_unknown) | np.asarray(right_unknown)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if op == "+":
+            return left + right, unknown
+        if op == "-":
+            return left - right, unknown
+        if op == "*":
+            return left * right, unknown
+        if op == "/":
+            zero = np.asarray(right) == 0
+            return np.where(zero, np.nan, left / np.where(zero, 1, right)), unknown | zero
+    if op == "=":
+        return (np.abs(left - right) <= EQUALITY_EPSILON).astype(float), unknown
+    if op == "<>":
+        return (np.abs(left - right) > EQUALITY_EPSILON).astype(float), unknown
+    compare = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}
+    return compare[op](left, right).astype(float), unknown
@@ -0,0 +1,342 @@
+"""Build the Zabbix template family from one declarative YAML model.
+
+The model lists items, discovery rules, triggers, macros and value maps once,
+in the field order of a Zabbix export. Any list entry may carry a ``feature``
+and is only emitted for variants that enable it; ``{TEMPLATE}`` is replaced by
+the variant's technical name. An entry's ``uuid`` maps variant templates to
+the UUIDs already imported into Zabbix, so existing entities update in place;
+every other UUID is derived from the model namespace, the template name and
+the entity's identity, so regenerating is reproducible. An entry's
+``override`` maps variant templates to fields that replace the entry's own in
+that variant; a null field is dropped. An entry's ``comment`` is written as an
+XML comment before it.
+"""
+
+from __future__ import annotations
+
+import uuid
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from .template import USER_MACRO
+
+TEMPLATE_TOKEN = "{TEMPLATE}"
+
+# List containers of an export and the element name of their entries.
+_ENTRIES = {
+    "templates": "template",
+    "groups": "group",
+    "items": "item",
+    "discovery_rules": "discovery_rule",
+    "item_prototypes": "item_prototype",
+    "trigger_prototypes": "trigger_prototype",
+    "graph_prototypes": "graph_prototype",
+    "graph_items": "graph_item",
+    "tags": "tag",
+    "preprocessing": "step",
+    "conditions": "condition",
+    "dependencies": "dependency",
+    "macros": "macro",
+    "mappings": "mapping",
+    "value_maps": "value_map",
+    "triggers": "trigger",
+}
+# Mapping shorthands: ``tags: {class: network}`` and ``mappings: {"1": up}``.
+_PAIRS = {"tags": ("tag", "value"), "mappings": ("value", "newvalue")}
+# Entities that get a UUID, and the field identifying them within a template.
+_IDENTITY = {
+    "item": "key",
+    "discovery_rule": "key",
+    "item_prototype": "key",
+    "trigger": "name",
+    "trigger_prototype": "name",
+    "graph_prototype": "name",
+    "value_map": "name",
+}
+
+
+@dataclass
+class Variant:
+    file: str
+    template: str
+    name: str
+    description: str
+    features: set[str] = field(default_factory=set)
+    uuid: str | None = None
+    groups: list[str] | None = None
+
+
+@dataclass
+class TemplateModel:
+    namespace: uuid.UUID
+    variants: list[Variant]
+    version: str = "7.0"
+    groups: list[str] = field(default_factory=list)
+    items: list[dict[str, Any]] = field(default_factory=list)
+    discovery_rules: list[dict[str, Any]] = field(default_factory=list)
+    triggers: list[dict[str, Any]] = field(default_factory=list)
+    macros: list[dict[str, Any]] = field(default_factory=list)
+    value_maps: list[dict[str, Any]] = field(default_factory=list)
+    source: str = ""
+
+    def variant(self, name: str) -> Variant:
+        for variant in self.variants:
+            if name in (variant.template, variant.file):
+                return variant
+        raise ValueError(f"Unknown template variant: {name}")
+
+
+def load_model(path: Path | str) -> TemplateModel:
+    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    try:
+        variants = [
+            Variant(
+                file=entry["file"],
+                template=entry["template"],
+                name=entry["name"],
+                description=entry.get("description", ""),
+                features=set(entry.get("features", [])),
+                uuid=entry.get("uuid"),
+                groups=entry.get("groups"),
+            )
+            for entry in data.get("variants", [])
+        ]
+        namespace = uuid.UUID(str(data["namespace"]))
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid template model {path}: {exc}") from exc
+    if not variants:
+        raise ValueError(f"Template model {path} defines no variants")
+    return TemplateModel(
+        namespace=namespace,
+        variants=variants,
+        version=str(data.get("version", "7.0")),
+        groups=list(data.get("groups", [])),
+        items=list(data.get("items", [])),
+        discovery_rules=list(data.get("discovery_rules", [])),
+        triggers=list(data.get("triggers", [])),
+        macros=list(data.get("macros", [])),
+        value_maps=list(data.get("value_maps", [])),
+        source=str(path),
+    )
+
+
+def entity_uuid(namespace: uuid.UUID, template: str, kind: str, identity: str) -> str:
+    """Stable 32-digit UUID of one template entity."""
+
+    return uuid.uuid5(namespace, f"{template}/{kind}/{identity}").hex
+
+
+def build_export(model: TemplateModel, variant: Variant) -> ET.Element:
+    """The ``<zabbix_export>`` tree of one variant.
+
+    Raises ``ValueError`` when the variant references a macro, value map or
+    trigger dependency it does not include, or when two entities of one kind
+    would share a UUID.
+    """
+
+    def select(entries: list[Any]) -> list[Any]:
+        return [
+            prune(_override(entry, variant) if isinstance(entry, dict) else entry)
+            for entry in entries
+            if not isinstance(entry, dict) or entry.get("feature", None) in features
+        ]
+
+    def prune(value: Any) -> Any:
+        if isinstance(value, list):
+            return select(value)
+        if isinstance(value, dict):
+            return {key: prune(item) for key, item in value.items() if key != "feature"}
+        return _text(value).replace(TEMPLATE_TOKEN, variant.template)
+
+    features = variant.features | {None}
+    body = {
+        "items": select(model.items),
+        "discovery_rules": select(model.discovery_rules),
+        "triggers": select(model.triggers),
+        "macros": select(model.macros),
+    }
+    value_maps = _used_value_maps(select(model.value_maps), body)
+    _check_references(variant, body)
+
+    seen: set[tuple[str, str]] = set()
+    root = ET.Element("zabbix_export", version=model.version)
+    root.append(ET.Comment(f" Generated from {Path(model.source).name}; edit the model. "))
+    templates = ET.SubElement(root, "templates")
+    template = ET.SubElement(templates, "template")
+    pinned = variant.uuid or entity_uuid(model.namespace, variant.template, "template", "")
+    _leaf(template, "uuid", pinned)
+    _leaf(template, "template", variant.template)
+    _leaf(template, "name", variant.name)
+    _leaf(template, "description", variant.description.rstrip("\n"))
+    groups = variant.groups if variant.groups is not None else model.groups
+    _append(template, "groups", [{"name": name} for name in groups], model, variant, seen)
+    for key, entries in body.items():
+        if entries:
+            _append(template, key, entries, model, variant, seen)
+    if value_maps:
+        _append(root, "value_maps", value_maps, model, variant, seen)
+    return root
+
+
+def render(model: TemplateModel, variant: Variant) -> bytes:
+    root = build_export(model, variant)
+    ET.indent(root, space="  ")
+    return ET.tostring(root, encoding="UTF-8", xml_declaration=True) + b"\n"
+
+
+def generate(
+    model: TemplateModel, out_dir: Path | str, variants: list[str] | None = None, write: bool = True
+) -> list[tuple[Path, bool]]:
+    """Render variants into ``out_dir``; returns ``(path, changed)`` per file.
+
+    Unchanged files are not rewritten. With ``write=False`` nothing is written,
+    which lets callers check that committed exports match the model.
+    """
+
+    chosen = model.variants if not variants else [model.variant(name) for name in variants]
+    results = []
+    for variant in chosen:
+        path = Path(out_dir) / variant.file
+        content = render(model, variant)
+        changed = not path.exists() or path.read_bytes() != content
+        if changed and write:
+            path.write_bytes(content)
+        results.append((path, changed))
+    return results
+
+
+def _append(
+    parent: ET.Element,
+    key: str,
+    value: Any,
+    model: TemplateModel,
+    variant: Variant,
+    seen: set[tuple[str, str]],
+) -> None:
+    if key in _PAIRS and isinstance(value, dict):
+        name, other = _PAIRS[key]
+        value = [{name: first, other: second} for first, second in value.items()]
+    if not isinstance(value, (list, dict)):
+        _leaf(parent, key, _text(value))
+        return
+    element = ET.SubElement(parent, key)
+    if isinstance(value, dict):
+        for child, item in value.items():
+            _append(element, child, item, model, variant, seen)
+        return
+    tag = _ENTRIES.get(key)
+    if tag is None:
+        raise ValueError(f"Don't know how to export a list under <{key}>")
+    for entry in value:
+        if not isinstance(entry, dict):
+            raise ValueError(f"<{tag}> entries must be mappings")
+        entry = dict(entry)
+        comment = entry.pop("comment", None)
+        pins = entry.pop("uuid", None)
+        if comment:
+            element.append(ET.Comment(f" {comment} "))
+        child = ET.SubElement(element, tag)
+        if tag in _IDENTITY:
+            identity = entry.get(_IDENTITY[tag])
+            if not identity:
+                raise ValueError(f"<{tag}> without {_IDENTITY[tag]}")
+            digest = _pinned_uuid(pins, variant) or entity_uuid(
+                model.namespace, variant.template, tag, identity
+            )
+            if (tag, digest) in seen:
+                raise ValueError(f"Duplicate {tag} {identity!r} in {variant.template}")
+            seen.add((tag, digest))
+            _leaf(child, "uuid", digest)
+        elif pins is not None:
+            raise ValueError(f"<{tag}> entries have no UUID to pin")
+        for name, item in entry.items():
+            _append(child, name, item, model, variant, seen)
+
+
+def _override(entry: dict[str, Any], variant: Variant) -> dict[str, Any]:
+    if "override" not in entry:
+        return entry
+    overrides = entry["override"]
+    if not isinstance(overrides, dict) or not all(
+        isinstance(fields, dict) for fields in overrides.values()
+    ):
+        raise ValueError("Entry override must map template names to fields")
+    merged = {key: value for key, value in entry.items() if key != "override"}
+    for key, value in overrides.get(variant.template, {}).items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _pinned_uuid(pins: Any, variant: Variant) -> str | None:
+    if pins is None:
+        return None
+    if not isinstance(pins, dict):
+        raise ValueError("Entity uuid must map template names to UUIDs")
+    pinned = pins.get(variant.template)
+    if pinned is not None and uuid.UUID(str(pinned)).hex != pinned:
+        raise ValueError(f"Pinned UUID {pinned!r} is not 32 lowercase hex digits")
+    return pinned
+
+
+def _leaf(parent: ET.Element, tag: str, text: str) -> None:
+    ET.SubElement(parent, tag).text = text
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bool):
+        raise ValueError(f"Ambiguous YAML boolean {value}; quote the value in the model")
+    return "" if value is None else str(value)
+
+
+def _walk(value: Any):
+    """Every ``(key, value)`` pair below ``value``."""
+
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield key, item
+            yield from _walk(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _walk(item)
+
+
+def _used_value_maps(value_maps: list[dict], body: dict) -> list[dict]:
+    used = {item["name"] for key, item in _walk(body) if key == "valuemap"}
+    known = {entry["name"] for entry in value_maps}
+    if used - known:
+        raise ValueError(f"Unknown value maps: {', '.join(sorted(used - known))}")
+    return [entry for entry in value_maps if entry["name"] in used]
+
+
+def _check_references(variant: Variant, body: dict) -> None:
+    defined = {macro["macro"] for macro in body["macros"]}
+    referenced = {
+        match.split(":", 1)[0].rstrip("}") + "}"
+        for key, text in _walk(body)
+        if isinstance(text, str)
+        for match in USER_MACRO.findall(text)
+    }
+    if referenced - defined:
+        missing = ", ".join(sorted(referenced - defined))
+        raise ValueError(f"{variant.template} uses undefined macros: {missing}")
+
+    triggers = {
+        trigger["name"]
+        for key, entries in _walk(body)
+        if key in ("triggers", "trigger_prototypes")
+        for trigger in entries
+    }
+    for key, entries in _walk(body):
+        if key == "dependencies":
+            for dependency in entries:
+                if dependency.get("name") not in triggers:
+                    raise ValueError(
+                        f"{variant.template} depends on missing trigger {dependency.get('name')!r}"
+                    )
@@ -0,0 +1,707 @@
+"""Replay exported Zabbix history against a template's preprocessing and triggers.
+
+History is read in chunks of ``chunk_rows`` rows from CSV (``host,key,clock,
+value`` with an optional ``ns`` column) or NDJSON (the same fields; ``host`` may
+be the object of Zabbix's real-time export and the key may be named ``key_``
+as in the database). Rows are routed to template items and item prototypes,
+where LLD macros in prototype keys become the instance, e.g. one interface.
+
+By default values are raw counter readings and each item's preprocessing
+chain runs first; with ``stored=True`` they are taken as Zabbix stored them.
+Calculated items are computed whenever one of their inputs gets a value, and
+triggers are evaluated whenever an item they reference gets one, as the
+history syncer does. Only the tail of each item's history that the longest
+trigger function can still look at is kept between chunks, so memory does not
+grow with the export. Rows must be in clock order per item, as in Zabbix's
+real-time export; rows older than the previous value of their item are
+counted as late and skipped.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import re
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+
+from ..columnar import np
+from .expression import Expression, FunctionCall, parse_expression
+from .preprocessing import Batch, Pipeline, grow, require_numpy, segment_starts
+from .template import ItemSpec, TemplateSpec, TriggerSpec, resolve_macros
+
+CHUNK_ROWS = 250_000
+NUMERIC_TYPES = {"FLOAT", "UNSIGNED"}
+EXAMPLES = 3
+# Store keys pack a channel (one item of one instance) above a millisecond clock.
+CLOCK_BITS = 38
+CLOCK_MASK = (1 << CLOCK_BITS) - 1
+
+_LLD_MACRO = re.compile(r"\{#[A-Z0-9_.]+\}")
+# Channel codes of rows that match no item, or an item that is not replayed.
+_UNMATCHED = -1
+_SKIPPED = -2
+
+HistoryChunk = tuple[list, list, list, list, list]
+
+
+@dataclass
+class ItemReplay:
+    key: str
+    rows: int = 0
+    values: int = 0
+    discarded: int = 0
+    decreases: int = 0
+    wraps_32bit: int = 0
+
+
+@dataclass
+class TriggerReplay:
+    name: str
+    priority: str
+    instances: int = 0
+    fired: int = 0
+    problems: int = 0
+    problem_seconds: float = 0.0
+    # ``(instance, clock)`` of the first problem events.
+    examples: list[tuple[str, float]] = field(default_factory=list)
+
+
+@dataclass
+class ReplayReport:
+    template: str
+    rows: int
+    unmatched: int
+    skipped: int
+    late: int
+    items: list[ItemReplay]
+    triggers: list[TriggerReplay]
+
+
+@dataclass
+class _Item:
+    index: int
+    spec: ItemSpec
+    rule: int | None
+    pipeline: Pipeline | None = None
+    formula: Expression | None = None
+    refs: dict = field(default_factory=dict)
+    drivers: np.ndarray | None = None
+    # Channel of each instance, and of each item-local series index.
+    channels: np.ndarray | None = None
+    series: np.ndarray | None = None
+    count: int = 0
+    report: ItemReplay | None = None
+
+
+@dataclass
+class _Trigger:
+    spec: TriggerSpec
+    rule: int | None
+    problem: Expression
+    recovery: Expression | None
+    refs: dict
+    drivers: np.ndarray
+    report: TriggerReplay
+    state: np.ndarray
+    seen: np.ndarray
+    fired: np.ndarray
+    # Sum of falling minus rising clocks; open problems are closed at the end.
+    problem_ms: int = 0
+
+
+class HistoryReplay:
+    """Feed history chunks with :meth:`feed`, then call :meth:`report`."""
+
+    def __init__(
+        self,
+        template: TemplateSpec,
+        macros: Mapping[str, str] | None = None,
+        stored: bool = False,
+    ) -> None:
+        require_numpy("History replay")
+        self.template = template
+        self.macros = {**template.macros, **(macros or {})}
+        self.items: list[_Item] = []
+        self._exact: dict[str, int] = {}
+        self._patterns: list[tuple[re.Pattern[str], int, list[str]]] = []
+        for spec in template.items:
+            self._add_item(spec, None, stored)
+        for rule_index, rule in enumerate(template.discovery_rules):
+            for spec in rule.item_prototypes:
+                self._add_item(spec, rule_index, stored)
+        for item in self.items:
+            if item.spec.type == "CALCULATED":
+                item.formula = self._parse(item.spec.params, item.spec.key)
+                item.refs, item.drivers = self._references(item.formula, item.rule)
+        self.triggers = [self._trigger(spec, None) for spec in template.triggers] + [
+            self._trigger(spec, rule_index)
+            for rule_index, rule in enumerate(template.discovery_rules)
+            for spec in rule.trigger_prototypes
+        ]
+        calls = [call for trigger in self.triggers for call in _calls(trigger)] + [
+            call for item in self.items if item.formula for call in item.formula.calls
+        ]
+        self._lookback = max([int(call.period * 1000) for call in calls if call.period] or [0])
+        self._depth = max([(call.count or 1) + (call.name == "change") for call in calls] or [1])
+
+        self._pairs: dict[tuple[str, str], int] = {}
+        self._instances: dict[tuple, int] = {}
+        self._labels: list[str] = []
+        self._inst_host = np.zeros(0, dtype=np.int64)
+        self._channels = 0
+        self._channel_item = np.zeros(0, dtype=np.int64)
+        self._channel_inst = np.zeros(0, dtype=np.int64)
+        self._channel_local = np.zeros(0, dtype=np.int64)
+        self._last = np.zeros(0, dtype=np.int64)
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._values = np.zeros(0)
+        self._base_ms: int | None = None
+        self._end_ms = 0
+        self.rows = self.unmatched = self.skipped = self.late = 0
+
+    def feed(self, chunk: HistoryChunk) -> None:
+        hosts, keys, clocks, values, ns = chunk
+        if not hosts:
+            return
+        lookup = self._pairs.get
+        codes = [lookup(pair) for pair in zip(hosts, keys, strict=True)]
+        for row, code in enumerate(codes):
+            if code is None:
+                code = lookup((hosts[row], keys[row]))
+                codes[row] = self._resolve(hosts[row], keys[row]) if code is None else code
+        channels = np.asarray(codes, dtype=np.int64)
+        self.rows += len(channels)
+        self.unmatched += int((channels == _UNMATCHED).sum())
+        self.skipped += int((channels == _SKIPPED).sum())
+
+        try:
+            seconds = np.asarray(clocks).astype(np.float64)
+            nanos = np.asarray(ns).astype(np.int64) if ns else 0
+        except ValueError as exc:
+            raise ValueError(f"Bad clock in history: {exc}") from exc
+        clock_ms = np.round(seconds * 1000).astype(np.int64) + nanos // 1_000_000
+        if self._base_ms is None:
+            # Leave room for rows a little older than the first chunk.
+            self._base_ms = int(clock_ms.min()) - 86_400_000
+        clock_ms -= self._base_ms
+        if clock_ms.max() > CLOCK_MASK:
+            raise ValueError("History spans more than the supported ~8 years")
+        early = clock_ms < 0
+        self.late += int((early & (channels >= 0)).sum())
+        channels[early] = _UNMATCHED
+
+        # Objects keep JSON integers above 2**53 exact until they are parsed per item.
+        raw = np.asarray(values) if isinstance(values[0], str) else np.array(values, dtype=object)
+        rows = np.flatnonzero(channels >= 0)
+        owners = self._channel_item[channels[rows]]
+        rows = rows[np.lexsort((clock_ms[rows], channels[rows], owners))]
+        owners = self._channel_item[channels[rows]]
+        new = [
+            self._preprocess(self.items[owners[group[0]]], rows[group], channels, clock_ms, raw)
+            for group in np.split(np.arange(len(rows)), np.flatnonzero(np.diff(owners)) + 1)
+            if len(group)
+        ]
+        new_keys = self._merge(new)
+        for item in self.items:
+            if item.formula is not None:
+                calculated = self._merge([self._calculate(item, new_keys)])
+                new_keys = np.concatenate([new_keys, calculated])
+        if len(new_keys):
+            self._end_ms = max(self._end_ms, int((new_keys & CLOCK_MASK).max()))
+        for trigger in self.triggers:
+            self._replay(trigger, new_keys)
+        self._trim()
+
+    def report(self) -> ReplayReport:
+        for trigger in self.triggers:
+            report = trigger.report
+            open_problems = int(trigger.state.sum())
+            report.instances = int(trigger.seen.sum())
+            report.fired = int(trigger.fired.sum())
+            report.problem_seconds = (trigger.problem_ms + open_problems * self._end_ms) / 1000
+        for item in self.items:
+            if item.pipeline is not None:
+                stats = item.pipeline.stats
+                item.report.discarded = stats.discarded
+                item.report.decreases = stats.decreases
+                item.report.wraps_32bit = stats.wraps_32bit
+        return ReplayReport(
+            template=self.template.template or self.template.name,
+            rows=self.rows,
+            unmatched=self.unmatched,
+            skipped=self.skipped,
+            late=self.late,
+            items=[item.report for item in self.items if item.report.rows or item.report.values],
+            triggers=[trigger.report for trigger in self.triggers],
+        )
+
+    def _add_item(self, spec: ItemSpec, rule: int | None, stored: bool) -> None:
+        index = len(self.items)
+        item = _Item(index, spec, rule, report=ItemReplay(spec.key))
+        item.channels = np.zeros(0, dtype=np.int64)
+        item.series = np.zeros(0, dtype=np.int64)
+        if spec.preprocessing and not stored and spec.value_type in NUMERIC_TYPES:
+            try:
+                item.pipeline = Pipeline.compile(spec.preprocessing, self.macros)
+            except ValueError as exc:
+                raise ValueError(f"{spec.key}: {exc}") from exc
+        self.items.append(item)
+        macros = _LLD_MACRO.findall(spec.key)
+        if not macros:
+            self._exact.setdefault(spec.key, index)
+            return
+        pattern, names = "", []
+        for part, macro in zip(_LLD_MACRO.split(spec.key), macros + [None], strict=True):
+            pattern += re.escape(part)
+            if macro is None:
+                continue
+            if macro in names:
+                pattern += f"(?P=m{names.index(macro)})"
+            else:
+                pattern += f"(?P<m{len(names)}>.+?)"
+                names.append(macro)
+        self._patterns.append((re.compile(pattern), index, names))
+
+    def _parse(self, text: str, owner: str) -> Expression:
+        try:
+            return parse_expression(text, self.macros)
+        except ValueError as exc:
+            raise ValueError(f"{owner}: {exc}") from exc
+
+    def _references(self, expression: Expression, rule: int | None) -> tuple[dict, np.ndarray]:
+        """Item of each key in the scope of ``rule``, and the items driving evaluation."""
+
+        refs = {}
+        drivers = np.zeros(len(self.items), dtype=bool)
+        for key in expression.keys:
+            local = [item for item in self.items if item.spec.key == key and item.rule == rule]
+            host = [item for item in self.items if item.spec.key == key and item.rule is None]
+            if not local and not host:
+                raise ValueError(f"{expression.text}: unknown item {key}")
+            target = (local or host)[0]
+            refs[key] = (target, rule is not None and target.rule is None)
+            if target.rule == rule:
+                drivers[target.index] = True
+        return refs, drivers
+
+    def _trigger(self, spec: TriggerSpec, rule: int | None) -> _Trigger:
+        problem = self._parse(spec.expression, spec.name)
+        recovery = None
+        if spec.recovery_mode == "RECOVERY_EXPRESSION":
+            recovery = self._parse(spec.recovery_expression, spec.name)
+        elif spec.recovery_mode not in ("EXPRESSION", "NONE"):
+            raise ValueError(f"{spec.name}: unsupported recovery mode {spec.recovery_mode}")
+        refs, drivers = self._references(problem, rule)
+        if recovery is not None:
+            extra, extra_drivers = self._references(recovery, rule)
+            refs.update(extra)
+            drivers |= extra_drivers
+        try:
+            name = resolve_macros(spec.name, self.macros)
+        except ValueError:
+            name = spec.name
+        empty = np.zeros(0, dtype=bool)
+        return _Trigger(
+            spec,
+            rule,
+            problem,
+            recovery,
+            refs,
+            drivers,
+            TriggerReplay(name, spec.priority),
+            empty,
+            empty.copy(),
+            empty.copy(),
+        )
+
+    def _resolve(self, host: str, key: str) -> int:
+        index = self._exact.get(key)
+        lld: tuple = ()
+        if index is None:
+            for pattern, candidate, names in self._patterns:
+                match = pattern.fullmatch(key)
+                if match:
+                    index = candidate
+                    lld = tuple(sorted(zip(names, match.groups(), strict=True)))
+                    break
+        if index is None:
+            code = _UNMATCHED
+        else:
+            item = self.items[index]
+            if item.spec.value_type not in NUMERIC_TYPES or item.formula is not None:
+                code = _SKIPPED
+            else:
+                instance = self._instance(host, item.rule, lld)
+                code = int(self._channels_for(item, np.array([instance]))[0])
+        self._pairs[(host, key)] = code
+        return code
+
+    def _instance(self, host: str, rule: int | None, lld: tuple) -> int:
+        code = self._instances.get((host, rule, lld))
+        if code is None:
+            host_code = self._instances.get((host, None, ()))
+            if host_code is None and (rule is not None or lld):
+                host_code = self._instance(host, None, ())
+            code = len(self._labels)
+            self._instances[(host, rule, lld)] = code
+            values = ", ".join(value for _, value in lld)
+            self._labels.append(f"{host} [{values}]" if lld else host)
+            self._inst_host = grow(self._inst_host, code + 1, 0)
+            self._inst_host[code] = code if host_code is None else host_code
+        return code
+
+    def _channels_for(self, item: _Item, instances: np.ndarray) -> np.ndarray:
+        """Channel of ``item`` on each instance, created on first use."""
+
+        item.channels = grow(item.channels, len(self._labels), -1)
+        missing = np.unique(instances[item.channels[instances] < 0])
+        for instance in missing:
+            code = self._channels
+            self._channels += 1
+            for name, value in (
+                ("_channel_item", item.index),
+                ("_channel_inst", instance),
+                ("_channel_local", item.count),
+                ("_last", -1),
+            ):
+                array = grow(getattr(self, name), code + 1, 0)
+                array[code] = value
+                setattr(self, name, array)
+            item.channels[instance] = code
+            item.series = grow(item.series, item.count + 1, 0)
+            item.series[item.count] = code
+            item.count += 1
+        return item.channels[instances]
+
+    def _preprocess(
+        self,
+        item: _Item,
+        rows: np.ndarray,
+        channels: np.ndarray,
+        clocks: np.ndarray,
+        raw: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Preprocessed values of ``item`` from its ``rows``, sorted by channel and clock."""
+
+        series, times = channels[rows], clocks[rows]
+        late = times < self._last[series]
+        if late.any():
+            self.late += int(late.sum())
+            rows, series, times = rows[~late], series[~late], times[~late]
+        item.report.rows += len(rows)
+        if not len(rows):
+            return series, times, np.zeros(0)
+        ends = np.append(series[1:] != series[:-1], True)
+        self._last[series[ends]] = times[ends]
+        if item.pipeline is not None and not item.pipeline.numeric_input:
+            values = raw[rows]
+        else:
+            counter = item.pipeline is not None and item.pipeline.counts_deltas
+            try:
+                values = raw[rows].astype(np.uint64 if counter else np.float64)
+            except (ValueError, OverflowError) as exc:
+                raise ValueError(f"Non-numeric history value for {item.spec.key}: {exc}") from exc
+        if item.pipeline is not None:
+            # Pipelines work in seconds; the store in milliseconds from the base clock.
+            batch = item.pipeline.run(Batch(self._channel_local[series], times / 1000, values))
+            series, values = item.series[batch.series], batch.values
+            times = np.round(batch.clocks * 1000).astype(np.int64)
+        item.report.values += len(values)
+        return series, times, values.astype(np.float64, copy=False)
+
+    def _merge(self, parts: list[tuple[np.ndarray, np.ndarray, np.ndarray]]) -> np.ndarray:
+        """Add values to the store; returns their keys."""
+
+        parts = [part for part in parts if len(part[0])]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        keys = np.concatenate([(series << CLOCK_BITS) | times for series, times, _ in parts])
+        values = np.concatenate([values for _, _, values in parts])
+        all_keys = np.concatenate([self._keys, keys])
+        order = np.argsort(all_keys, kind="stable")
+        self._keys = all_keys[order]
+        self._values = np.concatenate([self._values, values])[order]
+        return keys
+
+    def _calculate(self, item: _Item, new_keys: np.ndarray):
+        instances, clocks = self._points(item.drivers, new_keys)
+        # Inputs polled at the same clock but split across chunks give one value.
+        existing = self._channels_for(item, instances)
+        fresh = clocks > self._last[existing]
+        instances, clocks, existing = instances[fresh], clocks[fresh], existing[fresh]
+        if not len(instances):
+            return existing, clocks, np.zeros(0)
+        value, unknown = self._evaluate(item.formula, item.refs, instances, clocks)
+        known = ~unknown & np.isfinite(value)
+        item.report.rows += len(known)
+        item.report.values += int(known.sum())
+        np.maximum.at(self._last, existing, clocks)
+        return existing[known], clocks[known], value[known]
+
+    def _points(self, drivers: np.ndarray, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Distinct ``(instance, clock)`` evaluation points, sorted."""
+
+        channels = keys >> CLOCK_BITS
+        keys = keys[drivers[self._channel_item[channels]]]
+        points = np.unique(
+            (self._channel_inst[keys >> CLOCK_BITS] << CLOCK_BITS) | (keys & CLOCK_MASK)
+        )
+        return points >> CLOCK_BITS, points & CLOCK_MASK
+
+    def _evaluate(
+        self, expression: Expression, refs: dict, instances: np.ndarray, clocks: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        padded = np.append(self._values, 0.0)
+
+        def values(call: FunctionCall):
+            item, host_level = refs[call.key]
+            targets = self._inst_host[instances] if host_level else instances
+            channels = np.full(len(targets), -1, dtype=np.int64)
+            inside = targets < len(item.channels)
+            channels[inside] = item.channels[targets[inside]]
+            return self._function(call, channels, clocks, padded)
+
+        value, unknown = expression.evaluate(values)
+        size = len(instances)
+        return (
+            np.broadcast_to(np.asarray(value, dtype=np.float64), size),
+            np.broadcast_to(np.asarray(unknown, dtype=bool), size),
+        )
+
+    def _function(
+        self, call: FunctionCall, channels: np.ndarray, clocks: np.ndarray, padded: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        missing = channels < 0
+        base = np.maximum(channels, 0) << CLOCK_BITS
+        hi = np.searchsorted(self._keys, base | clocks, side="right")
+        start = np.searchsorted(self._keys, base, side="left")
+        if call.name in ("last", "change"):
+            newest = hi - (call.count or 1)
+            older = newest - 1 if call.name == "change" else newest
+            unknown = missing | (older < start)
+            value = padded[np.maximum(newest, 0)]
+            if call.name == "change":
+                value = value - padded[np.maximum(older, 0)]
+            return value, unknown
+        if call.count is not None:
+            lo = np.maximum(hi - call.count, start)
+        else:
+            lo = np.searchsorted(
+                self._keys, base | np.maximum(clocks - int(call.period * 1000), 0), side="right"
+            )
+            lo = np.maximum(lo, start)
+        lo = np.where(missing, hi, lo)
+        empty = lo >= hi
+        bounds = np.column_stack([lo, hi]).ravel()
+        if call.name == "count":
+            if call.pattern is None:
+                return (hi - lo).astype(np.float64), missing
+            compare = {
+                "eq": np.equal,
+                "ne": np.not_equal,
+                "gt": np.greater,
+                "ge": np.greater_equal,
+                "lt": np.less,
+                "le": np.less_equal,
+            }[call.operator]
+            matches = compare(padded, call.pattern).astype(np.float64)
+            counted = np.add.reduceat(matches, bounds)[::2]
+            return np.where(empty, 0.0, counted), missing
+        reduce = {"sum": np.add, "avg": np.add, "min": np.minimum, "max": np.maximum}[call.name]
+        value = reduce.reduceat(padded, bounds)[::2]
+        if call.name == "avg":
+            value = value / np.maximum(hi - lo, 1)
+        return value, empty
+
+    def _replay(self, trigger: _Trigger, new_keys: np.ndarray) -> None:
+        instances, clocks = self._points(trigger.drivers, new_keys)
+        if not len(instances):
+            return
+        value, unknown = self._evaluate(trigger.problem, trigger.refs, instances, clocks)
+        signal = np.full(len(instances), -1, dtype=np.int8)
+        problem = ~unknown & (value != 0)
+        healthy = ~unknown & (value == 0)
+        signal[problem] = 1
+        if trigger.spec.recovery_mode == "EXPRESSION":
+            signal[healthy] = 0
+        elif trigger.recovery is not None:
+            recovered, recovery_unknown = self._evaluate(
+                trigger.recovery, trigger.refs, instances, clocks
+            )
+            signal[healthy & ~recovery_unknown & (recovered != 0)] = 0
+
+        size = int(instances.max()) + 1
+        trigger.state = grow(trigger.state, size, False)
+        trigger.seen = grow(trigger.seen, size, False)
+        trigger.fired = grow(trigger.fired, size, False)
+        starts = segment_starts(instances)
+        carried = trigger.state[instances]
+        held = starts & (signal < 0)
+        signal[held] = carried[held]
+        # Forward-fill each instance's state from its last set or reset.
+        last_signal = np.where(signal >= 0, np.arange(len(signal)), 0)
+        np.maximum.accumulate(last_signal, out=last_signal)
+        state = signal[last_signal] == 1
+        previous = np.empty_like(state)
+        previous[1:] = state[:-1]
+        previous[starts] = carried[starts]
+        rising = state & ~previous
+        falling = previous & ~state
+
+        report = trigger.report
+        report.problems += int(rising.sum())
+        trigger.problem_ms += int(clocks[falling].sum()) - int(clocks[rising].sum())
+        for position in np.flatnonzero(rising)[: EXAMPLES - len(report.examples)]:
+            clock = (int(clocks[position]) + self._base_ms) / 1000
+            report.examples.append((self._labels[instances[position]], clock))
+        ends = np.append(starts[1:], True)
+        trigger.state[instances[ends]] = state[ends]
+        trigger.seen[instances] = True
+        trigger.fired[instances[rising]] = True
+
+    def _trim(self) -> None:
+        """Drop values no trigger or calculated item can reach any more."""
+
+        if not len(self._keys):
+            return
+        channels = self._keys >> CLOCK_BITS
+        end = np.searchsorted(self._keys, (channels + 1) << CLOCK_BITS, side="left")
+        newest = self._keys[end - 1] & CLOCK_MASK
+        keep = ((self._keys & CLOCK_MASK) > newest - self._lookback) | (
+            end - np.arange(len(self._keys)) <= self._depth
+        )
+        self._keys = self._keys[keep]
+        self._values = self._values[keep]
+
+
+def read_history(path: Path | str, chunk_rows: int = CHUNK_ROWS) -> Iterator[HistoryChunk]:
+    """Chunks of ``(hosts, keys, clocks, values, ns)`` columns; ``ns`` may be empty."""
+
+    if chunk_rows < 1:
+        raise ValueError("Chunk size must be at least 1")
+    path = Path(path)
+    suffix = path.suffixes[-2] if path.suffix == ".gz" and len(path.suffixes) > 1 else path.suffix
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", newline="") as handle:
+        if suffix.lower() == ".csv":
+            yield from _read_csv(handle, chunk_rows, path)
+        elif suffix.lower() in (".ndjson", ".jsonl", ".json"):
+            yield from _read_ndjson(handle, chunk_rows, path)
+        else:
+            raise ValueError(f"Unsupported history format: {path.name} (use .csv or .ndjson)")
+
+
+def _read_csv(handle: io.TextIOBase, chunk_rows: int, path: Path) -> Iterator[HistoryChunk]:
+    reader = csv.reader(handle)
+    header = [name.strip().lower() for name in next(reader, [])]
+    columns = {name: position for position, name in enumerate(header)}
+    columns.setdefault("key", columns.get("key_"))
+    missing = [name for name in ("host", "key", "clock", "value") if columns.get(name) is None]
+    if missing:
+        raise ValueError(f"{path}: missing CSV columns {', '.join(missing)}")
+    host, key, clock, value = (columns[name] for name in ("host", "key", "clock", "value"))
+    ns = columns.get("ns")
+    while True:
+        rows = list(islice(reader, chunk_rows))
+        if not rows:
+            return
+        try:
+            yield (
+                [row[host] for row in rows],
+                [row[key] for row in rows],
+                [row[clock] for row in rows],
+                [row[value] for row in rows],
+                [row[ns] for row in rows] if ns is not None else [],
+            )
+        except IndexError as exc:
+            raise ValueError(f"{path}: short CSV row") from exc
+
+
+def _read_ndjson(handle: io.TextIOBase, chunk_rows: int, path: Path) -> Iterator[HistoryChunk]:
+    columns: HistoryChunk = ([], [], [], [], [])
+    with_ns = None
+    for number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            host = record["host"]
+            key = record["key"] if "key" in record else record["key_"]
+            clock, value = record["clock"], record["value"]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise ValueError(f"{path}:{number}: bad history record: {exc}") from exc
+        if with_ns is None:
+            with_ns = "ns" in record
+        columns[0].append(host["host"] if isinstance(host, dict) else host)
+        columns[1].append(key)
+        columns[2].append(clock)
+        columns[3].append(value)
+        if with_ns:
+            columns[4].append(record.get("ns", 0))
+        if len(columns[0]) >= chunk_rows:
+            yield columns
+            columns = ([], [], [], [], [])
+    if columns[0]:
+        yield columns
+
+
+def replay_history(
+    template: TemplateSpec,
+    paths: Iterable[Path | str],
+    macros: Mapping[str, str] | None = None,
+    stored: bool = False,
+    chunk_rows: int = CHUNK_ROWS,
+) -> ReplayReport:
+    replay = HistoryReplay(template, macros, stored)
+    for path in paths:
+        for chunk in read_history(path, chunk_rows):
+            replay.feed(chunk)
+    return replay.report()
+
+
+def render_markdown(report: ReplayReport) -> str:
+    md = [
+        f"# History replay: {report.template}",
+        "",
+        f"- Rows: {report.rows} ({report.unmatched} unmatched, {report.skipped} not replayed, "
+        f"{report.late} late)",
+        "",
+        "## Triggers",
+        "",
+        "| Trigger | Priority | Instances | Fired | Problems | Problem time | First problems |",
+        "| --- | --- | ---: | ---: | ---: | ---: | --- |",
+    ]
+    for trigger in sorted(report.triggers, key=lambda entry: (-entry.problems, entry.name)):
+        examples = "; ".join(f"{instance} @ {clock:.0f}" for instance, clock in trigger.examples)
+        md.append(
+            f"| {trigger.name} | {trigger.priority} | {trigger.instances} | {trigger.fired} "
+            f"| {trigger.problems} | {_duration(trigger.problem_seconds)} | {examples} |"
+        )
+    md += [
+        "",
+        "## Items",
+        "",
+        "| Item | Rows | Values | Discarded | Decreases | 32-bit wraps |",
+        "| --- | ---: | ---: | ---: | ---: | ---: |",
+    ]
+    for item in report.items:
+        md.append(
+            f"| {item.key} | {item.rows} | {item.values} | {item.discarded} "
+            f"| {item.decreases} | {item.wraps_32bit} |"
+        )
+    return "\n".join(md)
+
+
+def _calls(trigger: _Trigger) -> list[FunctionCall]:
+    return trigger.problem.calls + (trigger.recovery.calls if trigger.recovery else [])
+
+
+def _duration(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
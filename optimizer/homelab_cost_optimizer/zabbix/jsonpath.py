@@ -0,0 +1,220 @@
+"""The subset of Zabbix JSONPath used by preprocessing steps.
+
+Supported: ``$``, ``.name``, ``['name']``, ``[n]`` (negative from the end),
+``[*]``/``.*``, ``..name``, filters ``[?(@.path op literal)]`` with ``==``,
+``!=``, ``<``, ``<=``, ``>``, ``>=`` and ``=~``, and the trailing functions
+``length()``, ``first()``, ``sum()``, ``min()``, ``max()`` and ``avg()``.
+
+As in Zabbix, a definite path returns the one value it points at: strings
+without quotes, other values as JSON. A path with wildcards, filters or
+recursive descent returns a JSON array of all matches. A path that matches
+nothing is an error.
+"""
+
+from __future__ import annotations
+
+import json
+import operator
+import re
+from collections.abc import Callable
+from typing import Any
+
+_NAME = re.compile(r"[A-Za-z_][\w-]*")
+_FILTER = re.compile(
+    r"\?\(\s*@((?:\.[A-Za-z_][\w-]*|\[\d+\])*)\s*(==|!=|<=|>=|<|>|=~)\s*(.+?)\s*\)$"
+)
+_FUNCTIONS = ("length", "first", "sum", "min", "max", "avg")
+_COMPARE = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+Selector = Callable[[list[Any]], list[Any]]
+
+
+class JsonPath:
+    """A compiled path; call :meth:`query` with JSON text."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.selectors, self.definite, self.function = _compile(text)
+
+    def query(self, document: str) -> str:
+        """Raises ``ValueError`` for invalid JSON or when nothing matches."""
+
+        try:
+            nodes = [json.loads(document)]
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"cannot parse as JSON: {exc}") from exc
+        for select in self.selectors:
+            nodes = select(nodes)
+        if not nodes and self.function != "length":
+            raise ValueError(f"no data matches the path {self.text}")
+        result: Any = nodes[0] if self.definite else nodes
+        if self.function == "length":
+            if self.definite and not isinstance(result, list):
+                raise ValueError("length() needs an array")
+            return str(len(result))
+        if self.function == "first":
+            result = result[0] if isinstance(result, list) and result else result
+        elif self.function is not None:
+            numbers = result if isinstance(result, list) else [result]
+            try:
+                numbers = [float(value) for value in numbers]
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"{self.function}() needs numbers") from exc
+            if not numbers:
+                raise ValueError(f"{self.function}() of an empty array")
+            total = sum(numbers)
+            result = {"sum": total, "min": min(numbers), "max": max(numbers)}.get(
+                self.function, total / len(numbers)
+            )
+        return format_value(result)
+
+
+def format_value(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _compile(text: str) -> tuple[list[Selector], bool, str | None]:
+    path = text.strip()
+    function = None
+    for name in _FUNCTIONS:
+        if path.endswith(f".{name}()"):
+            function = name
+            path = path[: -len(name) - 3]
+            break
+    if not path.startswith("$"):
+        raise ValueError(f"JSONPath must start with '$': {text}")
+    selectors: list[Selector] = []
+    definite = True
+    pos = 1
+    while pos < len(path):
+        if path.startswith("..", pos):
+            match = _NAME.match(path, pos + 2)
+            if match is None:
+                raise ValueError(f"Bad recursive descent in {text}")
+            selectors.append(_descendants(match[0]))
+            definite = False
+            pos = match.end()
+        elif path.startswith(".*", pos):
+            selectors.append(_children)
+            definite = False
+            pos += 2
+        elif path[pos] == ".":
+            match = _NAME.match(path, pos + 1)
+            if match is None:
+                raise ValueError(f"Bad member name in {text}")
+            selectors.append(_member(match[0]))
+            pos = match.end()
+        elif path[pos] == "[":
+            end = _bracket_end(path, pos, text)
+            selector, exact = _bracket(path[pos + 1 : end].strip(), text)
+            selectors.append(selector)
+            definite = definite and exact
+            pos = end + 1
+        else:
+            raise ValueError(f"Unexpected {path[pos]!r} in JSONPath {text}")
+    return selectors, definite, function
+
+
+def _bracket_end(path: str, start: int, text: str) -> int:
+    quote = None
+    for pos in range(start + 1, len(path)):
+        char = path[pos]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "]":
+            return pos
+    raise ValueError(f"Unclosed '[' in JSONPath {text}")
+
+
+def _bracket(inner: str, text: str) -> tuple[Selector, bool]:
+    if inner == "*":
+        return _children, False
+    if inner[:1] in "'\"" and inner[-1:] == inner[:1] and len(inner) > 1:
+        return _member(inner[1:-1]), True
+    if re.fullmatch(r"-?\d+", inner):
+        return _index(int(inner)), True
+    match = _FILTER.match(inner)
+    if match is None:
+        raise ValueError(f"Unsupported JSONPath selector [{inner}] in {text}")
+    steps = re.findall(r"\.([A-Za-z_][\w-]*)|\[(\d+)\]", match[1])
+    field = [name if name else int(index) for name, index in steps]
+    return _filter(field, match[2], _literal(match[3], text)), False
+
+
+def _literal(text: str, path: str) -> Any:
+    if text[:1] in "'\"" and text[-1:] == text[:1] and len(text) > 1:
+        return text[1:-1]
+    try:
+        return json.loads(text)
+    except ValueError as exc:
+        raise ValueError(f"Bad filter literal {text} in {path}") from exc
+
+
+def _member(name: str) -> Selector:
+    return lambda nodes: [node[name] for node in nodes if isinstance(node, dict) and name in node]
+
+
+def _index(index: int) -> Selector:
+    return lambda nodes: [
+        node[index] for node in nodes if isinstance(node, list) and -len(node) <= index < len(node)
+    ]
+
+
+def _children(nodes: list[Any]) -> list[Any]:
+    children = []
+    for node in nodes:
+        if isinstance(node, dict):
+            children.extend(node.values())
+        elif isinstance(node, list):
+            children.extend(node)
+    return children
+
+
+def _descendants(name: str) -> Selector:
+    def select(nodes: list[Any]) -> list[Any]:
+        found = []
+        stack = list(reversed(nodes))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                if name in node:
+                    found.append(node[name])
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+        return found
+
+    return select
+
+
+def _filter(field: list, op: str, literal: Any) -> Selector:
+    pattern = re.compile(str(literal)) if op == "=~" else None
+
+    def matches(node: Any) -> bool:
+        for step in field:
+            try:
+                node = node[step]
+            except (KeyError, IndexError, TypeError):
+                return False
+        if pattern is not None:
+            return isinstance(node, str) and pattern.search(node) is not None
+        try:
+            return bool(_COMPARE[op](node, literal))
+        except TypeError:
+            return False
+
+    return lambda nodes: [child for child in _children(nodes) if matches(child)]
@@ -0,0 +1,481 @@
+"""Simulate low-level discovery of SNMP walk dumps against a template.
+
+A walk dump is the ``snmpwalk`` output of one host, with symbolic
+(``IF-MIB::ifDescr.3 = STRING: ether1``) or numeric (``.1.3.6.1.2.1.2.2.1.2.3 =
+STRING: "ether1"``) OIDs, optionally gzipped; the host is the file name without
+its suffixes. As the Zabbix SNMP poller does for ``discovery[...]`` rules, each
+OID column fills one LLD macro, and the rows are the indexes seen in any column,
+each with ``{#SNMPINDEX}``.
+
+Rows then pass the rule's filter. User macros are resolved from the template
+and the overrides, and every regular expression is compiled once per run.
+Filters follow Zabbix: with the default And/Or evaluation, conditions on the
+same macro are or-ed and the groups are and-ed; ``formula`` is only read for a
+custom expression. A row without a value for a macro that a regex condition
+tests is not discovered.
+
+A corpus is split across worker processes; each worker compiles the template
+once in its initializer.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import os
+import re
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TextIO
+
+from ..snmp.ber import format_oid
+from ..snmp.mib import resolve_oid
+from .poll_load import SNMP_TYPE, host_values_per_second
+from .template import DiscoveryRule, LldFilter, TemplateSpec, resolve_macros
+
+SNMP_INDEX = "{#SNMPINDEX}"
+SNMP_VALUE = "{#SNMPVALUE}"
+WALK_SUFFIXES = (".walk", ".snmpwalk", ".txt")
+REGEX_OPERATORS = ("MATCHES_REGEX", "NOT_MATCHES_REGEX")
+TOP_HOSTS = 20
+
+# snmpwalk value types; anything else after " = " is an untyped value (-OQ).
+_TYPES = frozenset(
+    (
+        "STRING",
+        "Hex-STRING",
+        "INTEGER",
+        "Counter32",
+        "Counter64",
+        "Gauge32",
+        "Timeticks",
+        "IpAddress",
+        "OID",
+        "Opaque",
+        "BITS",
+        "Network Address",
+    )
+)
+# Enumerations (``up(1)``) and Timeticks (``(8640000) 1 day, 0:00:00.00``) keep the number.
+_ENUM = re.compile(r"^[A-Za-z][\w-]*\((-?\d+)\)$|^\((\d+)\)")
+_FORMULA_TOKEN = re.compile(r"\s*(?:(\()|(\))|(and|or|not)\b|([A-Z]+))")
+
+Row = dict[str, str]
+Test = Callable[[Row], bool]
+
+
+@dataclass
+class RuleDiscovery:
+    key: str
+    filter: str
+    rows: int = 0
+    discovered: int = 0
+    incomplete: int = 0
+    items: int = 0
+    triggers: int = 0
+
+    @property
+    def filtered_out(self) -> int:
+        return self.rows - self.discovered - self.incomplete
+
+
+@dataclass
+class HostDiscovery:
+    host: str
+    rows: list[int]
+    discovered: list[int]
+    incomplete: list[int]
+    items: int
+    triggers: int
+    values_per_second: float
+
+
+@dataclass
+class DiscoveryReport:
+    template: str
+    rules: list[RuleDiscovery]
+    hosts: list[HostDiscovery] = field(default_factory=list)
+
+
+class CompiledFilter:
+    """An LLD filter; call it with a row of macro values."""
+
+    def __init__(self, spec: LldFilter, macros: Mapping[str, str]) -> None:
+        ids = [
+            condition.formulaid or chr(ord("A") + position)
+            for position, condition in enumerate(spec.conditions)
+        ]
+        tests: dict[str, Test] = {}
+        for formulaid, condition in zip(ids, spec.conditions, strict=True):
+            tests[formulaid] = _condition(
+                condition.macro, condition.operator, condition.value, macros
+            )
+        self.required = frozenset(
+            condition.macro
+            for condition in spec.conditions
+            if condition.operator in REGEX_OPERATORS
+        )
+        if not spec.conditions:
+            self.expression = ""
+            self._test: Test = lambda row: True
+        elif spec.evaltype == "FORMULA":
+            self.expression = spec.formula
+            self._test = _Formula(spec.formula, tests).parse()
+        elif spec.evaltype in ("AND", "OR"):
+            joiner = f" {spec.evaltype.lower()} "
+            self.expression = joiner.join(ids)
+            checks = list(tests.values())
+            if spec.evaltype == "AND":
+                self._test = lambda row: all(test(row) for test in checks)
+            else:
+                self._test = lambda row: any(test(row) for test in checks)
+        elif spec.evaltype == "AND_OR":
+            groups: dict[str, list[str]] = {}
+            for formulaid, condition in zip(ids, spec.conditions, strict=True):
+                groups.setdefault(condition.macro, []).append(formulaid)
+            self.expression = " and ".join(
+                f"({' or '.join(group)})" if len(group) > 1 else group[0]
+                for group in groups.values()
+            )
+            grouped = [[tests[formulaid] for formulaid in group] for group in groups.values()]
+            self._test = lambda row: all(any(test(row) for test in group) for group in grouped)
+        else:
+            raise ValueError(f"Unknown LLD filter evaluation type: {spec.evaltype}")
+
+    def __call__(self, row: Row) -> bool | None:
+        """``None`` when the row lacks a macro a regex condition needs."""
+
+        if not self.required.issubset(row):
+            return None
+        return self._test(row)
+
+
+class LldSimulator:
+    """A template's SNMP discovery rules, compiled for many walk dumps."""
+
+    def __init__(self, template: TemplateSpec, macros: Mapping[str, str] | None = None) -> None:
+        self.template = template
+        self.macros = {**template.macros, **(macros or {})}
+        self.rules = template.discovery_rules
+        self.filters = [CompiledFilter(rule.filter, self.macros) for rule in self.rules]
+        # Walked OID -> (rule index, LLD macro), by symbolic name and by number.
+        self._by_name: dict[str, list[tuple[int, str]]] = {}
+        self._by_number: dict[str, list[tuple[int, str]]] = {}
+        for position, rule in enumerate(self.rules):
+            for macro, oid in _columns(rule):
+                column = (position, macro or SNMP_VALUE)
+                name = oid.split(".", 1)[0] if not oid[:1].isdigit() else ""
+                if name:
+                    self._by_name.setdefault(name, []).append(column)
+                    self._by_name.setdefault(name.split("::")[-1], []).append(column)
+                try:
+                    number = format_oid(resolve_oid(oid))
+                except ValueError:
+                    continue
+                self._by_number.setdefault(number.lstrip("."), []).append(column)
+        self._lengths = sorted({key.count(".") + 1 for key in self._by_number}, reverse=True)
+
+    def simulate(self, host: str, lines: Iterable[str]) -> HostDiscovery:
+        rows: list[dict[str, Row]] = [{} for _ in self.rules]
+        for line in lines:
+            oid, separator, text = line.partition(" = ")
+            match = self._column(_oid(oid)) if separator else None
+            if match is None:
+                continue
+            # Values are only parsed for the columns a rule walks.
+            value = _value(text.rstrip("\r\n"))
+            if value is None:
+                continue
+            columns, index = match
+            for position, macro in columns:
+                row = rows[position].get(index)
+                if row is None:
+                    row = rows[position][index] = {SNMP_INDEX: index}
+                row[macro] = value
+        discovered, incomplete = [], []
+        for compiled, found in zip(self.filters, rows, strict=True):
+            results = [compiled(row) for row in found.values()]
+            discovered.append(results.count(True))
+            incomplete.append(results.count(None))
+        items = len(self.template.items) + sum(
+            count * len(rule.item_prototypes)
+            for rule, count in zip(self.rules, discovered, strict=True)
+        )
+        triggers = len(self.template.triggers) + sum(
+            count * len(rule.trigger_prototypes)
+            for rule, count in zip(self.rules, discovered, strict=True)
+        )
+        return HostDiscovery(
+            host=host,
+            rows=[len(found) for found in rows],
+            discovered=discovered,
+            incomplete=incomplete,
+            items=items,
+            triggers=triggers,
+            values_per_second=host_values_per_second(self.template, discovered, self.macros),
+        )
+
+    def _column(self, oid: str) -> tuple[list[tuple[int, str]], str] | None:
+        if oid[:1].isdigit():
+            parts = oid.split(".")
+            for length in self._lengths:
+                columns = self._by_number.get(".".join(parts[:length]))
+                if columns is not None and len(parts) > length:
+                    return columns, ".".join(parts[length:])
+            return None
+        name, _, index = oid.partition(".")
+        columns = self._by_name.get(name)
+        if columns is None or not index:
+            return None
+        return columns, index
+
+
+def collect_walks(paths: Iterable[Path | str]) -> list[Path]:
+    """Walk files, expanding directories to the files below them."""
+
+    files: list[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(
+                child
+                for child in sorted(path.rglob("*"))
+                if child.is_file() and not child.name.startswith(".")
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def host_name(path: Path) -> str:
+    name = path.name.removesuffix(".gz")
+    for suffix in WALK_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def simulate_discovery(
+    template: TemplateSpec,
+    paths: Sequence[Path | str],
+    macros: Mapping[str, str] | None = None,
+    max_workers: int | None = None,
+) -> DiscoveryReport:
+    """Discover every walk in ``paths`` (files or directories), in input order.
+
+    ``max_workers`` defaults to the CPU count; 1 simulates in this process.
+    """
+
+    files = collect_walks(paths)
+    simulator = LldSimulator(template, macros)
+    workers = min(max_workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        hosts = [_simulate_file(path, simulator) for path in files]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(template, dict(macros or {})),
+        ) as pool:
+            chunksize = max(1, len(files) // (workers * 8))
+            hosts = list(pool.map(_simulate_file, files, chunksize=chunksize))
+    rules = [
+        RuleDiscovery(rule.key, compiled.expression)
+        for rule, compiled in zip(simulator.rules, simulator.filters, strict=True)
+    ]
+    for host in hosts:
+        for position, entry in enumerate(rules):
+            rule = simulator.rules[position]
+            count = host.discovered[position]
+            entry.rows += host.rows[position]
+            entry.discovered += count
+            entry.incomplete += host.incomplete[position]
+            entry.items += count * len(rule.item_prototypes)
+            entry.triggers += count * len(rule.trigger_prototypes)
+    return DiscoveryReport(template.template or template.name, rules, hosts)
+
+
+def render_markdown(report: DiscoveryReport, top: int = TOP_HOSTS) -> str:
+    hosts = report.hosts
+    items = sorted(host.items for host in hosts)
+    md = [
+        f"# LLD simulation: {report.template}",
+        "",
+        f"- Hosts: {len(hosts)}",
+        f"- Items: {sum(items)} (per host: median {_percentile(items, 0.5)}, "
+        f"p95 {_percentile(items, 0.95)}, max {items[-1] if items else 0})",
+        f"- Triggers: {sum(host.triggers for host in hosts)}",
+        f"- NVPS: {sum(host.values_per_second for host in hosts):.1f}",
+        "",
+        "## Discovery rules",
+        "",
+        "| Rule | Filter | Rows | Discovered | Filtered out | Missing macros | Items | Triggers |",
+        "| --- | --- | ---: | ---: | ---: | ---: | ---: | ---: |",
+    ]
+    for rule in report.rules:
+        md.append(
+            f"| {rule.key} | {rule.filter or '-'} | {rule.rows} | {rule.discovered} "
+            f"| {rule.filtered_out} | {rule.incomplete} | {rule.items} | {rule.triggers} |"
+        )
+    keys = [rule.key for rule in report.rules]
+    md += [
+        "",
+        f"## Hosts with the most items (top {min(top, len(hosts))})",
+        "",
+        "| Host | " + " | ".join(keys) + " | Items | Triggers | NVPS |",
+        "| --- |" + " ---: |" * (len(keys) + 3),
+    ]
+    for host in sorted(hosts, key=lambda entry: (-entry.items, entry.host))[:top]:
+        counts = " | ".join(
+            f"{found}/{rows}" for found, rows in zip(host.discovered, host.rows, strict=True)
+        )
+        md.append(
+            f"| {host.host} | {counts} | {host.items} | {host.triggers} "
+            f"| {host.values_per_second:.2f} |"
+        )
+    return "\n".join(md)
+
+
+def write_hosts_csv(report: DiscoveryReport, handle: TextIO) -> None:
+    """One row per host: discovered entities per rule, items, triggers and NVPS."""
+
+    writer = csv.writer(handle)
+    keys = [rule.key for rule in report.rules]
+    writer.writerow(["host", *keys, "items", "triggers", "nvps"])
+    for host in report.hosts:
+        writer.writerow(
+            [
+                host.host,
+                *host.discovered,
+                host.items,
+                host.triggers,
+                f"{host.values_per_second:.4f}",
+            ]
+        )
+
+
+_SIMULATOR: LldSimulator | None = None
+
+
+def _init_worker(template: TemplateSpec, macros: Mapping[str, str]) -> None:
+    global _SIMULATOR
+    _SIMULATOR = LldSimulator(template, macros)
+
+
+def _simulate_file(path: Path, simulator: LldSimulator | None = None) -> HostDiscovery:
+    simulator = simulator or _SIMULATOR
+    assert simulator is not None
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as handle:
+        return simulator.simulate(host_name(path), handle)
+
+
+def _oid(text: str) -> str:
+    oid = text.strip()
+    if oid.startswith("."):
+        return oid[1:]
+    if oid.startswith("iso."):
+        return "1." + oid[4:]
+    return oid
+
+
+def _value(text: str) -> str | None:
+    kind, colon, rest = text.partition(":")
+    if colon and kind in _TYPES:
+        text = rest[1:] if rest[:1] == " " else rest
+    elif text.startswith(("No Such ", "No more variables")):
+        return None
+    if len(text) > 1 and text[0] == text[-1] == '"':
+        return text[1:-1]
+    number = _ENUM.match(text)
+    return text if number is None else number[1] or number[2]
+
+
+def _percentile(values: list[int], fraction: float) -> int:
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _columns(rule: DiscoveryRule) -> list[tuple[str, str]]:
+    if rule.type != SNMP_TYPE:
+        return []
+    return rule.discovery_columns()
+
+
+def _condition(macro: str, operator: str, value: str, macros: Mapping[str, str]) -> Test:
+    if operator == "EXISTS":
+        return lambda row: macro in row
+    if operator == "NOT_EXISTS":
+        return lambda row: macro not in row
+    if operator not in REGEX_OPERATORS:
+        raise ValueError(f"Unknown LLD filter operator: {operator}")
+    pattern = resolve_macros(value, macros)
+    if pattern.startswith("@"):
+        raise ValueError(f"Global regular expressions are not supported: {pattern}")
+    try:
+        search = re.compile(pattern).search
+    except re.error as exc:
+        raise ValueError(f"Bad LLD filter regex {pattern!r} for {macro}: {exc}") from exc
+    if operator == "MATCHES_REGEX":
+        return lambda row: search(row[macro]) is not None
+    return lambda row: search(row[macro]) is None
+
+
+class _Formula:
+    """Recursive-descent parser of custom filter expressions (``A and (B or not C)``)."""
+
+    def __init__(self, text: str, tests: Mapping[str, Test]) -> None:
+        self.text = text
+        self.tests = tests
+        self.tokens: list[str] = []
+        pos = 0
+        while pos < len(text.rstrip()):
+            match = _FORMULA_TOKEN.match(text, pos)
+            if match is None:
+                raise ValueError(f"Unexpected {text[pos:].strip()[:1]!r} in LLD filter {text}")
+            self.tokens.append(match[match.lastindex])
+            pos = match.end()
+        self.pos = 0
+
+    def parse(self) -> Test:
+        test = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.pos]!r} in LLD filter {self.text}")
+        return test
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _or(self) -> Test:
+        terms = [self._and()]
+        while self._peek() == "or":
+            self.pos += 1
+            terms.append(self._and())
+        return terms[0] if len(terms) == 1 else lambda row: any(term(row) for term in terms)
+
+    def _and(self) -> Test:
+        factors = [self._not()]
+        while self._peek() == "and":
+            self.pos += 1
+            factors.append(self._not())
+        if len(factors) == 1:
+            return factors[0]
+        return lambda row: all(factor(row) for factor in factors)
+
+    def _not(self) -> Test:
+        token = self._peek()
+        self.pos += 1
+        if token == "not":
+            inner = self._not()
+            return lambda row: not inner(row)
+        if token == "(":
+            inner = self._or()
+            if self._peek() != ")":
+                raise ValueError(f"Unclosed '(' in LLD filter {self.text}")
+            self.pos += 1
+            return inner
+        if token is not None and token in self.tests:
+            return self.tests[token]
+        raise ValueError(f"Unknown condition {token} in LLD filter {self.text}")
@@ -0,0 +1,538 @@
+"""Fit a template's poll intervals to an NVPS and storage budget.
+
+Every poll interval that can change is a knob. A delay that is a single user
+macro, such as ``{$IF.POLL.INTERVAL}``, is set per host with a host macro. A
+literal delay (``30s``, ``5m``) can only change in the template, so that knob
+moves for every host at once.
+
+The search is greedy. Starting from the template's intervals, it repeatedly
+moves the knob whose next slower interval on :data:`LADDER` saves the most of the
+exceeded budgets per unit of lost resolution. Lost resolution is ``log2`` of the
+slowdown weighted by the item's priority and, for per-host knobs, the host's,
+so the hosts with the most interfaces are paced first. Loads follow
+:mod:`.poll_load`: values per second and history storage scale with
+1/interval, trends do not.
+
+Hosts are then spread over the proxies, largest first onto the least loaded
+one. While a proxy is still over the per-proxy NVPS budget, the fleet target is
+lowered by the excess and the search continues.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from .poll_load import (
+    DAY,
+    HISTORY_ROW_BYTES,
+    NUMERIC_TYPES,
+    TRENDS_ROW_BYTES,
+    UNPOLLED_TYPES,
+    format_bytes,
+)
+from .template import ItemSpec, TemplateSpec, format_interval, parse_interval, resolve_macros
+
+LADDER = (30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 21600, 43200, 86400)
+MAX_INTERVAL = "1h"
+DEFAULT_PRIORITY = 1.0
+TOP_HOSTS = 20
+# Written next to the host files; holds the template delay changes.
+TEMPLATE_FILE = "_template.yaml"
+
+_MACRO = re.compile(r"^\{\$[A-Z0-9_.]+\}$")
+_SIZE = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMGT]?)B?$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+@dataclass
+class FleetHost:
+    name: str
+    # Entities of discovery rules with an {#IFINDEX} column, unless ``discovered`` names them.
+    interfaces: int = 0
+    discovered: dict[str, int] = field(default_factory=dict)
+    priority: float = DEFAULT_PRIORITY
+
+    def counts(self, template: TemplateSpec) -> list[int]:
+        """Entities discovered per discovery rule of ``template``."""
+
+        counts = []
+        for rule in template.discovery_rules:
+            count = self.discovered.get(rule.key)
+            if count is None:
+                columns = rule.discovery_columns()
+                count = self.interfaces if any(m == "{#IFINDEX}" for m, _ in columns) else 0
+            counts.append(count)
+        return counts
+
+
+@dataclass
+class Fleet:
+    hosts: list[FleetHost]
+    priorities: dict[str, float] = field(default_factory=dict)
+    # Per proxy; storage is the retained history and trends of the whole fleet.
+    nvps_budget: float | None = None
+    storage_budget: float | None = None
+    proxies: int = 1
+
+
+@dataclass
+class Knob:
+    name: str
+    default: int
+    per_host: bool
+    priority: float
+    items: list[str] = field(default_factory=list)
+
+
+@dataclass
+class HostPlan:
+    name: str
+    proxy: str
+    macros: dict[str, str]
+    values_per_second: float
+    storage_bytes: float
+
+
+@dataclass
+class ProxyLoad:
+    name: str
+    hosts: int = 0
+    values_per_second: float = 0.0
+    storage_bytes: float = 0.0
+
+
+@dataclass
+class BudgetPlan:
+    template: str
+    knobs: list[Knob]
+    template_delays: dict[str, str]
+    hosts: list[HostPlan]
+    proxies: list[ProxyLoad]
+    nvps_before: float
+    storage_before: float
+    nvps_budget: float | None
+    storage_budget: float | None
+    feasible: bool
+
+    @property
+    def values_per_second(self) -> float:
+        return sum(host.values_per_second for host in self.hosts)
+
+    @property
+    def storage_bytes(self) -> float:
+        return sum(host.storage_bytes for host in self.hosts)
+
+
+def parse_size(text: str | float) -> float:
+    """Bytes in ``500GB``, ``1.5T`` or a plain number (1024-based units)."""
+
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _SIZE.match(str(text).strip())
+    if match is None:
+        raise ValueError(f"Invalid size: {text}")
+    return float(match[1]) * _SIZE_UNITS[match[2].upper()]
+
+
+def load_fleet(path: Path | str) -> Fleet:
+    """Read a fleet description; see ``config/fleet.example.yaml``."""
+
+    data = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    budget = data.get("budget") or {}
+    hosts = []
+    try:
+        for entry in data.get("hosts") or []:
+            count = int(entry.get("count", 1))
+            names = (
+                [str(entry["name"])]
+                if "count" not in entry
+                else [f"{entry['name']}-{i:0{len(str(count))}d}" for i in range(1, count + 1)]
+            )
+            hosts.extend(
+                FleetHost(
+                    name=name,
+                    interfaces=int(entry.get("interfaces", 0)),
+                    discovered={
+                        str(key): int(value)
+                        for key, value in (entry.get("discovered") or {}).items()
+                    },
+                    priority=float(entry.get("priority", DEFAULT_PRIORITY)),
+                )
+                for name in names
+            )
+        fleet = Fleet(
+            hosts=hosts,
+            priorities={
+                str(key): float(value) for key, value in (data.get("priorities") or {}).items()
+            },
+            nvps_budget=None if budget.get("nvps") is None else float(budget["nvps"]),
+            storage_budget=(
+                None if budget.get("storage") is None else parse_size(budget["storage"])
+            ),
+            proxies=int(data.get("proxies", 1)),
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid fleet description {path}: {exc}") from exc
+    return fleet
+
+
+def plan_budget(
+    template: TemplateSpec, fleet: Fleet, max_interval: str = MAX_INTERVAL
+) -> BudgetPlan:
+    """Slowest-first interval assignment that fits ``fleet`` under its budgets."""
+
+    if fleet.proxies < 1:
+        raise ValueError("Proxy count must be at least 1")
+    if not fleet.hosts:
+        raise ValueError("The fleet has no hosts")
+    if any(host.priority <= 0 for host in fleet.hosts) or any(
+        priority <= 0 for priority in fleet.priorities.values()
+    ):
+        raise ValueError("Priorities must be positive")
+    macros = template.macros
+    knobs, knob_of = _knobs(template, fleet.priorities, macros)
+    search = _Search(template, fleet, knobs, knob_of, parse_interval(max_interval))
+    nvps_before, storage_before = search.nvps, search.storage
+
+    nvps_target = math.inf if fleet.nvps_budget is None else fleet.nvps_budget * fleet.proxies
+    storage_target = math.inf if fleet.storage_budget is None else fleet.storage_budget
+    while True:
+        fits = search.run(nvps_target, storage_target)
+        assignment, proxies = _assign(search.host_nvps, fleet.proxies)
+        worst = max(proxy[0] for proxy in proxies)
+        if not fits or fleet.nvps_budget is None or worst <= fleet.nvps_budget * (1 + 1e-9):
+            break
+        nvps_target = min(nvps_target, search.nvps) - (worst - fleet.nvps_budget)
+
+    names = [f"proxy-{index + 1}" for index in range(fleet.proxies)]
+    loads = [ProxyLoad(name) for name in names]
+    hosts = []
+    for position, host in enumerate(fleet.hosts):
+        proxy = loads[assignment[position]]
+        proxy.hosts += 1
+        proxy.values_per_second += search.host_nvps[position]
+        proxy.storage_bytes += search.host_storage[position]
+        hosts.append(
+            HostPlan(
+                name=host.name,
+                proxy=proxy.name,
+                macros={
+                    knob.name: format_interval(search.intervals[k][position])
+                    for k, knob in enumerate(knobs)
+                    if knob.per_host and search.intervals[k][position] != knob.default
+                },
+                values_per_second=search.host_nvps[position],
+                storage_bytes=search.host_storage[position],
+            )
+        )
+    template_delays = {
+        item: format_interval(search.intervals[k][0])
+        for k, knob in enumerate(knobs)
+        if not knob.per_host and search.intervals[k][0] != knob.default
+        for item in knob.items
+    }
+    nvps_ok = fleet.nvps_budget is None or max(
+        load.values_per_second for load in loads
+    ) <= fleet.nvps_budget * (1 + 1e-9)
+    storage_ok = fleet.storage_budget is None or search.storage <= fleet.storage_budget * (1 + 1e-9)
+    return BudgetPlan(
+        template=template.template or template.name,
+        knobs=knobs,
+        template_delays=template_delays,
+        hosts=hosts,
+        proxies=loads,
+        nvps_before=nvps_before,
+        storage_before=storage_before,
+        nvps_budget=fleet.nvps_budget,
+        storage_budget=fleet.storage_budget,
+        feasible=nvps_ok and storage_ok,
+    )
+
+
+def write_overrides(plan: BudgetPlan, directory: Path | str) -> int:
+    """Write ``<host>.yaml`` with the host's proxy and macro overrides; returns the host count.
+
+    The template delay changes go to :data:`TEMPLATE_FILE` as ``item``/``delay``
+    pairs, so other tools can apply the same plan.
+    """
+
+    folder = Path(directory)
+    if any(f"{host.name}.yaml" == TEMPLATE_FILE for host in plan.hosts):
+        raise ValueError(f"A host may not be named {Path(TEMPLATE_FILE).stem}")
+    folder.mkdir(parents=True, exist_ok=True)
+    document = {
+        "template": plan.template,
+        "delays": [{"item": key, "delay": delay} for key, delay in plan.template_delays.items()],
+    }
+    (folder / TEMPLATE_FILE).write_text(yaml.safe_dump(document, sort_keys=False), encoding="utf-8")
+    for host in plan.hosts:
+        document = {
+            "host": host.name,
+            "proxy": host.proxy,
+            "macros": [{"macro": name, "value": value} for name, value in host.macros.items()],
+        }
+        (folder / f"{host.name}.yaml").write_text(
+            yaml.safe_dump(document, sort_keys=False), encoding="utf-8"
+        )
+    return len(plan.hosts)
+
+
+def render_markdown(plan: BudgetPlan, top: int = TOP_HOSTS) -> str:
+    nvps_budget = "-" if plan.nvps_budget is None else f"{plan.nvps_budget:.1f} per proxy"
+    storage_budget = "-" if plan.storage_budget is None else format_bytes(plan.storage_budget)
+    md = [
+        f"# Poll budget: {plan.template}",
+        "",
+        f"- Hosts: {len(plan.hosts)} on {len(plan.proxies)} proxies",
+        f"- NVPS: {plan.nvps_before:.1f} -> {plan.values_per_second:.1f} "
+        f"(budget {nvps_budget})",
+        f"- Storage kept: {format_bytes(plan.storage_before)} -> "
+        f"{format_bytes(plan.storage_bytes)} (budget {storage_budget})",
+        f"- Fits the budget: {'yes' if plan.feasible else 'no, even at the slowest intervals'}",
+        "",
+        "## Template delays",
+        "",
+    ]
+    if plan.template_delays:
+        defaults = {item: knob for knob in plan.knobs for item in knob.items}
+        md += ["| Item | Delay | New delay | Priority |", "| --- | --- | --- | ---: |"]
+        for item, delay in plan.template_delays.items():
+            knob = defaults[item]
+            md.append(f"| {item} | {format_interval(knob.default)} | {delay} | {knob.priority:g} |")
+    else:
+        md.append("No template delay changes.")
+    md += ["", "## Host macro overrides", ""]
+    per_host = [knob for knob in plan.knobs if knob.per_host]
+    if per_host:
+        md += ["| Macro | Template value | Hosts per value |", "| --- | --- | --- |"]
+        for knob in per_host:
+            counts: dict[str, int] = {}
+            for host in plan.hosts:
+                value = host.macros.get(knob.name, format_interval(knob.default))
+                counts[value] = counts.get(value, 0) + 1
+            ordered = sorted(counts.items(), key=lambda entry: parse_interval(entry[0]))
+            spread = ", ".join(f"{value}: {count}" for value, count in ordered)
+            md.append(f"| {knob.name} | {format_interval(knob.default)} | {spread} |")
+    else:
+        md.append("The template has no macro-driven delays.")
+    md += [
+        "",
+        "## Proxies",
+        "",
+        "| Proxy | Hosts | NVPS | Storage kept |",
+        "| --- | ---: | ---: | ---: |",
+    ]
+    for proxy in plan.proxies:
+        md.append(
+            f"| {proxy.name} | {proxy.hosts} | {proxy.values_per_second:.1f} "
+            f"| {format_bytes(proxy.storage_bytes)} |"
+        )
+    md += [
+        "",
+        f"## Busiest hosts (top {min(top, len(plan.hosts))})",
+        "",
+        "| Host | Proxy | NVPS | Overrides |",
+        "| --- | --- | ---: | --- |",
+    ]
+    for host in sorted(plan.hosts, key=lambda entry: -entry.values_per_second)[:top]:
+        overrides = ", ".join(f"{name}={value}" for name, value in host.macros.items()) or "-"
+        md.append(f"| {host.name} | {host.proxy} | {host.values_per_second:.2f} | {overrides} |")
+    return "\n".join(md)
+
+
+class _Search:
+    """Intervals per knob and host, with the loads they give."""
+
+    def __init__(
+        self,
+        template: TemplateSpec,
+        fleet: Fleet,
+        knobs: list[Knob],
+        knob_of: Mapping[str, int],
+        max_interval: int,
+    ) -> None:
+        self.knobs = knobs
+        self.host_priority = [host.priority for host in fleet.hosts]
+        self.caps = [max(knob.default, max_interval) for knob in knobs]
+        # Per host and knob: values per second and retained history bytes at a 1 s interval.
+        self.nvps_coef: list[list[float]] = []
+        self.storage_coef: list[list[float]] = []
+        self.host_fixed: list[float] = []
+        for host in fleet.hosts:
+            nvps, storage, fixed = _coefficients(template, host, knobs, knob_of)
+            self.nvps_coef.append(nvps)
+            self.storage_coef.append(storage)
+            self.host_fixed.append(fixed)
+        count = len(fleet.hosts)
+        self.intervals = [[knob.default] * count for knob in knobs]
+        self.host_nvps = [
+            sum(c / knob.default for c, knob in zip(coef, knobs, strict=True))
+            for coef in self.nvps_coef
+        ]
+        self.host_storage = [
+            fixed + sum(c / knob.default for c, knob in zip(coef, knobs, strict=True))
+            for fixed, coef in zip(self.host_fixed, self.storage_coef, strict=True)
+        ]
+        self.nvps = sum(self.host_nvps)
+        self.storage = sum(self.host_storage)
+
+    def run(self, nvps_target: float, storage_target: float) -> bool:
+        """Slow knobs down until both totals fit; ``False`` when no move is left."""
+
+        weights = None
+        heap: list[tuple[float, int, int, int]] = []
+        while True:
+            current = (
+                1 / nvps_target if self.nvps > nvps_target * (1 + 1e-9) else 0.0,
+                1 / storage_target if self.storage > storage_target * (1 + 1e-9) else 0.0,
+            )
+            if current == (0.0, 0.0):
+                return True
+            if current != weights:
+                weights = current
+                heap = [
+                    entry
+                    for k, knob in enumerate(self.knobs)
+                    for host in (range(len(self.host_nvps)) if knob.per_host else (-1,))
+                    if (entry := self._candidate(k, host, weights)) is not None
+                ]
+                heapq.heapify(heap)
+            while heap:
+                _, k, host, start = heapq.heappop(heap)
+                if self.intervals[k][max(host, 0)] == start:
+                    break
+            else:
+                return False
+            self._move(k, host)
+            entry = self._candidate(k, host, weights)
+            if entry is not None:
+                heapq.heappush(heap, entry)
+
+    def _next(self, k: int, interval: int) -> int | None:
+        for step in LADDER:
+            if step > interval:
+                return step if step <= self.caps[k] else None
+        return None
+
+    def _candidate(
+        self, k: int, host: int, weights: tuple[float, float]
+    ) -> tuple[float, int, int, int] | None:
+        hosts = range(len(self.host_nvps)) if host < 0 else (host,)
+        old = self.intervals[k][max(host, 0)]
+        new = self._next(k, old)
+        if new is None:
+            return None
+        saved = 1 / old - 1 / new
+        nvps = sum(self.nvps_coef[h][k] for h in hosts) * saved
+        storage = sum(self.storage_coef[h][k] for h in hosts) * saved
+        benefit = weights[0] * nvps + weights[1] * storage
+        if benefit <= 0:
+            return None
+        priority = sum(self.host_priority[h] for h in hosts)
+        cost = self.knobs[k].priority * priority * math.log2(new / old)
+        return (-benefit / cost, k, host, old)
+
+    def _move(self, k: int, host: int) -> None:
+        hosts = range(len(self.host_nvps)) if host < 0 else (host,)
+        old = self.intervals[k][max(host, 0)]
+        new = self._next(k, old)
+        assert new is not None
+        saved = 1 / old - 1 / new
+        for h in hosts:
+            self.intervals[k][h] = new
+            nvps = self.nvps_coef[h][k] * saved
+            storage = self.storage_coef[h][k] * saved
+            self.host_nvps[h] -= nvps
+            self.host_storage[h] -= storage
+            self.nvps -= nvps
+            self.storage -= storage
+
+
+def _assign(loads: list[float], proxies: int) -> tuple[list[int], list[list[float]]]:
+    """Largest host first onto the least loaded proxy."""
+
+    heap = [[0.0, index] for index in range(proxies)]
+    assignment = [0] * len(loads)
+    for position in sorted(range(len(loads)), key=lambda h: -loads[h]):
+        proxy = heapq.heappop(heap)
+        assignment[position] = proxy[1]
+        proxy[0] += loads[position]
+        heapq.heappush(heap, proxy)
+    return assignment, heap
+
+
+def _items(template: TemplateSpec, host: FleetHost) -> list[tuple[ItemSpec, int]]:
+    items = [(item, 1) for item in template.items]
+    for rule, count in zip(template.discovery_rules, host.counts(template), strict=True):
+        items.extend((item, count) for item in rule.item_prototypes)
+    return items
+
+
+def _knobs(
+    template: TemplateSpec, priorities: Mapping[str, float], macros: Mapping[str, str]
+) -> tuple[list[Knob], dict[str, int]]:
+    every = [
+        *template.items,
+        *(item for rule in template.discovery_rules for item in rule.item_prototypes),
+    ]
+    unknown = set(priorities) - {item.key for item in every}
+    if unknown:
+        raise ValueError(f"Unknown item in priorities: {', '.join(sorted(unknown))}")
+    knobs: list[Knob] = []
+    by_name: dict[str, int] = {}
+    knob_of: dict[str, int] = {}
+    for item in every:
+        if item.type in UNPOLLED_TYPES:
+            continue
+        delay = item.delay.strip()
+        default = parse_interval(resolve_macros(delay, macros))
+        if not default:
+            continue
+        per_host = _MACRO.match(delay) is not None
+        name = delay if per_host else item.key
+        if name not in by_name:
+            by_name[name] = len(knobs)
+            knobs.append(Knob(name, default, per_host, 0.0))
+        knob = knobs[by_name[name]]
+        knob.items.append(item.key)
+        knob.priority = max(knob.priority, priorities.get(item.key, DEFAULT_PRIORITY))
+        knob_of[item.key] = by_name[name]
+    return knobs, knob_of
+
+
+def _coefficients(
+    template: TemplateSpec, host: FleetHost, knobs: list[Knob], knob_of: Mapping[str, int]
+) -> tuple[list[float], list[float], float]:
+    nvps = [0.0] * len(knobs)
+    storage = [0.0] * len(knobs)
+    fixed = 0.0
+    items = _items(template, host)
+    keys = {item.key for item, _ in items}
+    for item, count in items:
+        if not count:
+            continue
+        k = knob_of.get(item.key)
+        if item.type == "DEPENDENT" and item.master_item in keys:
+            # Dependent items store one value each time their master is polled.
+            k = knob_of.get(item.master_item or "")
+        if k is None:
+            continue
+        nvps[k] += count
+        history_days = _days(item.history, template.macros)
+        row = HISTORY_ROW_BYTES.get(item.value_type, HISTORY_ROW_BYTES["TEXT"])
+        storage[k] += count * DAY * row * history_days
+        trends_days = _days(item.trends, template.macros)
+        if trends_days and item.value_type in NUMERIC_TYPES:
+            fixed += count * 24 * TRENDS_ROW_BYTES * trends_days
+    return nvps, storage, fixed
+
+
+def _days(value: str, macros: Mapping[str, str]) -> float:
+    return parse_interval(resolve_macros(value, macros)) / DAY
@@ -0,0 +1,235 @@
+"""Offline estimate of the Zabbix and SNMP load a template puts on a fleet.
+
+Every host is assumed to discover a number of entities per discovery rule,
+drawn from a :class:`CountDistribution` (for example ``8:0.6,24:0.3,48:0.1``
+interfaces). Item prototypes are expanded per entity, user macros in delays
+and storage periods are resolved from the template (and overrides), and the
+load is the expectation over the distributions.
+
+SNMP requests follow the Zabbix poller: SNMP items of one host that share an
+update interval are scheduled together and combined into requests of up to
+``max_oids_per_request`` OIDs, and ``discovery[...]`` rules walk each OID
+column with GETBULK requests of ``max_repetitions`` rows.
+
+Storage uses the per-row sizes of the Zabbix database sizing guide: about 90
+bytes per numeric history value or hourly trend row, more for text values.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from itertools import product
+
+from .template import ItemSpec, TemplateSpec, parse_interval, resolve_macros
+
+HISTORY_ROW_BYTES = {"FLOAT": 90, "UNSIGNED": 90, "CHAR": 200, "TEXT": 300, "LOG": 300}
+TRENDS_ROW_BYTES = 90
+NUMERIC_TYPES = {"FLOAT", "UNSIGNED"}
+SNMP_TYPE = "SNMP_AGENT"
+# Items that are not polled on their own schedule.
+UNPOLLED_TYPES = {"DEPENDENT", "SNMP_TRAP", "TRAP", "ZABBIX_ACTIVE"}
+MAX_OIDS_PER_REQUEST = 128
+MAX_REPETITIONS = 10
+DAY = 86400
+
+
+@dataclass
+class CountDistribution:
+    """Discrete distribution of per-host entity counts."""
+
+    buckets: list[tuple[int, float]]
+
+    @classmethod
+    def parse(cls, text: str) -> CountDistribution:
+        """Parse ``24`` or ``count:weight`` pairs such as ``8:0.6,24:0.3,48:0.1``."""
+
+        buckets = []
+        for part in str(text).split(","):
+            if not part.strip():
+                continue
+            count, _, weight = part.partition(":")
+            buckets.append((int(count), float(weight) if weight else 1.0))
+        total = sum(weight for _, weight in buckets)
+        if not buckets or total <= 0 or any(c < 0 or w < 0 for c, w in buckets):
+            raise ValueError(f"Invalid count distribution: {text}")
+        return cls([(count, weight / total) for count, weight in buckets])
+
+    def mean(self) -> float:
+        return sum(count * weight for count, weight in self.buckets)
+
+
+@dataclass
+class PollLoad:
+    template: str
+    hosts: int
+    items_per_host: float
+    values_per_second: float
+    snmp_oids_per_second: float
+    snmp_pdus_per_second: float
+    history_bytes_per_day: float
+    trends_bytes_per_day: float
+    history_bytes_retained: float
+    trends_bytes_retained: float
+
+
+@dataclass
+class _Rate:
+    """Per-host figures for one item with ``count`` copies."""
+
+    item: ItemSpec
+    count: int
+    interval: int
+
+
+def estimate_poll_load(
+    template: TemplateSpec,
+    hosts: int,
+    discovered: Mapping[str, CountDistribution] | None = None,
+    macros: Mapping[str, str] | None = None,
+    max_oids_per_request: int = MAX_OIDS_PER_REQUEST,
+    max_repetitions: int = MAX_REPETITIONS,
+) -> PollLoad:
+    """Expected load of ``hosts`` hosts linked to ``template``.
+
+    ``discovered`` maps discovery rule keys to entity counts per host; rules
+    without an entry discover nothing.
+    """
+
+    if hosts < 0:
+        raise ValueError("Host count must not be negative")
+    if max_oids_per_request < 1 or max_repetitions < 1:
+        raise ValueError("Request sizes must be at least 1")
+    discovered = discovered or {}
+    unknown = set(discovered) - {rule.key for rule in template.discovery_rules}
+    if unknown:
+        raise ValueError(f"Unknown discovery rule: {', '.join(sorted(unknown))}")
+    resolved = {**template.macros, **(macros or {})}
+    rules = template.discovery_rules
+    distributions = [
+        discovered.get(rule.key, CountDistribution([(0, 1.0)])).buckets for rule in rules
+    ]
+
+    totals = [0.0] * 8
+    for scenario in product(*distributions):
+        weight = math.prod(probability for _, probability in scenario)
+        counts = [count for count, _ in scenario]
+        figures = _host_figures(template, counts, resolved, max_oids_per_request, max_repetitions)
+        for index, value in enumerate(figures):
+            totals[index] += weight * value
+
+    items, nvps, oids, pdus, history, trends, history_kept, trends_kept = totals
+    return PollLoad(
+        template=template.template or template.name,
+        hosts=hosts,
+        items_per_host=items,
+        values_per_second=nvps * hosts,
+        snmp_oids_per_second=oids * hosts,
+        snmp_pdus_per_second=pdus * hosts,
+        history_bytes_per_day=history * hosts,
+        trends_bytes_per_day=trends * hosts,
+        history_bytes_retained=history_kept * hosts,
+        trends_bytes_retained=trends_kept * hosts,
+    )
+
+
+def host_values_per_second(
+    template: TemplateSpec, counts: Sequence[int], macros: Mapping[str, str] | None = None
+) -> float:
+    """NVPS of one host that discovered ``counts[i]`` entities with discovery rule ``i``."""
+
+    resolved = {**template.macros, **(macros or {})}
+    figures = _host_figures(template, list(counts), resolved, MAX_OIDS_PER_REQUEST, MAX_REPETITIONS)
+    return figures[1]
+
+
+def render_markdown(loads: list[PollLoad]) -> str:
+    md = [
+        "# Zabbix poll load estimate",
+        "",
+        "| Template | Hosts | Items/host | NVPS | SNMP OIDs/s | SNMP PDUs/s "
+        "| History/day | Trends/day | History kept | Trends kept |",
+        "| --- | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: |",
+    ]
+    for load in loads:
+        md.append(
+            f"| {load.template} | {load.hosts} | {load.items_per_host:.1f} "
+            f"| {load.values_per_second:.1f} | {load.snmp_oids_per_second:.1f} "
+            f"| {load.snmp_pdus_per_second:.1f} | {format_bytes(load.history_bytes_per_day)} "
+            f"| {format_bytes(load.trends_bytes_per_day)} "
+            f"| {format_bytes(load.history_bytes_retained)} "
+            f"| {format_bytes(load.trends_bytes_retained)} |"
+        )
+    return "\n".join(md)
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if value < 1024 or unit == "TB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def _host_figures(
+    template: TemplateSpec,
+    counts: list[int],
+    macros: Mapping[str, str],
+    max_oids_per_request: int,
+    max_repetitions: int,
+) -> tuple[float, ...]:
+    rates = [_Rate(item, 1, _seconds(item.delay, macros)) for item in template.items]
+    walk_pdus = 0.0
+    for rule, count in zip(template.discovery_rules, counts, strict=True):
+        rates.extend(
+            _Rate(item, count, _seconds(item.delay, macros)) for item in rule.item_prototypes
+        )
+        interval = _seconds(rule.delay, macros)
+        if rule.type == SNMP_TYPE and interval:
+            requests_per_column = math.ceil((count + 1) / max_repetitions)
+            walk_pdus += len(rule.discovery_columns()) * requests_per_column / interval
+
+    per_second = {id(rate.item): _values_per_second(rate) for rate in rates}
+    by_key = {rate.item.key: rate for rate in rates}
+    for rate in rates:
+        master = by_key.get(rate.item.master_item or "")
+        if rate.item.type == "DEPENDENT" and master is not None and master.interval:
+            # Dependent items store one value each time their master is polled.
+            per_second[id(rate.item)] = rate.count / master.interval
+
+    snmp_by_interval: dict[int, int] = {}
+    items = nvps = oids = history = trends = history_kept = trends_kept = 0.0
+    for rate in rates:
+        item, values = rate.item, per_second[id(rate.item)]
+        items += rate.count
+        nvps += values
+        if item.type == SNMP_TYPE and rate.interval:
+            oids += values
+            snmp_by_interval[rate.interval] = snmp_by_interval.get(rate.interval, 0) + rate.count
+        history_days = _seconds(item.history, macros) / DAY
+        if history_days:
+            row = HISTORY_ROW_BYTES.get(item.value_type, HISTORY_ROW_BYTES["TEXT"])
+            history += values * DAY * row
+            history_kept += values * DAY * row * history_days
+        trends_days = _seconds(item.trends, macros) / DAY
+        if trends_days and item.value_type in NUMERIC_TYPES and values:
+            trends += rate.count * 24 * TRENDS_ROW_BYTES
+            trends_kept += rate.count * 24 * TRENDS_ROW_BYTES * trends_days
+
+    get_pdus = sum(
+        math.ceil(count / max_oids_per_request) / interval
+        for interval, count in snmp_by_interval.items()
+    )
+    pdus = get_pdus + walk_pdus
+    return items, nvps, oids, pdus, history, trends, history_kept, trends_kept
+
+
+def _values_per_second(rate: _Rate) -> float:
+    if rate.item.type in UNPOLLED_TYPES or not rate.interval:
+        return 0.0
+    return rate.count / rate.interval
+
+
+def _seconds(value: str, macros: Mapping[str, str]) -> int:
+    return parse_interval(resolve_macros(value, macros))
@@ -0,0 +1,485 @@
+"""Compiled, vectorized item preprocessing.
+
+A :class:`Pipeline` is compiled once from an item's ``<preprocessing>`` chain
+and runs over batches holding samples of many series at once, sorted by series
+and then by clock. State such as the previous value of a change step is kept
+per series, so each batch continues where the last one stopped.
+
+Steps follow Zabbix semantics:
+
+* Change steps discard the first value of a series and any value smaller
+  than the previous one; the discarded value still becomes the new previous
+  value.
+* Discard-unchanged steps compare with the previous value the step saw. The
+  heartbeat variant also keeps a value once the heartbeat has passed since the
+  last kept one.
+* A value a step cannot handle fails. By default it is dropped as "not
+  supported". A step's error handler can instead discard it, replace the error
+  message (still dropped), or set a value; a set value skips the remaining
+  steps.
+
+Numeric steps work on NumPy arrays. Text steps (JSONPath, regular
+expressions, trimming, conversions) run once per distinct value in a batch.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+from ..columnar import np
+from .jsonpath import JsonPath
+from .template import PreprocessingStep, TemplateSpec, parse_interval, resolve_macros
+
+WRAP_32 = 2**32
+
+CHANGE_STEPS = ("CHANGE_PER_SECOND", "SIMPLE_CHANGE")
+ERROR_HANDLERS = ("ORIGINAL_ERROR", "DISCARD_VALUE", "SET_VALUE", "SET_ERROR")
+
+_TRUE = {"true", "t", "yes", "y", "on", "up", "running", "enabled", "available", "ok", "master"}
+_FALSE = {
+    "false",
+    "f",
+    "no",
+    "n",
+    "off",
+    "down",
+    "unused",
+    "disabled",
+    "unavailable",
+    "err",
+    "slave",
+}
+_OUTPUT_GROUP = re.compile(r"\\(\d)")
+_ESCAPES = {"\\n": "\n", "\\r": "\r", "\\t": "\t", "\\s": " ", "\\\\": "\\"}
+
+
+def require_numpy(feature: str) -> None:
+    if np is None:
+        raise ValueError(f"{feature} needs NumPy (pip install -e '.[fast]')")
+
+
+@dataclass
+class Batch:
+    series: np.ndarray
+    clocks: np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.clocks)
+
+    def take(self, mask: np.ndarray) -> Batch:
+        return Batch(self.series[mask], self.clocks[mask], self.values[mask])
+
+
+@dataclass
+class PipelineStats:
+    discarded: int = 0
+    decreases: int = 0
+    # Decreases of series that never passed 2**32, from the upper half of that range.
+    wraps_32bit: int = 0
+    # Values that ended as "not supported".
+    errors: int = 0
+
+
+def segment_starts(series: np.ndarray) -> np.ndarray:
+    """Mask of the first sample of each series in a sorted batch."""
+
+    starts = np.ones(len(series), dtype=bool)
+    starts[1:] = series[1:] != series[:-1]
+    return starts
+
+
+def grow(values: np.ndarray, size: int, fill) -> np.ndarray:
+    """``values`` extended to at least ``size`` entries of ``fill``."""
+
+    if len(values) >= size:
+        return values
+    extra = np.full(max(size, 2 * len(values)) - len(values), fill, dtype=values.dtype)
+    return np.concatenate([values, extra])
+
+
+def numbers(values: np.ndarray, exact: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """Numeric values and the mask of those that are not numbers.
+
+    With ``exact``, whole numbers become ``uint64`` so 64-bit counters keep
+    every digit.
+    """
+
+    failed = np.zeros(len(values), dtype=bool)
+    if values.dtype != object and values.dtype.kind not in "US":
+        return values, failed
+    try:
+        parsed = values.astype(np.float64)
+    except (ValueError, TypeError):
+        parsed = None
+    if exact and parsed is not None:
+        try:
+            whole = values.astype(np.uint64)
+        except (ValueError, TypeError, OverflowError):
+            whole = None
+        # Object arrays truncate 1.5 to 1; keep those as floats.
+        if whole is not None and (whole.astype(np.float64) == parsed).all():
+            return whole, failed
+    if parsed is not None:
+        return parsed, failed
+    parsed = np.empty(len(values))
+    for position, value in enumerate(values):
+        try:
+            parsed[position] = float(str(value).strip())
+        except ValueError:
+            parsed[position] = 0.0
+            failed[position] = True
+    return parsed, failed
+
+
+class _Change:
+    def __init__(self, per_second: bool) -> None:
+        self.per_second = per_second
+        self.previous = np.zeros(0, dtype=np.uint64)
+        self.clocks = np.zeros(0)
+        self.seen = np.zeros(0, dtype=bool)
+        self.peak = np.zeros(0, dtype=np.uint64)
+
+    def __call__(self, batch: Batch, stats: PipelineStats):
+        values, failed = numbers(batch.values, exact=True)
+        if failed.any():
+            return batch, failed
+        series, clocks = batch.series, batch.clocks
+        if values.dtype.kind == "i" and (values >= 0).all():
+            values = values.astype(np.uint64)
+        if values.dtype != self.previous.dtype and values.dtype != np.uint64:
+            self.previous = self.previous.astype(np.float64)
+            self.peak = self.peak.astype(np.float64)
+        values = values.astype(self.previous.dtype, copy=False)
+        size = int(series.max()) + 1
+        self.previous = grow(self.previous, size, 0)
+        self.clocks = grow(self.clocks, size, 0.0)
+        self.seen = grow(self.seen, size, False)
+        self.peak = grow(self.peak, size, 0)
+
+        starts = segment_starts(series)
+        previous = np.empty_like(values)
+        previous[1:] = values[:-1]
+        previous[starts] = self.previous[series[starts]]
+        before = np.empty_like(clocks)
+        before[1:] = clocks[:-1]
+        before[starts] = self.clocks[series[starts]]
+        known = np.ones(len(values), dtype=bool)
+        known[starts] = self.seen[series[starts]]
+
+        np.maximum.at(self.peak, series, values)
+        decreases = known & (values < previous)
+        wraps = decreases & (previous >= WRAP_32 // 2) & (self.peak[series] < WRAP_32)
+        seconds = clocks - before
+        keep = known & ~decreases & (seconds > 0)
+        stats.decreases += int(decreases.sum())
+        stats.wraps_32bit += int(wraps.sum())
+        stats.discarded += len(values) - int(keep.sum())
+
+        ends = np.append(starts[1:], True)
+        self.previous[series[ends]] = values[ends]
+        self.clocks[series[ends]] = clocks[ends]
+        self.seen[series[ends]] = True
+
+        # uint64 subtraction is exact; decreases are dropped before it could wrap.
+        deltas = (values[keep] - previous[keep]).astype(np.float64)
+        if self.per_second:
+            deltas /= seconds[keep]
+        return Batch(series[keep], clocks[keep], deltas), None
+
+
+class _Multiplier:
+    def __init__(self, factor: float) -> None:
+        self.factor = factor
+
+    def __call__(self, batch: Batch, stats: PipelineStats):
+        values, failed = numbers(batch.values)
+        scaled = values.astype(np.float64) * self.factor
+        return Batch(batch.series, batch.clocks, scaled), failed
+
+
+class _InRange:
+    def __init__(self, low: float | None, high: float | None) -> None:
+        self.low, self.high = low, high
+
+    def __call__(self, batch: Batch, stats: PipelineStats):
+        values, failed = numbers(batch.values)
+        if self.low is not None:
+            failed |= values < self.low
+        if self.high is not None:
+            failed |= values > self.high
+        return batch, failed
+
+
+class _DiscardUnchanged:
+    def __init__(self, heartbeat: float | None) -> None:
+        self.heartbeat = heartbeat
+        self.previous = np.zeros(0, dtype=object)
+        self.seen = np.zeros(0, dtype=bool)
+        self.kept = np.zeros(0)
+
+    def __call__(self, batch: Batch, stats: PipelineStats):
+        series, clocks, values = batch.series, batch.clocks, batch.values
+        size = int(series.max()) + 1
+        self.previous = grow(self.previous, size, None)
+        self.seen = grow(self.seen, size, False)
+        self.kept = grow(self.kept, size, -np.inf)
+
+        starts = segment_starts(series)
+        previous = np.empty(len(values), dtype=object)
+        previous[1:] = values[:-1]
+        previous[starts] = self.previous[series[starts]]
+        changed = np.asarray(values != previous, dtype=bool)
+        changed[starts] |= ~self.seen[series[starts]]
+        keep = changed.copy()
+        if self.heartbeat is not None:
+            keep |= self._heartbeats(series, clocks, changed, starts)
+
+        ends = np.append(starts[1:], True)
+        self.previous[series[ends]] = values[ends]
+        self.seen[series[ends]] = True
+        kept_at = np.where(keep, clocks, -np.inf)
+        np.maximum.at(self.kept, series, kept_at)
+        stats.discarded += len(values) - int(keep.sum())
+        return batch.take(keep), None
+
+    def _heartbeats(self, series, clocks, changed, starts) -> np.ndarray:
+        """Unchanged values kept because the heartbeat passed since the last kept one."""
+
+        keep = np.zeros(len(clocks), dtype=bool)
+        # Sort key that is monotonic across series, so one searchsorted serves every run.
+        rank = np.cumsum(starts) - 1
+        span = float(clocks.max() - clocks.min()) + self.heartbeat + 1
+        offset = clocks.min()
+        ordered = rank * span + (clocks - offset)
+        run_start = ~changed & (starts | np.append(True, changed[:-1]))
+        positions = np.flatnonzero(run_start)
+        run_end = np.flatnonzero(~changed & np.append(changed[1:] | starts[1:], True)) + 1
+        anchors = np.where(
+            starts[positions],
+            self.kept[series[positions]],
+            clocks[np.maximum(positions - 1, 0)],
+        )
+        ranks = rank[positions]
+        while len(positions):
+            targets = ranks * span + (np.maximum(anchors + self.heartbeat, offset) - offset)
+            found = np.maximum(np.searchsorted(ordered, targets, side="left"), positions)
+            active = found < run_end
+            found, run_end, ranks = found[active], run_end[active], ranks[active]
+            keep[found] = True
+            anchors = clocks[found]
+            positions = found + 1
+        return keep
+
+
+class _Text:
+    """A per-value function applied once to each distinct value of a batch."""
+
+    def __init__(self, function: Callable[[str], str]) -> None:
+        self.function = function
+
+    def __call__(self, batch: Batch, stats: PipelineStats):
+        results: dict = {}
+        output = np.empty(len(batch.values), dtype=object)
+        failed = np.zeros(len(batch.values), dtype=bool)
+        for position, value in enumerate(batch.values.tolist()):
+            result = results.get(value)
+            if result is None:
+                try:
+                    result = self.function(_text(value))
+                except (ValueError, TypeError, re.error):
+                    result = _FAILED
+                results[value] = result
+            if result is _FAILED:
+                failed[position] = True
+            else:
+                output[position] = result
+        return Batch(batch.series, batch.clocks, output), failed
+
+
+_FAILED = object()
+
+
+class _Handler:
+    def __init__(self, kind: str, params: str) -> None:
+        if kind not in ERROR_HANDLERS:
+            raise ValueError(f"Unsupported error handler {kind}")
+        self.kind, self.params = kind, params
+
+    def apply(self, batch: Batch, failed: np.ndarray, stats: PipelineStats):
+        """Batch of the values that go on, and the values that are final."""
+
+        if self.kind == "DISCARD_VALUE":
+            stats.discarded += int(failed.sum())
+        elif self.kind != "SET_VALUE":
+            stats.errors += int(failed.sum())
+        finished = None
+        if self.kind == "SET_VALUE":
+            values = np.full(int(failed.sum()), self.params, dtype=object)
+            finished = Batch(batch.series[failed], batch.clocks[failed], values)
+        return batch.take(~failed), finished
+
+
+class Pipeline:
+    """Compiled preprocessing chain of one item."""
+
+    def __init__(self, steps: list) -> None:
+        self.steps = steps
+        self.stats = PipelineStats()
+
+    @classmethod
+    def compile(
+        cls, steps: list[PreprocessingStep], macros: Mapping[str, str] | None = None
+    ) -> Pipeline:
+        """Raises ``ValueError`` for steps that cannot be replayed."""
+
+        compiled = []
+        for step in steps:
+            params = resolve_macros(step.params, macros or {})
+            handler_params = resolve_macros(step.error_handler_params, macros or {})
+            try:
+                handler = _Handler(step.error_handler, handler_params)
+                compiled.append((_step(step.type, params.split("\n")), handler))
+            except (ValueError, re.error) as exc:
+                raise ValueError(f"{step.type}: {exc}") from exc
+        return cls(compiled)
+
+    @property
+    def counts_deltas(self) -> bool:
+        """True when raw values are counters whose differences are stored."""
+
+        return bool(self.steps) and isinstance(self.steps[0][0], _Change)
+
+    @property
+    def numeric_input(self) -> bool:
+        """True when the first step expects numbers rather than text."""
+
+        return not self.steps or not isinstance(self.steps[0][0], _Text)
+
+    def run(self, batch: Batch) -> Batch:
+        finished = []
+        for step, handler in self.steps:
+            if not len(batch):
+                break
+            batch, failed = step(batch, self.stats)
+            if failed is not None and failed.any():
+                batch, done = handler.apply(batch, failed, self.stats)
+                if done is not None:
+                    finished.append(done)
+        if finished:
+            parts = [batch, *finished]
+            batch = Batch(
+                np.concatenate([part.series for part in parts]),
+                np.concatenate([part.clocks for part in parts]),
+                np.concatenate([part.values.astype(object) for part in parts]),
+            )
+            batch = batch.take(np.lexsort((batch.clocks, batch.series)))
+        if batch.values.dtype.kind in "iuf":
+            return Batch(batch.series, batch.clocks, batch.values.astype(np.float64, copy=False))
+        return batch
+
+    __call__ = run
+
+
+def compile_pipelines(
+    template: TemplateSpec, macros: Mapping[str, str] | None = None
+) -> dict[str, Pipeline]:
+    """Pipeline of every item and item prototype with preprocessing, by key."""
+
+    resolved = {**template.macros, **(macros or {})}
+    items = template.items + [
+        item for rule in template.discovery_rules for item in rule.item_prototypes
+    ]
+    pipelines = {}
+    for item in items:
+        if item.preprocessing:
+            try:
+                pipelines[item.key] = Pipeline.compile(item.preprocessing, resolved)
+            except ValueError as exc:
+                raise ValueError(f"{item.key}: {exc}") from exc
+    return pipelines
+
+
+def _step(kind: str, params: list[str]):
+    first = params[0]
+    if kind in CHANGE_STEPS:
+        return _Change(kind == "CHANGE_PER_SECOND")
+    if kind == "MULTIPLIER":
+        return _Multiplier(_number(first))
+    if kind == "IN_RANGE":
+        low, high = (params + [""])[:2]
+        return _InRange(_number(low) if low else None, _number(high) if high else None)
+    if kind == "DISCARD_UNCHANGED":
+        return _DiscardUnchanged(None)
+    if kind == "DISCARD_UNCHANGED_HEARTBEAT":
+        return _DiscardUnchanged(float(parse_interval(first)))
+    if kind == "JSONPATH":
+        return _Text(JsonPath(first).query)
+    if kind == "REGEX":
+        return _Text(_regex(re.compile(first), params[1] if len(params) > 1 else "\\0"))
+    if kind in ("MATCHES_REGEX", "NOT_MATCHES_REGEX"):
+        return _Text(_validate(re.compile(first), kind == "MATCHES_REGEX"))
+    if kind in ("TRIM", "LTRIM", "RTRIM"):
+        strip = {"TRIM": str.strip, "LTRIM": str.lstrip, "RTRIM": str.rstrip}[kind]
+        return _Text(lambda value: strip(value, first))
+    if kind == "STR_REPLACE":
+        search, replace = (_unescape(param) for param in (params + [""])[:2])
+        if not search:
+            raise ValueError("search string must not be empty")
+        return _Text(lambda value: value.replace(search, replace))
+    if kind == "BOOL_TO_DECIMAL":
+        return _Text(_boolean)
+    if kind in ("OCTAL_TO_DECIMAL", "HEX_TO_DECIMAL"):
+        base = 8 if kind == "OCTAL_TO_DECIMAL" else 16
+        return _Text(lambda value: str(int(value.strip().replace(" ", ""), base)))
+    raise ValueError(f"Unsupported preprocessing step {kind}")
+
+
+def _number(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError as exc:
+        raise ValueError(f"Bad numeric parameter: {text!r}") from exc
+
+
+def _text(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value if isinstance(value, str) else str(value)
+
+
+def _regex(pattern: re.Pattern[str], output: str) -> Callable[[str], str]:
+    def apply(value: str) -> str:
+        match = pattern.search(value)
+        if match is None:
+            raise ValueError("cannot perform regular expression match")
+        return _OUTPUT_GROUP.sub(
+            lambda ref: (match.group(int(ref[1])) or "") if int(ref[1]) <= pattern.groups else "",
+            output,
+        )
+
+    return apply
+
+
+def _validate(pattern: re.Pattern[str], expected: bool) -> Callable[[str], str]:
+    def apply(value: str) -> str:
+        if (pattern.search(value) is not None) != expected:
+            raise ValueError("value does not pass the regular expression check")
+        return value
+
+    return apply
+
+
+def _boolean(value: str) -> str:
+    text = value.strip().lower()
+    if text in _TRUE:
+        return "1"
+    if text in _FALSE:
+        return "0"
+    return "0" if float(text) == 0 else "1"
+
+
+def _unescape(text: str) -> str:
+    return re.sub(r"\\[nrts\\]", lambda escape: _ESCAPES[escape[0]], text)
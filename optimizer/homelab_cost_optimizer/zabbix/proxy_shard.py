@@ -0,0 +1,286 @@
+"""Shard a fleet across Zabbix proxies by expected NVPS.
+
+A host's load is the NVPS of the template's items for the entities it
+discovers, as :mod:`.poll_load` counts them. The files ``poll-budget`` writes
+supply the host's macro overrides, the template delay changes and the proxy
+each host was planned on.
+
+Placement is rendezvous (highest random weight) hashing with bounded loads.
+Every host ranks the proxies by a hash of the host and proxy names and goes to
+the first proxy in its ranking that stays within ``(1 + epsilon)`` times the
+mean load. Hosts are placed heaviest first, so big hosts still find room; a
+host heavier than the bound goes to the least loaded proxy. A ranking depends
+only on the names, so adding or removing hosts moves few others, and adding a
+proxy mostly takes its share from every other proxy. With a previous map,
+each host tries its previous proxy first.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import math
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import TextIO
+
+import yaml
+
+from .poll_budget import TEMPLATE_FILE, FleetHost
+from .poll_load import host_values_per_second
+from .template import ItemSpec, TemplateSpec
+
+EPSILON = 0.05
+BAR_WIDTH = 40
+
+
+@dataclass
+class ShardPlan:
+    proxies: list[str]
+    assignment: dict[str, str]
+    host_loads: dict[str, float]
+    bound: float
+    # Hosts of the previous map that changed proxy, and their load.
+    moved: int | None = None
+    moved_load: float = 0.0
+
+    def proxy_loads(self) -> dict[str, float]:
+        loads = dict.fromkeys(self.proxies, 0.0)
+        for host, proxy in self.assignment.items():
+            loads[proxy] += self.host_loads[host]
+        return loads
+
+    def proxy_hosts(self) -> dict[str, int]:
+        counts = dict.fromkeys(self.proxies, 0)
+        for proxy in self.assignment.values():
+            counts[proxy] += 1
+        return counts
+
+
+@dataclass
+class Overrides:
+    """A ``poll-budget`` plan: host macros and proxies, and template delays by item key."""
+
+    macros: dict[str, dict[str, str]] = field(default_factory=dict)
+    proxies: dict[str, str] = field(default_factory=dict)
+    template: str | None = None
+    delays: dict[str, str] = field(default_factory=dict)
+
+
+def proxy_names(value: str | int) -> list[str]:
+    """``3`` gives ``proxy-1`` to ``proxy-3``; anything else is a comma-separated name list."""
+
+    text = str(value).strip()
+    if text.isdigit():
+        names = [f"proxy-{index}" for index in range(1, int(text) + 1)]
+    else:
+        names = [name.strip() for name in text.split(",") if name.strip()]
+    if not names:
+        raise ValueError("At least one proxy is needed")
+    if len(set(names)) != len(names):
+        raise ValueError("Proxy names must be unique")
+    return names
+
+
+def host_loads(
+    template: TemplateSpec,
+    hosts: Iterable[FleetHost],
+    macros: Mapping[str, Mapping[str, str]] | None = None,
+) -> dict[str, float]:
+    """NVPS per host; ``macros`` maps host names to their macro overrides."""
+
+    macros = macros or {}
+    loads = {}
+    for host in hosts:
+        if host.name in loads:
+            raise ValueError(f"Duplicate host: {host.name}")
+        loads[host.name] = host_values_per_second(
+            template, host.counts(template), macros.get(host.name)
+        )
+    return loads
+
+
+def apply_delays(template: TemplateSpec, delays: Mapping[str, str]) -> TemplateSpec:
+    """A copy of ``template`` with the items and prototypes in ``delays`` set to that delay."""
+
+    if not delays:
+        return template
+    keys = {item.key for item in template.items}
+    keys.update(item.key for rule in template.discovery_rules for item in rule.item_prototypes)
+    if set(delays) - keys:
+        raise ValueError(
+            f"Unknown item in template delays: {', '.join(sorted(set(delays) - keys))}"
+        )
+
+    def delayed(items: list[ItemSpec]) -> list[ItemSpec]:
+        return [
+            replace(item, delay=delays[item.key]) if item.key in delays else item for item in items
+        ]
+
+    rules = [
+        replace(rule, item_prototypes=delayed(rule.item_prototypes))
+        for rule in template.discovery_rules
+    ]
+    return replace(template, items=delayed(template.items), discovery_rules=rules)
+
+
+def shard_hosts(
+    loads: Mapping[str, float],
+    proxies: Sequence[str],
+    epsilon: float = EPSILON,
+    previous: Mapping[str, str] | None = None,
+) -> ShardPlan:
+    """Host to proxy map that keeps every proxy within ``(1 + epsilon)`` of the mean."""
+
+    if not proxies:
+        raise ValueError("At least one proxy is needed")
+    if epsilon < 0:
+        raise ValueError("Epsilon must not be negative")
+    previous = previous or {}
+    bound = (1 + epsilon) * sum(loads.values()) / len(proxies)
+    load = dict.fromkeys(proxies, 0.0)
+    placed: dict[str, str] = {}
+    for host in sorted(loads, key=lambda name: (-loads[name], name)):
+        weight = loads[host]
+        ranking = rank_proxies(host, proxies)
+        if previous.get(host) in load:
+            ranking.remove(previous[host])
+            ranking.insert(0, previous[host])
+        proxy = next((name for name in ranking if load[name] + weight <= bound * (1 + 1e-9)), None)
+        if proxy is None:
+            proxy = min(ranking, key=lambda name: load[name])
+        load[proxy] += weight
+        placed[host] = proxy
+    assignment = {host: placed[host] for host in loads}
+    plan = ShardPlan(list(proxies), assignment, dict(loads), bound)
+    if previous:
+        moved = [
+            host for host in assignment if host in previous and previous[host] != assignment[host]
+        ]
+        plan.moved = len(moved)
+        plan.moved_load = sum(loads[host] for host in moved)
+    return plan
+
+
+def rank_proxies(host: str, proxies: Sequence[str]) -> list[str]:
+    """Proxies in ``host``'s rendezvous order, highest hash first."""
+
+    def score(proxy: str) -> int:
+        digest = hashlib.blake2b(f"{host}\0{proxy}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    return sorted(proxies, key=score, reverse=True)
+
+
+def read_assignment(path: Path | str) -> dict[str, str]:
+    """``host,proxy`` rows of a previous map; other columns are ignored."""
+
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        if reader.fieldnames is None or not {"host", "proxy"} <= set(reader.fieldnames):
+            raise ValueError(f"{path} needs host and proxy columns")
+        return {row["host"]: row["proxy"] for row in reader}
+
+
+def read_overrides(directory: Path | str) -> Overrides:
+    """The ``<host>.yaml`` files and template delays that ``poll-budget`` wrote."""
+
+    overrides = Overrides()
+    for path in sorted(Path(directory).glob("*.yaml")):
+        document = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        try:
+            if path.name == TEMPLATE_FILE:
+                overrides.template = document.get("template")
+                overrides.delays = {
+                    str(entry["item"]): str(entry["delay"])
+                    for entry in document.get("delays") or []
+                }
+                continue
+            host = str(document.get("host", path.stem))
+            overrides.macros[host] = {
+                str(entry["macro"]): str(entry["value"]) for entry in document.get("macros") or []
+            }
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"Invalid override file {path}: {exc}") from exc
+        if document.get("proxy") is not None:
+            overrides.proxies[host] = str(document["proxy"])
+    return overrides
+
+
+def write_assignment(plan: ShardPlan, handle: TextIO) -> None:
+    writer = csv.writer(handle)
+    writer.writerow(["host", "proxy", "nvps"])
+    for host, proxy in plan.assignment.items():
+        writer.writerow([host, proxy, f"{plan.host_loads[host]:.4f}"])
+
+
+def render_markdown(plan: ShardPlan) -> str:
+    loads = plan.proxy_loads()
+    counts = plan.proxy_hosts()
+    total = sum(loads.values())
+    mean = total / len(plan.proxies)
+    peak = max(loads.values())
+    md = [
+        "# Proxy sharding plan",
+        "",
+        f"- Hosts: {len(plan.assignment)} on {len(plan.proxies)} proxies",
+        f"- NVPS: {total:.1f} (mean {mean:.1f} per proxy, bound {plan.bound:.1f})",
+        f"- Busiest proxy: {peak:.1f} NVPS, {peak / mean if mean else 1.0:.3f} x mean",
+    ]
+    if plan.moved is not None:
+        share = plan.moved_load / total if total else 0.0
+        md.append(
+            f"- Moved from the previous map: {plan.moved} hosts, {plan.moved_load:.1f} NVPS "
+            f"({share:.1%} of the load)"
+        )
+    md += [
+        "",
+        "## Load per proxy",
+        "",
+        "| Proxy | Hosts | NVPS | Load |",
+        "| --- | ---: | ---: | --- |",
+    ]
+    for proxy in plan.proxies:
+        md.append(
+            f"| {proxy} | {counts[proxy]} | {loads[proxy]:.1f} | `{_bar(loads[proxy], peak)}` |"
+        )
+    md += [
+        "",
+        "## Hosts by NVPS",
+        "",
+        "| NVPS | Hosts | NVPS total | Hosts |",
+        "| --- | ---: | ---: | --- |",
+    ]
+    buckets = _buckets(plan.host_loads.values())
+    widest = max((count for count, _ in buckets.values()), default=0)
+    for (low, high), (count, load) in sorted(buckets.items()):
+        md.append(
+            f"| {_number(low)}-{_number(high)} | {count} | {load:.1f} "
+            f"| `{_bar(count, widest)}` |"
+        )
+    return "\n".join(md)
+
+
+def _buckets(loads: Iterable[float]) -> dict[tuple[float, float], tuple[int, float]]:
+    """Hosts and load per power-of-two NVPS range."""
+
+    buckets: dict[tuple[float, float], tuple[int, float]] = {}
+    for load in loads:
+        if load <= 0:
+            key = (0.0, 0.0)
+        else:
+            exponent = math.floor(math.log2(load))
+            key = (2.0**exponent, 2.0 ** (exponent + 1))
+        count, total = buckets.get(key, (0, 0.0))
+        buckets[key] = (count + 1, total + load)
+    return buckets
+
+
+def _bar(value: float, peak: float) -> str:
+    filled = round(BAR_WIDTH * value / peak) if peak else 0
+    return "#" * filled + "." * (BAR_WIDTH - filled)
+
+
+def _number(value: float) -> str:
+    return f"{value:g}"
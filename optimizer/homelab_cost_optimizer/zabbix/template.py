@@ -0,0 +1,238 @@
+"""Read-only model of Zabbix template exports.
+
+Only the parts the planning tools need are kept: items, discovery rules with
+their filters and item and trigger prototypes, preprocessing steps, triggers
+and template-level user macros.
+"""
+
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# A user macro, with an optional context: {$IF.POLL.INTERVAL}, {$TEMP.MAX:"cpu"}.
+USER_MACRO = re.compile(r"\{\$[A-Z0-9_.]+(?::[^}]*)?\}")
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_INTERVAL = re.compile(r"^(\d+)([smhdw]?)$")
+_DISCOVERY_OID = re.compile(r"^discovery\[(.*)\]$")
+
+
+def parse_interval(text: str) -> int:
+    """Seconds in a Zabbix time value such as ``30s``, ``1m`` or ``7d``.
+
+    Only the update interval of flexible/scheduling delays (before the first
+    ``;``) is used.
+    """
+
+    value = text.split(";", 1)[0].strip()
+    match = _INTERVAL.match(value)
+    if match is None:
+        raise ValueError(f"Unsupported Zabbix interval: {text}")
+    return int(match[1]) * _UNITS[match[2] or "s"]
+
+
+def format_interval(seconds: int) -> str:
+    """Shortest Zabbix time value for ``seconds``: 300 is ``5m``, 86400 is ``1d``."""
+
+    for suffix, unit in sorted(_UNITS.items(), key=lambda entry: -entry[1]):
+        if seconds and seconds % unit == 0:
+            return f"{seconds // unit}{suffix}"
+    return str(seconds)
+
+
+def resolve_macros(text: str, macros: Mapping[str, str]) -> str:
+    """Replace user macros in ``text``; unknown macros raise ``ValueError``."""
+
+    def replace(match: re.Match[str]) -> str:
+        name = match[0]
+        if name in macros:
+            return macros[name]
+        # {$MACRO:"context"} falls back to the macro without context.
+        base = name.split(":", 1)[0] + "}"
+        if base in macros:
+            return macros[base]
+        raise ValueError(f"Unresolved macro {name}")
+
+    return USER_MACRO.sub(replace, text)
+
+
+@dataclass
+class PreprocessingStep:
+    type: str
+    params: str = ""
+    error_handler: str = "ORIGINAL_ERROR"
+    error_handler_params: str = ""
+
+
+@dataclass
+class ItemSpec:
+    key: str
+    name: str
+    type: str
+    delay: str = "1m"
+    value_type: str = "UNSIGNED"
+    history: str = "90d"
+    trends: str = "365d"
+    snmp_oid: str | None = None
+    master_item: str | None = None
+    units: str = ""
+    # Formula of CALCULATED items.
+    params: str = ""
+    preprocessing: list[PreprocessingStep] = field(default_factory=list)
+
+
+@dataclass
+class TriggerSpec:
+    name: str
+    expression: str
+    priority: str = "NOT_CLASSIFIED"
+    recovery_mode: str = "EXPRESSION"
+    recovery_expression: str = ""
+
+
+@dataclass
+class LldCondition:
+    macro: str
+    value: str
+    operator: str = "MATCHES_REGEX"
+    formulaid: str = ""
+
+
+@dataclass
+class LldFilter:
+    # Zabbix only reads ``formula`` when ``evaltype`` is FORMULA.
+    evaltype: str = "AND_OR"
+    formula: str = ""
+    conditions: list[LldCondition] = field(default_factory=list)
+
+
+@dataclass
+class DiscoveryRule:
+    key: str
+    name: str
+    type: str
+    delay: str = "1h"
+    lifetime: str = "7d"
+    snmp_oid: str | None = None
+    filter: LldFilter = field(default_factory=LldFilter)
+    item_prototypes: list[ItemSpec] = field(default_factory=list)
+    trigger_prototypes: list[TriggerSpec] = field(default_factory=list)
+
+    def discovery_columns(self) -> list[tuple[str, str]]:
+        """``(LLD macro, OID)`` pairs walked by an SNMP ``discovery[...]`` rule."""
+
+        match = _DISCOVERY_OID.match(self.snmp_oid or "")
+        if match is None:
+            return [("", self.snmp_oid)] if self.snmp_oid else []
+        parts = [part.strip() for part in match[1].split(",")]
+        return list(zip(parts[::2], parts[1::2], strict=False))
+
+
+@dataclass
+class TemplateSpec:
+    template: str
+    name: str
+    items: list[ItemSpec] = field(default_factory=list)
+    discovery_rules: list[DiscoveryRule] = field(default_factory=list)
+    triggers: list[TriggerSpec] = field(default_factory=list)
+    macros: dict[str, str] = field(default_factory=dict)
+    source: str = ""
+
+
+def load_templates(path: Path | str) -> list[TemplateSpec]:
+    """Parse every ``<template>`` of a Zabbix XML export."""
+
+    root = ET.parse(path).getroot()
+    return [_template(element, str(path)) for element in root.iterfind("templates/template")]
+
+
+def _template(element: ET.Element, source: str) -> TemplateSpec:
+    return TemplateSpec(
+        template=element.findtext("template", ""),
+        name=element.findtext("name", ""),
+        items=[_item(item) for item in element.iterfind("items/item")],
+        discovery_rules=[
+            _rule(rule) for rule in element.iterfind("discovery_rules/discovery_rule")
+        ],
+        triggers=_triggers(element, "items/item", "triggers/trigger"),
+        macros={
+            macro.findtext("macro", ""): macro.findtext("value", "")
+            for macro in element.iterfind("macros/macro")
+        },
+        source=source,
+    )
+
+
+def _item(element: ET.Element) -> ItemSpec:
+    return ItemSpec(
+        key=element.findtext("key", ""),
+        name=element.findtext("name", ""),
+        # Zabbix omits defaults from exports: ZABBIX_PASSIVE, 1m, UNSIGNED, 90d and 365d.
+        type=element.findtext("type", "ZABBIX_PASSIVE"),
+        delay=element.findtext("delay", "1m"),
+        value_type=element.findtext("value_type", "UNSIGNED"),
+        history=element.findtext("history", "90d"),
+        trends=element.findtext("trends", "365d"),
+        snmp_oid=element.findtext("snmp_oid"),
+        master_item=element.findtext("master_item/key"),
+        units=element.findtext("units", ""),
+        params=element.findtext("params") or "",
+        preprocessing=[
+            PreprocessingStep(
+                step.findtext("type", ""),
+                step.findtext("params") or "",
+                step.findtext("error_handler", "ORIGINAL_ERROR"),
+                step.findtext("error_handler_params") or "",
+            )
+            for step in element.iterfind("preprocessing/step")
+        ],
+    )
+
+
+def _rule(element: ET.Element) -> DiscoveryRule:
+    return DiscoveryRule(
+        key=element.findtext("key", ""),
+        name=element.findtext("name", ""),
+        type=element.findtext("type", "ZABBIX_PASSIVE"),
+        delay=element.findtext("delay", "1h"),
+        lifetime=element.findtext("lifetime", "7d"),
+        snmp_oid=element.findtext("snmp_oid"),
+        filter=LldFilter(
+            evaltype=element.findtext("filter/evaltype", "AND_OR"),
+            formula=element.findtext("filter/formula", ""),
+            conditions=[
+                LldCondition(
+                    macro=condition.findtext("macro", ""),
+                    value=condition.findtext("value") or "",
+                    operator=condition.findtext("operator", "MATCHES_REGEX"),
+                    formulaid=condition.findtext("formulaid", ""),
+                )
+                for condition in element.iterfind("filter/conditions/condition")
+            ],
+        ),
+        item_prototypes=[
+            _item(item) for item in element.iterfind("item_prototypes/item_prototype")
+        ],
+        trigger_prototypes=_triggers(
+            element, "item_prototypes/item_prototype", "trigger_prototypes/trigger_prototype"
+        ),
+    )
+
+
+def _triggers(element: ET.Element, items: str, path: str) -> list[TriggerSpec]:
+    # Triggers on one item may also be exported under that item (Zabbix 5.4+).
+    nested = [trigger for item in element.iterfind(items) for trigger in item.iterfind(path)]
+    return [
+        TriggerSpec(
+            name=trigger.findtext("name", ""),
+            expression=trigger.findtext("expression", ""),
+            priority=trigger.findtext("priority", "NOT_CLASSIFIED"),
+            recovery_mode=trigger.findtext("recovery_mode", "EXPRESSION"),
+            recovery_expression=trigger.findtext("recovery_expression", ""),
+        )
+        for trigger in [*element.iterfind(path), *nested]
+    ]
@@ -0,0 +1,66 @@
+#!/usr/bin/env bash
+# Compare idle-watt savings and runtime of the consolidation strategies.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+NODES="${NODES:-24}"
+WORKLOADS="${WORKLOADS:-90}"
+TIME_BUDGET="${TIME_BUDGET:-5}"
+
+python - "$NODES" "$WORKLOADS" "$TIME_BUDGET" <<'PY'
+import random
+import sys
+import time
+
+from homelab_cost_optimizer.consolidators.binpacking_consolidator import (
+    STRATEGIES,
+    BinPackingConsolidator,
+)
+from homelab_cost_optimizer.consolidators.exact_consolidator import ExactConsolidator
+from homelab_cost_optimizer.consolidators.heuristic_consolidator import HeuristicConsolidator
+from homelab_cost_optimizer.models import InventorySnapshot, Node, PowerProfile, Workload
+
+node_count, workload_count, budget = int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])
+rng = random.Random(42)
+nodes = [
+    Node(
+        name=f"node-{i}",
+        kind="hypervisor",
+        cpu_cores=rng.choice([8, 16, 32]),
+        memory_gb=rng.choice([32, 64, 128]),
+        power_profile=PowerProfile(base_idle_watts=rng.choice([45, 70, 110])),
+    )
+    for i in range(node_count)
+]
+workloads = [
+    Workload(
+        name=f"vm-{i}",
+        workload_type="vm",
+        cpu_cores=rng.choice([0.5, 1, 2, 4]),
+        memory_gb=rng.choice([1, 2, 4, 8, 16]),
+        utilization=rng.random(),
+        node_name=rng.choice(nodes).name,
+    )
+    for i in range(workload_count)
+]
+snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+
+consolidators = {"heuristic": HeuristicConsolidator()}
+consolidators.update({name: BinPackingConsolidator(name) for name in STRATEGIES})
+consolidators["optimal"] = ExactConsolidator(time_budget=budget)
+
+print(f"nodes={node_count} workloads={workload_count} optimal time budget={budget}s")
+print(f"{'strategy':<22} {'savings W':>10} {'off':>4} {'unplaced':>9} {'gap':>7} {'runtime':>10}")
+for name, consolidator in consolidators.items():
+    start = time.perf_counter()
+    plan = consolidator.consolidate(snapshot)
+    elapsed = time.perf_counter() - start
+    gap = "-" if plan.optimality_gap is None else f"{plan.optimality_gap:.1%}"
+    print(
+        f"{name:<22} {plan.estimated_idle_watt_reduction:>10.1f} "
+        f"{len(plan.nodes_to_power_down):>4} {len(plan.unplaced):>9} {gap:>7} "
+        f"{elapsed * 1000:>8.1f}ms"
+    )
+PY
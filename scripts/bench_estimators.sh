@@ -0,0 +1,71 @@
+#!/usr/bin/env bash
+# Compare the scalar PowerEstimator/CostEstimator path with the batch engine.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+WORKLOADS="${WORKLOADS:-50000}"
+NODES="${NODES:-2000}"
+
+python - "$WORKLOADS" "$NODES" <<'PY'
+import sys
+import time
+
+from homelab_cost_optimizer.columnar import np
+from homelab_cost_optimizer.estimators.batch_estimator import BatchEstimator
+from homelab_cost_optimizer.estimators.cost_estimator import CostEstimator
+from homelab_cost_optimizer.estimators.power_estimator import PowerEstimator
+from homelab_cost_optimizer.models import InventorySnapshot, Node, Workload
+
+workload_count, node_count = int(sys.argv[1]), int(sys.argv[2])
+nodes = [
+    Node(name=f"node-{i}", kind="hypervisor", cpu_cores=64, memory_gb=256)
+    for i in range(node_count)
+]
+workloads = [
+    Workload(
+        name=f"vm-{i}",
+        workload_type="vm",
+        cpu_cores=1 + i % 8,
+        memory_gb=2 + i % 16,
+        utilization=(i % 100) / 100,
+        node_name=nodes[i % node_count].name,
+    )
+    for i in range(workload_count)
+]
+snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def scalar():
+    snapshot.invalidate_indexes()
+    power = PowerEstimator().estimate(snapshot)
+    return power, CostEstimator(price_per_kwh=0.25).estimate(power)
+
+
+def batch_cold():
+    snapshot.invalidate_indexes()
+    return engine.estimate(snapshot)
+
+
+engine = BatchEstimator(price_per_kwh=0.25)
+scalar_time, scalar_result = best_of(scalar)
+# The first batch call on a snapshot builds its columnar view; later calls reuse it.
+cold_time, cold_result = best_of(batch_cold)
+batch_time, batch_result = best_of(lambda: engine.estimate(snapshot), repeat=20)
+assert batch_result == cold_result == scalar_result, "batch engine diverged from the scalar path"
+
+print(f"workloads={workload_count} nodes={node_count} numpy={'yes' if np is not None else 'no'}")
+print(f"scalar:       {scalar_time * 1000:6.1f} ms")
+print(f"batch, cold:  {cold_time * 1000:6.1f} ms ({scalar_time / cold_time:.1f}x, builds the view)")
+print(f"batch, warm:  {batch_time * 1000:6.1f} ms ({scalar_time / batch_time:.1f}x)")
+PY
@@ -0,0 +1,63 @@
+#!/usr/bin/env bash
+# Replay throughput and peak RSS of history-replay on a synthetic, time-ordered CSV export of
+# the advanced template's interface items. Peak RSS should stay flat as ROWS grows.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+ROWS="${ROWS:-5000000}"
+INTERFACES="${INTERFACES:-5000}"
+CHUNK_ROWS="${CHUNK_ROWS:-250000}"
+WORKDIR="$(mktemp -d)"
+trap 'rm -rf "$WORKDIR"' EXIT
+
+python - "$WORKDIR/history.csv" "$ROWS" "$INTERFACES" <<'PY'
+import random
+import sys
+
+path, rows, interfaces = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+keys = ("net.if.in", "net.if.out", "net.if.in.errors", "net.if.out.errors", "net.if.status")
+rng = random.Random(7)
+counters = [[rng.randrange(2**40) for _ in keys] for _ in range(interfaces)]
+written = 0
+with open(path, "w", encoding="utf-8") as handle:
+    handle.write("host,key,clock,value\n")
+    clock = 1_700_000_000
+    while written < rows:
+        lines = []
+        for index in range(interfaces):
+            host, port = f"sw{index // 48}", index % 48 + 1
+            state = counters[index]
+            state[0] += rng.randrange(7 * 10**9)
+            state[1] += rng.randrange(7 * 10**9)
+            state[2] += rng.randrange(3) if rng.random() < 0.01 else 0
+            state[4] = 2 if rng.random() < 0.001 else 1
+            lines.extend(
+                f"{host},{key}[{port}],{clock},{value}\n" for key, value in zip(keys, state)
+            )
+            lines.append(f"{host},net.if.highspeed[{port}],{clock},1000\n")
+        handle.writelines(lines[: rows - written])
+        written += len(lines)
+        clock += 60
+PY
+echo "rows=$ROWS interfaces=$INTERFACES export=$(du -h "$WORKDIR/history.csv" | cut -f1)"
+
+python - "$ROOT/template_mikrotik_snmpv2c_advanced_zbx72.xml" "$WORKDIR/history.csv" \
+  "$CHUNK_ROWS" <<'PY'
+import resource
+import sys
+import time
+
+from homelab_cost_optimizer.zabbix.history import replay_history
+from homelab_cost_optimizer.zabbix.template import load_templates
+
+(template,) = load_templates(sys.argv[1])
+start = time.perf_counter()
+report = replay_history(template, [sys.argv[2]], chunk_rows=int(sys.argv[3]))
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+fired = sum(trigger.problems for trigger in report.triggers)
+print(f"{'wall s':>8} {'rows/s':>10} {'peak RSS MB':>12} {'problems':>9}")
+print(f"{elapsed:>8.1f} {report.rows / elapsed:>10.0f} {peak:>12.0f} {fired:>9}")
+PY
@@ -0,0 +1,65 @@
+#!/usr/bin/env bash
+# Time lld-sim on a synthetic corpus of ifTable/ifXTable walks, one file per host: most hosts
+# have a few dozen ports, every tenth is a router with up to VLANS VLAN and tunnel interfaces.
+# The same corpus is simulated in one process and across all cores.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+HOSTS="${HOSTS:-10000}"
+VLANS="${VLANS:-2000}"
+WORKDIR="$(mktemp -d)"
+trap 'rm -rf "$WORKDIR"' EXIT
+
+python - "$WORKDIR/walks" "$HOSTS" "$VLANS" <<'PY'
+import os
+import random
+import sys
+
+folder, hosts, vlans = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+os.makedirs(folder)
+rng = random.Random(7)
+for host in range(hosts):
+    names = [f"ether{port}" for port in range(1, rng.choice((8, 24, 48)) + 1)]
+    if host % 10 == 0:
+        names += [f"vlan{tag}" for tag in range(rng.randrange(vlans // 2, vlans + 1))]
+        names += [f"gre-tunnel{tag}" for tag in range(rng.randrange(200))]
+    names.append("lo")
+    lines = []
+    for index, name in enumerate(names, 1):
+        admin = "up(1)" if rng.random() < 0.9 else "down(2)"
+        lines += [
+            f"IF-MIB::ifIndex.{index} = INTEGER: {index}",
+            f"IF-MIB::ifDescr.{index} = STRING: {name}",
+            f"IF-MIB::ifType.{index} = INTEGER: ethernetCsmacd(6)",
+            f"IF-MIB::ifAdminStatus.{index} = INTEGER: {admin}",
+            f"IF-MIB::ifOperStatus.{index} = INTEGER: up(1)",
+            f"IF-MIB::ifName.{index} = STRING: {name}",
+            f"IF-MIB::ifHCInOctets.{index} = Counter64: {rng.randrange(2**48)}",
+            f'IF-MIB::ifAlias.{index} = STRING: ""',
+        ]
+    with open(os.path.join(folder, f"r{host:05d}.walk"), "w", encoding="utf-8") as handle:
+        handle.write("\n".join(lines) + "\n")
+PY
+echo "hosts=$HOSTS corpus=$(du -sh "$WORKDIR/walks" | cut -f1)"
+
+python - "$ROOT/template_mikrotik_snmpv2c_advanced_zbx72.xml" "$WORKDIR/walks" <<'PY'
+import os
+import sys
+import time
+
+from homelab_cost_optimizer.zabbix.lld import simulate_discovery
+from homelab_cost_optimizer.zabbix.template import load_templates
+
+(template,) = load_templates(sys.argv[1])
+print(f"{'workers':>7} {'wall s':>7} {'hosts/s':>9} {'items':>10} {'triggers':>9}")
+for workers in (1, os.cpu_count() or 1):
+    start = time.perf_counter()
+    report = simulate_discovery(template, [sys.argv[2]], max_workers=workers)
+    elapsed = time.perf_counter() - start
+    items = sum(host.items for host in report.hosts)
+    triggers = sum(host.triggers for host in report.hosts)
+    rate = len(report.hosts) / elapsed
+    print(f"{workers:>7} {elapsed:>7.1f} {rate:>9.0f} {items:>10} {triggers:>9}")
+PY
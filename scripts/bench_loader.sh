@@ -0,0 +1,66 @@
+#!/usr/bin/env bash
+# Peak RSS and wall time of json.loads versus the streaming inventory loader.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+WORKLOADS="${WORKLOADS:-500000}"
+WORKDIR="$(mktemp -d)"
+trap 'rm -rf "$WORKDIR"' EXIT
+INVENTORY="$WORKDIR/inventory.json"
+
+python - "$INVENTORY" "$WORKLOADS" <<'PY'
+import json
+import sys
+
+path, count = sys.argv[1], int(sys.argv[2])
+nodes = max(count // 25, 1)
+with open(path, "w", encoding="utf-8") as handle:
+    handle.write('{"metadata": {"source": "bench"}, "nodes": [')
+    handle.write(
+        ",".join(
+            json.dumps({"name": f"node-{i}", "kind": "proxmox", "cpu_cores": 64, "memory_gb": 256})
+            for i in range(nodes)
+        )
+    )
+    handle.write('], "workloads": [')
+    for i in range(count):
+        record = {
+            "name": f"vm-{i}",
+            "workload_type": "vm",
+            "cpu_cores": 1 + i % 8,
+            "memory_gb": 2 + i % 16,
+            "utilization": (i % 100) / 100,
+            "node_name": f"node-{i % nodes}",
+            "labels": {"team": f"team-{i % 40}"},
+        }
+        handle.write(("," if i else "") + json.dumps(record, indent=2))
+    handle.write("]}")
+PY
+echo "inventory: $WORKLOADS workloads, $(du -h "$INVENTORY" | cut -f1)"
+
+run() {
+  local label="$1" loader="$2"
+  python - "$INVENTORY" "$label" <<PY
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+
+from homelab_cost_optimizer.collectors.base import build_snapshot
+from homelab_cost_optimizer.storage import json_stream
+
+path, label = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+snapshot = $loader
+elapsed = time.perf_counter() - start
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{label:<22} {elapsed:6.2f} s  peak RSS {peak_mb:8.1f} MB")
+PY
+}
+
+run "json.loads" 'build_snapshot(json.loads(Path(path).read_text(encoding="utf-8")))'
+run "streaming" 'json_stream.load_snapshot(path)'
+run "streaming --columnar" 'json_stream.load_snapshot(path, columnar=True)'
@@ -0,0 +1,60 @@
+#!/usr/bin/env bash
+# Time opening a binary inventory through mmap versus parsing the same inventory as JSON.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+WORKLOADS="${WORKLOADS:-1000000}"
+WORKDIR="$(mktemp -d)"
+trap 'rm -rf "$WORKDIR"' EXIT
+
+python - "$WORKDIR" "$WORKLOADS" <<'PY'
+import sys
+import time
+from pathlib import Path
+
+from homelab_cost_optimizer.columnar import ColumnarSnapshotBuilder
+from homelab_cost_optimizer.estimators.batch_estimator import BatchEstimator
+from homelab_cost_optimizer.storage import binary_format, json_stream
+
+workdir, count = Path(sys.argv[1]), int(sys.argv[2])
+node_count = max(count // 25, 1)
+builder = ColumnarSnapshotBuilder(metadata={"source": "bench"})
+for i in range(node_count):
+    builder.add_node({"name": f"node-{i}", "kind": "proxmox", "cpu_cores": 64, "memory_gb": 256})
+for i in range(count):
+    builder.add_workload(
+        {
+            "name": f"vm-{i}",
+            "cpu_cores": 1 + i % 8,
+            "memory_gb": 2 + i % 16,
+            "utilization": (i % 100) / 100,
+            "node_name": f"node-{i % node_count}",
+        }
+    )
+snapshot = builder.build()
+binary_path, json_path = workdir / "inventory.bin", workdir / "inventory.json"
+binary_format.write_snapshot(snapshot, binary_path)
+json_stream.write_snapshot(snapshot, json_path)
+print(
+    f"workloads={count} binary={binary_path.stat().st_size / 2**20:.1f} MB "
+    f"json={json_path.stat().st_size / 2**20:.1f} MB"
+)
+
+start = time.perf_counter()
+mapped = binary_format.open_snapshot(binary_path)
+print(f"open (mmap):          {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+start = time.perf_counter()
+BatchEstimator(price_per_kwh=0.25).estimate(mapped)
+print(f"batch estimate:       {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+start = time.perf_counter()
+binary_format.read_snapshot(binary_path)
+print(f"read (copying):       {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+start = time.perf_counter()
+json_stream.load_snapshot(json_path, columnar=True)
+print(f"json load (columnar): {(time.perf_counter() - start) * 1000:9.1f} ms")
+PY
@@ -0,0 +1,36 @@
+#!/usr/bin/env bash
+# Records/sec of the Proxmox API collector against the local fake API server.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+NODES="${NODES:-200}"
+GUESTS="${GUESTS:-100}"
+LATENCY="${LATENCY:-0.005}"
+
+python - "$NODES" "$GUESTS" "$LATENCY" <<'PY'
+import sys
+import time
+
+from homelab_cost_optimizer.collectors.proxmox_collector import ProxmoxCollector
+
+from tests.fake_proxmox import FakeProxmoxServer
+
+nodes, guests, latency = int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])
+with FakeProxmoxServer(
+    nodes=nodes, vms_per_node=guests * 3 // 4, containers_per_node=guests // 4, latency=latency
+) as server:
+    print(f"nodes={nodes} guests/node={guests} latency={latency * 1000:.1f}ms")
+    print(f"{'concurrency':>11} {'records':>8} {'seconds':>8} {'records/s':>10} {'peak':>5}")
+    for concurrency in (1, 4, 8, 16):
+        server.peak_concurrency = 0
+        collector = ProxmoxCollector(api_url=server.url, max_concurrency=concurrency)
+        start = time.perf_counter()
+        count = sum(1 for _ in collector.iter_records())
+        elapsed = time.perf_counter() - start
+        print(
+            f"{concurrency:>11} {count:>8} {elapsed:>8.2f} {count / elapsed:>10.0f} "
+            f"{server.peak_concurrency:>5}"
+        )
+PY
@@ -0,0 +1,55 @@
+#!/usr/bin/env bash
+# Ingest time of the SNMP counter collector for a synthetic ifHC* CSV export.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+export PYTHONPATH="$ROOT:$ROOT/optimizer${PYTHONPATH:+:$PYTHONPATH}"
+
+INTERFACES="${INTERFACES:-10000}"
+MINUTES="${MINUTES:-60}"
+
+python - "$INTERFACES" "$MINUTES" <<'PY'
+import csv
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from homelab_cost_optimizer.collectors import snmp_collector
+
+interfaces, minutes = int(sys.argv[1]), int(sys.argv[2])
+rng = random.Random(7)
+with tempfile.TemporaryDirectory() as scratch:
+    path = Path(scratch) / "samples.csv"
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["host", "key", "clock", "value"])
+        for index in range(interfaces):
+            host = f"sw{index // 48}"
+            counters = [rng.randrange(2**64), rng.randrange(2**40)]
+            for minute in range(minutes):
+                for direction, key in enumerate(("ifHCInOctets", "ifHCOutOctets")):
+                    counters[direction] = (counters[direction] + rng.randrange(10**9)) % 2**64
+                    clock = 1_700_000_000 + 60 * minute
+                    writer.writerow([host, f"{key}.{index % 48 + 1}", clock, counters[direction]])
+    samples = interfaces * minutes * 2
+    print(f"interfaces={interfaces} minutes={minutes} samples={samples}")
+    print(f"{'engine':>7} {'load s':>7} {'rates s':>8} {'samples/s':>10}")
+    for engine in ("numpy", "python"):
+        if engine == "numpy" and snmp_collector.np is None:
+            continue
+        saved = snmp_collector.np
+        if engine == "python":
+            snmp_collector.np = None
+        start = time.perf_counter()
+        loaded = snmp_collector.load_counter_samples(path)
+        loaded_at = time.perf_counter()
+        snmp_collector.compute_rates(loaded)
+        done = time.perf_counter()
+        snmp_collector.np = saved
+        print(
+            f"{engine:>7} {loaded_at - start:>7.2f} {done - loaded_at:>8.2f} "
+            f"{samples / (done - start):>10.0f}"
+        )
+PY
@@ -0,0 +1,126 @@
+#!/usr/bin/env bash
+# Wall time and peak RSS of the tree and streaming template validators on a synthetic export,
+# then a directory of templates validated serially and across all cores.
+set -euo pipefail
+
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+SIZE_MB="${SIZE_MB:-50}"
+FILES="${FILES:-32}"
+JOBS="${JOBS:-$(nproc)}"
+WORKDIR="$(mktemp -d)"
+trap 'rm -rf "$WORKDIR"' EXIT
+
+python - "$WORKDIR" "$SIZE_MB" "$FILES" <<'PY'
+import sys
+import uuid
+from pathlib import Path
+
+workdir, size_mb, files = Path(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+
+ITEM = """        <item>
+          <uuid>{uuid}</uuid>
+          <name>Interface {i}: Bits received</name>
+          <type>SNMP_AGENT</type>
+          <snmp_oid>IF-MIB::ifHCInOctets.{i}</snmp_oid>
+          <key>net.if.in[ifHCInOctets.{i}]</key>
+          <delay>1m</delay>
+          <units>bps</units>
+          <preprocessing>
+            <step>
+              <type>CHANGE_PER_SECOND</type>
+            </step>
+            <step>
+              <type>MULTIPLIER</type>
+              <params>8</params>
+            </step>
+          </preprocessing>
+          <triggers>
+            <trigger>
+              <uuid>{trigger}</uuid>
+              <expression>min(/Synthetic/net.if.in[ifHCInOctets.{i}],5m)&gt;900M</expression>
+              <name>Interface {i}: High inbound bandwidth</name>
+              <priority>WARNING</priority>
+            </trigger>
+          </triggers>
+        </item>
+"""
+
+
+def export(items: int, offset: int) -> str:
+    body = "".join(
+        ITEM.format(uuid=uuid.uuid4().hex, trigger=uuid.uuid4().hex, i=offset + i)
+        for i in range(items)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<zabbix_export version="7.0">
+  <templates>
+    <template>
+      <uuid>{uuid.uuid4().hex}</uuid>
+      <template>Synthetic_{offset}</template>
+      <name>Synthetic {offset}</name>
+      <groups>
+        <group>
+          <name>Templates/Network devices</name>
+        </group>
+      </groups>
+      <items>
+{body}      </items>
+      <macros>
+        <macro>
+          <macro>{{$SNMP_COMMUNITY}}</macro>
+          <value>CHANGE_ME</value>
+        </macro>
+      </macros>
+    </template>
+  </templates>
+</zabbix_export>
+"""
+
+
+items = size_mb * 1024 * 1024 // len(ITEM.format(uuid="0" * 32, trigger="0" * 32, i=10000))
+(workdir / "big.xml").write_text(export(items, 0), encoding="utf-8")
+library = workdir / "library"
+library.mkdir()
+for index in range(files):
+    (library / f"template_{index:03d}.xml").write_text(
+        export(items // files, index * items), encoding="utf-8"
+    )
+PY
+echo "export: $(du -h "$WORKDIR/big.xml" | cut -f1); library: $FILES files, $(du -sh "$WORKDIR/library" | cut -f1)"
+
+printf '%-8s %8s %12s\n' engine "wall s" "peak RSS MB"
+for engine in tree stream; do
+  python - "$ROOT/tests" "$WORKDIR/big.xml" "$engine" <<'PY'
+import resource
+import sys
+import time
+
+sys.path.insert(0, sys.argv[1])
+from validate_xml import check_file
+
+start = time.perf_counter()
+passed, errors, warnings, info = check_file(sys.argv[2], sys.argv[3])
+elapsed = time.perf_counter() - start
+assert passed, errors[:3]
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{sys.argv[3]:<8} {elapsed:>8.2f} {peak:>12.0f}")
+PY
+done
+
+printf '%-8s %8s %8s\n' jobs "wall s" "files/s"
+for jobs in 1 "$JOBS"; do
+  python - "$ROOT/tests" "$WORKDIR/library" "$jobs" <<'PY'
+import sys
+import time
+
+sys.path.insert(0, sys.argv[1])
+from validate_xml import check_files, collect_paths
+
+paths = collect_paths([sys.argv[2]])
+start = time.perf_counter()
+results = check_files(paths, int(sys.argv[3]))
+elapsed = time.perf_counter() - start
+assert all(passed for passed, *_ in results)
+print(f"{sys.argv[3]:<8} {elapsed:>8.2f} {len(paths) / elapsed:>8.1f}")
+PY
+done
@@ -0,0 +1,152 @@
+"""Local fake of the Proxmox VE API for collector tests and benchmarks.
+
+Serves ``/api2/json/cluster/resources`` and ``/api2/json/nodes/<node>/{qemu,lxc}``
+with the field names of the real API for a generated cluster, over HTTP/1.1
+keep-alive. Tracks the peak number of concurrent requests so tests can check
+that collectors bound their concurrency.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+GIB = 1024**3
+
+
+class FakeProxmoxServer:
+    def __init__(
+        self,
+        nodes: int = 3,
+        vms_per_node: int = 4,
+        containers_per_node: int = 2,
+        offline_nodes: int = 0,
+        latency: float = 0.0,
+        token: str | None = None,
+    ) -> None:
+        self.latency = latency
+        self.token = token
+        self.requests = 0
+        self.active = 0
+        self.peak_concurrency = 0
+        self._lock = threading.Lock()
+        self.node_names = [f"pve-{i}" for i in range(nodes + offline_nodes)]
+        self.online = set(self.node_names[:nodes])
+        self.guests: dict[tuple[str, str], bytes] = {}
+        vmid = 100
+        for node in self.node_names:
+            for guest, count in (("qemu", vms_per_node), ("lxc", containers_per_node)):
+                entries = []
+                for index in range(count):
+                    entries.append(_guest(node, guest, vmid, index))
+                    vmid += 1
+                self.guests[(node, guest)] = _encode(entries)
+        self.resources = _encode(
+            [
+                {
+                    "id": f"node/{node}",
+                    "type": "node",
+                    "node": node,
+                    "status": "online" if node in self.online else "offline",
+                    "maxcpu": 16 + 16 * (index % 2),
+                    "maxmem": (64 + 64 * (index % 2)) * GIB,
+                    "cpu": 0.12,
+                    "mem": 20 * GIB,
+                }
+                for index, node in enumerate(self.node_names)
+            ]
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/api2/json"
+
+    @property
+    def workload_count(self) -> int:
+        return sum(
+            len(json.loads(body)["data"])
+            for (node, _), body in self.guests.items()
+            if node in self.online
+        )
+
+    def __enter__(self) -> FakeProxmoxServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path: str, authorization: str | None) -> tuple[int, bytes]:
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if self.token and authorization != f"PVEAPIToken={self.token}":
+                return 401, _encode(None)
+            parts = urlsplit(path)
+            segments = parts.path.strip("/").split("/")
+            if segments[:2] != ["api2", "json"]:
+                return 404, _encode(None)
+            segments = segments[2:]
+            if segments == ["cluster", "resources"]:
+                return 200, self.resources
+            if len(segments) == 3 and segments[0] == "nodes":
+                node, guest = segments[1], segments[2]
+                if node in self.node_names and node not in self.online:
+                    return 595, _encode(None)
+                body = self.guests.get((node, guest))
+                if body is not None:
+                    return 200, body
+            return 404, _encode(None)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _guest(node: str, guest: str, vmid: int, index: int) -> dict:
+    running = index % 5 != 4
+    return {
+        "vmid": vmid,
+        "name": f"{node}-{guest}-{vmid}",
+        "status": "running" if running else "stopped",
+        "cpus": 1 + index % 4,
+        "maxmem": (1 + index % 8) * GIB,
+        "mem": GIB // 2,
+        "cpu": round(0.05 * (index % 10), 2) if running else 0,
+        "uptime": 3600 if running else 0,
+        "tags": "bench" if index % 3 == 0 else "",
+    }
+
+
+def _encode(data) -> bytes:
+    return json.dumps({"data": data}).encode()
+
+
+def _handler_for(fake: FakeProxmoxServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; avoid delayed-ACK stalls on keep-alive.
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            status, body = fake.respond(self.path, self.headers.get("Authorization"))
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
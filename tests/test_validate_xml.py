@@ -0,0 +1,114 @@
+"""The streaming validator must agree with the ElementTree one."""
+
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import validate_xml  # noqa: E402
+from validate_xml import ResultCache, check_file, check_files, collect_paths  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+TEMPLATE_PATHS = sorted(REPO_ROOT.glob("template_*.xml"))
+
+MINIMAL = """<?xml version="1.0" encoding="UTF-8"?>
+<zabbix_export>
+  <version>7.0</version>
+  <templates>
+    <template>
+      <uuid>{uuid}</uuid>
+      <template>Minimal</template>
+      <name>Minimal</name>
+      <groups><group><name>Templates</name></group></groups>
+      <items>
+        <item>
+          <uuid>{uuid}</uuid>
+          <name>Uptime</name>
+          <type>SNMP_AGENT</type>
+          <snmp_oid>1.3.6.1.2.1.1.3.0</snmp_oid>
+          <key>system.uptime</key>
+        </item>
+      </items>
+    </template>
+  </templates>
+</zabbix_export>
+"""
+
+
+def _comparable(report):
+    passed, errors, warnings, info = report
+    errors = [re.sub(r" found in: .*", "", error) for error in errors]
+    return passed, sorted(errors), sorted(warnings), sorted(info)
+
+
+@pytest.mark.parametrize("template_path", TEMPLATE_PATHS, ids=lambda p: p.name)
+def test_streaming_matches_tree_validator(template_path: Path) -> None:
+    stream = check_file(str(template_path), "stream")
+    tree = check_file(str(template_path), "tree")
+
+    assert _comparable(stream) == _comparable(tree)
+
+
+def test_streaming_reports_parse_errors_and_duplicates(tmp_path: Path) -> None:
+    broken = tmp_path / "broken.xml"
+    broken.write_text("<zabbix_export><templates>", encoding="utf-8")
+    duplicated = tmp_path / "duplicated.xml"
+    duplicated.write_text(MINIMAL.format(uuid="a" * 32), encoding="utf-8")
+
+    passed, errors, _, _ = check_file(str(broken))
+    assert not passed and errors[0].startswith("XML parse error")
+
+    passed, errors, _, _ = check_file(str(duplicated))
+    assert not passed
+    assert any(error.startswith(f"Duplicate UUID {'a' * 32}") for error in errors)
+
+
+def test_directory_mode_runs_in_parallel_in_input_order(tmp_path: Path) -> None:
+    for index, uuid in enumerate(("1" * 32, "2" * 32, "3" * 32)):
+        (tmp_path / f"t{index}.xml").write_text(MINIMAL.format(uuid=uuid), encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("not a template", encoding="utf-8")
+
+    paths = collect_paths([str(tmp_path)])
+
+    assert [Path(path).name for path in paths] == ["t0.xml", "t1.xml", "t2.xml"]
+    assert check_files(paths, jobs=2) == check_files(paths, jobs=1)
+
+
+def test_cache_skips_unchanged_templates(tmp_path: Path, monkeypatch) -> None:
+    template = tmp_path / "t.xml"
+    template.write_text(MINIMAL.format(uuid="a" * 32), encoding="utf-8")
+    cache_dir = str(tmp_path / "cache")
+
+    def run(**kwargs):
+        cache = ResultCache(cache_dir, **kwargs)
+        return check_files([str(template)], cache=cache), cache
+
+    first, cold = run()
+    second, warm = run()
+    assert (cold.hits, cold.misses, warm.hits, warm.misses) == (0, 1, 1, 0)
+    assert first == second == [check_file(str(template))]
+
+    _, bypass = run(enabled=False)
+    assert bypass.hits == bypass.misses == 0 and bypass.summary() == "Cache: disabled"
+
+    template.write_text(MINIMAL.format(uuid="b" * 32), encoding="utf-8")
+    changed, edited = run()
+    assert edited.misses == 1 and changed[0][1] != first[0][1]
+
+    monkeypatch.setattr(validate_xml, "RULESET_VERSION", "next")
+    _, upgraded = run()
+    assert upgraded.misses == 1
+
+
+def test_cache_reports_missing_files_as_failed(tmp_path: Path) -> None:
+    cache = ResultCache(str(tmp_path / "cache"))
+    missing = str(tmp_path / "missing.xml")
+    [(passed, errors, _, _)] = check_files([missing], cache=cache)
+    assert not passed and errors == [f"File not found: {missing}"]
+    assert cache.cached(missing, "facts", lambda path: "parsed") == "parsed"
+    assert not (tmp_path / "cache").exists()
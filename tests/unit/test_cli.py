@@ -26,3 +26,22 @@ def test_collect_with_mock(tmp_path: Path):
     assert result.exit_code == 0
     data = json.loads(out.read_text(encoding="utf-8"))
     assert data["nodes"][0]["name"] == "n1"
+
+
+def test_collect_binary_inventory_feeds_analyze(tmp_path: Path):
+    out = tmp_path / "inventory.bin"
+    result = runner.invoke(
+        app, ["collect", "--source", "proxmox", "--out", out, "--format", "binary"]
+    )
+    assert result.exit_code == 0
+    assert out.read_bytes().startswith(b"HCOSNAP")
+
+    electricity = tmp_path / "electricity.yaml"
+    electricity.write_text("price_per_kwh: 0.2\n", encoding="utf-8")
+    report = tmp_path / "report.md"
+    result = runner.invoke(
+        app,
+        ["analyze", "--inventory", out, "--electricity", electricity, "--out", report],
+    )
+    assert result.exit_code == 0
+    assert "| pve-1 |" in report.read_text(encoding="utf-8")
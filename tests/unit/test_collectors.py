@@ -1,5 +1,10 @@
+import types
+
 from homelab_cost_optimizer.collectors.docker_collector import DockerCollector
 from homelab_cost_optimizer.collectors.proxmox_collector import ProxmoxCollector
+from homelab_cost_optimizer.models import Node, Workload
+
+from tests.fake_proxmox import FakeProxmoxServer
 
 
 def test_proxmox_collector_returns_snapshot():
@@ -27,3 +32,39 @@ def test_docker_collector_simulation_has_containers():
     collector = DockerCollector()
     snapshot = collector.collect()
     assert snapshot.workloads, "Expected simulated docker workloads"
+
+
+def test_proxmox_collector_walks_api_with_bounded_concurrency():
+    fake = FakeProxmoxServer(
+        nodes=6,
+        vms_per_node=5,
+        containers_per_node=3,
+        offline_nodes=1,
+        latency=0.02,
+        token="collector@pve!t=secret",
+    )
+    with fake as server:
+        collector = ProxmoxCollector(
+            api_url=server.url,
+            token_id="collector@pve!t",
+            token_secret="secret",
+            max_concurrency=3,
+        )
+        records = collector.iter_records()
+        assert isinstance(records, types.GeneratorType)
+        records = list(records)
+
+    nodes = [record for record in records if isinstance(record, Node)]
+    workloads = [record for record in records if isinstance(record, Workload)]
+    assert [node.name for node in nodes] == [f"pve-{i}" for i in range(6)]
+    assert nodes[1].cpu_cores == 32 and nodes[1].memory_gb == 128
+    assert len(workloads) == server.workload_count == 48
+    assert server.peak_concurrency <= 3
+    assert server.requests == 1 + 6 * 2
+
+    vm = next(w for w in workloads if w.name == "pve-0-qemu-101")
+    assert (vm.workload_type, vm.cpu_cores, vm.memory_gb) == ("vm", 2.0, 2.0)
+    assert vm.utilization == 0.05 and vm.node_name == "pve-0"
+    stopped = next(w for w in workloads if w.labels["status"] == "stopped")
+    assert stopped.utilization == 0.0
+    assert {w.workload_type for w in workloads} == {"vm", "container"}
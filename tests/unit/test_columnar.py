@@ -0,0 +1,70 @@
+from homelab_cost_optimizer.collectors.base import build_columnar_snapshot, build_snapshot
+from homelab_cost_optimizer.columnar import ColumnarSnapshot
+from homelab_cost_optimizer.consolidators.heuristic_consolidator import HeuristicConsolidator
+from homelab_cost_optimizer.estimators.cost_estimator import CostEstimator
+from homelab_cost_optimizer.estimators.power_estimator import PowerEstimator
+
+DATASET = {
+    "metadata": {"source": "test"},
+    "nodes": [
+        {
+            "name": "n1",
+            "kind": "proxmox",
+            "cpu_cores": 16,
+            "memory_gb": 64,
+            "power_profile": {"base_idle_watts": 85, "watts_per_cpu_core": 9},
+            "metadata": {"rack": "a"},
+        },
+        {"name": "n2", "kind": "proxmox", "cpu_cores": 8, "memory_gb": 32},
+    ],
+    "workloads": [
+        {
+            "name": "vm1",
+            "workload_type": "vm",
+            "cpu_cores": 2,
+            "memory_gb": 4,
+            "utilization": 0.3,
+            "node_name": "n1",
+            "labels": {"tier": "prod"},
+        },
+        {
+            "name": "ct1",
+            "workload_type": "container",
+            "cpu_cores": 0.5,
+            "memory_gb": 1,
+            "utilization": 0.7,
+            "node_name": "n2",
+        },
+        {"name": "orphan", "cpu_cores": 1, "memory_gb": 1, "node_name": "gone"},
+    ],
+}
+
+
+def test_columnar_snapshot_matches_object_snapshot():
+    snapshot = build_snapshot(DATASET)
+    columnar = build_columnar_snapshot(DATASET)
+
+    assert list(columnar.nodes) == snapshot.nodes
+    assert list(columnar.workloads) == snapshot.workloads
+    assert columnar.node_by_name("n2") == snapshot.node_by_name("n2")
+    assert columnar.workloads_on("n1") == snapshot.workloads_on("n1")
+    assert columnar.workloads_on("gone") == snapshot.workloads_on("gone")
+    assert columnar.workloads_of_type("vm") == snapshot.workloads_of_type("vm")
+    assert list(columnar.workload_node_index) == [0, 1, -1]
+    assert columnar.workload_labels == {0: {"tier": "prod"}}
+
+    power = PowerEstimator().estimate(columnar)
+    assert power == PowerEstimator().estimate(snapshot)
+    estimator = CostEstimator(price_per_kwh=0.3)
+    assert estimator.estimate(power) == estimator.estimate(PowerEstimator().estimate(snapshot))
+    assert HeuristicConsolidator().consolidate(columnar) == HeuristicConsolidator().consolidate(
+        snapshot
+    )
+
+
+def test_columnar_snapshot_round_trips_objects():
+    snapshot = build_snapshot(DATASET)
+    columnar = ColumnarSnapshot.from_snapshot(snapshot)
+    assert columnar.to_snapshot() == snapshot
+    assert columnar.nodes[-1].name == "n2"
+    assert [w.name for w in columnar.workloads[1:]] == ["ct1", "orphan"]
@@ -1,5 +1,16 @@
+import itertools
+import random
+
+import pytest
+from homelab_cost_optimizer.consolidators.binpacking_consolidator import (
+    BEST_FIT_DECREASING,
+    FIRST_FIT_DECREASING,
+    STRATEGIES,
+    BinPackingConsolidator,
+)
+from homelab_cost_optimizer.consolidators.exact_consolidator import ExactConsolidator
 from homelab_cost_optimizer.consolidators.heuristic_consolidator import HeuristicConsolidator
-from homelab_cost_optimizer.models import InventorySnapshot, Node, Workload
+from homelab_cost_optimizer.models import InventorySnapshot, Node, PowerProfile, Workload
 
 
 def test_consolidator_identifies_idle_nodes():
@@ -29,3 +40,181 @@ def test_consolidator_identifies_idle_nodes():
     plan = HeuristicConsolidator().consolidate(snapshot)
     assert plan.assignments
     assert isinstance(plan.nodes_to_power_down, list)
+
+
+def _reference_plan(snapshot: InventorySnapshot, strategy: str, headroom: float = 0.8):
+    """Linear-scan definition of each strategy, used to check the indexed engine."""
+    nodes = sorted(snapshot.nodes, key=lambda n: n.cpu_cores, reverse=True)
+    used = [[0.0, 0.0] for _ in nodes]
+    assignments = {}
+    for workload in sorted(
+        snapshot.workloads, key=lambda w: (w.cpu_cores, w.memory_gb), reverse=True
+    ):
+        fitting = [
+            pos
+            for pos, node in enumerate(nodes)
+            if used[pos][0] + workload.cpu_cores <= node.cpu_cores * headroom
+            and used[pos][1] + workload.memory_gb <= node.memory_gb * headroom
+        ]
+        if not fitting:
+            continue
+
+        def residual(pos):
+            return (nodes[pos].cpu_cores * headroom - used[pos][0], pos)
+
+        if strategy == FIRST_FIT_DECREASING:
+            pos = fitting[0]
+        elif strategy == BEST_FIT_DECREASING:
+            pos = min(fitting, key=residual)
+        else:
+            pos = max(fitting, key=residual)
+        used[pos][0] += workload.cpu_cores
+        used[pos][1] += workload.memory_gb
+        assignments[workload.name] = nodes[pos].name
+    return assignments
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_binpacking_strategies_match_linear_scan(strategy: str):
+    rng = random.Random(7)
+    nodes = [
+        Node(
+            name=f"n{i}",
+            kind="hypervisor",
+            cpu_cores=rng.choice([8, 16, 32]),
+            memory_gb=rng.choice([16, 64, 128]),
+        )
+        for i in range(40)
+    ]
+    workloads = [
+        Workload(
+            name=f"w{i}",
+            workload_type="vm",
+            cpu_cores=rng.choice([0.5, 1, 2, 4, 6]),
+            memory_gb=rng.choice([1, 2, 8, 16, 24]),
+            utilization=rng.random(),
+            node_name=rng.choice(nodes).name,
+        )
+        for i in range(300)
+    ]
+    snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+
+    plan = BinPackingConsolidator(strategy=strategy).consolidate(snapshot)
+
+    assert plan.assignments == _reference_plan(snapshot, strategy)
+    assert set(plan.unplaced) == {w.name for w in workloads} - set(plan.assignments)
+    assert not set(plan.nodes_to_power_down) & set(plan.assignments.values())
+
+
+def test_first_fit_decreasing_frees_more_nodes_than_heuristic():
+    nodes = [Node(name=f"n{i}", kind="hypervisor", cpu_cores=10, memory_gb=100) for i in range(3)]
+    sizes = [2, 2, 2, 6, 6, 6]
+    workloads = [
+        Workload(
+            name=f"w{i}",
+            workload_type="vm",
+            cpu_cores=size,
+            memory_gb=1,
+            utilization=0.1 * i,
+            node_name="n0",
+        )
+        for i, size in enumerate(sizes)
+    ]
+    snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+
+    heuristic = HeuristicConsolidator(headroom=0.8).consolidate(snapshot)
+    packed = BinPackingConsolidator(FIRST_FIT_DECREASING, headroom=0.8).consolidate(snapshot)
+
+    assert heuristic.unplaced == ["w5"]
+    assert packed.unplaced == []
+    assert len(packed.assignments) == len(workloads)
+
+
+def _vm(name: str, cpu: float, ram: float = 1) -> Workload:
+    return Workload(
+        name=name, workload_type="vm", cpu_cores=cpu, memory_gb=ram, utilization=0.5, node_name="n0"
+    )
+
+
+def test_exact_consolidator_beats_first_fit_decreasing():
+    nodes = [Node(name=f"n{i}", kind="hypervisor", cpu_cores=10, memory_gb=100) for i in range(3)]
+    workloads = [_vm(f"w{i}", size) for i, size in enumerate([5, 4, 3, 3, 3, 2])]
+    snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+
+    greedy = BinPackingConsolidator(FIRST_FIT_DECREASING, headroom=1.0).consolidate(snapshot)
+    exact = ExactConsolidator(headroom=1.0).consolidate(snapshot)
+
+    assert len(greedy.nodes_to_power_down) == 0
+    assert len(exact.nodes_to_power_down) == 1
+    assert exact.optimality_gap == 0.0
+    assert exact.estimated_idle_watt_reduction == 60.0
+    assert len(exact.assignments) == len(workloads)
+
+
+def test_exact_consolidator_finds_brute_force_optimum():
+    rng = random.Random(3)
+    for _ in range(15):
+        nodes = [
+            Node(
+                name=f"n{i}",
+                kind="hypervisor",
+                cpu_cores=rng.choice([4, 8]),
+                memory_gb=rng.choice([8, 16]),
+                power_profile=PowerProfile(base_idle_watts=rng.choice([40, 60, 90])),
+            )
+            for i in range(4)
+        ]
+        workloads = [_vm(f"w{i}", rng.choice([1, 2, 3]), rng.choice([1, 4, 6])) for i in range(6)]
+        snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+        best = None
+        for assignment in itertools.product(range(len(nodes)), repeat=len(workloads)):
+            cpu = [0.0] * len(nodes)
+            ram = [0.0] * len(nodes)
+            for workload, position in zip(workloads, assignment, strict=True):
+                cpu[position] += workload.cpu_cores
+                ram[position] += workload.memory_gb
+            if all(
+                cpu[p] <= n.cpu_cores * 0.8 and ram[p] <= n.memory_gb * 0.8
+                for p, n in enumerate(nodes)
+            ):
+                saved = sum(
+                    n.power_profile.base_idle_watts
+                    for p, n in enumerate(nodes)
+                    if p not in assignment
+                )
+                best = saved if best is None else max(best, saved)
+
+        plan = ExactConsolidator().consolidate(snapshot)
+        if best is None:
+            assert plan.unplaced
+        else:
+            assert plan.estimated_idle_watt_reduction == best
+            assert plan.optimality_gap == 0.0
+
+
+def test_exact_consolidator_reports_gap_when_budget_runs_out():
+    # Ten nodes are needed, but the demand-based bound only proves nine.
+    nodes = [Node(name=f"n{i}", kind="hypervisor", cpu_cores=10, memory_gb=100) for i in range(15)]
+    workloads = [_vm(f"w{i}", 3) for i in range(30)]
+    snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+
+    plan = ExactConsolidator(headroom=1.0, time_budget=0.0).consolidate(snapshot)
+
+    assert len(plan.assignments) == len(workloads)
+    assert len(plan.nodes_to_power_down) == 5
+    assert plan.optimality_gap == 0.1
+
+
+def test_exact_consolidator_keeps_best_partial_plan():
+    nodes = [Node(name=f"n{i}", kind="hypervisor", cpu_cores=10, memory_gb=100) for i in range(2)]
+    workloads = [_vm(f"w{i}", 5) for i in range(5)]
+    snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+
+    heuristic = HeuristicConsolidator(headroom=1.0).consolidate(snapshot)
+    plan = ExactConsolidator(headroom=1.0).consolidate(snapshot)
+
+    assert len(plan.assignments) == 4
+    assert len(plan.unplaced) == 1
+    assert plan.nodes_to_power_down == heuristic.nodes_to_power_down == []
+    assert plan.estimated_idle_watt_reduction == 0.0
+    assert plan.optimality_gap is None
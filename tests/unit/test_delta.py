@@ -0,0 +1,102 @@
+import copy
+import dataclasses
+import random
+
+import pytest
+from homelab_cost_optimizer.consolidators.binpacking_consolidator import (
+    BEST_FIT_DECREASING,
+    BinPackingConsolidator,
+)
+from homelab_cost_optimizer.consolidators.heuristic_consolidator import HeuristicConsolidator
+from homelab_cost_optimizer.consolidators.incremental_consolidator import IncrementalConsolidator
+from homelab_cost_optimizer.delta import diff_snapshots
+from homelab_cost_optimizer.models import InventorySnapshot, Node, Workload
+
+
+def _snapshot(seed: int = 3) -> InventorySnapshot:
+    rng = random.Random(seed)
+    nodes = [
+        Node(name=f"n{i}", kind="hypervisor", cpu_cores=rng.choice([16, 32]), memory_gb=64)
+        for i in range(6)
+    ]
+    workloads = [
+        Workload(
+            name=f"vm{i}",
+            workload_type="vm",
+            cpu_cores=rng.choice([1, 2, 3]),
+            memory_gb=rng.choice([2, 4, 8]),
+            utilization=rng.uniform(0, 0.8),
+            node_name=rng.choice(nodes).name,
+        )
+        for i in range(20)
+    ]
+    return InventorySnapshot(nodes=nodes, workloads=workloads)
+
+
+def test_diff_snapshots_reports_added_removed_and_changed():
+    old = _snapshot()
+    new = copy.deepcopy(old)
+    new.nodes.pop(0)
+    new.nodes.append(Node(name="n9", kind="hypervisor", cpu_cores=4, memory_gb=8))
+    new.workloads[1].utilization = 0.99
+    del new.workloads[2]
+    new.workloads.append(dataclasses.replace(old.workloads[0], name="vm-new"))
+
+    delta = diff_snapshots(old, new)
+    assert [n.name for n in delta.added_nodes] == ["n9"]
+    assert delta.removed_nodes == ["n0"]
+    assert delta.changed_nodes == []
+    assert [w.name for w in delta.added_workloads] == ["vm-new"]
+    assert delta.removed_workloads == ["vm2"]
+    assert [w.name for w in delta.changed_workloads] == ["vm1"]
+    assert diff_snapshots(new, copy.deepcopy(new)).is_empty()
+
+
+@pytest.mark.parametrize(
+    ("strategy", "full"),
+    [
+        ("heuristic", HeuristicConsolidator()),
+        (BEST_FIT_DECREASING, BinPackingConsolidator(BEST_FIT_DECREASING)),
+    ],
+)
+def test_incremental_matches_full_recompute_for_compatible_delta(strategy, full):
+    old = _snapshot()
+    previous = full.consolidate(old)
+    new = copy.deepcopy(old)
+    # Sorts after every existing workload in both orders, so the full run keeps the old placements.
+    new.workloads.append(
+        Workload(
+            name="vm-new",
+            workload_type="vm",
+            cpu_cores=0.5,
+            memory_gb=1,
+            utilization=0.95,
+            node_name="n0",
+        )
+    )
+
+    plan = IncrementalConsolidator(strategy).consolidate(new, previous, diff_snapshots(old, new))
+    expected = full.consolidate(new)
+    assert plan.assignments == expected.assignments
+    assert plan.nodes_to_power_down == expected.nodes_to_power_down
+    assert plan.estimated_idle_watt_reduction == expected.estimated_idle_watt_reduction
+
+
+def test_incremental_replaces_workloads_from_removed_nodes_and_resized_workloads():
+    old = _snapshot()
+    previous = HeuristicConsolidator().consolidate(old)
+    new = copy.deepcopy(old)
+    removed = previous.assignments["vm0"]
+    new.nodes = [node for node in new.nodes if node.name != removed]
+    new.workloads[5].cpu_cores = 6
+
+    plan = IncrementalConsolidator().consolidate(new, previous, diff_snapshots(old, new))
+    assert removed not in plan.assignments.values()
+    assert sorted(plan.assignments) == sorted(w.name for w in new.workloads)
+    for name, target in previous.assignments.items():
+        if target != removed and name != "vm5":
+            assert plan.assignments[name] == target
+    for node in new.nodes:
+        hosted = [w for w in new.workloads if plan.assignments[w.name] == node.name]
+        assert sum(w.cpu_cores for w in hosted) <= node.cpu_cores * 0.8
+        assert sum(w.memory_gb for w in hosted) <= node.memory_gb * 0.8
@@ -1,3 +1,7 @@
+import pytest
+from homelab_cost_optimizer.columnar import ColumnarSnapshot
+from homelab_cost_optimizer.estimators import batch_estimator
+from homelab_cost_optimizer.estimators.batch_estimator import BatchEstimator
 from homelab_cost_optimizer.estimators.cost_estimator import CostEstimator
 from homelab_cost_optimizer.estimators.power_estimator import PowerEstimator
 from homelab_cost_optimizer.models import InventorySnapshot, Node, PowerProfile, Workload
@@ -29,3 +33,62 @@ def test_cost_estimator_uses_price():
     cost = CostEstimator(price_per_kwh=0.25, currency="EUR", hours_per_month=720).estimate(power)
     assert cost["n1"]["monthly_cost"] == 18.0
     assert cost["n1"]["currency"] == "EUR"
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_estimator_matches_scalar_path(monkeypatch, use_numpy: bool):
+    if not use_numpy:
+        monkeypatch.setattr(batch_estimator, "np", None)
+    nodes = [
+        Node(
+            name=f"n{i}",
+            kind="proxmox",
+            cpu_cores=16,
+            memory_gb=64,
+            power_profile=PowerProfile(base_idle_watts=60 + i, watts_per_cpu_core=7.3),
+        )
+        for i in range(7)
+    ]
+    workloads = [
+        Workload(
+            name=f"w{i}",
+            workload_type="vm",
+            cpu_cores=(i % 5) * 0.5 + 0.25,
+            memory_gb=(i % 3) + 1.5,
+            utilization=((i * 37) % 100) / 99 - 0.05,
+            node_name=f"n{i % 9}",
+        )
+        for i in range(200)
+    ]
+    snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+    columnar = ColumnarSnapshot.from_snapshot(snapshot)
+
+    scalar_power = PowerEstimator().estimate(snapshot)
+    scalar_cost = CostEstimator(price_per_kwh=0.31, currency="EUR").estimate(scalar_power)
+    power, cost = BatchEstimator(price_per_kwh=0.31, currency="EUR").estimate(columnar)
+
+    assert power == scalar_power
+    assert cost == scalar_cost
+
+
+def test_batch_estimator_reuses_columnar_view():
+    nodes = [Node(name=name, kind="proxmox", cpu_cores=8, memory_gb=32) for name in "aba"]
+    workloads = [
+        Workload(f"w{i}", "vm", cpu_cores=2, memory_gb=4, utilization=0.5, node_name="ab"[i % 2])
+        for i in range(5)
+    ]
+    snapshot = InventorySnapshot(nodes=nodes, workloads=workloads)
+    engine = BatchEstimator(price_per_kwh=0.2)
+    assert engine.estimate_power(snapshot) == PowerEstimator().estimate(snapshot)
+    view = batch_estimator.columnar_view(snapshot)
+    assert batch_estimator.columnar_view(snapshot) is view
+
+    snapshot.workloads[0].utilization = 1.0
+    snapshot.invalidate_indexes()
+    assert batch_estimator.columnar_view(snapshot) is not view
+    assert engine.estimate_power(snapshot) == PowerEstimator().estimate(snapshot)
+
+    view = batch_estimator.columnar_view(snapshot)
+    snapshot.nodes[2] = Node(name="c", kind="proxmox", cpu_cores=8, memory_gb=32)
+    assert batch_estimator.columnar_view(snapshot) is not view
+    assert engine.estimate_power(snapshot) == PowerEstimator().estimate(snapshot)
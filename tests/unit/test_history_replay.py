@@ -0,0 +1,164 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.zabbix.expression import parse_expression
+from homelab_cost_optimizer.zabbix.history import HistoryReplay, read_history
+from homelab_cost_optimizer.zabbix.preprocessing import Batch, Pipeline
+from homelab_cost_optimizer.zabbix.template import (
+    DiscoveryRule,
+    ItemSpec,
+    PreprocessingStep,
+    TemplateSpec,
+    TriggerSpec,
+)
+
+from typer.testing import CliRunner
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ADVANCED = REPO_ROOT / "template_mikrotik_snmpv2c_advanced_zbx72.xml"
+START = 1_700_000_000
+
+
+def _template(recovery_mode: str = "EXPRESSION") -> TemplateSpec:
+    bits = [PreprocessingStep("CHANGE_PER_SECOND"), PreprocessingStep("MULTIPLIER", "8")]
+    rule = DiscoveryRule(
+        key="net.if.discovery",
+        name="Interfaces",
+        type="SNMP_AGENT",
+        item_prototypes=[
+            ItemSpec("net.if.in[{#IFINDEX}]", "In", "SNMP_AGENT", "FLOAT", preprocessing=bits),
+            ItemSpec("net.if.speed[{#IFINDEX}]", "Speed", "SNMP_AGENT"),
+            ItemSpec(
+                "net.if.in.util[{#IFINDEX}]",
+                "Util",
+                "CALCULATED",
+                value_type="FLOAT",
+                params="last(//net.if.in[{#IFINDEX}])/last(//net.if.speed[{#IFINDEX}])*100",
+            ),
+        ],
+        trigger_prototypes=[
+            TriggerSpec(
+                "High utilization",
+                "min(/T/net.if.in.util[{#IFINDEX}],3m)>{$UTIL.MAX}",
+                recovery_mode=recovery_mode,
+                recovery_expression="last(/T/net.if.in.util[{#IFINDEX}])<10",
+            )
+        ],
+    )
+    return TemplateSpec("T", "T", discovery_rules=[rule], macros={"{$UTIL.MAX}": "80"})
+
+
+def _rows(rates: list[float], interface: str = "1", host: str = "r1") -> list[tuple]:
+    """One minute of octet counters per rate (bits per second) on a 1 Gbps port."""
+
+    rows, counter = [], 2**40
+    for minute, rate in enumerate(rates):
+        counter += int(rate * 60 / 8)
+        clock = str(START + 60 * minute)
+        rows.append((host, f"net.if.in[{interface}]", clock, str(counter)))
+        rows.append((host, f"net.if.speed[{interface}]", clock, "1000000000"))
+    return rows
+
+
+def _replay(replay: HistoryReplay, rows: list[tuple], chunk: int = 7) -> None:
+    for start in range(0, len(rows), chunk):
+        part = rows[start : start + chunk]
+        replay.feed(tuple([row[column] for row in part] for column in range(4)) + ([],))
+
+
+def test_change_per_second_discards_first_value_decreases_and_counts_32bit_wraps():
+    pipeline = Pipeline.compile(
+        [PreprocessingStep("CHANGE_PER_SECOND"), PreprocessingStep("MULTIPLIER", "{$BITS}")],
+        {"{$BITS}": "8"},
+    )
+    first = pipeline.run(
+        Batch(
+            np.array([0, 0, 1, 1]),
+            np.array([0.0, 10.0, 0.0, 10.0]),
+            np.array([2**32 - 100, 100, 2**63, 2**63 + 50], dtype=np.uint64),
+        )
+    )
+    # Both series start with a discarded value; series 0 wrapped past 2**32.
+    assert first.series.tolist() == [1]
+    assert first.values.tolist() == [40.0]
+    second = pipeline.run(Batch(np.array([0]), np.array([20.0]), np.array([1100], dtype=np.uint64)))
+    assert second.values.tolist() == [800.0]
+    assert (pipeline.stats.discarded, pipeline.stats.decreases) == (3, 1)
+    assert pipeline.stats.wraps_32bit == 1
+    with pytest.raises(ValueError):
+        Pipeline.compile([PreprocessingStep("JAVASCRIPT", "return value;")])
+
+
+def test_expressions_parse_both_syntaxes():
+    old = parse_expression(
+        "{T:net.if.status[{#IFINDEX}].last()}=2 and {T:net.if.status[{#IFINDEX}].count(2m,2)}>1"
+    )
+    new = parse_expression(
+        "last(/T/net.if.status[{#IFINDEX}])=2 and count(/T/net.if.status[{#IFINDEX}],2m,,2)>1"
+    )
+    assert old.calls == new.calls
+    assert old.calls[1].period == 120 and old.calls[1].pattern == 2
+    value, unknown = parse_expression("2K*1m-(3>2 or 1/0)").evaluate(lambda call: None)
+    assert (value, bool(unknown)) == (2048 * 60 - 1, False)
+    with pytest.raises(ValueError):
+        parse_expression("nodata(/T/icmpping,5m)=1")
+    with pytest.raises(ValueError):
+        parse_expression("{$MISSING}>1")
+
+
+def test_trigger_replay_fires_and_recovers_across_chunks():
+    rates = [5e8] * 3 + [9e8] * 5 + [5e8] * 3 + [5e7] * 2
+    replay = HistoryReplay(_template())
+    _replay(replay, _rows(rates) + _rows([1e8] * len(rates), interface="2"))
+    report = replay.report()
+    (trigger,) = report.triggers
+    # Util of minute m is known from minute 1; three 90% minutes end at minute 5.
+    assert (trigger.instances, trigger.fired, trigger.problems) == (2, 1, 1)
+    assert trigger.examples == [("r1 [1]", START + 5 * 60)]
+    assert trigger.problem_seconds == 3 * 60
+    items = {item.key: item for item in report.items}
+    assert items["net.if.in[{#IFINDEX}]"].discarded == 2
+    assert items["net.if.in.util[{#IFINDEX}]"].values == 24
+
+    # With a recovery expression the problem stays open until util drops below 10%.
+    replay = HistoryReplay(_template("RECOVERY_EXPRESSION"))
+    _replay(replay, _rows(rates), chunk=100)
+    (trigger,) = replay.report().triggers
+    assert trigger.problems == 1
+    assert trigger.problem_seconds == 6 * 60
+
+
+def test_cli_replays_shipped_template(tmp_path):
+    history = tmp_path / "history.ndjson"
+    lines = []
+    for minute in range(10):
+        status = 2 if 3 <= minute <= 6 else 1
+        lines.append(
+            f'{{"host": {{"host": "r1"}}, "key": "net.if.status[3]", '
+            f'"clock": {START + 60 * minute}, "ns": 0, "value": {status}}}'
+        )
+    lines.append(f'{{"host": "r1", "key": "unknown.key", "clock": {START}, "value": 1}}')
+    history.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    assert sum(len(chunk[0]) for chunk in read_history(history, chunk_rows=4)) == 11
+
+    out = tmp_path / "replay.md"
+    result = CliRunner().invoke(
+        app,
+        [
+            "history-replay",
+            "--template",
+            str(ADVANCED),
+            "--history",
+            str(history),
+            "--chunk-rows",
+            "3",
+            "--out",
+            str(out),
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    report = out.read_text(encoding="utf-8")
+    assert "1 unmatched" in report
+    assert "| {#IFDESCR}: Interface is down | AVERAGE | 1 | 1 | 1 | 3.0 min |" in report
@@ -0,0 +1,220 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from homelab_cost_optimizer.collectors.k8s_collector import KubernetesWatchCollector, parse_quantity
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "k8s"
+KINDS = {"Node": "nodes", "Pod": "pods"}
+
+
+class _ReplayServer:
+    """Serves the recorded LIST responses and replays the recorded watch events on demand."""
+
+    def __init__(self) -> None:
+        lists = json.loads((FIXTURES / "list.json").read_text(encoding="utf-8"))
+        self.items = {
+            name: {_key(item): item for item in payload["items"]} for name, payload in lists.items()
+        }
+        self.version = int(lists["pods"]["metadata"]["resourceVersion"])
+        lines = (FIXTURES / "watch_events.jsonl").read_text(encoding="utf-8").splitlines()
+        self.recording = [json.loads(line) for line in lines]
+        self.log: list[tuple[str, dict]] = []
+        self.lists_served = 0
+        self.expired: set[str] = set()
+        self.stopped = False
+        self.cond = threading.Condition()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(self))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def publish(self, count: int) -> None:
+        with self.cond:
+            for event in self.recording[:count]:
+                self._record(event)
+            self.recording = self.recording[count:]
+            self.cond.notify_all()
+
+    def expire(self, name: str) -> None:
+        with self.cond:
+            self.expired.add(name)
+            self.cond.notify_all()
+
+    def close(self) -> None:
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _record(self, event: dict) -> None:
+        self.version = max(self.version, _version(event))
+        if event["type"] == "BOOKMARK":
+            self.log.append(("pods", event))
+            return
+        name = KINDS[event["object"]["kind"]]
+        if event["type"] == "DELETED":
+            self.items[name].pop(_key(event["object"]), None)
+        else:
+            self.items[name][_key(event["object"])] = event["object"]
+        self.log.append((name, event))
+
+    def list_payload(self, name: str) -> dict:
+        with self.cond:
+            self.lists_served += 1
+            self.expired.discard(name)
+            return {
+                "metadata": {"resourceVersion": str(self.version)},
+                "items": list(self.items[name].values()),
+            }
+
+    def watch(self, name: str, version: int, timeout: float):
+        deadline = time.monotonic() + timeout
+        cursor = 0
+        while True:
+            with self.cond:
+                if name in self.expired:
+                    yield {"type": "ERROR", "object": {"kind": "Status", "code": 410}}
+                    return
+                pending = [
+                    event
+                    for resource, event in self.log[cursor:]
+                    if resource == name and _version(event) > version
+                ]
+                cursor = len(self.log)
+                if not pending:
+                    remaining = deadline - time.monotonic()
+                    if self.stopped or remaining <= 0:
+                        return
+                    self.cond.wait(remaining)
+                    continue
+            yield from pending
+
+
+def _version(event: dict) -> int:
+    return int(event["object"]["metadata"]["resourceVersion"])
+
+
+def _key(item: dict) -> str:
+    metadata = item["metadata"]
+    return f"{metadata.get('namespace', '')}/{metadata['name']}"
+
+
+def _handler_for(replay: _ReplayServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            name = parts.path.rsplit("/", 1)[-1]
+            query = parse_qs(parts.query)
+            if "watch" not in query:
+                body = json.dumps(replay.list_payload(name)).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            version = int(query["resourceVersion"][0])
+            for event in replay.watch(name, version, float(query["timeoutSeconds"][0])):
+                self.wfile.write(json.dumps(event).encode() + b"\n")
+                self.wfile.flush()
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def replay():
+    server = _ReplayServer()
+    yield server
+    server.close()
+
+
+def _collect_events(collector, expected: int) -> int:
+    received = 0
+    deadline = time.monotonic() + 5
+    while received < expected and time.monotonic() < deadline:
+        collector.collect()
+        received += collector.last_event_count
+        time.sleep(0.01)
+    return received
+
+
+def _state(snapshot):
+    return (
+        sorted((n.name, n.cpu_cores, n.memory_gb) for n in snapshot.nodes),
+        sorted((w.name, w.node_name, w.cpu_cores) for w in snapshot.workloads),
+    )
+
+
+def test_watch_collector_applies_recorded_events_incrementally(replay):
+    with KubernetesWatchCollector(replay.url, watch_timeout=30) as collector:
+        snapshot = collector.collect()
+        assert replay.lists_served == 2
+        assert _state(snapshot) == (
+            [("k3s-agent-1", 4, 16), ("k3s-master", 4, 16)],
+            [
+                ("batch/report-28391", "k3s-agent-1", 0.25),
+                ("default/api-7d9", "k3s-master", 1.0),
+                ("default/runner-5c2", "k3s-agent-1", 0.5),
+            ],
+        )
+
+        replay.publish(3)
+        assert _collect_events(collector, 3) == 3
+        replay.publish(6)
+        # The bookmark only advances the resourceVersion and is not queued.
+        assert _collect_events(collector, 5) == 5
+        assert collector.collect() is snapshot
+        assert collector.last_event_count == 0
+        assert replay.lists_served == 2
+
+        assert _state(snapshot) == (
+            [("k3s-agent-1", 4, 16), ("k3s-agent-2", 8, 32), ("k3s-master", 4, 16)],
+            [
+                ("default/api-7d9", "k3s-master", 2.0),
+                ("default/web-6f1", "k3s-agent-1", 0.75),
+                ("kube-system/coredns-4b8", "k3s-agent-2", 0.1),
+            ],
+        )
+        assert snapshot.node_by_name("k3s-agent-2").cpu_cores == 8
+        assert [w.name for w in snapshot.workloads_on("k3s-agent-2")] == ["kube-system/coredns-4b8"]
+
+
+def test_expired_watch_relists(replay):
+    with KubernetesWatchCollector(replay.url, watch_timeout=30) as collector:
+        collector.collect()
+        replay.publish(1)
+        assert _collect_events(collector, 1) == 1
+        replay.expire("pods")
+        assert _collect_events(collector, 1) == 1
+        assert replay.lists_served == 3
+        names = sorted(w.name for w in collector.snapshot.workloads)
+        assert names == [
+            "batch/report-28391",
+            "default/api-7d9",
+            "default/runner-5c2",
+            "default/web-6f1",
+        ]
+
+
+def test_parse_quantity():
+    assert parse_quantity("250m") == 0.25
+    assert parse_quantity("2") == 2.0
+    assert parse_quantity("1Gi") == 1024**3
+    assert parse_quantity("500M") == 5e8
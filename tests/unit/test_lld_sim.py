@@ -0,0 +1,161 @@
+import csv
+import gzip
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.zabbix.lld import (
+    CompiledFilter,
+    LldSimulator,
+    simulate_discovery,
+)
+from homelab_cost_optimizer.zabbix.template import (
+    DiscoveryRule,
+    LldCondition,
+    LldFilter,
+    TemplateSpec,
+    load_templates,
+)
+
+from typer.testing import CliRunner
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ADVANCED = REPO_ROOT / "template_mikrotik_snmpv2c_advanced_zbx72.xml"
+
+
+def _walk(interfaces: list[tuple[int, str, str | None]]) -> list[str]:
+    """Symbolic ifDescr and numeric ifAdminStatus lines, as mixed snmpwalk dumps have."""
+
+    lines = []
+    for index, descr, admin in interfaces:
+        lines.append(f"IF-MIB::ifIndex.{index} = INTEGER: {index}")
+        lines.append(f'.1.3.6.1.2.1.2.2.1.2.{index} = STRING: "{descr}"')
+        if admin is not None:
+            lines.append(f"iso.3.6.1.2.1.2.2.1.7.{index} = INTEGER: {admin}")
+    return lines
+
+
+def test_walk_values_are_parsed_as_zabbix_sees_them():
+    columns = "{#ADMIN},IF-MIB::ifAdminStatus,{#ALIAS},IF-MIB::ifAlias,{#NAME},IF-MIB::ifName"
+    conditions = [
+        LldCondition("{#ADMIN}", "^1$"),
+        LldCondition("{#ALIAS}", "^(uplink: core)?$"),
+        LldCondition("{#NAME}", r"^ether\d$"),
+    ]
+    interfaces = DiscoveryRule(
+        "if",
+        "if",
+        "SNMP_AGENT",
+        snmp_oid=f"discovery[{columns}]",
+        filter=LldFilter(conditions=conditions),
+    )
+    uptime = DiscoveryRule(
+        "up",
+        "up",
+        "SNMP_AGENT",
+        snmp_oid="discovery[{#UP},SNMPv2-MIB::sysUpTime]",
+        filter=LldFilter(conditions=[LldCondition("{#UP}", "^8640000$")]),
+    )
+    lines = [
+        "IF-MIB::ifAdminStatus.1 = INTEGER: up(1)",
+        "IF-MIB::ifAdminStatus.2 = INTEGER: 1",
+        'IF-MIB::ifAlias.1 = STRING: "uplink: core"',
+        "IF-MIB::ifAlias.2 = STRING: ",
+        "SNMPv2-MIB::sysUpTime.0 = Timeticks: (8640000) 1 day, 0:00:00.00",
+        "IF-MIB::ifName.1 = ether1",
+        "IF-MIB::ifName.2 = ether2",
+        "IF-MIB::ifName.9 = No Such Instance currently exists at this OID",
+        "continuation of a multi-line value",
+    ]
+    template = TemplateSpec("T", "T", discovery_rules=[interfaces, uptime])
+    host = LldSimulator(template).simulate("r1", lines)
+    assert (host.rows, host.discovered, host.incomplete) == ([2, 1], [2, 1], [0, 0])
+
+
+def test_shipped_interface_filter_follows_zabbix_and_or():
+    (template,) = load_templates(ADVANCED)
+    walk = _walk([(1, "ether1", "1"), (2, "vlan100", "1"), (3, "lo", "2"), (4, "ether4", None)])
+    simulator = LldSimulator(template)
+    assert simulator.filters[0].expression == "(A or B) and C"
+    host = simulator.simulate("r1", walk)
+    # Both ifDescr conditions are or-ed, so the VLAN passes; ether4 has no admin status.
+    assert (host.rows[0], host.discovered[0], host.incomplete[0]) == (4, 2, 1)
+    rule = template.discovery_rules[0]
+    assert host.items == len(template.items) + 2 * len(rule.item_prototypes)
+    assert host.triggers == len(template.triggers) + 2 * len(rule.trigger_prototypes)
+
+    rule.filter.evaltype, rule.filter.formula = "FORMULA", "A and B and C"
+    host = LldSimulator(template).simulate("r1", walk)
+    assert host.discovered[0] == 1
+    overrides = {"{$IF.LLD.FILTER.ADMIN_STATUS}": "^[12]$"}
+    assert LldSimulator(template, overrides).simulate("r1", walk).discovered[0] == 2
+
+
+def test_filter_formulas_and_operators():
+    conditions = [
+        LldCondition("{#NAME}", "^ether", formulaid="A"),
+        LldCondition("{#ALIAS}", "", "EXISTS", "B"),
+        LldCondition("{#NAME}", "5$", "NOT_MATCHES_REGEX", "C"),
+    ]
+    custom = CompiledFilter(LldFilter("FORMULA", "A and (B or not C)", conditions), {})
+    assert custom({"{#NAME}": "ether5"}) is True
+    assert custom({"{#NAME}": "ether1"}) is False
+    assert custom({"{#NAME}": "ether1", "{#ALIAS}": "x"}) is True
+    assert custom({"{#ALIAS}": "x"}) is None
+    either = CompiledFilter(LldFilter("OR", "", conditions), {})
+    assert either.expression == "A or B or C"
+    assert either({"{#NAME}": "sfp5"}) is False
+    with pytest.raises(ValueError):
+        CompiledFilter(LldFilter("FORMULA", "A&B", conditions), {})
+    with pytest.raises(ValueError):
+        CompiledFilter(LldFilter("FORMULA", "A and D", conditions), {})
+    with pytest.raises(ValueError):
+        CompiledFilter(LldFilter(conditions=[LldCondition("{#NAME}", "(")]), {})
+    with pytest.raises(ValueError):
+        CompiledFilter(LldFilter(conditions=[LldCondition("{#NAME}", "{$MISSING}")]), {})
+    with pytest.raises(ValueError):
+        CompiledFilter(LldFilter(conditions=[LldCondition("{#NAME}", "@Interfaces")]), {})
+
+
+def test_cli_simulates_corpus_in_parallel(tmp_path):
+    corpus = tmp_path / "walks"
+    corpus.mkdir()
+    (corpus / "r1.walk").write_text("\n".join(_walk([(1, "ether1", "1")])), encoding="utf-8")
+    bgp = [
+        "BGP4-MIB::bgpPeerRemoteAddr.10.0.0.1 = IpAddress: 10.0.0.1",
+        "BGP4-MIB::bgpPeerRemoteAs.10.0.0.1 = INTEGER: 65001",
+    ]
+    big = _walk([(index, f"ether{index}", "1") for index in range(1, 49)]) + bgp
+    with gzip.open(corpus / "r2.walk.gz", "wt", encoding="utf-8") as handle:
+        handle.write("\n".join(big))
+    (corpus / "r3.txt").write_text("", encoding="utf-8")
+    hosts_csv, out = tmp_path / "hosts.csv", tmp_path / "lld.md"
+    result = CliRunner().invoke(
+        app,
+        [
+            "lld-sim",
+            "--template",
+            str(ADVANCED),
+            "--walks",
+            str(corpus),
+            "--workers",
+            "2",
+            "--hosts-csv",
+            str(hosts_csv),
+            "--out",
+            str(out),
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    rows = list(csv.DictReader(hosts_csv.open(encoding="utf-8")))
+    assert [(row["host"], row["net.if.discovery"], row["bgp.peers.discovery"]) for row in rows] == [
+        ("r1", "1", "0"),
+        ("r2", "48", "1"),
+        ("r3", "0", "0"),
+    ]
+    report = out.read_text(encoding="utf-8")
+    assert "| net.if.discovery | (A or B) and C | 49 | 49 | 0 | 0 |" in report
+    assert report.index("| r2 |") < report.index("| r1 |")
+    (template,) = load_templates(ADVANCED)
+    serial = simulate_discovery(template, [corpus], max_workers=1)
+    assert [host.items for host in serial.hosts] == [int(row["items"]) for row in rows]
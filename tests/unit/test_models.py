@@ -0,0 +1,82 @@
+import pickle
+from dataclasses import replace
+
+from homelab_cost_optimizer.models import InventorySnapshot, Node, Workload
+
+
+def build_snapshot() -> InventorySnapshot:
+    nodes = [
+        Node(name="n1", kind="proxmox", cpu_cores=8, memory_gb=32),
+        Node(name="n2", kind="proxmox", cpu_cores=8, memory_gb=32),
+    ]
+    workloads = [
+        Workload(
+            name="vm1",
+            workload_type="vm",
+            cpu_cores=2,
+            memory_gb=4,
+            utilization=0.5,
+            node_name="n1",
+        ),
+        Workload(
+            name="ct1",
+            workload_type="container",
+            cpu_cores=1,
+            memory_gb=1,
+            utilization=0.2,
+            node_name="n1",
+        ),
+    ]
+    return InventorySnapshot(nodes=nodes, workloads=workloads)
+
+
+def test_snapshot_indexes_nodes_and_workloads():
+    snapshot = build_snapshot()
+    assert snapshot.node_by_name("n2") is snapshot.nodes[1]
+    assert snapshot.node_by_name("missing") is None
+    assert [w.name for w in snapshot.workloads_on("n1")] == ["vm1", "ct1"]
+    assert snapshot.workloads_on("n2") == []
+    assert [w.name for w in snapshot.workloads_of_type("container")] == ["ct1"]
+
+
+def test_snapshot_indexes_follow_mutations():
+    snapshot = build_snapshot()
+    assert snapshot.workloads_on("n2") == []
+
+    snapshot.workloads.append(
+        Workload(
+            name="vm2",
+            workload_type="vm",
+            cpu_cores=1,
+            memory_gb=2,
+            utilization=0.1,
+            node_name="n2",
+        )
+    )
+    assert [w.name for w in snapshot.workloads_on("n2")] == ["vm2"]
+
+    snapshot.workloads[0].node_name = "n2"
+    snapshot.invalidate_indexes()
+    assert [w.name for w in snapshot.workloads_on("n2")] == ["vm1", "vm2"]
+
+    snapshot.nodes = [Node(name="n3", kind="docker", cpu_cores=4, memory_gb=8)]
+    assert snapshot.node_by_name("n1") is None
+    assert snapshot.node_by_name("n3") is not None
+
+
+def test_snapshot_indexes_see_in_place_list_edits():
+    snapshot = build_snapshot()
+    assert snapshot.node_by_name("n1") is snapshot.nodes[0]
+
+    replacement = Node(name="n9", kind="docker", cpu_cores=4, memory_gb=8)
+    snapshot.nodes[0] = replacement
+    assert snapshot.node_by_name("n1") is None
+    assert snapshot.node_by_name("n9") is replacement
+
+    # Same length as before, different contents.
+    moved = snapshot.workloads.pop(0)
+    snapshot.workloads.append(moved)
+    snapshot.workloads.remove(moved)
+    snapshot.workloads.append(replace(moved, name="vm9", node_name="n2"))
+    assert [w.name for w in snapshot.workloads_on("n2")] == ["vm9"]
+    assert pickle.loads(pickle.dumps(snapshot)).node_by_name("n9") == replacement
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.collectors import (
+    docker_collector,
+    k8s_collector,
+    libvirt_collector,
+    multi_source,
+    proxmox_collector,
+)
+from homelab_cost_optimizer.collectors.http_pool import HTTPConnectionPool
+from homelab_cost_optimizer.collectors.multi_source import MultiSourceCollector
+
+from typer.testing import CliRunner
+
+DATASETS = {
+    "/proxmox": proxmox_collector._simulate_dataset(),
+    "/libvirt": libvirt_collector._simulate_dataset(),
+    "/docker": docker_collector._simulate_dataset(),
+    "/k8s": k8s_collector._simulate_dataset(),
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(0.5)
+        dataset = DATASETS.get(self.path)
+        status = 200 if dataset else 500
+        body = json.dumps(dataset or {"error": "boom"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_collects_all_sources_over_pooled_connections(stub_server):
+    server, base = stub_server
+    endpoints = {source: {"url": f"{base}/{source}"} for source in ("proxmox", "libvirt", "docker")}
+    endpoints["kubernetes"] = {"url": f"{base}/k8s", "token": "secret"}
+    with HTTPConnectionPool() as pool:
+        collector = MultiSourceCollector(endpoints, pool=pool)
+        first = collector.collect_report()
+        second = collector.collect_report()
+
+    assert first.failures == {}
+    assert first.succeeded == ["proxmox", "libvirt", "docker", "k8s"]
+    names = {node.name for node in first.snapshot.nodes}
+    assert names == {"pve-1", "libvirt-node", "docker-host", "k3s-master", "k3s-agent-1"}
+    assert len(second.snapshot.workloads) == len(first.snapshot.workloads) == 6
+    # The second round reuses the keep-alive connections of the first.
+    assert pool.connections_opened == server.connections <= 4
+
+
+def test_partial_failures_are_reported(stub_server):
+    _, base = stub_server
+    endpoints = {
+        "proxmox": {"url": f"{base}/proxmox"},
+        "libvirt": {"url": f"{base}/slow", "timeout": 0.1},
+        "docker": {"url": f"{base}/missing"},
+    }
+    started = time.perf_counter()
+    collector = MultiSourceCollector(endpoints, sources=["proxmox", "libvirt", "docker"])
+    report = collector.collect_report()
+    assert time.perf_counter() - started < 0.5
+
+    assert report.succeeded == ["proxmox"]
+    assert report.failures["libvirt"] == "timed out after 0.1s"
+    assert "HTTP 500" in report.failures["docker"]
+    assert [node.name for node in report.snapshot.nodes] == ["pve-1"]
+    assert report.snapshot.metadata["failed_sources"] == "libvirt,docker"
+
+
+def test_timed_out_blocking_collector_does_not_delay_the_report(monkeypatch):
+    release = threading.Event()
+
+    class _StuckCollector:
+        def collect(self):
+            release.wait(5)
+            raise RuntimeError("late result")
+
+    monkeypatch.setitem(multi_source.COLLECTORS, "libvirt", _StuckCollector)
+    collector = MultiSourceCollector({"libvirt": {"timeout": 0.1}}, sources=["libvirt", "docker"])
+    started = time.perf_counter()
+    try:
+        report = collector.collect_report()
+        elapsed = time.perf_counter() - started
+    finally:
+        release.set()
+
+    assert elapsed < 1.0
+    assert report.succeeded == ["docker"]
+    assert report.failures == {"libvirt": "timed out after 0.1s"}
+
+
+def test_collect_all_command_merges_sources(stub_server, tmp_path: Path):
+    _, base = stub_server
+    config = tmp_path / "optimizer.yaml"
+    config.write_text(
+        "collectors:\n"
+        f"  proxmox:\n    url: {base}/proxmox\n"
+        f"  docker:\n    url: {base}/missing\n",
+        encoding="utf-8",
+    )
+    out = tmp_path / "inventory.json"
+    args = ["collect", "--source", "all", "--config", config, "--out", out]
+    result = CliRunner().invoke(app, args)
+    assert result.exit_code == 0
+    assert "Source docker failed" in result.stdout
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert {node["name"] for node in data["nodes"]} == {
+        "pve-1",
+        "libvirt-node",
+        "k3s-master",
+        "k3s-agent-1",
+    }
@@ -0,0 +1,141 @@
+from pathlib import Path
+
+import pytest
+import yaml
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.zabbix.poll_budget import (
+    Fleet,
+    FleetHost,
+    load_fleet,
+    parse_size,
+    plan_budget,
+)
+from homelab_cost_optimizer.zabbix.poll_load import CountDistribution, estimate_poll_load
+from homelab_cost_optimizer.zabbix.template import format_interval, load_templates
+
+from typer.testing import CliRunner
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ADVANCED = REPO_ROOT / "template_mikrotik_snmpv2c_advanced_zbx72.xml"
+EXAMPLE = REPO_ROOT / "config" / "fleet.example.yaml"
+
+
+def _template():
+    (template,) = load_templates(ADVANCED)
+    return template
+
+
+def test_unconstrained_plan_matches_poll_load():
+    template = _template()
+    host = FleetHost("r1", interfaces=24, discovered={"bgp.peers.discovery": 2})
+    plan = plan_budget(template, Fleet([host]))
+    load = estimate_poll_load(
+        template,
+        1,
+        {
+            "net.if.discovery": CountDistribution([(24, 1.0)]),
+            "bgp.peers.discovery": CountDistribution([(2, 1.0)]),
+        },
+    )
+    assert plan.feasible and not plan.template_delays and plan.hosts[0].macros == {}
+    assert plan.values_per_second == pytest.approx(load.values_per_second)
+    assert plan.storage_bytes == pytest.approx(
+        load.history_bytes_retained + load.trends_bytes_retained
+    )
+
+
+def test_budget_paces_big_hosts_and_low_priority_items_first():
+    template = _template()
+    hosts = [FleetHost(f"cpe{i}", interfaces=8) for i in range(20)]
+    hosts += [FleetHost("agg1", interfaces=2000), FleetHost("agg2", interfaces=1500)]
+    before = plan_budget(template, Fleet(hosts)).values_per_second
+    priorities = {"net.if.status[{#IFINDEX}]": 100.0, "icmpping": 100.0}
+    fleet = Fleet(hosts, priorities, nvps_budget=before / 6, proxies=3)
+    plan = plan_budget(template, fleet)
+    assert plan.feasible
+    assert max(proxy.values_per_second for proxy in plan.proxies) <= before / 6 + 1e-6
+    assert sum(proxy.hosts for proxy in plan.proxies) == len(hosts)
+    by_name = {host.name: host for host in plan.hosts}
+    # The interface macro is raised per host, on the big aggregation routers only.
+    assert set(by_name["agg1"].macros) == {"{$IF.POLL.INTERVAL}"}
+    assert by_name["cpe0"].macros == {}
+    assert "net.if.status[{#IFINDEX}]" not in plan.template_delays
+    assert "net.if.in.errors[{#IFINDEX}]" in plan.template_delays
+
+    capped = plan_budget(template, Fleet(hosts, nvps_budget=1.0), max_interval="5m")
+    assert not capped.feasible
+    assert set(capped.template_delays.values()) <= {"2m", "5m"}
+
+
+def test_fleet_description_and_errors(tmp_path):
+    fleet = load_fleet(EXAMPLE)
+    assert len(fleet.hosts) == 1 + 40 + 2000
+    assert fleet.hosts[-1].name == "cpe-2000" and fleet.hosts[1].name == "agg-01"
+    assert (fleet.proxies, fleet.nvps_budget, fleet.storage_budget) == (3, 1500.0, 2 * 1024**4)
+    assert parse_size("1.5 GB") == 1.5 * 1024**3 and parse_size("100") == 100.0
+    assert format_interval(300) == "5m" and format_interval(90) == "90s"
+    with pytest.raises(ValueError):
+        parse_size("lots")
+    with pytest.raises(ValueError):
+        plan_budget(_template(), Fleet([FleetHost("r1")], {"no.such.item": 2.0}))
+    broken = tmp_path / "fleet.yaml"
+    broken.write_text("hosts:\n  - interfaces: 8\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_fleet(broken)
+
+
+def test_cli_writes_host_overrides(tmp_path):
+    fleet = tmp_path / "fleet.yaml"
+    fleet.write_text(
+        "hosts:\n  - {name: big, interfaces: 3000}\n  - {name: small, count: 3, interfaces: 8}\n",
+        encoding="utf-8",
+    )
+    overrides, out = tmp_path / "overrides", tmp_path / "budget.md"
+    result = CliRunner().invoke(
+        app,
+        [
+            "poll-budget",
+            "--template",
+            str(ADVANCED),
+            "--fleet",
+            str(fleet),
+            "--nvps-budget",
+            "100",
+            "--proxies",
+            "2",
+            "--overrides-dir",
+            str(overrides),
+            "--out",
+            str(out),
+        ],
+    )
+    assert result.exit_code == 0, result.stdout
+    assert sorted(path.name for path in overrides.iterdir()) == [
+        "_template.yaml",
+        "big.yaml",
+        "small-1.yaml",
+        "small-2.yaml",
+        "small-3.yaml",
+    ]
+    delays = yaml.safe_load((overrides / "_template.yaml").read_text(encoding="utf-8"))
+    assert delays["template"] == "Template_Mikrotik_SNMPv2c_Advanced"
+    assert delays["delays"] and all(set(entry) == {"item", "delay"} for entry in delays["delays"])
+    big = yaml.safe_load((overrides / "big.yaml").read_text(encoding="utf-8"))
+    assert big["proxy"] in {"proxy-1", "proxy-2"}
+    assert big["macros"][0]["macro"] == "{$IF.POLL.INTERVAL}"
+    assert "- Fits the budget: yes" in out.read_text(encoding="utf-8")
+    result = CliRunner().invoke(
+        app,
+        [
+            "poll-budget",
+            "--template",
+            str(ADVANCED),
+            "--fleet",
+            str(fleet),
+            "--nvps-budget",
+            "1",
+            "--max-interval",
+            "1m",
+        ],
+    )
+    assert result.exit_code == 1
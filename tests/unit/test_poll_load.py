@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.zabbix.poll_load import CountDistribution, estimate_poll_load
+from homelab_cost_optimizer.zabbix.template import (
+    DiscoveryRule,
+    ItemSpec,
+    TemplateSpec,
+    load_templates,
+    parse_interval,
+    resolve_macros,
+)
+
+from typer.testing import CliRunner
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ADVANCED = REPO_ROOT / "template_mikrotik_snmpv2c_advanced_zbx72.xml"
+
+
+def _template() -> TemplateSpec:
+    rule = DiscoveryRule(
+        key="net.if.discovery",
+        name="Interfaces",
+        type="SNMP_AGENT",
+        delay="{$IF.DISCOVERY.INTERVAL}",
+        snmp_oid="discovery[{#IFINDEX},ifIndex,{#IFNAME},ifName,{#IFALIAS},ifAlias]",
+        item_prototypes=[
+            ItemSpec("in[{#IFINDEX}]", "In", "SNMP_AGENT", delay="{$IF.POLL.INTERVAL}"),
+            ItemSpec("out[{#IFINDEX}]", "Out", "SNMP_AGENT", delay="{$IF.POLL.INTERVAL}"),
+            ItemSpec("name[{#IFINDEX}]", "Name", "SNMP_AGENT", "1h", "CHAR", trends="0"),
+            ItemSpec("in.kbps[{#IFINDEX}]", "Kbps", "DEPENDENT", "0", master_item="in[{#IFINDEX}]"),
+        ],
+    )
+    return TemplateSpec(
+        template="T",
+        name="T",
+        items=[
+            ItemSpec("uptime", "Uptime", "SNMP_AGENT"),
+            ItemSpec("icmpping", "Ping", "SIMPLE", history="7d", trends="0"),
+        ],
+        discovery_rules=[rule],
+        macros={"{$IF.POLL.INTERVAL}": "1m", "{$IF.DISCOVERY.INTERVAL}": "1h"},
+    )
+
+
+def test_intervals_and_macros():
+    assert parse_interval("30s") == 30
+    assert parse_interval("5m;wd1-5h9-18") == 300
+    assert parse_interval("0") == 0
+    with pytest.raises(ValueError):
+        parse_interval("{$IF.POLL.INTERVAL}")
+    macros = {"{$IF.POLL.INTERVAL}": "1m"}
+    assert resolve_macros('{$IF.POLL.INTERVAL:"ether1"}', macros) == "1m"
+    with pytest.raises(ValueError):
+        resolve_macros("{$MISSING}", macros)
+
+
+def test_prototypes_expand_per_discovered_interface():
+    load = estimate_poll_load(
+        _template(), hosts=10, discovered={"net.if.discovery": CountDistribution.parse("12")}
+    )
+
+    assert load.items_per_host == 2 + 4 * 12
+    # Per host: uptime, ping, in/out and their dependent kbps every minute; names hourly.
+    assert load.values_per_second == pytest.approx(10 * ((2 + 36) / 60 + 12 / 3600))
+    assert load.snmp_oids_per_second == pytest.approx(10 * (25 / 60 + 12 / 3600))
+    # 25 one-minute OIDs fit one request, 12 hourly names another, and each of the three
+    # discovery columns needs two GETBULKs of ten rows to walk 12 rows and step past them.
+    assert load.snmp_pdus_per_second == pytest.approx(10 * (1 / 60 + 1 / 3600 + 6 / 3600))
+    ping_history = 86400 / 60 * 90 * 7
+    assert load.history_bytes_retained > ping_history * 10
+    assert load.trends_bytes_per_day == 10 * (1 + 3 * 12) * 24 * 90
+
+
+def test_distribution_is_averaged_and_macros_override_template():
+    template = _template()
+    mixed = CountDistribution.parse("8:3,48:1")
+    assert mixed.mean() == 18
+
+    averaged = estimate_poll_load(template, 4, {"net.if.discovery": mixed})
+    fixed = estimate_poll_load(template, 4, {"net.if.discovery": CountDistribution([(18, 1)])})
+    slower = estimate_poll_load(
+        template, 4, {"net.if.discovery": mixed}, macros={"{$IF.POLL.INTERVAL}": "5m"}
+    )
+
+    assert averaged.values_per_second == pytest.approx(fixed.values_per_second)
+    assert slower.values_per_second < averaged.values_per_second
+    with pytest.raises(ValueError):
+        estimate_poll_load(template, 4, {"bgp.discovery": mixed})
+    with pytest.raises(ValueError):
+        CountDistribution.parse("8:0")
+
+
+def test_poll_load_command_reads_shipped_template(tmp_path: Path):
+    spec = load_templates(ADVANCED)[0]
+    assert len(spec.items) == 16
+    assert [len(rule.item_prototypes) for rule in spec.discovery_rules] == [13, 1, 2]
+    out = tmp_path / "load.md"
+
+    args = ["poll-load", "--template", ADVANCED, "--hosts", 50, "--interfaces", "24"]
+    result = CliRunner().invoke(app, [*args, "--out", out])
+    bad = CliRunner().invoke(app, [*args, "--macro", "{$IF.POLL.INTERVAL}"])
+
+    assert result.exit_code == 0
+    assert "| Template_Mikrotik_SNMPv2c_Advanced | 50 |" in out.read_text(encoding="utf-8")
+    assert bad.exit_code != 0
@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from homelab_cost_optimizer.zabbix.jsonpath import JsonPath
+from homelab_cost_optimizer.zabbix.preprocessing import Batch, Pipeline, compile_pipelines
+from homelab_cost_optimizer.zabbix.template import PreprocessingStep, load_templates
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TEMPLATES = sorted(REPO_ROOT.glob("template_mikrotik_*.xml"))
+
+
+def _batch(values, clocks=None, series=None) -> Batch:
+    count = len(values)
+    return Batch(
+        np.asarray(series if series is not None else [0] * count),
+        np.asarray(clocks if clocks is not None else [60.0 * i for i in range(count)]),
+        np.array(values, dtype=object),
+    )
+
+
+def _run(steps: list[PreprocessingStep], values, **kwargs) -> tuple[list, Pipeline]:
+    pipeline = Pipeline.compile(steps)
+    return pipeline(_batch(values, **kwargs)).values.tolist(), pipeline
+
+
+@pytest.mark.parametrize("path", TEMPLATES, ids=lambda path: path.name)
+def test_shipped_chains_compile(path):
+    for template in load_templates(path):
+        pipelines = compile_pipelines(template)
+        assert pipelines
+        bits = pipelines.get("net.if.in[{#IFINDEX}]")
+        if bits is not None:
+            assert bits.counts_deltas
+            # ifHCInOctets near 2**64 stays exact: 1000 octets in 10 s is 800 bps.
+            result = bits(_batch([str(2**64 - 2000), str(2**64 - 1000)], clocks=[0.0, 10.0]))
+            assert result.values.tolist() == [800.0]
+
+
+def test_text_steps_follow_zabbix():
+    regex = PreprocessingStep("REGEX", "temp=(\\d+)C\n\\1")
+    assert _run([regex, PreprocessingStep("MULTIPLIER", "10")], ["temp=42C"])[0] == [420.0]
+    assert _run([PreprocessingStep("BOOL_TO_DECIMAL")], ["Up", "off", "7"])[0] == ["1", "0", "1"]
+    assert _run([PreprocessingStep("HEX_TO_DECIMAL")], ["1F", "0a ff"])[0] == ["31", "2815"]
+    assert _run([PreprocessingStep("OCTAL_TO_DECIMAL")], ["17"])[0] == ["15"]
+    assert _run([PreprocessingStep("TRIM", '"')], ['"ether1"'])[0] == ["ether1"]
+    replace = PreprocessingStep("STR_REPLACE", "\\s\n_")
+    assert _run([replace], ["sfp plus 1"])[0] == ["sfp_plus_1"]
+    check = PreprocessingStep("NOT_MATCHES_REGEX", "^error")
+    values, pipeline = _run([check], ["ok", "error: timeout"])
+    assert values == ["ok"] and pipeline.stats.errors == 1
+
+
+def test_jsonpath_matches_zabbix_results():
+    document = (
+        '{"ports": [{"name": "ether1", "rx": 10, "up": true}, '
+        '{"name": "ether2", "rx": 5, "up": false}], "host": {"name": "r1"}}'
+    )
+    assert JsonPath("$.host.name").query(document) == "r1"
+    assert JsonPath("$['ports'][-1].rx").query(document) == "5"
+    assert JsonPath("$.ports[0]").query(document) == '{"name":"ether1","rx":10,"up":true}'
+    assert JsonPath("$.ports[*].rx").query(document) == "[10,5]"
+    assert JsonPath("$..name").query(document) == '["ether1","ether2","r1"]'
+    assert JsonPath('$.ports[?(@.name == "ether2")].rx.first()').query(document) == "5"
+    assert JsonPath("$.ports[?(@.up == true)].length()").query(document) == "1"
+    assert JsonPath("$.ports[*].rx.sum()").query(document) == "15"
+    assert JsonPath('$.ports[?(@.name =~ "^ether")].rx.avg()').query(document) == "7.5"
+    with pytest.raises(ValueError):
+        JsonPath("$.ports[5]").query(document)
+    with pytest.raises(ValueError):
+        JsonPath("$.ports").query("not json")
+    with pytest.raises(ValueError):
+        JsonPath("ports")
+
+
+def test_error_handlers():
+    def regex(handler: str, params: str = ""):
+        return [
+            PreprocessingStep("REGEX", "(\\d+)\n\\1", handler, params),
+            PreprocessingStep("MULTIPLIER", "2"),
+        ]
+
+    values, pipeline = _run(regex("ORIGINAL_ERROR"), ["5", "n/a"])
+    assert values == [10.0] and pipeline.stats.errors == 1
+    values, pipeline = _run(regex("DISCARD_VALUE"), ["5", "n/a"])
+    assert values == [10.0] and (pipeline.stats.discarded, pipeline.stats.errors) == (1, 0)
+    # A set value is final: the multiplier after the failing step is skipped.
+    values, _ = _run(regex("SET_VALUE", "-1"), ["n/a", "5"])
+    assert values == ["-1", 10.0]
+    values, pipeline = _run([PreprocessingStep("IN_RANGE", "0\n100")], ["5", "120", "-1"])
+    assert values == ["5"] and pipeline.stats.errors == 2
+    with pytest.raises(ValueError):
+        Pipeline.compile([PreprocessingStep("MULTIPLIER", "eight")])
+    with pytest.raises(ValueError):
+        Pipeline.compile([PreprocessingStep("XMLPATH", "//value")])
+
+
+def test_discard_unchanged_heartbeat_across_batches():
+    pipeline = Pipeline.compile([PreprocessingStep("DISCARD_UNCHANGED_HEARTBEAT", "2m")])
+    # Two series: a flapping status and one stuck at 1.
+    first = pipeline(
+        Batch(
+            np.array([0, 0, 0, 0, 1, 1, 1]),
+            np.array([0.0, 60.0, 120.0, 180.0, 0.0, 60.0, 120.0]),
+            np.array([1, 1, 1, 2, 1, 1, 1]),
+        )
+    )
+    assert list(zip(first.series.tolist(), first.clocks.tolist(), strict=True)) == [
+        (0, 0.0),
+        (0, 120.0),
+        (0, 180.0),
+        (1, 0.0),
+        (1, 120.0),
+    ]
+    clocks = np.array([240.0, 300.0, 180.0, 240.0])
+    second = pipeline(Batch(np.array([0, 0, 1, 1]), clocks, np.array([2, 2, 1, 1])))
+    assert list(zip(second.series.tolist(), second.clocks.tolist(), strict=True)) == [
+        (0, 300.0),
+        (1, 240.0),
+    ]
+    plain, _ = _run([PreprocessingStep("DISCARD_UNCHANGED")], ["a", "a", "b", "a"])
+    assert plain == ["a", "b", "a"]
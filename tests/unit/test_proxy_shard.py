@@ -0,0 +1,104 @@
+import csv
+import random
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.zabbix.poll_budget import Fleet, FleetHost, plan_budget, write_overrides
+from homelab_cost_optimizer.zabbix.poll_load import host_values_per_second
+from homelab_cost_optimizer.zabbix.proxy_shard import (
+    apply_delays,
+    host_loads,
+    proxy_names,
+    rank_proxies,
+    read_overrides,
+    shard_hosts,
+)
+from homelab_cost_optimizer.zabbix.template import load_templates
+
+from typer.testing import CliRunner
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ADVANCED = REPO_ROOT / "template_mikrotik_snmpv2c_advanced_zbx72.xml"
+
+
+def _loads(count: int, seed: int = 3) -> dict[str, float]:
+    rng = random.Random(seed)
+    return {f"r{index}": rng.choice((1.5, 5.0, 10.0, 90.0)) for index in range(count)}
+
+
+def test_host_loads_follow_template_and_overrides():
+    (template,) = load_templates(ADVANCED)
+    hosts = [FleetHost("a", interfaces=24), FleetHost("b", interfaces=24)]
+    loads = host_loads(template, hosts, {"b": {"{$IF.POLL.INTERVAL}": "5m"}})
+    assert loads["a"] == pytest.approx(host_values_per_second(template, [24, 0, 0]))
+    # in and out of 24 interfaces move from 1m to 5m.
+    assert loads["a"] - loads["b"] == pytest.approx(48 / 60 - 48 / 300)
+    with pytest.raises(ValueError):
+        host_loads(template, [FleetHost("a"), FleetHost("a")])
+
+
+def test_poll_budget_plan_is_applied_as_written(tmp_path):
+    (template,) = load_templates(ADVANCED)
+    hosts = [FleetHost(f"cpe{i}", interfaces=8) for i in range(20)]
+    hosts += [FleetHost("agg1", interfaces=2000), FleetHost("agg2", interfaces=1500)]
+    budget = plan_budget(template, Fleet(hosts, nvps_budget=40.0, proxies=3))
+    write_overrides(budget, tmp_path)
+    planned = read_overrides(tmp_path)
+    assert budget.template_delays and planned.delays == budget.template_delays
+
+    loads = host_loads(apply_delays(template, planned.delays), hosts, planned.macros)
+    assert loads == pytest.approx({host.name: host.values_per_second for host in budget.hosts})
+    plan = shard_hosts(loads, proxy_names(3), previous=planned.proxies)
+    assert plan.assignment == {host.name: host.proxy for host in budget.hosts}
+    with pytest.raises(ValueError, match="no.such.item"):
+        apply_delays(template, {"no.such.item": "5m"})
+
+
+def test_bounded_loads_and_heavy_hosts():
+    loads = _loads(2000)
+    proxies = proxy_names(6)
+    plan = shard_hosts(loads, proxies, epsilon=0.05)
+    assert max(plan.proxy_loads().values()) <= plan.bound + 1e-6
+    assert plan.assignment == shard_hosts(dict(reversed(loads.items())), proxies).assignment
+    giant = shard_hosts({"core": 1000.0, "a": 1.0, "b": 1.0}, proxy_names("p1,p2"))
+    assert giant.assignment["a"] == giant.assignment["b"] != giant.assignment["core"]
+    assert rank_proxies("r1", proxies) == rank_proxies("r1", list(reversed(proxies)))
+    with pytest.raises(ValueError):
+        proxy_names("p1,p1")
+
+
+def test_assignment_is_stable_as_the_fleet_changes():
+    loads = _loads(4000)
+    total = sum(loads.values())
+    base = shard_hosts(loads, proxy_names(8))
+    grown = {**loads, **{f"n{index}": 5.0 for index in range(40)}}
+    after = shard_hosts(grown, proxy_names(8), previous=base.assignment)
+    assert after.moved is not None and after.moved_load / total < 0.01
+    shrunk = {host: load for host, load in loads.items() if not host.endswith("7")}
+    after = shard_hosts(shrunk, proxy_names(8), previous=base.assignment)
+    assert after.moved_load / total < 0.02
+    # A ninth proxy takes about its share and nothing more.
+    after = shard_hosts(loads, proxy_names(9), previous=base.assignment)
+    assert 1 / 9 - 0.05 < after.moved_load / total < 1 / 9 + 0.05
+    assert max(after.proxy_loads().values()) <= after.bound + 1e-6
+
+
+def test_cli_writes_map_and_histograms(tmp_path):
+    fleet = tmp_path / "fleet.yaml"
+    fleet.write_text(
+        "proxies: 2\nhosts:\n  - {name: agg, count: 4, interfaces: 500}\n"
+        "  - {name: cpe, count: 20, interfaces: 8}\n",
+        encoding="utf-8",
+    )
+    shards, out = tmp_path / "map.csv", tmp_path / "shards.md"
+    args = ["proxy-shard", "--template", str(ADVANCED), "--fleet", str(fleet)]
+    result = CliRunner().invoke(app, [*args, "--map-out", str(shards), "--out", str(out)])
+    assert result.exit_code == 0, result.stdout
+    rows = list(csv.DictReader(shards.open(encoding="utf-8")))
+    assert len(rows) == 24 and {row["proxy"] for row in rows} == {"proxy-1", "proxy-2"}
+    report = out.read_text(encoding="utf-8")
+    assert "## Load per proxy" in report and "## Hosts by NVPS" in report
+    result = CliRunner().invoke(app, [*args, "--previous", str(shards), "--out", str(out)])
+    assert result.exit_code == 0, result.stdout
+    assert "- Moved from the previous map: 0 hosts" in out.read_text(encoding="utf-8")
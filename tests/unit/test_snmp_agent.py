@@ -0,0 +1,136 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.snmp import agent, ber, poller, usm
+from homelab_cost_optimizer.snmp.mib import resolve_oid
+from homelab_cost_optimizer.zabbix.template import load_templates
+
+from typer.testing import CliRunner
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+UUID32 = REPO_ROOT / "template_mikrotik_snmpv2c_zbx72_uuid32.xml"
+IN_OCTETS = resolve_oid("IF-MIB::ifHCInOctets")
+USER = usm.UsmUser("zabbix_monitor", "SHA", "CHANGE_ME_AUTH_PASSWORD")
+
+
+def test_ber_round_trip_and_rfc3414_keys():
+    pdu = ber.Pdu(
+        ber.RESPONSE,
+        7,
+        [
+            ber.VarBind((1, 3, 6, 1, 2, 1, 1, 5, 0), ber.OCTET_STRING, b"sw1"),
+            ber.VarBind(IN_OCTETS + (1,), ber.COUNTER64, 2**64 - 1),
+            ber.VarBind((1, 3, 6, 1, 2, 1, 1, 3, 0), ber.INTEGER, -5),
+            ber.VarBind((1, 3, 6, 1), ber.END_OF_MIB_VIEW),
+        ],
+    )
+    message = ber.decode_message(ber.encode_v2c(b"public", pdu))
+    assert message.community == b"public" and message.pdu == pdu
+
+    engine_id = bytes.fromhex("000000000000000000000002")
+    md5 = usm.localize_key(usm.password_to_key("maplesyrup", "MD5"), engine_id, "MD5")
+    sha = usm.localize_key(usm.password_to_key("maplesyrup", "SHA"), engine_id, "SHA")
+    assert md5.hex() == "526f5eed9fcce26f8964c2930787d82b"
+    assert sha.hex() == "6695febc9288e36282235fc7151f128497b38f3f"
+
+
+def test_counters_wrap_and_reset_with_the_device():
+    device = agent.SimulatedDevice(
+        "sw", interfaces=4, wrap_after=60, wrap_fraction=1.0, reset_every=1000, started=0
+    )
+    up = next(row for row in range(1, 5) if device.up[row - 1])
+    oid = IN_OCTETS + (up,)
+
+    start, wrapped = (device.get(oid, now).value for now in (0, 120))
+    assert wrapped < start
+    rate = device.rates[up - 1][0]
+    assert (wrapped - start) % agent.COUNTER64 == pytest.approx(rate * 120, abs=1)
+    rebooted = device.get(oid, 1010)
+    assert rebooted.value == int(rate * 10)
+    assert device.get(resolve_oid("sysUpTime.0"), 1010).value == 1000
+
+
+def test_agent_answers_v2c_bulk_and_drops_wrong_community():
+    responder = agent.SnmpAgent(agent.SimulatedDevice("sw", interfaces=3), community=b"lab")
+    walk = ber.Pdu(ber.GET_BULK, 1, [ber.VarBind(resolve_oid("IF-MIB::ifName"))], 0, 10)
+
+    reply = ber.decode_message(responder.handle(ber.encode_v2c(b"lab", walk))).pdu
+
+    names = [vb.value for vb in reply.varbinds[:3]]
+    assert names == [b"ether1", b"sfp-sfpplus1", b"sfp-sfpplus2"]
+    assert len(reply.varbinds) == 10
+    assert responder.handle(ber.encode_v2c(b"public", walk)) is None
+    assert responder.handle(b"\x30\x03junk") is None
+
+
+def test_agent_runs_usm_discovery_and_authentication():
+    responder = agent.SnmpAgent(agent.SimulatedDevice("sw"), users=[USER])
+    get = ber.Pdu(ber.GET, 5, [ber.VarBind(resolve_oid("sysName.0"))])
+    probe = usm.encode_message(get, None, ber.UsmParameters(), 5, ber.FLAG_REPORTABLE, b"")
+
+    report = ber.decode_message(responder.handle(probe))
+    assert report.pdu.type == ber.REPORT
+    assert report.pdu.varbinds[0].oid == agent.UNKNOWN_ENGINE_IDS
+
+    engine = report.usm
+    params = ber.UsmParameters(
+        engine.engine_id, engine.engine_boots, engine.engine_time, b"zabbix_monitor"
+    )
+    keys = usm.LocalizedKeys.for_engine(USER, engine.engine_id)
+    signed = usm.encode_message(get, keys, params, 6, ber.FLAG_AUTH, engine.engine_id)
+    reply = usm.open_message(ber.decode_message(responder.handle(signed)), keys)
+    assert reply.pdu.varbinds[0].value == b"sw"
+
+    impostor = usm.LocalizedKeys.for_engine(
+        usm.UsmUser("zabbix_monitor", "SHA", "not-the-passphrase"), engine.engine_id
+    )
+    forged = usm.encode_message(get, impostor, params, 7, ber.FLAG_AUTH, engine.engine_id)
+    assert ber.decode_message(responder.handle(forged)).pdu.varbinds[0].oid == agent.WRONG_DIGESTS
+
+
+def test_poller_benchmarks_template_modes_against_live_agents():
+    template = load_templates(UUID32)[0]
+
+    async def run():
+        agents = await agent.serve_devices(
+            agent.simulate_fleet(3), base_port=0, community=None, users=[USER]
+        )
+        client = await poller.SnmpClient.open(timeout=5)
+        try:
+            targets = poller.targets_for(template, [a.address for a in agents])
+            oids = await poller.discover_items(client, targets[0], template, 10)
+            received = {
+                mode: await poller.poll(client, targets[0], oids, mode) for mode in poller.MODES
+            }
+            v3 = poller.Target(agents[0].address, user=USER)
+            uptime = await client.get(v3, [resolve_oid("sysUpTime.0")])
+            results = await poller.benchmark_template(client, template, targets, rounds=1)
+        finally:
+            client.close()
+            for responder in agents:
+                responder.close()
+        return oids, received, uptime, results
+
+    oids, received, uptime, results = asyncio.run(run())
+
+    # Four scalars plus seven prototypes for each of the 24 interfaces.
+    assert len(oids) == 4 + 7 * 24
+    assert received == {mode: len(oids) for mode in poller.MODES}
+    assert uptime[0].tag == ber.TIMETICKS
+    get, combined, bulk = results
+    assert get.stats.requests == len(oids) * 3
+    assert combined.stats.requests < bulk.stats.requests < get.stats.requests
+    assert all(result.stats.timeouts == 0 for result in results)
+    assert "| Template_Mikrotik_SNMPv2c_64bit | bulk | 3 |" in poller.render_markdown(results)
+
+
+def test_snmp_sim_command_serves_for_duration():
+    args = ["snmp-sim", "--devices", 2, "--base-port", 0, "--duration", 0.1]
+    result = CliRunner().invoke(app, args)
+    bad = CliRunner().invoke(app, ["snmp-sim", "--v3-user", "u", "--v3-auth-passphrase", "short"])
+
+    assert result.exit_code == 0
+    assert "Serving 2 devices" in result.stdout
+    assert bad.exit_code != 0
@@ -0,0 +1,144 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.collectors import snmp_collector
+from homelab_cost_optimizer.collectors.snmp_collector import (
+    CounterSamples,
+    SNMPCounterCollector,
+    compute_rates,
+)
+from homelab_cost_optimizer.consolidators.binpacking_consolidator import BinPackingConsolidator
+from homelab_cost_optimizer.consolidators.heuristic_consolidator import HeuristicConsolidator
+from homelab_cost_optimizer.estimators.power_estimator import PowerEstimator
+from homelab_cost_optimizer.models import InventorySnapshot, Node, Workload
+
+from typer.testing import CliRunner
+
+TOP = 2**64
+GBIT = 1e9
+
+
+def _samples(rows):
+    samples = CounterSamples()
+    for host, key, clock, value in rows:
+        samples.append(host, key, clock, value)
+    return samples
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_rates_handle_wraps_and_resets(monkeypatch, use_numpy: bool):
+    if not use_numpy:
+        monkeypatch.setattr(snmp_collector, "np", None)
+    rows = [
+        # Wraps: 1000 octets before the top plus 500 after it in 10s.
+        ("sw", "ifHCInOctets.1", 0, TOP - 1000),
+        ("sw", "IF-MIB::ifHCInOctets.1", 10, 500),
+        ("sw", "ifHCInOctets.1", 20, 1500),
+        # Resets: a wrap would mean ~2**64 octets in 10s on a 1G port.
+        ("sw", "ifHCOutOctets.1", 0, 10**12),
+        ("sw", "IF-MIB::ifHCOutOctets.1", 10, 2000),
+        ("sw", "ifHCOutOctets.1", 20, 4000),
+        ("sw", "ifOperStatus.1", 0, 1),
+    ]
+    rates = compute_rates(_samples(reversed(rows)), {("sw", 1): GBIT})[("sw", 1)]
+
+    assert rates.clocks == [10, 20]
+    assert rates.in_bps == [1500 * 8 / 10, 1000 * 8 / 10]
+    assert rates.out_bps == [2000 * 8 / 10, 2000 * 8 / 10]
+    assert rates.resets == 1
+    assert rates.mean_in_bps == 2500 * 8 / 20
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_template_items_are_read_as_stored_bits_per_second(monkeypatch, use_numpy: bool):
+    if not use_numpy:
+        monkeypatch.setattr(snmp_collector, "np", None)
+    rows = [
+        # What the template stores: bits/s over the interval ending at the clock.
+        ("sw", "net.if.in[1]", 0, "999999"),
+        ("sw", "net.if.in[1]", 60, "8000.0"),
+        ("sw", "net.if.in[1]", 180, "2000"),
+        ("sw", "net.if.out[1]", 60, "400"),
+        ("sw", "ifHCInOctets.2", 0, 0),
+        ("sw", "ifHCInOctets.2", 60, 6000),
+    ]
+    rates = compute_rates(_samples(reversed(rows)))
+
+    uplink = rates[("sw", 1)]
+    assert uplink.clocks == [60, 180]
+    assert uplink.in_bps == [8000.0, 2000.0]
+    assert uplink.out_bps == [0.0, 0.0]
+    assert uplink.mean_in_bps == pytest.approx((8000 * 60 + 2000 * 120) / 180)
+    assert uplink.resets == 0
+    assert rates[("sw", 2)].in_bps == [6000 * 8 / 60]
+
+    with pytest.raises(ValueError, match="both as octet counter and stored rate"):
+        _samples(rows + [("sw", "ifHCInOctets.1", 0, 0)])
+
+
+def test_collector_models_switch_power_and_interface_traffic():
+    start = 1_700_000_000
+    samples = []
+    for minute in range(6):
+        for key, value in (("ifHCInOctets.1", minute * 75 * 10**8), ("ifHCOutOctets.1", 0)):
+            samples.append({"host": "sw", "key": key, "clock": start + 60 * minute, "value": value})
+        samples.append(
+            {"host": "sw", "key": "ifHCInOctets.2", "clock": start + 60 * minute, "value": 0}
+        )
+    dataset = {
+        "devices": [
+            {
+                "name": "sw",
+                "power_profile": {"base_idle_watts": 10},
+                "watts_per_port": 1.5,
+                "interfaces": [{"ifindex": 1, "name": "sfp1", "speed_mbps": 10000}],
+            }
+        ],
+        "samples": samples,
+    }
+    snapshot = SNMPCounterCollector(dataset).collect()
+
+    assert [(n.name, n.kind) for n in snapshot.nodes] == [("sw", "network")]
+    assert snapshot.nodes[0].power_profile.base_idle_watts == 11.5
+    uplink, idle = snapshot.workloads
+    assert uplink.name == "sw:sfp1"
+    assert uplink.labels["in_bps"] == "1000000000"
+    assert uplink.utilization == pytest.approx(0.1)
+    assert len(uplink.utilization_series) == 5
+    assert idle.name == "sw:if2" and idle.utilization_series is None
+    assert PowerEstimator().estimate(snapshot)["sw"] == 11.5
+
+
+def test_consolidators_leave_network_gear_alone():
+    snmp = SNMPCounterCollector().collect()
+    servers = [Node(name=f"pve{i}", kind="proxmox", cpu_cores=16, memory_gb=64) for i in range(2)]
+    vm = Workload(
+        name="vm", workload_type="vm", cpu_cores=2, memory_gb=4, utilization=0.2, node_name="pve1"
+    )
+    snapshot = InventorySnapshot(nodes=servers + snmp.nodes, workloads=[vm, *snmp.workloads])
+
+    for consolidator in (HeuristicConsolidator(), BinPackingConsolidator()):
+        plan = consolidator.consolidate(snapshot)
+        assert plan.assignments == {"vm": "pve0"}
+        assert plan.nodes_to_power_down == ["pve1"]
+
+
+def test_collect_command_reads_csv_export(tmp_path: Path):
+    export = tmp_path / "history.csv"
+    with export.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["itemid", "host", "key", "clock", "value"])
+        for clock, value in ((0, 0), (60, 600), (120, 1200)):
+            writer.writerow([1, "edge", "ifHCInOctets.4", clock, value])
+    out = tmp_path / "inventory.json"
+
+    args = ["collect", "--source", "snmp", "--mock-data", export, "--out", out]
+    result = CliRunner().invoke(app, args)
+
+    assert result.exit_code == 0
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert [node["kind"] for node in data["nodes"]] == ["network"]
+    assert data["workloads"][0]["labels"]["in_bps"] == "80"
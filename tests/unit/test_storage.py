@@ -0,0 +1,125 @@
+import json
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.collectors.base import build_snapshot
+from homelab_cost_optimizer.collectors.docker_collector import DockerCollector
+from homelab_cost_optimizer.storage import binary_format, json_stream
+
+DATASET = {
+    "nodes": [
+        {"name": "n1", "kind": "proxmox", "cpu_cores": 16, "memory_gb": 64},
+        {"name": "n2", "kind": "proxmox", "cpu_cores": 8, "memory_gb": 32, "metadata": {"r": "b"}},
+    ],
+    "workloads": [
+        {
+            "name": f"vm{i}",
+            "workload_type": "vm",
+            "cpu_cores": 1.25 + i,
+            "memory_gb": 1024.5,
+            "utilization": 0.123456789,
+            "node_name": "n1" if i % 2 else "n2",
+            "labels": {"app": 'x [y] {z}, "q"'},
+        }
+        for i in range(25)
+    ],
+    "metadata": {"source": "test", "count": 12345678},
+    "empty": [],
+}
+
+
+def write_inventory(tmp_path: Path, indent=None) -> Path:
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps(DATASET, indent=indent), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_streaming_loader_matches_json_loads(tmp_path: Path, chunk_size: int, indent):
+    path = write_inventory(tmp_path, indent)
+    expected = build_snapshot(DATASET)
+
+    assert json_stream.load_snapshot(path, chunk_size=chunk_size) == expected
+    columnar = json_stream.load_snapshot(path, columnar=True, chunk_size=chunk_size)
+    assert columnar.to_snapshot() == expected
+
+
+def test_stream_dataset_is_lazy_and_reiterable(tmp_path: Path):
+    path = write_inventory(tmp_path)
+    dataset = json_stream.stream_dataset(path, chunk_size=16)
+
+    assert dataset["metadata"] == DATASET["metadata"]
+    assert list(dataset["nodes"]) == DATASET["nodes"]
+    assert list(dataset["nodes"]) == DATASET["nodes"]
+    assert build_snapshot(dataset) == build_snapshot(DATASET)
+
+
+def test_stream_dataset_keeps_empty_arrays(tmp_path: Path):
+    path = tmp_path / "empty.json"
+    path.write_text('{"nodes": [], "workloads": [ ]}', encoding="utf-8")
+    dataset = json_stream.stream_dataset(path)
+
+    assert set(dataset) == {"nodes", "workloads"}
+    assert list(dataset["nodes"]) == []
+    assert DockerCollector(dataset).collect() == build_snapshot({"nodes": [], "workloads": []})
+
+
+def test_streaming_loader_rejects_malformed_documents(tmp_path: Path):
+    path = tmp_path / "broken.json"
+    path.write_text('{"nodes": [{"name": "n1"}, {"name": ', encoding="utf-8")
+    with pytest.raises(ValueError):
+        json_stream.load_snapshot(path, chunk_size=8)
+
+    path.write_text('[{"name": "n1"}]', encoding="utf-8")
+    with pytest.raises(ValueError, match="Expected"):
+        json_stream.load_snapshot(path)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_binary_format_round_trips_snapshot(tmp_path: Path, monkeypatch, use_numpy: bool):
+    if not use_numpy:
+        monkeypatch.setattr(binary_format, "np", None)
+    snapshot = build_snapshot(DATASET)
+    path = tmp_path / "inventory.bin"
+    binary_format.write_snapshot(snapshot, path)
+
+    assert binary_format.is_binary_inventory(path)
+    assert not binary_format.is_binary_inventory(write_inventory(tmp_path))
+    loaded = binary_format.read_snapshot(path)
+    assert loaded.to_snapshot() == snapshot
+    assert loaded.workloads_on("n2") == snapshot.workloads_on("n2")
+
+
+def test_binary_format_rejects_unknown_schema_version(tmp_path: Path):
+    path = tmp_path / "inventory.bin"
+    binary_format.write_snapshot(build_snapshot(DATASET), path)
+    data = bytearray(path.read_bytes())
+    data[8:10] = (binary_format.SCHEMA_VERSION + 1).to_bytes(2, "little")
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="schema version"):
+        binary_format.read_snapshot(path)
+
+
+def test_json_writer_round_trips_snapshot(tmp_path: Path):
+    snapshot = build_snapshot(DATASET)
+    path = tmp_path / "inventory.json"
+    json_stream.write_snapshot(snapshot, path)
+    assert build_snapshot(json.loads(path.read_text(encoding="utf-8"))) == snapshot
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_mmap_reader_serves_snapshot_from_mapping(tmp_path: Path, monkeypatch, use_numpy: bool):
+    if not use_numpy:
+        monkeypatch.setattr(binary_format, "np", None)
+    snapshot = build_snapshot(DATASET)
+    path = tmp_path / "inventory.bin"
+    binary_format.write_snapshot(snapshot, path)
+
+    mapped = binary_format.open_snapshot(path)
+    assert isinstance(mapped.workload_names, binary_format.StringTableView)
+    assert isinstance(mapped.workload_labels, binary_format.SparseRowMap)
+    assert mapped.workload_names[-1] == "vm24"
+    assert float(mapped.workload_cpu_cores[3]) == 4.25
+    assert mapped.node_by_name("n2").metadata == {"r": "b"}
+    assert mapped.to_snapshot() == snapshot
@@ -0,0 +1,110 @@
+import csv
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer import sweep
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.columnar import ColumnarSnapshot
+from homelab_cost_optimizer.estimators.power_estimator import PowerEstimator
+from homelab_cost_optimizer.models import InventorySnapshot, Node, PowerProfile, Workload
+from homelab_cost_optimizer.storage import binary_format, json_stream
+from homelab_cost_optimizer.sweep import SweepGrid, create_consolidator, run_sweep
+
+from typer.testing import CliRunner
+
+
+def _inventory(path: Path) -> Path:
+    nodes = [
+        Node(
+            name=f"n{i}",
+            kind="hypervisor",
+            cpu_cores=8,
+            memory_gb=32,
+            power_profile=PowerProfile(base_idle_watts=40 + 10 * i),
+        )
+        for i in range(4)
+    ]
+    workloads = [
+        Workload(
+            name=f"vm{i}",
+            workload_type="vm",
+            cpu_cores=1 + i % 3,
+            memory_gb=2,
+            utilization=0.1 * i,
+            node_name=f"n{i % 4}",
+        )
+        for i in range(8)
+    ]
+    json_stream.write_snapshot(InventorySnapshot(nodes=nodes, workloads=workloads), path)
+    return path
+
+
+def test_sweep_matches_serial_consolidation(tmp_path: Path):
+    inventory = _inventory(tmp_path / "inventory.json")
+    grid = SweepGrid(
+        headrooms=[0.5, 0.8],
+        strategies=["heuristic", "best-fit-decreasing"],
+        prices_per_kwh=[0.1, 0.3],
+        hours_per_month=[730, 24],
+    )
+    rows = list(run_sweep(inventory, grid, max_workers=2))
+    assert len(rows) == len(grid) == 16
+
+    snapshot = json_stream.load_snapshot(inventory)
+    total_watts = PowerEstimator().estimate(snapshot)["total_watts"]
+    for row in rows:
+        plan = create_consolidator(row["strategy"], row["headroom"]).consolidate(snapshot)
+        assert row["idle_watt_reduction"] == plan.estimated_idle_watt_reduction
+        assert row["nodes_powered_down"] == len(plan.nodes_to_power_down)
+        kwh_saved = plan.estimated_idle_watt_reduction * row["hours_per_month"] / 1000
+        assert row["monthly_savings"] == round(kwh_saved * row["price_per_kwh"], 2)
+        kwh = total_watts * row["hours_per_month"] / 1000
+        assert row["monthly_cost"] == round(kwh * row["price_per_kwh"], 2)
+
+
+def test_sweep_worker_keeps_the_mapped_snapshot(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(sweep, "_snapshot", None)
+    monkeypatch.setattr(sweep, "_total_watts", 0.0)
+    snapshot = json_stream.load_snapshot(_inventory(tmp_path / "inventory.json"))
+    shared = tmp_path / "inventory.bin"
+    binary_format.write_snapshot(snapshot, shared)
+    sweep._init_worker(str(shared))
+    assert isinstance(sweep._snapshot, ColumnarSnapshot)
+    assert isinstance(sweep._snapshot.node_names, binary_format.StringTableView)
+    assert sweep._total_watts == PowerEstimator().estimate(snapshot)["total_watts"]
+
+
+def test_sweep_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        SweepGrid(headrooms=[0.8], strategies=["random"], prices_per_kwh=[0.2])
+
+
+def test_sweep_command_writes_table(tmp_path: Path):
+    inventory = _inventory(tmp_path / "inventory.json")
+    electricity = tmp_path / "electricity.yaml"
+    electricity.write_text("price_per_kwh: 0.25\n", encoding="utf-8")
+    out = tmp_path / "sweep.csv"
+    result = CliRunner().invoke(
+        app,
+        [
+            "sweep",
+            "--inventory",
+            inventory,
+            "--electricity",
+            electricity,
+            "--out",
+            out,
+            "--headroom",
+            "0.7,0.9",
+            "--strategy",
+            "heuristic,first-fit-decreasing,optimal",
+            "--workers",
+            "2",
+        ],
+    )
+    assert result.exit_code == 0
+    with out.open(encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert len(rows) == 6
+    assert {row["price_per_kwh"] for row in rows} == {"0.25"}
+    assert {row["optimality_gap"] for row in rows if row["strategy"] == "optimal"} == {"0.0"}
@@ -0,0 +1,164 @@
+import uuid
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.cli import app
+from homelab_cost_optimizer.zabbix.generator import (
+    TemplateModel,
+    Variant,
+    build_export,
+    generate,
+    load_model,
+    render,
+)
+from homelab_cost_optimizer.zabbix.template import load_templates
+
+from typer.testing import CliRunner
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MODEL = REPO_ROOT / "templates" / "mikrotik.yaml"
+# The basic export as it shipped before it was generated from the model.
+BASIC_BASELINE = (
+    REPO_ROOT / "tests" / "fixtures" / "zabbix" / "template_mikrotik_snmpv2c_64bit_baseline.xml"
+)
+
+
+def _export(**entities):
+    variant = Variant("t.xml", "Template_T", "T", "Test template", {"extra"})
+    return build_export(TemplateModel(uuid.UUID(int=1), [variant], **entities), variant)
+
+
+def _expressions(root) -> str:
+    return " ".join(node.text or "" for node in root.iter("expression"))
+
+
+def _canonical(xml: bytes) -> str:
+    """The export without comments, empty elements or default ``ENABLED`` statuses."""
+
+    root = ET.fromstring(xml)
+    for parent in root.iter():
+        for child in list(parent):
+            empty = len(child) == 0 and not (child.text or "").strip()
+            if empty or (child.tag, child.text) == ("status", "ENABLED"):
+                parent.remove(child)
+    return ET.canonicalize(ET.tostring(root), strip_text=True)
+
+
+def test_shipped_exports_match_the_model():
+    model = load_model(MODEL)
+
+    assert [changed for _, changed in generate(model, REPO_ROOT, write=False)] == [False] * 3
+    assert render(model, model.variants[0]) == render(load_model(MODEL), model.variants[0])
+
+
+def test_variants_share_entities_with_unique_uuids():
+    model = load_model(MODEL)
+    exports = [build_export(model, variant) for variant in model.variants]
+    uuids = [
+        (node.tag, node.findtext("uuid"))
+        for root in exports
+        for node in root.iter()
+        if node.find("uuid") is not None
+    ]
+    v2c, v3, basic = (load_templates(REPO_ROOT / v.file)[0] for v in model.variants)
+
+    assert len(uuids) == len(set(uuids))
+    # Pinned UUIDs of the original exports; the v3 copies get derived ones.
+    assert exports[0].find(".//item/uuid").text == "1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d"
+    assert exports[1].find(".//item/uuid").text != "1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d"
+    assert [item.key for item in v3.items] == [item.key for item in v2c.items]
+    assert "{$SNMPV3_USER}" in v3.macros and "{$SNMP_COMMUNITY}" not in v3.macros
+    assert len(basic.items) == 4 and [rule.key for rule in basic.discovery_rules] == [
+        "net.if.discovery"
+    ]
+    assert "Template_Mikrotik_SNMPv3_Advanced:" in _expressions(exports[1])
+
+
+def test_basic_export_matches_its_baseline():
+    model = load_model(MODEL)
+    variant = model.variant("Template_Mikrotik_SNMPv2c_64bit")
+    (baseline,) = load_templates(BASIC_BASELINE)
+    (basic,) = load_templates(REPO_ROOT / variant.file)
+
+    def keys_and_delays(template):
+        rules = template.discovery_rules
+        return [(item.key, item.delay) for item in template.items] + [
+            (entry.key, entry.delay) for rule in rules for entry in (rule, *rule.item_prototypes)
+        ]
+
+    def expressions(template):
+        return [
+            (trigger.expression, trigger.recovery_mode, trigger.recovery_expression)
+            for rule in template.discovery_rules
+            for trigger in rule.trigger_prototypes
+        ]
+
+    assert keys_and_delays(basic) == keys_and_delays(baseline)
+    assert expressions(basic) == expressions(baseline)
+    assert basic.macros == baseline.macros
+    # Filters, tags, descriptions and value maps too; only comments and layout differ.
+    assert _canonical(render(model, variant)) == _canonical(BASIC_BASELINE.read_bytes())
+
+
+def test_variant_overrides_replace_and_drop_fields():
+    item = {"name": "Up", "key": "up", "delay": "1m", "units": "s"}
+    override = {"Template_T": {"delay": "30s", "units": None}, "Template_U": {"key": "down"}}
+    root = _export(items=[{**item, "override": override}])
+
+    assert root.find(".//item/key").text == "up"
+    assert root.find(".//item/delay").text == "30s"
+    assert root.find(".//item/units") is None and root.find(".//item/override") is None
+    with pytest.raises(ValueError, match="override must map template names"):
+        _export(items=[{**item, "override": {"Template_T": "30s"}}])
+
+
+def test_model_references_are_checked():
+    trigger = {"name": "Down", "expression": "last(/{TEMPLATE}/up)=0"}
+    dependent = {
+        "name": "Slow",
+        "expression": "last(/{TEMPLATE}/rtt)>{$RTT.MAX}",
+        "dependencies": [{"name": "Down"}],
+    }
+
+    with pytest.raises(ValueError, match=r"undefined macros: \{\$RTT.MAX\}"):
+        _export(triggers=[dependent])
+    with pytest.raises(ValueError, match="missing trigger 'Down'"):
+        _export(triggers=[dependent], macros=[{"macro": "{$RTT.MAX}", "value": 1}])
+
+    root = _export(
+        triggers=[{"feature": "extra", **trigger}, {"feature": "other", **dependent}],
+        value_maps=[{"name": "unused", "mappings": {1: "up"}}],
+    )
+    assert [node.text for node in root.iter("name")][-1] == "Down"
+    assert root.find("value_maps") is None
+    assert _expressions(root) == "last(/Template_T/up)=0"
+
+
+def test_pinned_uuids_and_comments():
+    item = {"name": "Up", "key": "up", "comment": "Availability"}
+    root = _export(items=[{"uuid": {"Template_T": "0" * 32, "Template_U": "1" * 32}, **item}])
+    items = root.find("templates/template/items")
+
+    assert items[0].tag is ET.Comment and items[0].text == " Availability "
+    assert items[1].findtext("uuid") == "0" * 32 and items[1].find("comment") is None
+    assert _export(items=[item]).find(".//item/uuid").text != "0" * 32
+    with pytest.raises(ValueError, match="Duplicate item 'b'"):
+        _export(items=[{"uuid": {"Template_T": "0" * 32}, **item, "key": key} for key in "ab"])
+    with pytest.raises(ValueError):
+        _export(items=[{"uuid": {"Template_T": "not-a-uuid"}, **item}])
+
+
+def test_generate_templates_command_checks_and_writes(tmp_path):
+    args = ["generate-templates", "--model", str(MODEL), "--out-dir", str(tmp_path)]
+
+    stale = CliRunner().invoke(app, args + ["--check"])
+    written = CliRunner().invoke(app, args + ["--variant", "Template_Mikrotik_SNMPv2c_64bit"])
+    again = CliRunner().invoke(app, args + ["--variant", "Template_Mikrotik_SNMPv2c_64bit"])
+
+    assert stale.exit_code == 1 and "out of date" in stale.stdout
+    assert written.exit_code == 0 and "written" in written.stdout
+    assert "unchanged" in again.stdout
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "template_mikrotik_snmpv2c_zbx72_uuid32.xml"
+    ]
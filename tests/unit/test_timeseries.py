@@ -0,0 +1,140 @@
+import json
+from pathlib import Path
+
+import pytest
+from homelab_cost_optimizer.collectors.base import build_snapshot
+from homelab_cost_optimizer.columnar import ColumnarSnapshot
+from homelab_cost_optimizer.consolidators.binpacking_consolidator import BinPackingConsolidator
+from homelab_cost_optimizer.consolidators.heuristic_consolidator import HeuristicConsolidator
+from homelab_cost_optimizer.estimators import batch_estimator
+from homelab_cost_optimizer.estimators.batch_estimator import BatchEstimator
+from homelab_cost_optimizer.estimators.power_estimator import PowerEstimator
+from homelab_cost_optimizer.models import InventorySnapshot, Node, PowerProfile, Workload
+from homelab_cost_optimizer.storage import binary_format, json_stream
+from homelab_cost_optimizer.timeseries import UtilizationSeries
+
+DAY = 24 * 12
+
+
+def _workload(name, series=None, cpu=2.0, utilization=0.3, node="n1"):
+    return Workload(
+        name=name,
+        workload_type="vm",
+        cpu_cores=cpu,
+        memory_gb=4,
+        utilization=utilization,
+        node_name=node,
+        utilization_series=series,
+    )
+
+
+def _node(name, cores=16):
+    return Node(
+        name=name,
+        kind="proxmox",
+        cpu_cores=cores,
+        memory_gb=64,
+        power_profile=PowerProfile(base_idle_watts=60, watts_per_cpu_core=10, watts_per_gb_ram=0),
+    )
+
+
+def test_ring_buffer_keeps_latest_samples_and_statistics():
+    series = UtilizationSeries(capacity=4)
+    series.extend([1.0, 0.0, 0.2, 0.4, 0.6, 0.8])
+
+    assert len(series) == 4
+    assert [round(value, 2) for value in series] == [0.2, 0.4, 0.6, 0.8]
+    assert series.mean() == pytest.approx(0.5, abs=1 / 255)
+    assert series.percentile(50) == pytest.approx(0.4, abs=1 / 255)
+    assert series.percentile(100) == pytest.approx(0.8, abs=1 / 255)
+    assert len(series.to_bytes()) == 4
+
+
+def test_power_follows_mean_of_series_not_last_sample():
+    steady = UtilizationSeries(samples=[0.3] * DAY)
+    bursty = UtilizationSeries(samples=[0.0] * (DAY - 12) + [1.0] * 12)
+    # Both workloads report 30% as their last scalar reading.
+    snapshot = InventorySnapshot(
+        nodes=[_node("n1"), _node("n2")],
+        workloads=[_workload("steady", steady), _workload("bursty", bursty, node="n2")],
+    )
+
+    power = PowerEstimator().estimate(snapshot)
+
+    assert power["n1"] == pytest.approx(60 + 2 * 10 * 0.3, abs=0.1)
+    assert power["n2"] == pytest.approx(60 + 2 * 10 / 24, abs=0.1)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_estimator_uses_series_means(monkeypatch, use_numpy: bool):
+    if not use_numpy:
+        monkeypatch.setattr(batch_estimator, "np", None)
+    workloads = [
+        _workload(f"w{i}", UtilizationSeries(samples=[i / 10] * 5) if i % 2 else None)
+        for i in range(10)
+    ]
+    snapshot = InventorySnapshot(nodes=[_node("n1")], workloads=workloads)
+
+    columnar = ColumnarSnapshot.from_snapshot(snapshot)
+    power, _ = BatchEstimator(price_per_kwh=0.3).estimate(columnar)
+
+    assert power == PowerEstimator().estimate(snapshot)
+
+
+def test_series_round_trip_through_json_and_binary(tmp_path: Path):
+    dataset = {
+        "nodes": [{"name": "n1", "kind": "proxmox", "cpu_cores": 16, "memory_gb": 64}],
+        "workloads": [
+            {"name": "plain", "cpu_cores": 1, "memory_gb": 1, "node_name": "n1"},
+            {
+                "name": "tracked",
+                "cpu_cores": 2,
+                "memory_gb": 2,
+                "node_name": "n1",
+                "utilization_series": [0.1, 0.5, 0.9],
+            },
+        ],
+    }
+    expected = build_snapshot(dataset)
+    assert expected.workloads[1].utilization_series == UtilizationSeries(samples=[0.1, 0.5, 0.9])
+
+    json_path = tmp_path / "inventory.json"
+    json_stream.write_snapshot(expected, json_path)
+    assert "utilization_series" not in json.loads(json_path.read_text())["workloads"][0]
+    assert json_stream.load_snapshot(json_path) == expected
+
+    binary_path = tmp_path / "inventory.bin"
+    binary_format.write_snapshot(json_stream.load_snapshot(json_path, columnar=True), binary_path)
+    assert binary_format.open_snapshot(binary_path).to_snapshot() == expected
+
+    # Version 1 files predate series; a version 1 header with a series section is invalid.
+    data = bytearray(binary_path.read_bytes())
+    data[8:10] = (1).to_bytes(2, "little")
+    binary_path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="unknown sections: wl.series"):
+        binary_format.read_snapshot(binary_path)
+    plain = build_snapshot({**dataset, "workloads": dataset["workloads"][:1]})
+    binary_format.write_snapshot(plain, binary_path)
+    data = bytearray(binary_path.read_bytes())
+    data[8:10] = (1).to_bytes(2, "little")
+    binary_path.write_bytes(bytes(data))
+    assert binary_format.read_snapshot(binary_path).to_snapshot() == plain
+
+
+def test_p95_sizing_consolidates_further_than_allocation():
+    # Four 8-core workloads that peak at a quarter of their allocation; by allocation
+    # only one fits a 16-core node at 80% headroom.
+    quiet = UtilizationSeries(samples=[0.1] * 90 + [0.25] * 10)
+    snapshot = InventorySnapshot(
+        nodes=[_node(f"n{i}") for i in range(4)],
+        workloads=[_workload(f"w{i}", quiet, cpu=8, node=f"n{i}") for i in range(4)],
+    )
+
+    allocated = BinPackingConsolidator().consolidate(snapshot)
+    p95 = BinPackingConsolidator(sizing="p95").consolidate(snapshot)
+
+    assert allocated.nodes_to_power_down == []
+    assert len(p95.nodes_to_power_down) == 3
+    assert len(HeuristicConsolidator(sizing="p95").consolidate(snapshot).nodes_to_power_down) == 3
+    with pytest.raises(ValueError):
+        HeuristicConsolidator(sizing="peak")
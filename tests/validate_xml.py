@@ -13,13 +13,21 @@ This script validates Zabbix template XML files for:
 Usage:
     python3 validate_xml.py ../template_mikrotik_snmpv2c_advanced_zbx72.xml
     python3 validate_xml.py --all  # Validate all XML files in parent directory
+    python3 validate_xml.py --jobs 8 templates/  # Validate a directory in parallel
+    python3 validate_xml.py --all --no-cache  # Re-validate templates whose results are cached
 """
 
+import argparse
+import hashlib
+import json
 import os
 import re
 import sys
+import tempfile
+import time
 import xml.etree.ElementTree as ET
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 # ANSI color codes
 GREEN = "\033[92m"
@@ -28,6 +36,11 @@ YELLOW = "\033[93m"
 BLUE = "\033[94m"
 RESET = "\033[0m"
 
+# Bump whenever a check is added or changed, so cached results of older rules are ignored.
+RULESET_VERSION = "1"
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_DIR, ".validate_cache")
+
 
 class TemplateValidator:
     def __init__(self, xml_path: str):
@@ -39,10 +52,18 @@ class TemplateValidator:
         self.info: list[str] = []
 
     def validate(self) -> bool:
-        """Run all validations and return success status"""
+        """Run all validations, print the results and return success status"""
         print(f"\n{BLUE}Validating: {os.path.basename(self.xml_path)}{RESET}")
         print("=" * 70)
 
+        passed = self.check()
+        if self.root is not None:
+            # Print results
+            self._print_results()
+        return passed
+
+    def check(self) -> bool:
+        """Run all validations without printing and return success status"""
         # Step 1: Parse XML
         if not self._parse_xml():
             return False
@@ -66,9 +87,6 @@ class TemplateValidator:
         # Step 7: Validate value maps
         self._validate_value_maps()
 
-        # Print results
-        self._print_results()
-
         return len(self.errors) == 0
 
     def _parse_xml(self) -> bool:
@@ -343,23 +361,420 @@ class TemplateValidator:
             return True
 
 
+class _Frame:
+    """Open element state kept by the streaming validator"""
+
+    __slots__ = ("tag", "texts", "uuids", "preprocessing", "mappings", "group_name")
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        self.texts: dict = {}  # first direct child text per tag, like Element.find()
+        self.uuids: list[str] = []
+        self.preprocessing = False
+        self.mappings = 0
+        self.group_name = None
+
+
+class StreamingTemplateValidator(TemplateValidator):
+    """Single-pass validator built on iterparse
+
+    Checks the same rules as TemplateValidator in one traversal. Elements are
+    removed from the tree as soon as they end, so memory is bounded by nesting
+    depth and the UUID table rather than by file size.
+    """
+
+    SECTIONS = ("parse", "version", "metadata", "uuids", "items", "macros", "triggers", "values")
+
+    def check(self) -> bool:
+        """Run all validations in one pass and return success status"""
+        self.sections = {name: ([], [], []) for name in self.SECTIONS}
+        self.uuid_paths: dict[str, list[str]] = {}
+        self.counts = defaultdict(int)
+        self.macro_names: list[str] = []
+        self.template_frame = None
+        self.frames: list[_Frame] = []
+        try:
+            self._stream()
+        except ET.ParseError as e:
+            self.errors, self.warnings, self.info = [f"XML parse error: {e}"], [], []
+            self.root = None
+            return False
+        except FileNotFoundError:
+            self.errors, self.warnings, self.info = [f"File not found: {self.xml_path}"], [], []
+            return False
+
+        self._use("parse")
+        self.info.append("✓ XML is well-formed")
+        self._finish()
+        self.errors, self.warnings, self.info = [], [], []
+        for errors, warnings, info in self.sections.values():
+            self.errors.extend(errors)
+            self.warnings.extend(warnings)
+            self.info.extend(info)
+        return len(self.errors) == 0
+
+    def _use(self, section: str):
+        """Direct messages to one section so the output order matches TemplateValidator"""
+        self.errors, self.warnings, self.info = self.sections[section]
+
+    def _stream(self):
+        frames = self.frames
+        stack = []
+        for event, elem in ET.iterparse(self.xml_path, events=("start", "end")):
+            if event == "start":
+                if not stack:
+                    self.root = elem
+                    self._use("version")
+                    self._check_version(elem.get("version"))
+                frame = _Frame(elem.tag)
+                if elem.tag == "template" and self.template_frame is None:
+                    self.template_frame = frame
+                stack.append(elem)
+                frames.append(frame)
+                continue
+
+            frame = frames.pop()
+            stack.pop()
+            parent = frames[-1] if frames else None
+            if parent is not None and elem.tag not in parent.texts:
+                parent.texts[elem.tag] = elem.text
+            self._end(elem, frame, parent)
+            if stack:
+                # Drop the finished subtree; its parent holds no other children by now.
+                stack[-1].remove(elem)
+
+    def _end(self, elem, frame: _Frame, parent):
+        tag = elem.tag
+        if tag == "uuid" and elem.text:
+            uuid = elem.text.strip()
+            self._use("uuids")
+            if not re.match(r"^[a-f0-9]{32}$", uuid):
+                self.errors.append(f"Invalid UUID format: {uuid}")
+            self.uuid_paths.setdefault(uuid, [])
+            if parent is not None:
+                parent.uuids.append(uuid)
+            else:
+                self.uuid_paths[uuid].append(tag)
+        if frame.uuids:
+            path = frame.texts.get("name") or frame.tag
+            for uuid in frame.uuids:
+                self.uuid_paths[uuid].append(path)
+
+        if tag == "preprocessing":
+            for open_frame in self.frames:
+                if open_frame.tag in ("item", "item_prototype"):
+                    open_frame.preprocessing = True
+        elif tag == "mapping":
+            for open_frame in self.frames:
+                if open_frame.tag == "value_map":
+                    open_frame.mappings += 1
+        elif tag == "name" and parent is not None and parent.tag == "group":
+            owner = self.template_frame
+            if owner is not None and owner.group_name is None and owner in self.frames:
+                owner.group_name = elem.text
+        elif tag in ("item", "item_prototype"):
+            self.counts["items"] += 1
+            self._use("items")
+            self._check_item(frame)
+        elif tag in ("trigger", "trigger_prototype"):
+            self.counts["triggers"] += 1
+            self._use("triggers")
+            self._check_trigger(frame)
+        elif tag == "value_map":
+            self.counts["value_maps"] += 1
+            self._use("values")
+            self._check_value_map(frame)
+        elif (
+            tag == "macro"
+            and len(self.frames) >= 2
+            and self.frames[-1].tag == "macros"
+            and self.frames[-2].tag == "template"
+        ):
+            self.counts["macros"] += 1
+            self._use("macros")
+            self._check_macro(frame)
+
+        if frame is self.template_frame:
+            self._use("metadata")
+            self._check_template(frame)
+
+    def _check_version(self, version):
+        if not version:
+            self.errors.append("Missing zabbix_export version attribute")
+        elif version != "7.0":
+            self.warnings.append(f"Export version is {version}, expected 7.0")
+        else:
+            self.info.append(f"✓ Export version: {version}")
+
+    def _check_template(self, frame: _Frame):
+        for field in ("uuid", "template", "name"):
+            text = frame.texts.get(field)
+            if not text:
+                self.errors.append(f"Template missing required field: {field}")
+            else:
+                self.info.append(f"✓ Template {field}: {text}")
+        if frame.group_name is not None:
+            self.info.append(f"✓ Template group: {frame.group_name}")
+            if "Templates/Network" not in frame.group_name:
+                self.warnings.append(
+                    "Template group should be 'Templates/Network devices' for Zabbix 7.0"
+                )
+
+    def _check_item(self, frame: _Frame):
+        texts = frame.texts
+        name = texts.get("name") or "unknown"
+        if not texts.get("name"):
+            self.errors.append("Item missing name")
+        key_text = texts.get("key")
+        if not key_text:
+            label = texts["name"] if "name" in texts else "unknown"
+            self.errors.append(f"Item '{label}' missing key")
+            return
+        if texts.get("type") == "SNMP_AGENT":
+            oid = texts.get("snmp_oid")
+            if not oid:
+                self.errors.append(f"SNMP item '{name}' missing snmp_oid")
+            else:
+                self._validate_oid(oid, texts.get("name"))
+        if not self._validate_item_key(key_text):
+            self.errors.append(f"Invalid item key syntax: {key_text}")
+        if "bandwidth" in key_text or "error" in key_text or "discard" in key_text:
+            if not frame.preprocessing:
+                self.warnings.append(f"Item '{name}' may need CHANGE_PER_SECOND preprocessing")
+
+    def _check_trigger(self, frame: _Frame):
+        texts = frame.texts
+        name = texts.get("name") or "unknown"
+        if not texts.get("name"):
+            self.errors.append("Trigger missing name")
+        if not texts.get("expression"):
+            self.errors.append(f"Trigger '{name}' missing expression")
+        if not texts.get("priority"):
+            self.warnings.append(f"Trigger '{name}' missing priority")
+
+    def _check_value_map(self, frame: _Frame):
+        name = frame.texts.get("name")
+        if not name:
+            self.errors.append("Value map missing name")
+        elif not frame.mappings:
+            self.warnings.append(f"Value map '{name}' has no mappings")
+
+    def _check_macro(self, frame: _Frame):
+        name = frame.texts.get("macro")
+        value = frame.texts.get("value")
+        if not name:
+            self.errors.append("Macro missing name")
+            return
+        self.macro_names.append(name)
+        if not (name.startswith("{$") and name.endswith("}")):
+            self.errors.append(f"Invalid macro syntax: {name}")
+        if value and "public" in value.lower() and "COMMUNITY" in name:
+            self.errors.append(f"Security risk: Macro {name} uses default 'public' value")
+
+    def _finish(self):
+        """Emit the document-wide results once the traversal is complete"""
+        if self.template_frame is None:
+            self._use("metadata")
+            self.errors.append("No template element found")
+
+        self._use("uuids")
+        duplicates = {uuid: paths for uuid, paths in self.uuid_paths.items() if len(paths) > 1}
+        for uuid, paths in duplicates.items():
+            self.errors.append(f"Duplicate UUID {uuid} found in: {', '.join(paths)}")
+        if not duplicates:
+            self.info.append(f"✓ All {len(self.uuid_paths)} UUIDs are unique")
+
+        self._use("items")
+        if self.counts["items"]:
+            self.info.append(f"✓ Found {self.counts['items']} items/item prototypes")
+        else:
+            self.warnings.append("No items found in template")
+
+        self._use("macros")
+        if self.counts["macros"]:
+            self.info.append(f"✓ Found {self.counts['macros']} macros")
+            names = set(self.macro_names)
+            has_v2_macros = "{$SNMP_COMMUNITY}" in names
+            has_v3_macros = {
+                "{$SNMPV3_USER}",
+                "{$SNMPV3_AUTH_PASSPHRASE}",
+                "{$SNMPV3_PRIV_PASSPHRASE}",
+            } <= names
+            if not (has_v2_macros or has_v3_macros):
+                self.warnings.append("Template missing expected SNMP authentication macros")
+        else:
+            self.warnings.append("No macros found in template")
+
+        self._use("triggers")
+        if self.counts["triggers"]:
+            self.info.append(f"✓ Found {self.counts['triggers']} triggers/trigger prototypes")
+        else:
+            self.warnings.append("No triggers found in template")
+
+        self._use("values")
+        if self.counts["value_maps"]:
+            self.info.append(f"✓ Found {self.counts['value_maps']} value maps")
+
+
+VALIDATORS = {"stream": StreamingTemplateValidator, "tree": TemplateValidator}
+
+
+def check_file(xml_path: str, engine: str = "stream"):
+    """Validate one file; returns (passed, errors, warnings, info) for the report"""
+    validator = VALIDATORS[engine](xml_path)
+    passed = validator.check()
+    return passed, validator.errors, validator.warnings, validator.info
+
+
+def _timed_check(xml_path: str, engine: str):
+    start = time.perf_counter()
+    report = check_file(xml_path, engine)
+    return report, time.perf_counter() - start
+
+
+class ResultCache:
+    """Results on disk, keyed by file content, rule-set version and kind of check
+
+    Identical bytes always produce the same report, so an unchanged template is never
+    parsed twice. ``$VALIDATE_XML_CACHE`` overrides the directory.
+    """
+
+    def __init__(self, directory: str = None, enabled: bool = True):
+        self.directory = directory or os.environ.get("VALIDATE_XML_CACHE") or CACHE_DIR
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0.0
+        self.hashing = 0.0
+
+    def key(self, path: str, kind: str):
+        """Cache key for the file's content, or None when it cannot be read"""
+        start = time.perf_counter()
+        digest = hashlib.sha256(f"{RULESET_VERSION}\0{kind}\0".encode())
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        finally:
+            self.hashing += time.perf_counter() - start
+        return digest.hexdigest()
+
+    def load(self, key: str):
+        """Cached result for ``key``, or None; counts the hit or miss"""
+        try:
+            with open(os.path.join(self.directory, f"{key}.json"), encoding="utf-8") as f:
+                entry = json.load(f)
+            result, seconds = entry["result"], entry["seconds"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved += seconds
+        return result
+
+    def store(self, key: str, result, seconds: float):
+        """Write atomically so concurrent runs never read a partial entry"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"result": result, "seconds": seconds}, f)
+        os.replace(tmp, os.path.join(self.directory, f"{key}.json"))
+
+    def cached(self, path: str, kind: str, compute):
+        """``compute(path)`` unless a result for these bytes is already cached"""
+        if not self.enabled:
+            return compute(path)
+        key = self.key(path, kind)
+        if key is None:
+            return compute(path)
+        result = self.load(key)
+        if result is None:
+            start = time.perf_counter()
+            result = compute(path)
+            self.store(key, result, time.perf_counter() - start)
+        return result
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "Cache: disabled"
+        saved = max(self.saved - self.hashing, 0.0)
+        return f"Cache: {self.hits} hits, {self.misses} misses, saved {saved:.3f}s"
+
+
+def check_files(
+    paths: list[str], jobs: int = 1, engine: str = "stream", cache: ResultCache = None
+) -> list:
+    """Validate many files, spread across ``jobs`` processes, in input order
+
+    With a ``cache``, only files whose content has no cached result are validated.
+    Unreadable files are never cached; the validator reports them as failed.
+    """
+    results = [None] * len(paths)
+    keys = [None] * len(paths)
+    if cache is not None and cache.enabled:
+        keys = [cache.key(path, f"validate:{engine}") for path in paths]
+        results = [None if key is None else cache.load(key) for key in keys]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if jobs <= 1 or len(pending) <= 1:
+        checked = [_timed_check(paths[i], engine) for i in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+            todo = [paths[i] for i in pending]
+            checked = list(pool.map(_timed_check, todo, [engine] * len(todo)))
+    for i, (report, seconds) in zip(pending, checked, strict=True):
+        results[i] = report
+        if keys[i] is not None:
+            cache.store(keys[i], report, seconds)
+    return [tuple(result) for result in results]
+
+
+def collect_paths(arguments: list[str]) -> list[str]:
+    """Expand directories to the XML files below them"""
+    paths = []
+    for argument in arguments:
+        if os.path.isdir(argument):
+            for folder, _, files in sorted(os.walk(argument)):
+                paths.extend(os.path.join(folder, f) for f in sorted(files) if f.endswith(".xml"))
+        else:
+            paths.append(argument)
+    return paths
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 validate_xml.py <template.xml>")
-        print("       python3 validate_xml.py --all")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Validate Zabbix template XML files")
+    parser.add_argument("paths", nargs="*", help="Template files or directories of templates")
+    parser.add_argument(
+        "--all", action="store_true", help="Validate all XML files in parent directory"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Files validated in parallel"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=sorted(VALIDATORS),
+        default="stream",
+        help="stream: single-pass iterparse (default); tree: full ElementTree",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Validate every file even if its result is cached"
+    )
+    args = parser.parse_args()
 
     files_to_validate = []
 
-    if sys.argv[1] == "--all":
+    if args.all:
         # Find all XML files in parent directory
         parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        for file in os.listdir(parent_dir):
+        for file in sorted(os.listdir(parent_dir)):
             if file.endswith(".xml"):
                 files_to_validate.append(os.path.join(parent_dir, file))
-    else:
-        files_to_validate = sys.argv[1:]
+    files_to_validate += collect_paths(args.paths)
 
+    if not args.all and not args.paths:
+        parser.print_usage()
+        sys.exit(1)
     if not files_to_validate:
         print("No XML files found to validate")
         sys.exit(1)
@@ -371,9 +786,15 @@ def main():
     all_passed = True
     results = {}
 
-    for xml_file in files_to_validate:
-        validator = TemplateValidator(xml_file)
-        passed = validator.validate()
+    cache = ResultCache(enabled=not args.no_cache)
+    checked = check_files(files_to_validate, args.jobs, args.engine, cache)
+    for xml_file, (passed, errors, warnings, info) in zip(files_to_validate, checked, strict=True):
+        print(f"\n{BLUE}Validating: {os.path.basename(xml_file)}{RESET}")
+        print("=" * 70)
+        if info or errors:
+            report = TemplateValidator(xml_file)
+            report.errors, report.warnings, report.info = errors, warnings, info
+            report._print_results()
         results[xml_file] = passed
         all_passed = all_passed and passed
 
@@ -386,6 +807,8 @@ def main():
         status = f"{GREEN}✓ PASS{RESET}" if passed else f"{RED}✗ FAIL{RESET}"
         print(f"  {status}  {os.path.basename(xml_file)}")
 
+    print()
+    print(cache.summary())
     print()
     if all_passed:
         print(f"{GREEN}All validations passed!{RESET}")